@@ -7,19 +7,26 @@ the embedding and generation providers so they are created once and
 reused across requests.
 """
 
+import logging
 import os
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from typing import Annotated
 
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from core.generation.base import GenerationProvider
-from db.session import SessionLocal
-from infrastructure.cache import ResponseCache
+from db.session import AsyncSessionLocal, SessionLocal
+from db.vector_index import DEFAULT_INDEX_PATH, MmapVectorIndex
+from infrastructure.cache import ResponseCache, RetrievalCache
 from infrastructure.circuit_breaker import CircuitBreaker
 from infrastructure.rate_limiter import RateLimiter
 from ingestion.embeddings import OpenAIEmbeddingProvider
 from ingestion.generation import create_generation_provider
-from ingestion.memory_store import MemoryStore
+from ingestion.memory_store import AsyncMemoryStore, MemoryStore
+
+logger = logging.getLogger(__name__)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -31,6 +38,42 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield an ``AsyncSession`` for the async ``/ask`` pipeline."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+_vector_index: MmapVectorIndex | None = None
+_vector_index_checked = False
+
+
+def get_vector_index() -> MmapVectorIndex | None:
+    """Return the in-process mmap vector index singleton, or None if not built.
+
+    Loaded once from ``VECTOR_INDEX_PATH`` on first call.  A missing or
+    unreadable index is remembered so requests don't retry the disk on
+    every call — rebuild with ``python -m db.vector_index build`` and
+    restart the API to pick it up.
+    """
+    global _vector_index, _vector_index_checked  # noqa: PLW0603
+    if not _vector_index_checked:
+        _vector_index_checked = True
+        try:
+            _vector_index = MmapVectorIndex.load(DEFAULT_INDEX_PATH)
+        except FileNotFoundError:
+            _vector_index = None
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Vector index at %s unusable (%s) — disabled", DEFAULT_INDEX_PATH, exc)
+            _vector_index = None
+    return _vector_index
+
+
+def prefer_local_index() -> bool:
+    """True when ``SEARCH_BACKEND=mmap`` routes queries to the local index first."""
+    return os.getenv("SEARCH_BACKEND", "pgvector").lower() == "mmap"
+
+
 _embedding_provider: OpenAIEmbeddingProvider | None = None
 
 
@@ -68,16 +111,32 @@ _response_cache: ResponseCache | None = None
 
 
 def get_response_cache() -> ResponseCache:
-    """Return a cached ResponseCache singleton (Redis-backed).
+    """Return a cached ResponseCache singleton (in-process L1 + Redis).
 
-    Falls back gracefully to a no-op cache if Redis is unavailable.
+    Falls back gracefully to a no-op cache if Redis is unavailable.  Source
+    invalidations broadcast by other workers also reach this worker's
+    retrieval cache.
     """
     global _response_cache  # noqa: PLW0603
     if _response_cache is None:
         _response_cache = ResponseCache()
+        _response_cache.add_invalidation_listener(
+            lambda source_name: get_retrieval_cache().invalidate_source(source_name)
+        )
     return _response_cache
 
 
+_retrieval_cache: RetrievalCache | None = None
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """Return a cached RetrievalCache singleton (in-process, per worker)."""
+    global _retrieval_cache  # noqa: PLW0603
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache()
+    return _retrieval_cache
+
+
 _rate_limiter: RateLimiter | None = None
 
 
@@ -149,6 +208,17 @@ def get_memory_store() -> MemoryStore:
     return _memory_store
 
 
+def get_async_memory_store(
+    store: Annotated[MemoryStore, Depends(get_memory_store)],
+) -> AsyncMemoryStore:
+    """Return an awaitable facade over the :func:`get_memory_store` store.
+
+    Depends on ``get_memory_store`` so overriding that dependency (tests,
+    alternate stores) covers the async pipeline too.
+    """
+    return AsyncMemoryStore(store)
+
+
 # ---------------------------------------------------------------------------
 # Task router — multi-model musical task routing (opt-in via USE_ROUTING=true)
 # ---------------------------------------------------------------------------
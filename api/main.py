@@ -1,10 +1,13 @@
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 
-from api.deps import get_response_cache
+from api.deps import get_response_cache, get_retrieval_cache
 from api.routes.analyze import router as analyze_router
 from api.routes.ask import router as ask_router
+from api.routes.ask_async import router as ask_async_router
 from api.routes.generate import router as generate_router
 from api.routes.memory import router as memory_router
 from api.routes.mix import router as mix_router
@@ -33,7 +36,12 @@ app.add_middleware(
 )
 
 app.include_router(search_router)
-app.include_router(ask_router)
+# ASK_PIPELINE=async serves /ask and /ask/stream from the event loop instead
+# of the threadpool (api/routes/ask_async.py) — same paths and payloads.
+if os.getenv("ASK_PIPELINE", "sync").lower() == "async":
+    app.include_router(ask_async_router)
+else:
+    app.include_router(ask_router)
 app.include_router(memory_router)
 app.include_router(analyze_router)
 app.include_router(generate_router)
@@ -61,25 +69,30 @@ def metrics() -> Response:
 
 @app.post("/cache/invalidate")
 def cache_invalidate(source_name: str) -> dict[str, int]:
-    """Invalidate all cached responses that cited a given source.
+    """Invalidate all cached responses and retrievals that cited a given source.
 
     Call this after re-ingesting a document to ensure stale answers
-    are not served from the response cache.
+    are not served from the response cache.  The invalidation is broadcast
+    over Redis pub/sub, so other workers drop the same entries from their
+    in-process response and retrieval caches; without Redis, only this
+    worker's retrieval cache is cleared and the rest age out via
+    ``RETRIEVAL_CACHE_TTL_SECONDS``.
 
     Args:
         source_name: Filename or source identifier to invalidate
             (e.g. ``Bob_Katz.pdf``).
 
     Returns:
-        Dict with ``deleted`` count.
+        Dict with ``deleted`` (response cache) and ``retrievals_deleted`` counts.
     """
     cache = get_response_cache()
     deleted = cache.invalidate_source(source_name)
-    return {"deleted": deleted}
+    retrievals_deleted = get_retrieval_cache().invalidate_source(source_name)
+    return {"deleted": deleted, "retrievals_deleted": retrievals_deleted}
 
 
 @app.get("/cache/stats")
 def cache_stats() -> dict:
-    """Return basic response cache statistics."""
+    """Return basic response and retrieval cache statistics."""
     cache = get_response_cache()
-    return cache.stats()
+    return {**cache.stats(), "retrieval": get_retrieval_cache().stats()}
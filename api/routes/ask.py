@@ -17,6 +17,20 @@ Pipeline (hybrid mode, use_tools=True):
     8. Generate response via LLM
     9. Parse and validate citations
 
+    Steps 2–7 are not strictly sequential (``infrastructure.stages``): the
+    query embedding starts speculatively alongside step 0, so a tool miss
+    does not wait for it afterwards; the genre recipe and task
+    classification start with step 1, the memory lookup as soon as step 2
+    has an embedding, and all of them join before step 8.
+
+    With use_tools=False, identical concurrent requests are coalesced
+    (``infrastructure.singleflight``): one runs steps 1–9, the others share
+    its answer (``usage.coalesced``).  ``/ask/stream`` fans one token stream
+    out the same way.
+
+    A cached answer past the cache's soft TTL is served as usual but marked
+    ``usage.stale``, and one background run of steps 1–9 refreshes it.
+
 Response modes:
     "tool" — Tool executed and summarized. No RAG, no citations.
     "rag"  — Pure RAG. No tool matched or use_tools=False.
@@ -24,13 +38,16 @@ Response modes:
 
 import json
 import logging
+import threading
 import time
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import UTC
 from datetime import datetime as _dt
+from functools import partial
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
@@ -43,7 +60,10 @@ from api.deps import (
     get_memory_store,
     get_rate_limiter,
     get_response_cache,
+    get_retrieval_cache,
     get_task_router_optional,
+    get_vector_index,
+    prefer_local_index,
 )
 from api.schemas.ask import (
     AskRequest,
@@ -52,7 +72,12 @@ from api.schemas.ask import (
     ToolCallRecord,
     UsageMetadata,
 )
-from core.generation.base import GenerationProvider, GenerationRequest, Message
+from core.generation.base import (
+    GenerationProvider,
+    GenerationRequest,
+    GenerationResponse,
+    Message,
+)
 from core.genre_detector import detect_genre
 from core.memory.format import format_memory_block
 from core.query_expansion import detect_intents, detect_mastering_intent, expand_query
@@ -62,9 +87,21 @@ from core.rag.degraded import build_degraded_response
 from core.rag.prompts import build_system_prompt, build_user_prompt
 from core.routing.costs import calculate_cost
 from core.sub_domain_detector import detect_sub_domains
-from db.rerank import rerank_results
-from db.search import hybrid_search, search_chunks
-from infrastructure.cache import ResponseCache
+from db.rerank import EmbeddingLoader, rerank_results
+from db.search import (
+    KeywordLeg,
+    SearchProfile,
+    fetch_embeddings,
+    hybrid_search,
+    reciprocal_rank_fusion,
+    search_chunks,
+    search_chunks_keyword,
+    search_chunks_multi,
+)
+from db.session import SessionLocal
+from db.vector_index import MmapVectorIndex
+from infrastructure.cache import ResponseCache, RetrievalCache
+from infrastructure.cache_warm import WARM_SESSION_PREFIX
 from infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
 from infrastructure.metrics import (
     record_ask,
@@ -74,6 +111,12 @@ from infrastructure.metrics import (
     record_rate_limited,
 )
 from infrastructure.rate_limiter import RateLimiter
+from infrastructure.singleflight import (
+    SINGLE_FLIGHT_DISTRIBUTED,
+    SINGLE_FLIGHT_WAIT_SECONDS,
+    SingleFlight,
+)
+from infrastructure.stages import StageScheduler
 from ingestion.embeddings import OpenAIEmbeddingProvider
 from ingestion.memory_store import MemoryStore
 from ingestion.recipes import load_recipe
@@ -83,6 +126,11 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["ask"])
 
+# Identical concurrent RAG requests, keyed on the response cache key
+_FLIGHTS = SingleFlight()
+# Background refreshes of stale response cache entries, one per key
+_REFRESHES = SingleFlight()
+
 DbSession = Annotated[Session, Depends(get_db)]
 Embedder = Annotated[OpenAIEmbeddingProvider, Depends(get_embedding_provider)]
 Generator = Annotated[GenerationProvider, Depends(get_generation_provider)]
@@ -161,16 +209,329 @@ def _summarize_tool_data(tool_name: str, data: dict | None) -> dict[str, Any]:
     return {k: data[k] for k in fields if k in data}
 
 
+# ---------------------------------------------------------------------------
+# Pipeline helpers — shared with the async pipeline (api/routes/ask_async.py)
+# ---------------------------------------------------------------------------
+
+
+def _expand(query: str) -> tuple[list, str, list[str]]:
+    """Detect intents, expand the query and collect hybrid search keywords.
+
+    Pure function — no I/O.  Uses multi-intent detection to cover all music
+    production domains; keywords of every matched intent are merged,
+    deduplicated in order.
+
+    Returns:
+        ``(intents, expanded_query, query_terms)``.
+    """
+    intents = detect_intents(query)
+    intent = intents[0] if intents else detect_mastering_intent(query)
+    expanded_query = expand_query(query, intent)
+    query_terms = list(dict.fromkeys(kw for detected in intents for kw in detected.keywords))
+    return intents, expanded_query, query_terms
+
+
+def _retrieved_chunks(reranked: list) -> list[RetrievedChunk]:
+    """Convert reranked ``(ChunkHit, score)`` pairs for context formatting.
+
+    Pure function — no I/O.
+    """
+    return [
+        RetrievedChunk(
+            text=record.text,
+            source_name=record.source_name,
+            source_path=record.source_path,
+            chunk_index=record.chunk_index,
+            score=score,
+            page_number=record.page_number,
+        )
+        for record, score in reranked
+    ]
+
+
+def _insufficient_knowledge(reranked: list, threshold: float) -> str | None:
+    """Return the refusal message when retrieval is too weak to answer, else None.
+
+    Pure function — no I/O.
+    """
+    if not reranked:
+        return "No relevant chunks found for this query."
+    max_score = max(score for _, score in reranked)
+    if max_score < threshold:
+        return (
+            f"Top similarity score ({max_score:.2f}) is below "
+            f"confidence threshold ({threshold})."
+        )
+    return None
+
+
+def _cached_ask_response(
+    cached: dict[str, Any],
+    t_start: float,
+    *,
+    query: str | None = None,
+    similarity: float | None = None,
+    coalesced: bool = False,
+    stale: bool = False,
+) -> AskResponse:
+    """Serve a response-cache entry: refresh timing, mark the hit, record metrics.
+
+    Args:
+        cached: Cached response dict — shared with the in-process cache
+            tier, so it is copied, not mutated.
+        t_start: Request start time (perf_counter).
+        query: The asking query, for a semantic hit cached under other words.
+        similarity: Cosine similarity of a semantic hit.
+        coalesced: The entry was written by another worker's in-flight
+            request this one waited for.
+        stale: The entry is past its soft TTL (a refresh is under way).
+    """
+    record_cache_hit()
+    total_ms = (time.perf_counter() - t_start) * 1000
+    usage = {**cached["usage"], "total_ms": round(total_ms, 2), "cache_hit": True}
+    cached = {**cached, "usage": usage}
+    if query is not None:
+        cached["query"] = query
+    if similarity is not None:
+        usage["semantic_similarity"] = round(similarity, 4)
+    if coalesced:
+        usage["coalesced"] = True
+    if stale:
+        usage["stale"] = True
+    record_ask(
+        status="cache_hit",
+        subdomain=cached.get("_subdomain", "global"),
+        latency_seconds=total_ms / 1000,
+    )
+    return AskResponse(**cached)
+
+
+def _memory_context(memory_store: MemoryStore, query_embedding: list[float]) -> str | None:
+    """Relevant memories as a prompt block (best-effort — None on any failure).
+
+    min_score=0.35 is the trigger threshold: memories scoring below it
+    (cosine * decay) are not relevant enough to surface.
+    """
+    try:
+        memories = memory_store.search_relevant(
+            query_embedding=query_embedding,
+            now=_dt.now(UTC),
+            top_k=5,
+            min_score=0.35,
+        )
+    except Exception:
+        logger.warning("Memory retrieval failed — skipping memory injection")
+        return None
+    if not memories:
+        return None
+    return format_memory_block([e for e, _ in memories]) or None
+
+
+def _genre_context(query: str) -> str | None:
+    """Genre recipe for the prompt when the query names a genre that has one."""
+    genre_result = detect_genre(query)
+    if not (genre_result.has_recipe and genre_result.recipe_file):
+        return None
+    genre_context = load_recipe(genre_result.recipe_file)
+    if genre_context:
+        logger.info("Injecting genre recipe: %s", genre_result.genre)
+    return genre_context
+
+
+def _classify_task(query: str) -> bool:
+    """Classify the musical task and log the tier the router will pick.
+
+    Best-effort: returns False when classification fails, in which case the
+    default generator answers instead of the task router.
+    """
+    try:
+        from core.routing.classifier import classify_musical_task
+        from core.routing.tiers import select_tier
+
+        classification = classify_musical_task(query)
+        logger.info(
+            "Task classified as %s (confidence=%.2f) → tier %s",
+            classification.task_type,
+            classification.confidence,
+            select_tier(classification).name,
+        )
+    except Exception:
+        logger.warning("Task routing classification failed — using default generator")
+        return False
+    return True
+
+
+def _generation_request(
+    body: AskRequest,
+    active_sub_domains: list[str],
+    genre_context: str | None,
+    memory_context: str | None,
+    context_block: str,
+) -> GenerationRequest:
+    """Build the RAG generation request — sub-domain focus, recipe and memories injected.
+
+    Pure function — no I/O.
+    """
+    system_prompt = build_system_prompt(
+        active_sub_domains=active_sub_domains if active_sub_domains else None,
+        genre_context=genre_context,
+        memory_context=memory_context,
+    )
+    return GenerationRequest(
+        messages=(
+            Message(role="system", content=system_prompt),
+            Message(role="user", content=build_user_prompt(body.query, context_block)),
+        ),
+        temperature=body.temperature,
+        max_tokens=body.max_tokens,
+    )
+
+
+def _rag_usage(
+    gen_response: GenerationResponse | None,
+    routing_decision: Any,
+    *,
+    embedding_ms: float,
+    search_ms: float,
+    search_legs: dict[str, float],
+    generation_ms: float,
+    total_ms: float,
+    embedding_cache_hit: bool,
+    retrieval_cache_hit: bool,
+    stages_ms: dict[str, float] | None = None,
+    pre_generation_ms: float = 0.0,
+) -> UsageMetadata:
+    """Usage metadata for a RAG answer; *gen_response* None means degraded mode.
+
+    Pure function — no I/O.  Cost and tier are only known when the task
+    router produced *routing_decision*.
+    """
+    timings = {
+        "embedding_ms": round(embedding_ms, 2),
+        "search_ms": round(search_ms, 2),
+        "search_legs_ms": _round_legs(search_legs),
+        "stages_ms": stages_ms or {},
+        "pre_generation_ms": round(pre_generation_ms, 2),
+        "generation_ms": round(generation_ms, 2),
+        "total_ms": round(total_ms, 2),
+        "cache_hit": False,
+        "embedding_cache_hit": embedding_cache_hit,
+        "retrieval_cache_hit": retrieval_cache_hit,
+    }
+    if gen_response is None:
+        return UsageMetadata(
+            input_tokens=0, output_tokens=0, total_tokens=0, model="degraded-mode", **timings
+        )
+    cost_usd = 0.0
+    tier = ""
+    if routing_decision is not None:
+        cost_usd = calculate_cost(
+            gen_response.model,
+            gen_response.usage_input_tokens,
+            gen_response.usage_output_tokens,
+        )
+        tier = routing_decision.tier_used
+    return UsageMetadata(
+        input_tokens=gen_response.usage_input_tokens,
+        output_tokens=gen_response.usage_output_tokens,
+        total_tokens=gen_response.usage_input_tokens + gen_response.usage_output_tokens,
+        model=gen_response.model,
+        cost_usd=cost_usd,
+        tier=tier,
+        **timings,
+    )
+
+
+def _degraded_ask_response(
+    body: AskRequest,
+    retrieved_chunks: list[RetrievedChunk],
+    reason: str,
+    usage: UsageMetadata,
+) -> AskResponse:
+    """Raw-excerpt answer (mode="degraded") for when generation failed.
+
+    Pure function — no I/O.
+    """
+    degraded = build_degraded_response(
+        query=body.query,
+        retrieved_chunks=retrieved_chunks,
+        reason=reason,
+    )
+    return AskResponse(
+        query=body.query,
+        answer=degraded.answer,
+        sources=[
+            SourceReference(
+                index=i,
+                source_name=chunk.source_name,
+                source_path=chunk.source_path,
+                page_number=chunk.page_number,
+                score=chunk.score,
+            )
+            for i, chunk in enumerate(retrieved_chunks, start=1)
+        ],
+        citations=degraded.citations,
+        reason=None,
+        warnings=[degraded.warning],
+        usage=usage,
+        mode="degraded",
+        tool_calls=[],
+    )
+
+
+def _rag_ask_response(
+    body: AskRequest,
+    gen_response: GenerationResponse,
+    retrieved_chunks: list[RetrievedChunk],
+    sources_list: list,
+    warnings: list[str],
+    usage: UsageMetadata,
+) -> AskResponse:
+    """Validate the answer's citations and assemble the mode="rag" response.
+
+    Pure function — no I/O.  Adds ``invalid_citations`` to *warnings* when
+    the answer cites a source index that does not exist.
+    """
+    extracted_citations = extract_citations(gen_response.content)
+    citation_result = validate_citations(extracted_citations, num_sources=len(retrieved_chunks))
+    if citation_result.invalid_citations:
+        warnings.append("invalid_citations")
+
+    return AskResponse(
+        query=body.query,
+        answer=gen_response.content,
+        sources=[
+            SourceReference(
+                index=src["index"],  # type: ignore[arg-type]
+                source_name=src["source_name"],  # type: ignore[arg-type]
+                source_path=src["source_path"],  # type: ignore[arg-type]
+                page_number=src["page_number"],  # type: ignore[arg-type]
+                score=src["score"],  # type: ignore[arg-type]
+            )
+            for src in sources_list
+        ],
+        citations=list(citation_result.citations),
+        reason="invalid_citations" if citation_result.invalid_citations else None,
+        warnings=warnings,
+        usage=usage,
+        mode="rag",
+        tool_calls=[],
+    )
+
+
 # ---------------------------------------------------------------------------
 # Main endpoint
 # ---------------------------------------------------------------------------
 
 
 RespCache = Annotated[ResponseCache, Depends(get_response_cache)]
+RetrCache = Annotated[RetrievalCache, Depends(get_retrieval_cache)]
 Limiter = Annotated[RateLimiter, Depends(get_rate_limiter)]
 LLMBreaker = Annotated[CircuitBreaker, Depends(get_llm_breaker)]
 EmbBreaker = Annotated[CircuitBreaker, Depends(get_embedding_breaker)]
 MemStore = Annotated[MemoryStore, Depends(get_memory_store)]
+# None when no local vector index has been built (python -m db.vector_index build)
+LocalIndex = Annotated[MmapVectorIndex | None, Depends(get_vector_index)]
 # Router is None when USE_ROUTING != "true" — backward-compatible opt-in
 Router = Annotated[Any, Depends(get_task_router_optional)]
 
@@ -186,6 +547,9 @@ def ask(
     llm_breaker: LLMBreaker,
     embedding_breaker: EmbBreaker,
     memory_store: MemStore,
+    vector_index: LocalIndex,
+    retrieval_cache: RetrCache,
+    background_tasks: BackgroundTasks,
     task_router: Router = None,
 ) -> AskResponse:
     """
@@ -209,7 +573,6 @@ def ask(
     are available — the musician gets raw excerpts instead of a 500 error.
     """
     t_start = time.perf_counter()
-    warnings: list[str] = []
 
     # ------------------------------------------------------------------
     # Rate limiting — generous window, protects against runaway loops
@@ -228,30 +591,181 @@ def ask(
     # ------------------------------------------------------------------
     # Response cache check — skip for tool mode (non-deterministic)
     # ------------------------------------------------------------------
+    pipeline = partial(
+        _answer,
+        body,
+        embedder,
+        generator,
+        response_cache,
+        llm_breaker,
+        embedding_breaker,
+        memory_store,
+        vector_index,
+        retrieval_cache,
+        task_router,
+    )
     if body.use_tools is False or not body.use_tools:
+        # Count the query for cache warming, after the response is sent
+        if not (body.session_id or "").startswith(WARM_SESSION_PREFIX):
+            background_tasks.add_task(
+                response_cache.record_query,
+                body.query,
+                top_k=body.top_k,
+                threshold=body.confidence_threshold,
+                profile=body.profile,
+            )
         # Only cache pure RAG responses
         cached = response_cache.get(
             body.query,
             top_k=body.top_k,
             threshold=body.confidence_threshold,
+            profile=body.profile,
         )
         if cached is not None:
-            record_cache_hit()
-            total_ms = (time.perf_counter() - t_start) * 1000
-            cached["usage"]["total_ms"] = round(total_ms, 2)
-            cached["usage"]["cache_hit"] = True
-            record_ask(
-                status="cache_hit",
-                subdomain=cached.get("_subdomain", "global"),
-                latency_seconds=total_ms / 1000,
-            )
-            return AskResponse(**cached)
+            # Stale-while-revalidate: a stale entry is still served at cache
+            # speed, and refreshed off the request path.
+            stale = response_cache.is_stale(cached)
+            if stale:
+                _revalidate(body, response_cache, pipeline)
+            return _cached_ask_response(cached, t_start, stale=stale)
+
+    answer = partial(pipeline, db, t_start)
+    if body.use_tools:
+        return answer()
+
+    # Coalesce identical in-flight requests: the first one runs the pipeline,
+    # the others wait for its answer instead of generating their own.
+    key = _response_key(body)
+    response, shared = _FLIGHTS.do(key, _lead_flight, key, response_cache, answer, t_start)
+    return _coalesced_ask_response(response, t_start) if shared else response
+
+
+def _lead_flight(
+    key: str,
+    response_cache: ResponseCache,
+    answer: Callable[[], AskResponse],
+    t_start: float,
+) -> AskResponse:
+    """Answer as this process's single-flight leader for *key*.
+
+    With ``SINGLE_FLIGHT_DISTRIBUTED``, the flight is first claimed across
+    workers; if another worker holds it, wait for its answer to land in the
+    response cache and only run the pipeline here if none arrives.
+    """
+    if not SINGLE_FLIGHT_DISTRIBUTED:
+        return answer()
+    if not response_cache.claim_flight(key, SINGLE_FLIGHT_WAIT_SECONDS):
+        cached = response_cache.wait_for_flight(key, SINGLE_FLIGHT_WAIT_SECONDS)
+        if cached is not None:
+            return _cached_ask_response(cached, t_start, coalesced=True)
+        return answer()
+    try:
+        return answer()
+    finally:
+        response_cache.release_flight(key)
+
+
+def _revalidate(
+    body: AskRequest, response_cache: ResponseCache, pipeline: Callable[..., AskResponse]
+) -> None:
+    """Refresh *body*'s stale cache entry in the background, once per key.
+
+    *pipeline* is :func:`_answer` bound to everything but the session and
+    start time.  Only one refresh per entry runs in this process, and the
+    flight lock keeps other workers from refreshing it too.
+    """
+    key = _response_key(body)
+    _REFRESHES.submit(key, _refresh, key, response_cache, pipeline)
+
+
+def _refresh(key: str, response_cache: ResponseCache, pipeline: Callable[..., AskResponse]) -> None:
+    """Re-run the pipeline for a stale entry; its cache write replaces the entry."""
+    if not response_cache.claim_flight(key, SINGLE_FLIGHT_WAIT_SECONDS):
+        return  # another worker is refreshing it
+    with _flight_lease(key, response_cache):
+        try:
+            # The request's session closes with its response — use our own
+            with SessionLocal() as db:
+                pipeline(db, time.perf_counter(), revalidating=True)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Stale cache refresh failed: %s", exc)
+
+
+@contextmanager
+def _flight_lease(key: str, response_cache: ResponseCache) -> Iterator[None]:
+    """Hold *key*'s claimed flight lock until the block exits, then release it.
+
+    A refresh has no deadline of its own (generation can outlast
+    ``SINGLE_FLIGHT_WAIT_SECONDS``), so the lock is extended every third of
+    its lifetime instead of being allowed to expire under it — which would
+    let another worker start a second refresh.
+    """
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(SINGLE_FLIGHT_WAIT_SECONDS / 3):
+            if not response_cache.extend_flight(key, SINGLE_FLIGHT_WAIT_SECONDS):
+                return  # lost the lock — nothing left to hold
+
+    threading.Thread(target=renew, name="flight-lease", daemon=True).start()
+    try:
+        yield
+    finally:
+        stop.set()
+        response_cache.release_flight(key)
+
+
+def _coalesced_ask_response(response: AskResponse, t_start: float) -> AskResponse:
+    """A single-flight follower's copy of the leader's response, with its own timing."""
+    total_ms = (time.perf_counter() - t_start) * 1000
+    usage = response.usage.model_copy(update={"total_ms": round(total_ms, 2), "coalesced": True})
+    return response.model_copy(update={"usage": usage})
+
+
+def _answer(
+    body: AskRequest,
+    embedder: OpenAIEmbeddingProvider,
+    generator: GenerationProvider,
+    response_cache: ResponseCache,
+    llm_breaker: CircuitBreaker,
+    embedding_breaker: CircuitBreaker,
+    memory_store: MemoryStore,
+    vector_index: MmapVectorIndex | None,
+    retrieval_cache: RetrievalCache,
+    task_router: Any,
+    db: Session,
+    t_start: float,
+    *,
+    revalidating: bool = False,
+) -> AskResponse:
+    """Steps 0–9 of ``POST /ask`` — everything after rate limiting and the cache check.
+
+    *revalidating* marks a background refresh of a stale cache entry: the
+    semantic cache (which would return that same entry) and memory
+    extraction (nobody asked) are skipped.
+    """
+    warnings: list[str] = []
+
+    # 1. Query expansion (pure, <1ms) — needed up front by the speculative
+    #    embedding below.
+    intents, expanded_query, query_terms = _expand(body.query)
+
+    # 2. Embed query — speculatively, in parallel with tool routing.  On a
+    #    tool miss RAG picks the embedding up without paying for it again;
+    #    on a tool hit the result is discarded, but the call still completes
+    #    and lands in the embedder's cache.  Protected by the circuit breaker.
+    stages = StageScheduler()
+    stages.submit_critical(
+        "embedding", embedding_breaker.call, embedder.embed_texts, [expanded_query]
+    )
 
     # ------------------------------------------------------------------
     # Step 0: Tool routing (hybrid mode only)
     # ------------------------------------------------------------------
     if body.use_tools:
-        tool_response = _try_tool_route(
+        tool_response = stages.run(
+            "tool_route",
+            _try_tool_route,
             query=body.query,
             generator=generator,
             t_start=t_start,
@@ -263,41 +777,27 @@ def ask(
     # ------------------------------------------------------------------
     # Steps 1–9: Pure RAG pipeline
     # ------------------------------------------------------------------
+    #
+    # Embed → search → rerank is the critical path.  Stages that need only
+    # the raw query (genre recipe, task classification) start now, the
+    # memory lookup as soon as the embedding exists; all of them join just
+    # before generation.
+    stages.submit("genre_recipe", _genre_context, body.query)
+    if task_router is not None:
+        stages.submit("classify", _classify_task, body.query)
 
-    # 1. Query expansion + sub-domain detection + genre detection
-    # Use multi-intent detection to cover all music production domains
-    intents = detect_intents(body.query)
-    intent = intents[0] if intents else detect_mastering_intent(body.query)
-    expanded_query = expand_query(body.query, intent)
-    # Extract keywords from all matched intents for hybrid search
-    query_terms: list[str] = []
-    for detected_intent in intents:
-        query_terms.extend(detected_intent.keywords)
-    # Deduplicate while preserving order
-    seen_terms: set[str] = set()
-    unique_terms: list[str] = []
-    for term in query_terms:
-        if term not in seen_terms:
-            seen_terms.add(term)
-            unique_terms.append(term)
-    query_terms = unique_terms
+    # 1. Sub-domain detection
     sub_domain_result = detect_sub_domains(body.query)
     active_sub_domains = list(sub_domain_result.active)
-    genre_result = detect_genre(body.query)
-
-    # Record cache miss (we didn't return early from the cache check)
-    record_cache_miss()
 
-    # 2. Embed query — protected by circuit breaker
+    # 2. Join the query embedding started before tool routing
     #
     # If the embedding service is down, the circuit opens after 3 failures and
     # subsequent calls fail immediately (<1ms) with CircuitOpenError.
     # We convert this to a 503 (not 500) because it's a known, expected failure
     # mode during an outage — not a programming error.
-    t_embed = time.perf_counter()
     try:
-        embeddings = embedding_breaker.call(embedder.embed_texts, [expanded_query])
-        query_embedding = embeddings[0]
+        query_embedding = stages.result("embedding")[0]
     except CircuitOpenError as exc:
         # Circuit is open — embedding service is known-down, fail fast
         logger.warning("Embedding circuit open: %s", exc)
@@ -330,224 +830,125 @@ def ask(
                 "message": "Failed to embed query. Please try again.",
             },
         ) from exc
-    embedding_ms = (time.perf_counter() - t_embed) * 1000
+    # The embedding's own duration; the part that overlapped tool routing
+    # never reached the request's critical path.
+    embedding_ms = stages.timings["embedding"]
     emb_cache_hit = getattr(embedder, "last_cache_hit", False)
     if emb_cache_hit:
         record_embedding_cache_hit()
 
-    # 3. Search chunks — namespaced by sub-domain when detected, with global fallback
-    #
-    # Strategy:
-    #   a) If sub-domains detected: search each active sub-domain, merge, deduplicate.
-    #   b) If the filtered search returns fewer than MIN_FILTERED_RESULTS chunks,
-    #      fall back to global search (avoids empty responses for niche queries).
-    #   c) If no sub-domains detected: global search directly.
-    _MIN_FILTERED_RESULTS = 3
-    t_search = time.perf_counter()
-    try:
-        if active_sub_domains:
-            # Per-sub-domain search: allocate top_k * 3 slots, split across domains
-            per_domain_k = max(body.top_k * 2, 6)
-            seen_ids: set[int] = set()
-            merged: list = []
-            for sd in active_sub_domains:
-                for record, score in search_chunks(
-                    db, query_embedding, top_k=per_domain_k, sub_domain=sd
-                ):
-                    rid = id(record)
-                    if rid not in seen_ids:
-                        seen_ids.add(rid)
-                        merged.append((record, score))
-
-            if len(merged) >= _MIN_FILTERED_RESULTS:
-                raw_results = merged
-                logger.info(
-                    "Sub-domain search: domains=%s, results=%d",
-                    active_sub_domains,
-                    len(raw_results),
-                )
-            else:
-                # Not enough filtered results — fall back to global search
-                logger.info(
-                    "Sub-domain search returned %d results (< %d) — falling back to global",
-                    len(merged),
-                    _MIN_FILTERED_RESULTS,
-                )
-                # Fallback: use hybrid if we have query terms
-                if query_terms:
-                    raw_results = hybrid_search(
-                        db,
-                        query_embedding,
-                        query_terms,
-                        top_k=body.top_k * 3,
-                        vector_weight=0.7,
-                        keyword_weight=0.3,
-                    )
-                else:
-                    raw_results = search_chunks(db, query_embedding, top_k=body.top_k * 3)
-                active_sub_domains = []  # clear so prompt stays generic
-        else:
-            # Use hybrid search (RRF: vector + keyword) when intent keywords detected
-            if query_terms:
-                raw_results = hybrid_search(
-                    db,
-                    query_embedding,
-                    query_terms,
-                    top_k=body.top_k * 3,
-                    vector_weight=0.7,
-                    keyword_weight=0.3,
-                )
-            else:
-                raw_results = search_chunks(db, query_embedding, top_k=body.top_k * 3)
-    except Exception as exc:
-        # Search failure: no chunks available, can't build a degraded response.
-        # Return 503 (service unavailable) — the vector DB is down, not a code bug.
-        logger.error("Search failed: %s", exc)
-        record_ask(
-            status="error",
-            subdomain="global",
-            latency_seconds=(time.perf_counter() - t_start),
-        )
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "reason": "search_unavailable",
-                "message": "Vector search failed. Please try again in a moment.",
-            },
-        ) from exc
-
-    # 4. Rerank — derive filename boost keywords from all matched intents
-    _FILENAME_BOOST_MAP: dict[str, list[str]] = {
-        "mastering": ["mastering", "mixing", "masterclass", "mix-mastering"],
-        "mixing": ["mastering", "mixing", "masterclass", "mix-masterclass"],
-        "sound_design": ["serum", "synthesis", "sound-design", "synth"],
-        "synthesis": ["synthesis", "synth", "serum", "sound-design"],
-        "rhythm": ["drum", "groove", "rhythm", "percussion"],
-        "chord_progressions": ["chord", "harmony", "theory", "progression"],
-        "organic_house": ["organic", "house", "deep-house", "melodic"],
-        "afrobeat": ["afro", "latin", "african", "rhythm"],
-        "arrangement": ["arrangement", "structure", "track"],
-        "bass_design": ["bass", "kick-bass", "sub", "808"],
-    }
-    filename_keywords: list[str] | None = None
-    for detected_intent in intents:
-        extra = _FILENAME_BOOST_MAP.get(detected_intent.category)
-        if extra:
-            if filename_keywords is None:
-                filename_keywords = []
-            filename_keywords.extend(k for k in extra if k not in filename_keywords)
-
-    try:
-        reranked = rerank_results(
-            raw_results,
+    # 2.5 Semantic response cache — a cached answer to a differently worded
+    #     question whose embedding is close enough, with the same parameters
+    #     and detected sub-domains.
+    detected_sub_domains = list(active_sub_domains)
+    if not body.use_tools and not revalidating:
+        similar = response_cache.get_similar(
+            query_embedding,
             top_k=body.top_k,
-            max_per_document=1,
-            course_boost=1.25,
-            youtube_boost=1.0,
-            filename_keywords=filename_keywords,
-            filename_boost=1.20,
-            query_embedding=query_embedding,
-            mmr_lambda=0.7,
-            use_mmr=True,
+            threshold=body.confidence_threshold,
+            scope=detected_sub_domains,
+            profile=body.profile,
         )
-    except Exception as exc:
-        logger.warning("Reranking failed, using raw results: %s", exc)
-        warnings.append("reranking_failed")
-        reranked = raw_results[: body.top_k]
+        if similar is not None:
+            cached_response, similarity = similar
+            return _cached_ask_response(
+                cached_response, t_start, query=body.query, similarity=similarity
+            )
 
-    search_ms = (time.perf_counter() - t_search) * 1000
+    # A response cache miss — exact and semantic.  A background refresh is
+    # not a request, so it is not counted.
+    if not revalidating:
+        record_cache_miss()
 
-    # 5. Confidence check
-    if not reranked:
-        raise HTTPException(
-            status_code=422,
-            detail={
-                "reason": "insufficient_knowledge",
-                "message": "No relevant chunks found for this query.",
-            },
-        )
+    stages.submit("memory", _memory_context, memory_store, query_embedding)
 
-    max_score = max(score for _, score in reranked)
-    if max_score < body.confidence_threshold:
+    # 3. Search chunks — namespaced by sub-domain when detected, with global
+    #    fallback (see _retrieve_candidates).  The local mmap index answers
+    #    when SEARCH_BACKEND=mmap or when the database search fails.  A warm
+    #    retrieval cache entry skips search and rerank altogether.
+    t_search = time.perf_counter()
+    search_legs: dict[str, float] = {}
+    filename_keywords = _filename_keywords(intents)
+    cache_params = _retrieval_cache_params(
+        active_sub_domains, query_terms, filename_keywords, body.top_k, body.profile
+    )
+    cached = retrieval_cache.get(query_embedding, **cache_params)
+    if cached is not None:
+        reranked = list(cached.results)
+        active_sub_domains = list(cached.sub_domains)
+    else:
+        try:
+            reranked, active_sub_domains, retrieval_warnings = stages.run(
+                "search",
+                _search_and_rerank,
+                db,
+                query_embedding,
+                query_terms,
+                active_sub_domains,
+                top_k=body.top_k,
+                vector_index=vector_index,
+                filename_keywords=filename_keywords,
+                timings=search_legs,
+                profile=body.profile,
+            )
+        except Exception as exc:
+            # Search failure: no chunks available, can't build a degraded response.
+            # Return 503 (service unavailable) — the vector DB is down, not a code bug.
+            logger.error("Search failed: %s", exc)
+            record_ask(
+                status="error",
+                subdomain="global",
+                latency_seconds=(time.perf_counter() - t_start),
+            )
+            raise HTTPException(
+                status_code=503,
+                detail={
+                    "reason": "search_unavailable",
+                    "message": "Vector search failed. Please try again in a moment.",
+                },
+            ) from exc
+        warnings.extend(retrieval_warnings)
+
+        if not retrieval_warnings:
+            retrieval_cache.set(
+                query_embedding,
+                results=reranked,
+                sub_domains=active_sub_domains,
+                **cache_params,
+            )
+
+    search_ms = (time.perf_counter() - t_search) * 1000
+
+    # 5. Confidence check
+    refusal = _insufficient_knowledge(reranked, body.confidence_threshold)
+    if refusal is not None:
         raise HTTPException(
             status_code=422,
-            detail={
-                "reason": "insufficient_knowledge",
-                "message": (
-                    f"Top similarity score ({max_score:.2f}) is below "
-                    f"confidence threshold ({body.confidence_threshold})."
-                ),
-            },
+            detail={"reason": "insufficient_knowledge", "message": refusal},
         )
 
     # 6. Build context
-    retrieved_chunks = [
-        RetrievedChunk(
-            text=record.text,
-            source_name=record.source_name,
-            source_path=record.source_path,
-            chunk_index=record.chunk_index,
-            score=score,
-            page_number=record.page_number,
-        )
-        for record, score in reranked
-    ]
+    retrieved_chunks = _retrieved_chunks(reranked)
 
     context_block = format_context_block(retrieved_chunks)
     sources_list = format_source_list(retrieved_chunks)
 
-    # ── Step 6.5 — Retrieve relevant memories (best-effort) ──────────
-    # min_score=0.35 is the trigger threshold: memories scoring below this
-    # (cosine * decay < 0.35) are silenced — not relevant enough to surface.
-    memory_context: str | None = None
-    try:
-        _now = _dt.now(UTC)
-        relevant_memories = memory_store.search_relevant(
-            query_embedding=query_embedding,
-            now=_now,
-            top_k=5,
-            min_score=0.35,
-        )
-        if relevant_memories:
-            memory_context = format_memory_block([e for e, _ in relevant_memories]) or None
-    except Exception:
-        logger.warning("Memory retrieval failed — skipping memory injection")
-
-    # ── Step 6.7 — Classify musical task + select model tier (best-effort) ──
-    # When USE_ROUTING=true, task_router is an instance of TaskRouter that
-    # implements GenerationProvider — it can drop in as active_generator.
-    # When USE_ROUTING is unset/false, task_router is None and we fall back
-    # to the default singleton (generator).
+    # ── Step 6.5 — Join the side stages (all best-effort) ────────────
+    # Relevant memories (see _memory_context for the trigger threshold) and
+    # the genre recipe feed the prompt.  When USE_ROUTING=true, task_router
+    # is a TaskRouter that implements GenerationProvider — once the task is
+    # classified it drops in as active_generator.  When USE_ROUTING is
+    # unset/false, task_router is None and the default singleton answers.
+    memory_context = stages.result("memory")
+    genre_context = stages.result("genre_recipe")
     active_generator: GenerationProvider = generator
-    if task_router is not None:
-        try:
-            from core.routing.classifier import classify_musical_task
-            from core.routing.tiers import select_tier
-
-            _classification = classify_musical_task(body.query)
-            logger.info(
-                "Task classified as %s (confidence=%.2f) → tier %s",
-                _classification.task_type,
-                _classification.confidence,
-                select_tier(_classification).name,
-            )
-            active_generator = task_router
-        except Exception:
-            logger.warning("Task routing classification failed — using default generator")
+    if task_router is not None and stages.result("classify"):
+        active_generator = task_router
 
     # 7. Build prompts — inject sub-domain focus areas and genre recipe when available
-    genre_context: str | None = None
-    if genre_result.has_recipe and genre_result.recipe_file:
-        genre_context = load_recipe(genre_result.recipe_file)
-        if genre_context:
-            logger.info("Injecting genre recipe: %s", genre_result.genre)
-
-    system_prompt = build_system_prompt(
-        active_sub_domains=active_sub_domains if active_sub_domains else None,
-        genre_context=genre_context,
-        memory_context=memory_context,
+    _gen_request = _generation_request(
+        body, active_sub_domains, genre_context, memory_context, context_block
     )
-    user_prompt = build_user_prompt(body.query, context_block)
 
     # 8. Generate response — protected by circuit breaker
     #
@@ -565,17 +966,10 @@ def ask(
     # to recover the RoutingDecision for tier/cost metadata.  The TaskRouter has its own
     # internal fallback chain, so the breaker is not needed at this level for routing.
     t_gen = time.perf_counter()
+    pre_generation_ms = (t_gen - t_start) * 1000
     degraded_reason: str | None = None
     gen_response = None
     routing_decision = None
-    _gen_request = GenerationRequest(
-        messages=(
-            Message(role="system", content=system_prompt),
-            Message(role="user", content=user_prompt),
-        ),
-        temperature=body.temperature,
-        max_tokens=body.max_tokens,
-    )
     try:
         if task_router is not None:
             # Router path: recover RoutingDecision for tier/cost metadata.
@@ -592,118 +986,43 @@ def ask(
         degraded_reason = "llm_unavailable"
     generation_ms = (time.perf_counter() - t_gen) * 1000
 
-    # If generation failed, return degraded response with raw chunks
-    if degraded_reason is not None:
-        degraded = build_degraded_response(
-            query=body.query,
-            retrieved_chunks=retrieved_chunks,
-            reason=degraded_reason,
-        )
-        total_ms = (time.perf_counter() - t_start) * 1000
-        subdomain_label = active_sub_domains[0] if active_sub_domains else "global"
-        record_ask(
-            status="degraded",
-            subdomain=subdomain_label,
-            latency_seconds=total_ms / 1000,
-        )
-        return AskResponse(
-            query=body.query,
-            answer=degraded.answer,
-            sources=[
-                SourceReference(
-                    index=i,
-                    source_name=chunk.source_name,
-                    source_path=chunk.source_path,
-                    page_number=chunk.page_number,
-                    score=chunk.score,
-                )
-                for i, chunk in enumerate(retrieved_chunks, start=1)
-            ],
-            citations=degraded.citations,
-            reason=None,
-            warnings=[degraded.warning],
-            usage=UsageMetadata(
-                input_tokens=0,
-                output_tokens=0,
-                total_tokens=0,
-                embedding_ms=round(embedding_ms, 2),
-                search_ms=round(search_ms, 2),
-                generation_ms=round(generation_ms, 2),
-                total_ms=round(total_ms, 2),
-                model="degraded-mode",
-                cache_hit=False,
-                embedding_cache_hit=emb_cache_hit,
-            ),
-            mode="degraded",
-            tool_calls=[],
-        )
-
-    # 9. Parse and validate citations
-    extracted_citations = extract_citations(gen_response.content)
-    citation_result = validate_citations(extracted_citations, num_sources=len(retrieved_chunks))
-
-    if citation_result.invalid_citations:
-        warnings.append("invalid_citations")
-
     total_ms = (time.perf_counter() - t_start) * 1000
     subdomain_label = active_sub_domains[0] if active_sub_domains else "global"
+    usage = _rag_usage(
+        gen_response,
+        routing_decision,
+        embedding_ms=embedding_ms,
+        search_ms=search_ms,
+        search_legs=search_legs,
+        generation_ms=generation_ms,
+        total_ms=total_ms,
+        embedding_cache_hit=emb_cache_hit,
+        retrieval_cache_hit=cached is not None,
+        stages_ms=stages.timings,
+        pre_generation_ms=pre_generation_ms,
+    )
 
-    record_ask(status="success", subdomain=subdomain_label, latency_seconds=total_ms / 1000)
-
-    # Derive cost_usd and tier from routing decision (when routing active)
-    _cost_usd = 0.0
-    _tier = ""
-    if routing_decision is not None:
-        _cost_usd = calculate_cost(
-            gen_response.model,
-            gen_response.usage_input_tokens,
-            gen_response.usage_output_tokens,
-        )
-        _tier = routing_decision.tier_used
+    # If generation failed, return degraded response with raw chunks
+    if degraded_reason is not None:
+        record_ask(status="degraded", subdomain=subdomain_label, latency_seconds=total_ms / 1000)
+        return _degraded_ask_response(body, retrieved_chunks, degraded_reason, usage)
 
-    rag_response = AskResponse(
-        query=body.query,
-        answer=gen_response.content,
-        sources=[
-            SourceReference(
-                index=src["index"],  # type: ignore[arg-type]
-                source_name=src["source_name"],  # type: ignore[arg-type]
-                source_path=src["source_path"],  # type: ignore[arg-type]
-                page_number=src["page_number"],  # type: ignore[arg-type]
-                score=src["score"],  # type: ignore[arg-type]
-            )
-            for src in sources_list
-        ],
-        citations=list(citation_result.citations),
-        reason="invalid_citations" if citation_result.invalid_citations else None,
-        warnings=warnings,
-        usage=UsageMetadata(
-            input_tokens=gen_response.usage_input_tokens,
-            output_tokens=gen_response.usage_output_tokens,
-            total_tokens=gen_response.usage_input_tokens + gen_response.usage_output_tokens,
-            embedding_ms=round(embedding_ms, 2),
-            search_ms=round(search_ms, 2),
-            generation_ms=round(generation_ms, 2),
-            total_ms=round(total_ms, 2),
-            model=gen_response.model,
-            cache_hit=False,
-            embedding_cache_hit=emb_cache_hit,
-            cost_usd=_cost_usd,
-            tier=_tier,
-        ),
-        mode="rag",
-        tool_calls=[],
+    # 9. Parse and validate citations
+    rag_response = _rag_ask_response(
+        body, gen_response, retrieved_chunks, sources_list, warnings, usage
     )
+    record_ask(status="success", subdomain=subdomain_label, latency_seconds=total_ms / 1000)
 
     # ── Step 9.5 — Extract and store new memories (best-effort) ──────
     try:
-        _extract_and_store_memories(
-            query=body.query,
-            answer=gen_response.content,
-            query_embedding=query_embedding,
-            generator=generator,
-            memory_store=memory_store,
-        )
+        if not revalidating:
+            _extract_and_store_memories(
+                query=body.query,
+                answer=gen_response.content,
+                query_embedding=query_embedding,
+                generator=generator,
+                memory_store=memory_store,
+            )
     except Exception:
         logger.debug("Memory extraction skipped (best-effort)")
 
@@ -719,6 +1038,15 @@ def ask(
             threshold=body.confidence_threshold,
             response=cacheable,
             sources=cited_sources,
+            profile=body.profile,
+        )
+        response_cache.index_query(
+            body.query,
+            query_embedding,
+            top_k=body.top_k,
+            threshold=body.confidence_threshold,
+            scope=detected_sub_domains,
+            profile=body.profile,
         )
     except Exception:  # noqa: BLE001
         logger.warning("Cache write failed — response not cached (best-effort)")
@@ -741,15 +1069,33 @@ def _sse(data: dict) -> str:
     return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
+def _sources_payload(sources_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """The per-source fields of the ``/ask/stream`` ``sources`` event.
+
+    Pure function — no I/O.
+    """
+    return [
+        {
+            "index": src["index"],
+            "source_name": src["source_name"],
+            "source_path": src["source_path"],
+            "page_number": src["page_number"],
+            "score": src["score"],
+        }
+        for src in sources_list
+    ]
+
+
 @router.post("/ask/stream")
 def ask_stream(
     body: AskRequest,
-    db: DbSession,
     embedder: Embedder,
     generator: Generator,
     rate_limiter: Limiter,
     embedding_breaker: EmbBreaker,
     memory_store: MemStore,
+    vector_index: LocalIndex,
+    retrieval_cache: RetrCache,
 ) -> StreamingResponse:
     """Stream an answer as Server-Sent Events (SSE).
 
@@ -772,6 +1118,8 @@ def ask_stream(
         Fatal pipeline error.  ``{"type": "error", "code": "...", "message": "..."}``
 
     The client should accumulate ``chunk`` events to reconstruct the full answer.
+    Concurrent identical requests share one stream: the first runs the
+    pipeline and the others receive the same events.
 
     Returns:
         ``StreamingResponse`` with ``Content-Type: text/event-stream``.
@@ -796,31 +1144,23 @@ def ask_stream(
         # --- Step 1: Query expansion + sub-domain detection --------------------
         yield _sse({"type": "step", "step": "expanding"})
 
-        intents = detect_intents(body.query)
-        intent = intents[0] if intents else detect_mastering_intent(body.query)
-        expanded_query = expand_query(body.query, intent)
-
-        query_terms: list[str] = []
-        for detected_intent in intents:
-            query_terms.extend(detected_intent.keywords)
-        seen_terms: set[str] = set()
-        unique_terms: list[str] = []
-        for term in query_terms:
-            if term not in seen_terms:
-                seen_terms.add(term)
-                unique_terms.append(term)
-        query_terms = unique_terms
+        # Side stages overlap the critical path, as in POST /ask.
+        stages = StageScheduler()
+        stages.submit("genre_recipe", _genre_context, body.query)
+
+        _intents, expanded_query, query_terms = _expand(body.query)
 
         sub_domain_result = detect_sub_domains(body.query)
         active_sub_domains = list(sub_domain_result.active)
-        genre_result = detect_genre(body.query)
 
         # --- Step 2: Embed query -----------------------------------------------
         yield _sse({"type": "step", "step": "embedding"})
         t_embed = time.perf_counter()
 
         try:
-            embeddings = embedding_breaker.call(embedder.embed_texts, [expanded_query])
+            embeddings = stages.run(
+                "embedding", embedding_breaker.call, embedder.embed_texts, [expanded_query]
+            )
             query_embedding = embeddings[0]
         except Exception as exc:
             logger.error("Streaming embed failed: %s", exc)
@@ -834,179 +1174,88 @@ def ask_stream(
             return
 
         embedding_ms = (time.perf_counter() - t_embed) * 1000
+        stages.submit("memory", _memory_context, memory_store, query_embedding)
 
         # --- Step 3: Search + rerank -------------------------------------------
         yield _sse({"type": "step", "step": "searching"})
         t_search = time.perf_counter()
-        _MIN_FILTERED_RESULTS = 3
-
-        try:
-            if active_sub_domains:
-                per_domain_k = max(body.top_k * 2, 6)
-                seen_ids: set[int] = set()
-                merged: list = []
-                for sd in active_sub_domains:
-                    for record, score in search_chunks(
-                        db, query_embedding, top_k=per_domain_k, sub_domain=sd
-                    ):
-                        rid = id(record)
-                        if rid not in seen_ids:
-                            seen_ids.add(rid)
-                            merged.append((record, score))
-
-                if len(merged) >= _MIN_FILTERED_RESULTS:
-                    raw_results = merged
-                else:
-                    if query_terms:
-                        raw_results = hybrid_search(
-                            db,
-                            query_embedding,
-                            query_terms,
-                            top_k=body.top_k * 3,
-                            vector_weight=0.7,
-                            keyword_weight=0.3,
-                        )
-                    else:
-                        raw_results = search_chunks(db, query_embedding, top_k=body.top_k * 3)
-                    active_sub_domains = []
-            else:
-                if query_terms:
-                    raw_results = hybrid_search(
+        search_legs: dict[str, float] = {}
+        cache_params = _retrieval_cache_params(
+            active_sub_domains, query_terms, None, body.top_k, body.profile
+        )
+        cached = retrieval_cache.get(query_embedding, **cache_params)
+        if cached is not None:
+            reranked = list(cached.results)
+            active_sub_domains = list(cached.sub_domains)
+        else:
+            try:
+                # The stream outlives the leader's request (followers keep
+                # reading after it disconnects) — use our own session
+                with SessionLocal() as db:
+                    reranked, active_sub_domains, retrieval_warnings = stages.run(
+                        "search",
+                        _search_and_rerank,
                         db,
                         query_embedding,
                         query_terms,
-                        top_k=body.top_k * 3,
-                        vector_weight=0.7,
-                        keyword_weight=0.3,
+                        active_sub_domains,
+                        top_k=body.top_k,
+                        vector_index=vector_index,
+                        timings=search_legs,
+                        profile=body.profile,
                     )
-                else:
-                    raw_results = search_chunks(db, query_embedding, top_k=body.top_k * 3)
-        except Exception as exc:
-            logger.error("Streaming search failed: %s", exc)
-            yield _sse(
-                {
-                    "type": "error",
-                    "code": "search_unavailable",
-                    "message": "Vector search failed. Please try again.",
-                }
-            )
-            return
+            except Exception as exc:
+                logger.error("Streaming search failed: %s", exc)
+                yield _sse(
+                    {
+                        "type": "error",
+                        "code": "search_unavailable",
+                        "message": "Vector search failed. Please try again.",
+                    }
+                )
+                return
 
-        try:
-            reranked = rerank_results(
-                raw_results,
-                top_k=body.top_k,
-                max_per_document=1,
-                course_boost=1.25,
-                youtube_boost=1.0,
-                filename_boost=1.20,
-                query_embedding=query_embedding,
-                mmr_lambda=0.7,
-                use_mmr=True,
-            )
-        except Exception:
-            reranked = raw_results[: body.top_k]
+            if not retrieval_warnings:
+                retrieval_cache.set(
+                    query_embedding,
+                    results=reranked,
+                    sub_domains=active_sub_domains,
+                    **cache_params,
+                )
 
         search_ms = (time.perf_counter() - t_search) * 1000
 
         # --- Step 4: Confidence check ------------------------------------------
-        if not reranked:
-            yield _sse(
-                {
-                    "type": "error",
-                    "code": "insufficient_knowledge",
-                    "message": "No relevant chunks found for this query.",
-                }
-            )
-            return
-
-        max_score = max(score for _, score in reranked)
-        if max_score < body.confidence_threshold:
-            yield _sse(
-                {
-                    "type": "error",
-                    "code": "insufficient_knowledge",
-                    "message": (
-                        f"Top similarity score ({max_score:.2f}) is below "
-                        f"confidence threshold ({body.confidence_threshold})."
-                    ),
-                }
-            )
+        refusal = _insufficient_knowledge(reranked, body.confidence_threshold)
+        if refusal is not None:
+            yield _sse({"type": "error", "code": "insufficient_knowledge", "message": refusal})
             return
 
         # --- Step 5: Build context + prompts -----------------------------------
-        retrieved_chunks = [
-            RetrievedChunk(
-                text=record.text,
-                source_name=record.source_name,
-                source_path=record.source_path,
-                chunk_index=record.chunk_index,
-                score=score,
-                page_number=record.page_number,
-            )
-            for record, score in reranked
-        ]
+        retrieved_chunks = _retrieved_chunks(reranked)
 
         context_block = format_context_block(retrieved_chunks)
         sources_list = format_source_list(retrieved_chunks)
 
-        genre_context: str | None = None
-        if genre_result.has_recipe and genre_result.recipe_file:
-            genre_context = load_recipe(genre_result.recipe_file)
-
-        # ── Step 6.5 — Retrieve relevant memories (best-effort) ──────
-        # min_score=0.35 mirrors the non-stream trigger threshold.
-        stream_memory_context: str | None = None
-        try:
-            _stream_now = _dt.now(UTC)
-            _stream_memories = memory_store.search_relevant(
-                query_embedding=query_embedding,
-                now=_stream_now,
-                top_k=5,
-                min_score=0.35,
-            )
-            if _stream_memories:
-                stream_memory_context = (
-                    format_memory_block([e for e, _ in _stream_memories]) or None
-                )
-        except Exception:
-            logger.warning("Stream memory retrieval failed — skipping memory injection")
-
-        system_prompt = build_system_prompt(
-            active_sub_domains=active_sub_domains if active_sub_domains else None,
-            genre_context=genre_context,
-            memory_context=stream_memory_context,
+        # Join the side stages — genre recipe and memories (best-effort)
+        gen_request = _generation_request(
+            body,
+            active_sub_domains,
+            stages.result("genre_recipe"),
+            stages.result("memory"),
+            context_block,
         )
-        user_prompt = build_user_prompt(body.query, context_block)
 
         # --- Step 6: Stream generation -----------------------------------------
         yield _sse({"type": "step", "step": "generating"})
 
         # Emit sources before generation begins — clients can pre-render them
-        sources_payload = [
-            {
-                "index": src["index"],
-                "source_name": src["source_name"],
-                "source_path": src["source_path"],
-                "page_number": src["page_number"],
-                "score": src["score"],
-            }
-            for src in sources_list
-        ]
-        yield _sse({"type": "sources", "sources": sources_payload})
+        yield _sse({"type": "sources", "sources": _sources_payload(sources_list)})
 
         t_gen = time.perf_counter()
+        pre_generation_ms = (t_gen - t_start) * 1000
         full_answer: list[str] = []
 
-        gen_request = GenerationRequest(
-            messages=(
-                Message(role="system", content=system_prompt),
-                Message(role="user", content=user_prompt),
-            ),
-            temperature=body.temperature,
-            max_tokens=body.max_tokens,
-        )
-
         try:
             for chunk_text in generator.generate_stream(gen_request):
                 full_answer.append(chunk_text)
@@ -1049,14 +1298,21 @@ def ask_stream(
                 "usage": {
                     "embedding_ms": round(embedding_ms, 2),
                     "search_ms": round(search_ms, 2),
+                    "search_legs_ms": _round_legs(search_legs),
+                    "stages_ms": stages.timings,
+                    "pre_generation_ms": round(pre_generation_ms, 2),
                     "generation_ms": round(generation_ms, 2),
                     "total_ms": round(total_ms, 2),
+                    "retrieval_cache_hit": cached is not None,
                 },
             }
         )
 
+    # Identical concurrent streams share one pipeline run (same key as the
+    # response cache): followers replay its events from the start.
+    key = _response_key(body)
     return StreamingResponse(
-        event_stream(),
+        _FLIGHTS.stream(key, event_stream),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1066,6 +1322,370 @@ def ask_stream(
     )
 
 
+# ---------------------------------------------------------------------------
+# Retrieval helper
+# ---------------------------------------------------------------------------
+
+# Filtered (per-sub-domain) search must return at least this many chunks,
+# otherwise the pipeline falls back to a global search.
+_MIN_FILTERED_RESULTS = 3
+
+
+def _retrieve_candidates(
+    db: Session,
+    query_embedding: list[float],
+    query_terms: list[str],
+    active_sub_domains: list[str],
+    *,
+    top_k: int,
+    vector_index: MmapVectorIndex | None = None,
+    timings: dict[str, float] | None = None,
+    profile: SearchProfile | None = None,
+    session_factory: Callable[[], Session] | None = SessionLocal,
+) -> tuple[list, list[str]]:
+    """
+    Fetch rerank candidates — namespaced by sub-domain when detected.
+
+    Strategy:
+      a) If sub-domains detected: search each active sub-domain, merge, deduplicate
+         by chunk id.  On pgvector this is a single :func:`search_chunks_multi`
+         round trip that also carries the global fallback leg.
+      b) If the filtered search returns fewer than ``_MIN_FILTERED_RESULTS`` chunks,
+         fall back to global search (avoids empty responses for niche queries).
+      c) If no sub-domains detected: global search directly.
+
+    Global searches use hybrid (RRF: vector + keyword) when intent keywords
+    were detected, with the keyword leg on its own pooled connection.  When
+    *vector_index* is given, every query goes to the in-process index instead
+    of Postgres (vector-only — no keyword leg).
+
+    Args:
+        db: Active SQLAlchemy session (unused when *vector_index* is given).
+        query_embedding: Query vector.
+        query_terms: Intent keywords for the hybrid keyword leg.
+        active_sub_domains: Detected sub-domains (may be empty).
+        top_k: Final number of results the caller will keep after reranking.
+        vector_index: Optional local index to query instead of pgvector.
+        timings: Optional out-param accumulating per-leg milliseconds
+            (``vector_ms``, ``keyword_ms``, ``keyword_timeout_ms``).
+        profile: HNSW recall/latency preset for pgvector queries (ignored by
+            the exact local index).
+        session_factory: Opens the second connection for the concurrent
+            hybrid keyword leg; ``None`` runs both legs on *db*.
+
+    Returns:
+        ``(raw_results, active_sub_domains)`` — the sub-domain list is
+        cleared when the global fallback was used so the prompt stays generic.
+    """
+    global_k = top_k * 3
+    # Per-sub-domain search: allocate top_k * 3 slots, split across domains
+    per_domain_k = max(top_k * 2, 6)
+    timings = timings if timings is not None else {}
+
+    def add_timing(key: str, t0: float) -> None:
+        timings[key] = timings.get(key, 0.0) + (time.perf_counter() - t0) * 1000
+
+    if vector_index is not None:
+        query_terms = []
+
+        def global_search() -> list:
+            t0 = time.perf_counter()
+            results = vector_index.search(query_embedding, top_k=global_k)
+            add_timing("vector_ms", t0)
+            return results
+
+    else:
+
+        def global_search() -> list:
+            # Use hybrid search (RRF: vector + keyword) when intent keywords detected
+            if query_terms:
+                legs: dict[str, float] = {}
+                results = hybrid_search(
+                    db,
+                    query_embedding,
+                    query_terms,
+                    top_k=global_k,
+                    vector_weight=0.7,
+                    keyword_weight=0.3,
+                    profile=profile,
+                    session_factory=session_factory,
+                    timings=legs,
+                )
+                for key, ms in legs.items():
+                    timings[key] = timings.get(key, 0.0) + ms
+                return results
+            t0 = time.perf_counter()
+            results = search_chunks(db, query_embedding, top_k=global_k, profile=profile)
+            add_timing("vector_ms", t0)
+            return results
+
+    if not active_sub_domains:
+        return global_search(), active_sub_domains
+
+    if vector_index is not None:
+        seen_ids: set[int] = set()
+        merged: list = []
+        t0 = time.perf_counter()
+        for sd in active_sub_domains:
+            for record, score in vector_index.search(
+                query_embedding, top_k=per_domain_k, sub_domain=sd
+            ):
+                if record.id not in seen_ids:
+                    seen_ids.add(record.id)
+                    merged.append((record, score))
+        add_timing("vector_ms", t0)
+        used_fallback = len(merged) < _MIN_FILTERED_RESULTS
+        if used_fallback:
+            merged = global_search()
+    else:
+        # A hybrid fallback fuses top_k * 3 candidates per leg, as hybrid_search
+        # does.  The global vector leg rides in the same round trip; the
+        # keyword leg only runs once that round trip says the fallback is
+        # needed — most queries never need it.
+        fetch_k = global_k * 3 if query_terms else global_k
+        t0 = time.perf_counter()
+        merged, used_fallback = search_chunks_multi(
+            db,
+            query_embedding,
+            active_sub_domains,
+            per_domain_k=per_domain_k,
+            global_k=fetch_k,
+            min_results=_MIN_FILTERED_RESULTS,
+            profile=profile,
+        )
+        add_timing("vector_ms", t0)
+        if used_fallback and query_terms:
+            if session_factory is not None:
+                legs: dict[str, float] = {}
+                keyword_results = KeywordLeg(session_factory, query_terms, fetch_k).result(legs)
+                for key, ms in legs.items():
+                    timings[key] = timings.get(key, 0.0) + ms
+            else:
+                t0 = time.perf_counter()
+                try:
+                    keyword_results = search_chunks_keyword(db, query_terms, top_k=fetch_k)
+                except Exception:  # noqa: BLE001
+                    keyword_results = []
+                add_timing("keyword_ms", t0)
+            merged = reciprocal_rank_fusion(
+                merged, keyword_results, global_k, vector_weight=0.7, keyword_weight=0.3
+            )
+
+    if not used_fallback:
+        logger.info(
+            "Sub-domain search: domains=%s, results=%d",
+            active_sub_domains,
+            len(merged),
+        )
+        return merged, active_sub_domains
+
+    # Not enough filtered results — fell back to global search
+    logger.info(
+        "Sub-domain search returned < %d results — fell back to global",
+        _MIN_FILTERED_RESULTS,
+    )
+    return merged, []
+
+
+# Filename boost keywords per detected intent category (rerank step).
+_FILENAME_BOOST_MAP: dict[str, list[str]] = {
+    "mastering": ["mastering", "mixing", "masterclass", "mix-mastering"],
+    "mixing": ["mastering", "mixing", "masterclass", "mix-masterclass"],
+    "sound_design": ["serum", "synthesis", "sound-design", "synth"],
+    "synthesis": ["synthesis", "synth", "serum", "sound-design"],
+    "rhythm": ["drum", "groove", "rhythm", "percussion"],
+    "chord_progressions": ["chord", "harmony", "theory", "progression"],
+    "organic_house": ["organic", "house", "deep-house", "melodic"],
+    "afrobeat": ["afro", "latin", "african", "rhythm"],
+    "arrangement": ["arrangement", "structure", "track"],
+    "bass_design": ["bass", "kick-bass", "sub", "808"],
+}
+
+
+def _filename_keywords(intents: list) -> list[str] | None:
+    """Merge filename boost keywords of all matched intents, order-preserving.
+
+    Pure function — no I/O.  Returns None when no intent has boost keywords.
+    """
+    filename_keywords: list[str] | None = None
+    for detected_intent in intents:
+        extra = _FILENAME_BOOST_MAP.get(detected_intent.category)
+        if extra:
+            if filename_keywords is None:
+                filename_keywords = []
+            filename_keywords.extend(k for k in extra if k not in filename_keywords)
+    return filename_keywords
+
+
+def _response_key(body: AskRequest) -> str:
+    """Response cache key of *body* — also its single-flight key.
+
+    Pure function — no I/O.
+    """
+    return ResponseCache.make_key(
+        body.query, top_k=body.top_k, threshold=body.confidence_threshold, profile=body.profile
+    )
+
+
+def _retrieval_cache_params(
+    active_sub_domains: list[str],
+    query_terms: list[str],
+    filename_keywords: list[str] | None,
+    top_k: int,
+    profile: SearchProfile | None,
+) -> dict[str, Any]:
+    """Key parameters for the ``/ask`` retrieval cache.
+
+    Pure function — no I/O.  Covers everything besides the query embedding
+    that changes the reranked result: detected scope, hybrid keyword terms,
+    filename boosts, ``top_k`` and the search profile.
+    """
+    return {
+        "scope": tuple(active_sub_domains),
+        "top_k": top_k,
+        "settings": ("ask", tuple(query_terms), tuple(filename_keywords or ()), profile),
+    }
+
+
+def _round_legs(timings: dict[str, float]) -> dict[str, float]:
+    """Round per-leg search timings for the response payload."""
+    return {key: round(ms, 2) for key, ms in timings.items()}
+
+
+def _retrieve_with_fallback(
+    db: Session,
+    query_embedding: list[float],
+    query_terms: list[str],
+    active_sub_domains: list[str],
+    *,
+    top_k: int,
+    vector_index: MmapVectorIndex | None,
+    timings: dict[str, float] | None = None,
+    profile: SearchProfile | None = None,
+    session_factory: Callable[[], Session] | None = SessionLocal,
+) -> tuple[list, list[str], bool, EmbeddingLoader]:
+    """
+    Run :func:`_retrieve_candidates` against the configured backend.
+
+    With ``SEARCH_BACKEND=mmap`` the local index answers first.  Otherwise
+    pgvector answers, and the local index (when built) takes over if the
+    database query raises — so ``/ask`` keeps working while Postgres is down.
+
+    Returns:
+        ``(raw_results, active_sub_domains, fell_back, embedding_loader)`` —
+        *fell_back* is True when the local index answered because the
+        database search failed; *embedding_loader* fetches MMR embeddings
+        from whichever backend answered.
+
+    Raises:
+        Exception: The original search error when no backend could answer.
+    """
+    if vector_index is not None and prefer_local_index():
+        raw, active = _retrieve_candidates(
+            db,
+            query_embedding,
+            query_terms,
+            active_sub_domains,
+            top_k=top_k,
+            vector_index=vector_index,
+            timings=timings,
+        )
+        return raw, active, False, vector_index.fetch_embeddings
+    try:
+        raw, active = _retrieve_candidates(
+            db,
+            query_embedding,
+            query_terms,
+            active_sub_domains,
+            top_k=top_k,
+            timings=timings,
+            profile=profile,
+            session_factory=session_factory,
+        )
+        return raw, active, False, partial(fetch_embeddings, db)
+    except Exception as exc:
+        if vector_index is None:
+            raise
+        logger.warning("Database search failed (%s) — falling back to local vector index", exc)
+        raw, active = _retrieve_candidates(
+            db,
+            query_embedding,
+            query_terms,
+            active_sub_domains,
+            top_k=top_k,
+            vector_index=vector_index,
+            timings=timings,
+        )
+        return raw, active, True, vector_index.fetch_embeddings
+
+
+def _search_and_rerank(
+    db: Session,
+    query_embedding: list[float],
+    query_terms: list[str],
+    active_sub_domains: list[str],
+    *,
+    top_k: int,
+    vector_index: MmapVectorIndex | None,
+    filename_keywords: list[str] | None = None,
+    timings: dict[str, float] | None = None,
+    profile: SearchProfile | None = None,
+    session_factory: Callable[[], Session] | None = SessionLocal,
+) -> tuple[list, list[str], list[str]]:
+    """
+    Retrieve candidates (:func:`_retrieve_with_fallback`) and rerank them.
+
+    Reranking applies the source-type boosts, *filename_keywords* boosts and
+    MMR diversity; if it fails the raw top-k is used instead.
+
+    Returns:
+        ``(reranked, active_sub_domains, warnings)`` — *warnings* lists
+        anything that degraded the result (``search_fallback_local_index``,
+        ``keyword_search_timeout``, ``reranking_failed``); only a result
+        without warnings is worth caching.
+
+    Raises:
+        Exception: The search error when no backend could answer.
+    """
+    timings = timings if timings is not None else {}
+    raw_results, active_sub_domains, fell_back, embedding_loader = _retrieve_with_fallback(
+        db,
+        query_embedding,
+        query_terms,
+        active_sub_domains,
+        top_k=top_k,
+        vector_index=vector_index,
+        timings=timings,
+        profile=profile,
+        session_factory=session_factory,
+    )
+    warnings: list[str] = []
+    if fell_back:
+        warnings.append("search_fallback_local_index")
+    if "keyword_timeout_ms" in timings:
+        warnings.append("keyword_search_timeout")
+
+    try:
+        reranked = rerank_results(
+            raw_results,
+            top_k=top_k,
+            max_per_document=1,
+            course_boost=1.25,
+            youtube_boost=1.0,
+            filename_keywords=filename_keywords,
+            filename_boost=1.20,
+            query_embedding=query_embedding,
+            mmr_lambda=0.7,
+            use_mmr=True,
+            embedding_loader=embedding_loader,
+        )
+    except Exception as exc:
+        logger.warning("Reranking failed, using raw results: %s", exc)
+        warnings.append("reranking_failed")
+        reranked = raw_results[:top_k]
+    return reranked, active_sub_domains, warnings
+
+
 # ---------------------------------------------------------------------------
 # Tool routing helper
 # ---------------------------------------------------------------------------
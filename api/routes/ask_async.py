@@ -0,0 +1,804 @@
+"""
+Async ask routes — the ``/ask`` and ``/ask/stream`` pipeline on the event loop.
+
+Same request/response contract and pipeline steps as :mod:`api.routes.ask`
+(the pure helpers are shared), but no step pins a Starlette threadpool
+thread for the life of the request, so one worker can hold hundreds of
+in-flight questions while they wait on OpenAI, Postgres or the LLM:
+
+- Embedding and generation await the providers' ``AsyncOpenAI`` /
+  ``AsyncAnthropic`` clients (``aembed_texts``, ``agenerate``,
+  ``agenerate_stream``).  Providers without async methods (test doubles,
+  the task router) run in the default executor instead.
+- Retrieval + rerank run on an ``AsyncSession`` through
+  ``AsyncSession.run_sync``: the shared sync search code executes with its
+  I/O yielding to the loop.  The hybrid legs run back to back on that one
+  connection — concurrency comes from requests sharing the loop, not from a
+  second pooled connection per request.  An exact scan of the local mmap
+  index is CPU-bound and runs in the executor.
+- Memory lookups go through :class:`~ingestion.memory_store.AsyncMemoryStore`.
+  Redis-backed rate limiting and response caching, recipe reads and tool
+  routing (sync tool code; not the hot path) run in the executor.
+- Identical concurrent requests are coalesced on the loop
+  (:class:`~infrastructure.singleflight.AsyncSingleFlight`), and stale
+  cache entries are refreshed in a background task, as in the sync route.
+
+Environment variables
+---------------------
+``ASK_PIPELINE``
+    ``sync`` (default) or ``async``.  ``api/main.py`` mounts this router in
+    place of :mod:`api.routes.ask` when set to ``async``; the paths are the
+    same, so clients do not change.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import UTC
+from datetime import datetime as _dt
+from functools import partial
+from typing import Annotated, Any
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.deps import get_async_db, get_async_memory_store, prefer_local_index
+from api.routes.ask import (
+    EmbBreaker,
+    Embedder,
+    Generator,
+    Limiter,
+    LLMBreaker,
+    LocalIndex,
+    RespCache,
+    RetrCache,
+    Router,
+    _cached_ask_response,
+    _classify_task,
+    _coalesced_ask_response,
+    _degraded_ask_response,
+    _expand,
+    _filename_keywords,
+    _generation_request,
+    _genre_context,
+    _insufficient_knowledge,
+    _rag_ask_response,
+    _rag_usage,
+    _response_key,
+    _retrieval_cache_params,
+    _retrieved_chunks,
+    _round_legs,
+    _search_and_rerank,
+    _sources_payload,
+    _sse,
+    _try_tool_route,
+)
+from api.schemas.ask import AskRequest, AskResponse
+from core.generation.base import (
+    AsyncGenerationProvider,
+    GenerationProvider,
+    GenerationRequest,
+    GenerationResponse,
+)
+from core.memory.format import format_memory_block
+from core.rag.citations import extract_citations, validate_citations
+from core.rag.context import format_context_block, format_source_list
+from core.sub_domain_detector import detect_sub_domains
+from db.session import AsyncSessionLocal
+from db.vector_index import MmapVectorIndex
+from infrastructure.cache import ResponseCache, RetrievalCache
+from infrastructure.cache_warm import WARM_SESSION_PREFIX
+from infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
+from infrastructure.metrics import (
+    record_ask,
+    record_cache_miss,
+    record_embedding_cache_hit,
+    record_rate_limited,
+)
+from infrastructure.singleflight import (
+    SINGLE_FLIGHT_DISTRIBUTED,
+    SINGLE_FLIGHT_WAIT_SECONDS,
+    AsyncSingleFlight,
+)
+from infrastructure.stages import AsyncStageScheduler
+from ingestion.embeddings import OpenAIEmbeddingProvider
+from ingestion.memory_store import AsyncMemoryStore
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["ask"])
+
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
+AsyncMemStore = Annotated[AsyncMemoryStore, Depends(get_async_memory_store)]
+
+# Identical concurrent RAG requests on this loop (see the sync route)
+_FLIGHTS = AsyncSingleFlight()
+_REFRESHES = AsyncSingleFlight()
+
+_RATE_LIMITED = {
+    "reason": "rate_limit_exceeded",
+    "message": "Too many requests. Take a breath and try again in a moment.",
+}
+
+
+# ---------------------------------------------------------------------------
+# Awaitable pipeline steps
+# ---------------------------------------------------------------------------
+
+
+def _is_async_provider(provider: object) -> bool:
+    """True when *provider* implements ``AsyncGenerationProvider`` with real coroutines."""
+    return isinstance(provider, AsyncGenerationProvider) and inspect.iscoroutinefunction(
+        provider.agenerate
+    )
+
+
+async def _aembed(
+    embedder: OpenAIEmbeddingProvider, breaker: CircuitBreaker, text: str
+) -> list[float]:
+    """Embed one query through the embedding circuit breaker."""
+    aembed_texts = getattr(embedder, "aembed_texts", None)
+    if inspect.iscoroutinefunction(aembed_texts):
+        embeddings = await breaker.acall(aembed_texts, [text])
+    else:
+        embeddings = await breaker.acall(asyncio.to_thread, embedder.embed_texts, [text])
+    return embeddings[0]
+
+
+async def _agenerate(
+    generator: GenerationProvider, request: GenerationRequest
+) -> GenerationResponse:
+    """Await a completion, on the provider's async client when it has one."""
+    if _is_async_provider(generator):
+        return await generator.agenerate(request)  # type: ignore[attr-defined]
+    return await asyncio.to_thread(generator.generate, request)
+
+
+async def _agenerate_stream(
+    generator: GenerationProvider, request: GenerationRequest
+) -> AsyncIterator[str]:
+    """Iterate a completion stream without blocking the loop between chunks."""
+    if _is_async_provider(generator):
+        async for text in generator.agenerate_stream(request):  # type: ignore[attr-defined]
+            yield text
+        return
+    chunks = iter(generator.generate_stream(request))
+    done = object()
+    while (text := await asyncio.to_thread(next, chunks, done)) is not done:
+        yield text  # type: ignore[misc]
+
+
+async def _asearch_and_rerank(
+    db: AsyncSession,
+    query_embedding: list[float],
+    query_terms: list[str],
+    active_sub_domains: list[str],
+    *,
+    vector_index: MmapVectorIndex | None,
+    **kwargs: Any,
+) -> tuple[list, list[str], list[str]]:
+    """Awaitable :func:`api.routes.ask._search_and_rerank`."""
+    if vector_index is not None and prefer_local_index():
+        return await asyncio.to_thread(
+            _search_and_rerank,
+            None,  # type: ignore[arg-type]  # the local index needs no session
+            query_embedding,
+            query_terms,
+            active_sub_domains,
+            vector_index=vector_index,
+            **kwargs,
+        )
+    return await db.run_sync(
+        _search_and_rerank,
+        query_embedding,
+        query_terms,
+        active_sub_domains,
+        vector_index=vector_index,
+        session_factory=None,
+        **kwargs,
+    )
+
+
+async def _amemory_context(
+    memory_store: AsyncMemoryStore, query_embedding: list[float]
+) -> str | None:
+    """Relevant memories as a prompt block (best-effort — None on any failure)."""
+    try:
+        memories = await memory_store.search_relevant(
+            query_embedding, _dt.now(UTC), top_k=5, min_score=0.35
+        )
+    except Exception:
+        logger.warning("Memory retrieval failed — skipping memory injection")
+        return None
+    if not memories:
+        return None
+    return format_memory_block([e for e, _ in memories]) or None
+
+
+async def _aextract_and_store_memories(
+    query: str,
+    answer: str,
+    query_embedding: list[float],
+    memory_store: AsyncMemoryStore,
+) -> None:
+    """Async counterpart of :func:`api.routes.ask._extract_and_store_memories`."""
+    from ingestion.memory_extractor import extract_memories
+
+    extracted = extract_memories(query=query, answer=answer, generator=None, use_llm=False)
+    now = _dt.now(UTC)
+    for mem in extracted:
+        entry = memory_store.create_entry(
+            memory_type=mem.memory_type,
+            content=mem.content,
+            now=now,
+            source="auto",
+        )
+        await memory_store.save(entry, embedding=query_embedding)
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+
+@router.post("/ask", response_model=AskResponse)
+async def ask(
+    body: AskRequest,
+    db: AsyncDbSession,
+    embedder: Embedder,
+    generator: Generator,
+    response_cache: RespCache,
+    rate_limiter: Limiter,
+    llm_breaker: LLMBreaker,
+    embedding_breaker: EmbBreaker,
+    memory_store: AsyncMemStore,
+    vector_index: LocalIndex,
+    retrieval_cache: RetrCache,
+    background_tasks: BackgroundTasks,
+    task_router: Router = None,
+) -> AskResponse:
+    """
+    Answer a question using hybrid tool routing + grounded RAG, asynchronously.
+
+    Same behaviour, status codes and response as :func:`api.routes.ask.ask`.
+    """
+    t_start = time.perf_counter()
+
+    session_id = body.session_id or "default"
+    if not await asyncio.to_thread(rate_limiter.allow, session_id):
+        record_rate_limited()
+        raise HTTPException(status_code=429, detail=_RATE_LIMITED)
+
+    pipeline = partial(
+        _answer,
+        body,
+        embedder,
+        generator,
+        response_cache,
+        llm_breaker,
+        embedding_breaker,
+        memory_store,
+        vector_index,
+        retrieval_cache,
+        task_router,
+    )
+    if not body.use_tools:
+        # Count the query for cache warming, after the response is sent
+        if not (body.session_id or "").startswith(WARM_SESSION_PREFIX):
+            background_tasks.add_task(
+                response_cache.record_query,
+                body.query,
+                top_k=body.top_k,
+                threshold=body.confidence_threshold,
+                profile=body.profile,
+            )
+        cached_response = await asyncio.to_thread(
+            response_cache.get,
+            body.query,
+            top_k=body.top_k,
+            threshold=body.confidence_threshold,
+            profile=body.profile,
+        )
+        if cached_response is not None:
+            stale = response_cache.is_stale(cached_response)
+            if stale:
+                key = _response_key(body)
+                _REFRESHES.submit(key, _arefresh, key, response_cache, pipeline)
+            return _cached_ask_response(cached_response, t_start, stale=stale)
+
+    answer = partial(pipeline, db, t_start)
+    if body.use_tools:
+        return await answer()
+
+    key = _response_key(body)
+    response, shared = await _FLIGHTS.do(key, _alead_flight, key, response_cache, answer, t_start)
+    return _coalesced_ask_response(response, t_start) if shared else response
+
+
+async def _alead_flight(
+    key: str,
+    response_cache: ResponseCache,
+    answer: Callable[[], Awaitable[AskResponse]],
+    t_start: float,
+) -> AskResponse:
+    """:func:`api.routes.ask._lead_flight` with the Redis calls in the executor."""
+    if not SINGLE_FLIGHT_DISTRIBUTED:
+        return await answer()
+    if not await asyncio.to_thread(response_cache.claim_flight, key, SINGLE_FLIGHT_WAIT_SECONDS):
+        cached = await asyncio.to_thread(
+            response_cache.wait_for_flight, key, SINGLE_FLIGHT_WAIT_SECONDS
+        )
+        if cached is not None:
+            return _cached_ask_response(cached, t_start, coalesced=True)
+        return await answer()
+    try:
+        return await answer()
+    finally:
+        await asyncio.to_thread(response_cache.release_flight, key)
+
+
+async def _arefresh(
+    key: str, response_cache: ResponseCache, pipeline: Callable[..., Awaitable[AskResponse]]
+) -> None:
+    """:func:`api.routes.ask._refresh` on the loop, with its own ``AsyncSession``."""
+    if not await asyncio.to_thread(response_cache.claim_flight, key, SINGLE_FLIGHT_WAIT_SECONDS):
+        return
+    async with _aflight_lease(key, response_cache):
+        try:
+            async with AsyncSessionLocal() as db:
+                await pipeline(db, time.perf_counter(), revalidating=True)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Stale cache refresh failed: %s", exc)
+
+
+@asynccontextmanager
+async def _aflight_lease(key: str, response_cache: ResponseCache) -> AsyncIterator[None]:
+    """:func:`api.routes.ask._flight_lease` as a task on the loop."""
+
+    async def renew() -> None:
+        while True:
+            await asyncio.sleep(SINGLE_FLIGHT_WAIT_SECONDS / 3)
+            if not await asyncio.to_thread(
+                response_cache.extend_flight, key, SINGLE_FLIGHT_WAIT_SECONDS
+            ):
+                return
+
+    renewer = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        renewer.cancel()
+        await asyncio.to_thread(response_cache.release_flight, key)
+
+
+async def _answer(
+    body: AskRequest,
+    embedder: OpenAIEmbeddingProvider,
+    generator: GenerationProvider,
+    response_cache: ResponseCache,
+    llm_breaker: CircuitBreaker,
+    embedding_breaker: CircuitBreaker,
+    memory_store: AsyncMemoryStore,
+    vector_index: MmapVectorIndex | None,
+    retrieval_cache: RetrievalCache,
+    task_router: Any,
+    db: AsyncSession,
+    t_start: float,
+    *,
+    revalidating: bool = False,
+) -> AskResponse:
+    """Steps 0–9 of the async ``POST /ask`` — after rate limiting and the cache check.
+
+    *revalidating* has the meaning of :func:`api.routes.ask._answer`'s.
+    """
+    warnings: list[str] = []
+
+    # 1. Query expansion, then start embedding speculatively while tool
+    #    routing runs (see the sync route).
+    intents, expanded_query, query_terms = _expand(body.query)
+    stages = AsyncStageScheduler()
+    stages.submit("embedding", _aembed, embedder, embedding_breaker, expanded_query)
+
+    if body.use_tools:
+        tool_response = await stages.run(
+            "tool_route",
+            asyncio.to_thread,
+            _try_tool_route,
+            query=body.query,
+            generator=generator,
+            t_start=t_start,
+            body=body,
+        )
+        if tool_response is not None:
+            return tool_response
+
+    # Side stages overlap the critical path as in the sync route: the genre
+    # recipe and task classification start now, memories after embedding.
+    stages.submit("genre_recipe", asyncio.to_thread, _genre_context, body.query)
+    if task_router is not None:
+        stages.submit("classify", asyncio.to_thread, _classify_task, body.query)
+
+    # Sub-domain detection
+    active_sub_domains = list(detect_sub_domains(body.query).active)
+
+    # 2. Join the query embedding
+    try:
+        query_embedding = await stages.result("embedding")
+    except CircuitOpenError as exc:
+        logger.warning("Embedding circuit open: %s", exc)
+        record_ask(
+            status="error", subdomain="global", latency_seconds=time.perf_counter() - t_start
+        )
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "reason": "embedding_unavailable",
+                "message": (
+                    "The embedding service is temporarily unavailable. "
+                    f"Will retry in ~{exc.reset_in_seconds:.0f}s."
+                ),
+            },
+        ) from exc
+    except Exception as exc:
+        logger.error("Embedding failed: %s", exc)
+        record_ask(
+            status="error", subdomain="global", latency_seconds=time.perf_counter() - t_start
+        )
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "reason": "embedding_unavailable",
+                "message": "Failed to embed query. Please try again.",
+            },
+        ) from exc
+    embedding_ms = stages.timings["embedding"]
+    emb_cache_hit = getattr(embedder, "last_cache_hit", False)
+    if emb_cache_hit:
+        record_embedding_cache_hit()
+
+    # Semantic response cache (see the sync route)
+    detected_sub_domains = list(active_sub_domains)
+    if not body.use_tools and not revalidating:
+        similar = await asyncio.to_thread(
+            response_cache.get_similar,
+            query_embedding,
+            top_k=body.top_k,
+            threshold=body.confidence_threshold,
+            scope=detected_sub_domains,
+            profile=body.profile,
+        )
+        if similar is not None:
+            cached_response, similarity = similar
+            return _cached_ask_response(
+                cached_response, t_start, query=body.query, similarity=similarity
+            )
+
+    # Response cache miss (see the sync route)
+    if not revalidating:
+        record_cache_miss()
+
+    stages.submit("memory", _amemory_context, memory_store, query_embedding)
+
+    # 3–4. Search + rerank, or a warm retrieval cache entry
+    t_search = time.perf_counter()
+    search_legs: dict[str, float] = {}
+    filename_keywords = _filename_keywords(intents)
+    cache_params = _retrieval_cache_params(
+        active_sub_domains, query_terms, filename_keywords, body.top_k, body.profile
+    )
+    cached = retrieval_cache.get(query_embedding, **cache_params)
+    if cached is not None:
+        reranked = list(cached.results)
+        active_sub_domains = list(cached.sub_domains)
+    else:
+        try:
+            reranked, active_sub_domains, retrieval_warnings = await stages.run(
+                "search",
+                _asearch_and_rerank,
+                db,
+                query_embedding,
+                query_terms,
+                active_sub_domains,
+                vector_index=vector_index,
+                top_k=body.top_k,
+                filename_keywords=filename_keywords,
+                timings=search_legs,
+                profile=body.profile,
+            )
+        except Exception as exc:
+            logger.error("Search failed: %s", exc)
+            record_ask(
+                status="error", subdomain="global", latency_seconds=time.perf_counter() - t_start
+            )
+            raise HTTPException(
+                status_code=503,
+                detail={
+                    "reason": "search_unavailable",
+                    "message": "Vector search failed. Please try again in a moment.",
+                },
+            ) from exc
+        warnings.extend(retrieval_warnings)
+        if not retrieval_warnings:
+            retrieval_cache.set(
+                query_embedding, results=reranked, sub_domains=active_sub_domains, **cache_params
+            )
+    search_ms = (time.perf_counter() - t_search) * 1000
+
+    # 5. Confidence check
+    refusal = _insufficient_knowledge(reranked, body.confidence_threshold)
+    if refusal is not None:
+        raise HTTPException(
+            status_code=422,
+            detail={"reason": "insufficient_knowledge", "message": refusal},
+        )
+
+    # 6–7. Context, then join the side stages, prompts
+    retrieved_chunks = _retrieved_chunks(reranked)
+    sources_list = format_source_list(retrieved_chunks)
+    if task_router is not None:
+        await stages.result("classify")
+    gen_request = _generation_request(
+        body,
+        active_sub_domains,
+        await stages.result("genre_recipe"),
+        await stages.result("memory"),
+        format_context_block(retrieved_chunks),
+    )
+
+    # 8. Generate — degraded response on failure, as in the sync route
+    t_gen = time.perf_counter()
+    pre_generation_ms = (t_gen - t_start) * 1000
+    degraded_reason: str | None = None
+    gen_response = None
+    routing_decision = None
+    try:
+        if task_router is not None:
+            gen_response, routing_decision = await asyncio.to_thread(
+                task_router.generate_with_decision, gen_request
+            )
+        else:
+            gen_response = await llm_breaker.acall(_agenerate, generator, gen_request)
+    except CircuitOpenError as exc:
+        logger.warning("LLM circuit open, returning degraded response: %s", exc)
+        degraded_reason = "circuit_open"
+    except Exception as exc:
+        logger.error("Generation failed, returning degraded response: %s", exc)
+        degraded_reason = "llm_unavailable"
+    generation_ms = (time.perf_counter() - t_gen) * 1000
+
+    total_ms = (time.perf_counter() - t_start) * 1000
+    subdomain_label = active_sub_domains[0] if active_sub_domains else "global"
+    usage = _rag_usage(
+        gen_response,
+        routing_decision,
+        embedding_ms=embedding_ms,
+        search_ms=search_ms,
+        search_legs=search_legs,
+        generation_ms=generation_ms,
+        total_ms=total_ms,
+        embedding_cache_hit=emb_cache_hit,
+        retrieval_cache_hit=cached is not None,
+        stages_ms=stages.timings,
+        pre_generation_ms=pre_generation_ms,
+    )
+    if degraded_reason is not None:
+        record_ask(status="degraded", subdomain=subdomain_label, latency_seconds=total_ms / 1000)
+        return _degraded_ask_response(body, retrieved_chunks, degraded_reason, usage)
+
+    # 9. Citations
+    rag_response = _rag_ask_response(
+        body, gen_response, retrieved_chunks, sources_list, warnings, usage
+    )
+    record_ask(status="success", subdomain=subdomain_label, latency_seconds=total_ms / 1000)
+
+    try:
+        if not revalidating:
+            await _aextract_and_store_memories(
+                body.query, gen_response.content, query_embedding, memory_store
+            )
+    except Exception:
+        logger.debug("Memory extraction skipped (best-effort)")
+
+    cacheable = rag_response.model_dump()
+    cacheable["_subdomain"] = subdomain_label
+    try:
+        await asyncio.to_thread(
+            response_cache.set,
+            body.query,
+            top_k=body.top_k,
+            threshold=body.confidence_threshold,
+            response=cacheable,
+            sources=[src["source_name"] for src in sources_list],
+            profile=body.profile,
+        )
+        response_cache.index_query(
+            body.query,
+            query_embedding,
+            top_k=body.top_k,
+            threshold=body.confidence_threshold,
+            scope=detected_sub_domains,
+            profile=body.profile,
+        )
+    except Exception:  # noqa: BLE001
+        logger.warning("Cache write failed — response not cached (best-effort)")
+
+    return rag_response
+
+
+@router.post("/ask/stream")
+async def ask_stream(
+    body: AskRequest,
+    embedder: Embedder,
+    generator: Generator,
+    rate_limiter: Limiter,
+    embedding_breaker: EmbBreaker,
+    memory_store: AsyncMemStore,
+    vector_index: LocalIndex,
+    retrieval_cache: RetrCache,
+) -> StreamingResponse:
+    """Stream an answer as Server-Sent Events (SSE), asynchronously.
+
+    Same event sequence and payloads as :func:`api.routes.ask.ask_stream`.
+
+    Raises:
+        HTTPException 429: Rate limit exceeded (before stream starts).
+    """
+    session_id = body.session_id or "default"
+    if not await asyncio.to_thread(rate_limiter.allow, session_id):
+        record_rate_limited()
+        raise HTTPException(status_code=429, detail=_RATE_LIMITED)
+
+    async def event_stream() -> AsyncIterator[str]:
+        t_start = time.perf_counter()
+
+        stages = AsyncStageScheduler()
+        stages.submit("genre_recipe", asyncio.to_thread, _genre_context, body.query)
+
+        yield _sse({"type": "step", "step": "expanding"})
+        _intents, expanded_query, query_terms = _expand(body.query)
+        active_sub_domains = list(detect_sub_domains(body.query).active)
+
+        yield _sse({"type": "step", "step": "embedding"})
+        t_embed = time.perf_counter()
+        try:
+            query_embedding = await stages.run(
+                "embedding", _aembed, embedder, embedding_breaker, expanded_query
+            )
+        except Exception as exc:
+            logger.error("Streaming embed failed: %s", exc)
+            yield _sse(
+                {
+                    "type": "error",
+                    "code": "embedding_unavailable",
+                    "message": "Failed to embed query. Please try again.",
+                }
+            )
+            return
+        embedding_ms = (time.perf_counter() - t_embed) * 1000
+        stages.submit("memory", _amemory_context, memory_store, query_embedding)
+
+        yield _sse({"type": "step", "step": "searching"})
+        t_search = time.perf_counter()
+        search_legs: dict[str, float] = {}
+        cache_params = _retrieval_cache_params(
+            active_sub_domains, query_terms, None, body.top_k, body.profile
+        )
+        cached = retrieval_cache.get(query_embedding, **cache_params)
+        if cached is not None:
+            reranked = list(cached.results)
+            active_sub_domains = list(cached.sub_domains)
+        else:
+            try:
+                # The stream outlives the leader's request — use our own session
+                async with AsyncSessionLocal() as db:
+                    reranked, active_sub_domains, retrieval_warnings = await stages.run(
+                        "search",
+                        _asearch_and_rerank,
+                        db,
+                        query_embedding,
+                        query_terms,
+                        active_sub_domains,
+                        vector_index=vector_index,
+                        top_k=body.top_k,
+                        timings=search_legs,
+                        profile=body.profile,
+                    )
+            except Exception as exc:
+                logger.error("Streaming search failed: %s", exc)
+                yield _sse(
+                    {
+                        "type": "error",
+                        "code": "search_unavailable",
+                        "message": "Vector search failed. Please try again.",
+                    }
+                )
+                return
+            if not retrieval_warnings:
+                retrieval_cache.set(
+                    query_embedding,
+                    results=reranked,
+                    sub_domains=active_sub_domains,
+                    **cache_params,
+                )
+        search_ms = (time.perf_counter() - t_search) * 1000
+
+        refusal = _insufficient_knowledge(reranked, body.confidence_threshold)
+        if refusal is not None:
+            yield _sse({"type": "error", "code": "insufficient_knowledge", "message": refusal})
+            return
+
+        retrieved_chunks = _retrieved_chunks(reranked)
+        sources_list = format_source_list(retrieved_chunks)
+        gen_request = _generation_request(
+            body,
+            active_sub_domains,
+            await stages.result("genre_recipe"),
+            await stages.result("memory"),
+            format_context_block(retrieved_chunks),
+        )
+
+        yield _sse({"type": "step", "step": "generating"})
+        yield _sse({"type": "sources", "sources": _sources_payload(sources_list)})
+
+        t_gen = time.perf_counter()
+        pre_generation_ms = (t_gen - t_start) * 1000
+        full_answer: list[str] = []
+        try:
+            async for chunk_text in _agenerate_stream(generator, gen_request):
+                full_answer.append(chunk_text)
+                yield _sse({"type": "chunk", "content": chunk_text})
+        except Exception as exc:
+            logger.error("Streaming generation failed: %s", exc)
+            yield _sse(
+                {
+                    "type": "error",
+                    "code": "generation_failed",
+                    "message": "LLM generation failed mid-stream. Partial answer above.",
+                }
+            )
+            return
+        generation_ms = (time.perf_counter() - t_gen) * 1000
+        total_ms = (time.perf_counter() - t_start) * 1000
+
+        answer_text = "".join(full_answer)
+        citation_result = validate_citations(
+            extract_citations(answer_text), num_sources=len(retrieved_chunks)
+        )
+        try:
+            await _aextract_and_store_memories(
+                body.query, answer_text, query_embedding, memory_store
+            )
+        except Exception:
+            logger.debug("Stream memory extraction skipped (best-effort)")
+
+        yield _sse(
+            {
+                "type": "done",
+                "citations": list(citation_result.citations),
+                "usage": {
+                    "embedding_ms": round(embedding_ms, 2),
+                    "search_ms": round(search_ms, 2),
+                    "search_legs_ms": _round_legs(search_legs),
+                    "stages_ms": stages.timings,
+                    "pre_generation_ms": round(pre_generation_ms, 2),
+                    "generation_ms": round(generation_ms, 2),
+                    "total_ms": round(total_ms, 2),
+                    "retrieval_cache_hit": cached is not None,
+                },
+            }
+        )
+
+    key = _response_key(body)
+    return StreamingResponse(
+        _FLIGHTS.stream(key, event_stream),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable nginx buffering for SSE
+            "Connection": "keep-alive",
+        },
+    )
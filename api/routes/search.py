@@ -8,21 +8,34 @@ Improvements over baseline:
     - **Resilient reranking**: if rerank fails, returns raw results + warning.
     - **Response headers**: timing metadata duplicated into HTTP headers
       for load-balancer / proxy observability.
+    - **Local index backend**: ``SEARCH_BACKEND=mmap`` serves queries from the
+      in-process vector index; with pgvector it takes over when the DB fails.
+    - **Retrieval cache**: reranked results are cached per query embedding
+      and settings, so a warm retrieval skips search and rerank entirely.
 """
 
 import logging
 import time
 import uuid
+from functools import partial
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from api.deps import get_db, get_embedding_provider
+from api.deps import (
+    get_db,
+    get_embedding_provider,
+    get_retrieval_cache,
+    get_vector_index,
+    prefer_local_index,
+)
 from api.schemas.search import ResponseMeta, SearchRequest, SearchResponse, SearchResult
 from core.query_expansion import detect_mastering_intent, expand_query
-from db.rerank import rerank_results
-from db.search import search_chunks
+from db.rerank import EmbeddingLoader, rerank_results
+from db.search import fetch_embeddings, search_chunks
+from db.vector_index import MmapVectorIndex
+from infrastructure.cache import RetrievalCache
 from ingestion.embeddings import OpenAIEmbeddingProvider
 
 logger = logging.getLogger(__name__)
@@ -31,6 +44,8 @@ router = APIRouter(tags=["search"])
 
 DbSession = Annotated[Session, Depends(get_db)]
 Embedder = Annotated[OpenAIEmbeddingProvider, Depends(get_embedding_provider)]
+LocalIndex = Annotated[MmapVectorIndex | None, Depends(get_vector_index)]
+RetrCache = Annotated[RetrievalCache, Depends(get_retrieval_cache)]
 
 
 @router.post("/search", response_model=SearchResponse)
@@ -39,6 +54,8 @@ def search(
     response: Response,
     db: DbSession,
     embedder: Embedder,
+    vector_index: LocalIndex,
+    retrieval_cache: RetrCache,
 ) -> SearchResponse:
     """
     Perform semantic search over ingested document chunks.
@@ -68,43 +85,32 @@ def search(
         ) from exc
     embedding_ms = (time.perf_counter() - t_embed) * 1000
 
-    # 3. Search the database (fetch 3x for reranking diversity)
+    # 3–4. Search + rerank, unless this retrieval is already cached
     t_search = time.perf_counter()
-    try:
-        raw_results = search_chunks(db, query_embedding, top_k=body.top_k * 3)
-    except Exception as exc:
-        logger.error("Search failed [request_id=%s]: %s", request_id, exc)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Search query failed. request_id={request_id}",
-        ) from exc
-
-    # 4. Apply reranking — resilient: degrade to raw results on failure
     filename_keywords = None
     if intent.category in ("mastering", "mixing"):
         filename_keywords = ["mastering", "mixing", "masterclass", "mix-mastering"]
-
-    try:
-        reranked = rerank_results(
-            raw_results,
-            top_k=body.top_k,
-            max_per_document=1,
-            course_boost=1.25,  # 25% boost for Pete Tong courses
-            youtube_boost=1.0,
-            filename_keywords=filename_keywords,
-            filename_boost=1.20,
-            query_embedding=query_embedding if body.use_mmr else None,
-            mmr_lambda=body.mmr_lambda,
-            use_mmr=body.use_mmr,
-        )
-    except Exception as exc:
-        logger.warning(
-            "Reranking failed, falling back to raw results [request_id=%s]: %s",
-            request_id,
-            exc,
+    cache_params = {
+        "scope": (),
+        "top_k": body.top_k,
+        "settings": (
+            "search",
+            tuple(filename_keywords or ()),
+            body.use_mmr,
+            body.mmr_lambda,
+            body.profile,
+        ),
+    }
+    cached = retrieval_cache.get(query_embedding, **cache_params)
+    if cached is not None:
+        reranked = list(cached.results)
+    else:
+        reranked = _search_and_rerank(
+            body, db, query_embedding, vector_index, filename_keywords, warnings, request_id
         )
-        warnings.append("reranking_failed: results returned without reranking")
-        reranked = raw_results[: body.top_k]
+        # Degraded retrievals (local-index fallback, unreranked) are not cached.
+        if not warnings:
+            retrieval_cache.set(query_embedding, results=reranked, **cache_params)
 
     search_ms = (time.perf_counter() - t_search) * 1000
 
@@ -147,5 +153,79 @@ def search(
             total_ms=round(total_ms, 2),
             cache_hit=cache_hit,
             request_id=request_id,
+            retrieval_cache_hit=cached is not None,
         ),
     )
+
+
+def _search_and_rerank(
+    body: SearchRequest,
+    db: Session,
+    query_embedding: list[float],
+    vector_index: MmapVectorIndex | None,
+    filename_keywords: list[str] | None,
+    warnings: list[str],
+    request_id: str,
+) -> list:
+    """Run vector search and reranking for ``POST /search``.
+
+    Falls back to the local index when the database search fails and to
+    raw results when reranking fails, appending a warning for each.
+
+    Returns:
+        Reranked ``(chunk, score)`` pairs (at most ``body.top_k``).
+
+    Raises:
+        HTTPException 500: Search failed and no local index can take over.
+    """
+    # Search the database (fetch 3x for reranking diversity)
+    embedding_loader: EmbeddingLoader = partial(fetch_embeddings, db)
+    try:
+        if vector_index is not None and prefer_local_index():
+            embedding_loader = vector_index.fetch_embeddings
+            raw_results = vector_index.search(query_embedding, top_k=body.top_k * 3)
+        else:
+            raw_results = search_chunks(
+                db, query_embedding, top_k=body.top_k * 3, profile=body.profile
+            )
+    except Exception as exc:
+        if vector_index is None or prefer_local_index():
+            logger.error("Search failed [request_id=%s]: %s", request_id, exc)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Search query failed. request_id={request_id}",
+            ) from exc
+        logger.warning(
+            "Search failed, falling back to local vector index [request_id=%s]: %s",
+            request_id,
+            exc,
+        )
+        warnings.append("search_fallback_local_index: results served from local vector index")
+        embedding_loader = vector_index.fetch_embeddings
+        raw_results = vector_index.search(query_embedding, top_k=body.top_k * 3)
+
+    # Apply reranking — resilient: degrade to raw results on failure
+    try:
+        reranked = rerank_results(
+            raw_results,
+            top_k=body.top_k,
+            max_per_document=1,
+            course_boost=1.25,  # 25% boost for Pete Tong courses
+            youtube_boost=1.0,
+            filename_keywords=filename_keywords,
+            filename_boost=1.20,
+            query_embedding=query_embedding if body.use_mmr else None,
+            mmr_lambda=body.mmr_lambda,
+            use_mmr=body.use_mmr,
+            embedding_loader=embedding_loader,
+        )
+    except Exception as exc:
+        logger.warning(
+            "Reranking failed, falling back to raw results [request_id=%s]: %s",
+            request_id,
+            exc,
+        )
+        warnings.append("reranking_failed: results returned without reranking")
+        reranked = raw_results[: body.top_k]
+
+    return reranked
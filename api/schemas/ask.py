@@ -11,7 +11,7 @@ Response modes:
   "hybrid"   — Tool result injected as context into RAG pipeline (future).
 """
 
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -65,6 +65,13 @@ class AskRequest(BaseModel):
             "Defaults to 'default' if not provided."
         ),
     )
+    profile: Literal["fast", "balanced", "exhaustive"] | None = Field(
+        default=None,
+        description=(
+            "HNSW recall/latency preset: 'fast' (ef_search=40), 'balanced' (100, iterative "
+            "scan), 'exhaustive' (400, strict iterative scan). Omit for the server default."
+        ),
+    )
 
     @field_validator("query")
     @classmethod
@@ -96,6 +103,25 @@ class UsageMetadata(BaseModel):
     total_tokens: int = Field(..., description="Sum of input + output tokens.")
     embedding_ms: float = Field(..., description="Time to embed query (milliseconds).")
     search_ms: float = Field(..., description="Time for vector search (milliseconds).")
+    search_legs_ms: dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            "Per-leg retrieval timings in milliseconds: 'vector_ms', 'keyword_ms', and "
+            "'keyword_timeout_ms' when the keyword leg was abandoned (vector-only results)."
+        ),
+    )
+    stages_ms: dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            "Per-stage timings in milliseconds: 'embedding' and 'search' on the critical "
+            "path, plus the stages that ran alongside them ('memory', 'genre_recipe', "
+            "'classify').  Overlapping stages can sum to more than the wall clock."
+        ),
+    )
+    pre_generation_ms: float = Field(
+        default=0.0,
+        description="Wall-clock time from pipeline start until generation began (milliseconds).",
+    )
     generation_ms: float = Field(..., description="Time for LLM generation (milliseconds).")
     total_ms: float = Field(..., description="Total request duration (milliseconds).")
     model: str = Field(..., description="LLM model identifier that generated the response.")
@@ -107,6 +133,31 @@ class UsageMetadata(BaseModel):
         default=False,
         description="True if the query embedding was served from in-memory cache.",
     )
+    semantic_similarity: float | None = Field(
+        default=None,
+        description=(
+            "Set on a semantic cache hit: cosine similarity between this query and the "
+            "cached query whose answer was returned."
+        ),
+    )
+    stale: bool = Field(
+        default=False,
+        description=(
+            "True if the cached response is past its soft TTL. It is still served, "
+            "and a background refresh updates the cache for later requests."
+        ),
+    )
+    coalesced: bool = Field(
+        default=False,
+        description=(
+            "True if this request waited for an identical in-flight request and "
+            "shares its answer instead of running the pipeline itself."
+        ),
+    )
+    retrieval_cache_hit: bool = Field(
+        default=False,
+        description="True if search + rerank were served from the in-process retrieval cache.",
+    )
     cost_usd: float = Field(
         default=0.0,
         description=(
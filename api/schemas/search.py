@@ -4,6 +4,8 @@ Pydantic schemas for the ``/search`` endpoint.
 Defines request validation and response serialization models.
 """
 
+from typing import Literal
+
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -17,6 +19,10 @@ class ResponseMeta(BaseModel):
         ..., description="True if embedding was retrieved from cache, False if API call was made."
     )
     request_id: str = Field(..., description="Unique identifier for this request (UUID4).")
+    retrieval_cache_hit: bool = Field(
+        default=False,
+        description="True if search + rerank were served from the in-process retrieval cache.",
+    )
 
 
 class SearchRequest(BaseModel):
@@ -47,6 +53,13 @@ class SearchRequest(BaseModel):
         le=1.0,
         description="MMR trade-off: 1.0 = pure relevance, 0.0 = pure diversity. Only used when use_mmr=True.",
     )
+    profile: Literal["fast", "balanced", "exhaustive"] | None = Field(
+        default=None,
+        description=(
+            "HNSW recall/latency preset: 'fast' (ef_search=40), 'balanced' (100, iterative "
+            "scan), 'exhaustive' (400, strict iterative scan). Omit for the server default."
+        ),
+    )
 
     @field_validator("query")
     @classmethod
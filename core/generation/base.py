@@ -10,7 +10,7 @@ any class with the right method signature satisfies the protocol
 without inheriting from it.
 """
 
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 from dataclasses import dataclass
 from typing import Protocol, runtime_checkable
 
@@ -126,3 +126,22 @@ class GenerationProvider(Protocol):
             RuntimeError: If the streaming API call fails.
         """
         ...
+
+
+@runtime_checkable
+class AsyncGenerationProvider(Protocol):
+    """
+    Optional async counterpart of :class:`GenerationProvider`.
+
+    Implemented by providers whose SDK has a native async client, so the
+    async ``/ask`` pipeline can await generation on the event loop instead
+    of parking a worker thread for the whole LLM call.
+    """
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        """Async variant of ``GenerationProvider.generate``."""
+        ...
+
+    def agenerate_stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """Async variant of ``GenerationProvider.generate_stream``."""
+        ...
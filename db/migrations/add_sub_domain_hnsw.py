@@ -0,0 +1,149 @@
+"""Migration: one partial HNSW index per music sub-domain on chunk_records. Idempotent.
+
+pgvector filters a global HNSW scan *after* the graph walk, so a selective
+``WHERE sub_domain = ...`` returns fewer than ``top_k`` rows unless
+``ef_search`` is raised.  A partial index per sub-domain holds only that
+partition's vectors, so a filtered query walks a graph in which every
+candidate already matches.  ``db.search`` renders the filter as a literal
+so the planner can match the index predicate.
+
+Indexes are built ``CONCURRENTLY`` — ingestion keeps writing while they
+build.  Re-run after adding a sub-domain to ``MUSIC_SUB_DOMAINS``.
+
+Usage:
+    python -m db.migrations.add_sub_domain_hnsw                       # all sub-domains
+    python -m db.migrations.add_sub_domain_hnsw --sub-domain mixing practice
+    python -m db.migrations.add_sub_domain_hnsw --drop-stale          # also drop removed ones
+    python -m db.migrations.add_sub_domain_hnsw --list
+"""
+
+import argparse
+import logging
+import re
+from collections.abc import Iterable
+
+from sqlalchemy import text
+
+from db.session import engine
+from domains.music.sub_domains import MUSIC_SUB_DOMAINS
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = "idx_chunk_embedding_hnsw_"
+
+# Sub-domains are interpolated into DDL (index name and predicate literal).
+_SUB_DOMAIN_RE = re.compile(r"^[a-z][a-z0-9_]{0,38}$")
+
+
+def partial_index_name(sub_domain: str) -> str:
+    """Return the partial HNSW index name for *sub_domain*.
+
+    Raises:
+        ValueError: If *sub_domain* is not a lowercase identifier short
+            enough to fit Postgres' 63-byte name limit.
+    """
+    if not _SUB_DOMAIN_RE.match(sub_domain):
+        raise ValueError(f"sub_domain must be a lowercase identifier, got {sub_domain!r}")
+    return f"{INDEX_PREFIX}{sub_domain}"
+
+
+def create_index_sql(sub_domain: str) -> str:
+    """Build the ``CREATE INDEX`` statement for *sub_domain*.  Pure function — no I/O.
+
+    The ``WHERE`` predicate must match the filter ``db.search`` emits
+    (``sub_domain = '<literal>'``) for the planner to choose the index.
+    """
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partial_index_name(sub_domain)} "
+        "ON chunk_records USING hnsw (embedding vector_cosine_ops) "
+        f"WITH (m = 16, ef_construction = 64) WHERE sub_domain = '{sub_domain}'"
+    )
+
+
+def existing_indexes() -> dict[str, str]:
+    """Return ``{sub_domain: index_name}`` for partial HNSW indexes present in the database."""
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE tablename = 'chunk_records' AND indexname LIKE :prefix"
+            ),
+            {"prefix": INDEX_PREFIX.replace("_", r"\_") + "%"},
+        ).scalars()
+        return {name.removeprefix(INDEX_PREFIX): name for name in names}
+
+
+def run(sub_domains: Iterable[str] = MUSIC_SUB_DOMAINS, *, drop_stale: bool = False) -> None:
+    """Create a partial HNSW index for each of *sub_domains*.
+
+    Safe to run multiple times — uses ``IF NOT EXISTS``.  An interrupted
+    concurrent build leaves an ``INVALID`` index behind; it is dropped and
+    rebuilt on the next run.
+
+    Args:
+        sub_domains: Sub-domains to index.  Defaults to ``MUSIC_SUB_DOMAINS``.
+        drop_stale: Also drop partial indexes whose sub-domain is no longer
+            in ``MUSIC_SUB_DOMAINS``.
+
+    Raises:
+        ValueError: If a sub-domain name is not a valid identifier.
+    """
+    wanted = list(dict.fromkeys(sub_domains))
+    for sd in wanted:
+        partial_index_name(sd)  # validate before touching the database
+
+    # CREATE / DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        invalid = set(
+            conn.execute(
+                text(
+                    "SELECT c.relname FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE NOT i.indisvalid AND c.relname LIKE :prefix"
+                ),
+                {"prefix": INDEX_PREFIX.replace("_", r"\_") + "%"},
+            ).scalars()
+        )
+        for sd in wanted:
+            name = partial_index_name(sd)
+            if name in invalid:
+                logger.warning("Index %s is INVALID (interrupted build) — rebuilding", name)
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(create_index_sql(sd)))
+            logger.info("Index %s ready", name)
+
+        if drop_stale:
+            for sd, name in existing_indexes().items():
+                if sd not in MUSIC_SUB_DOMAINS:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                    logger.info("Dropped stale index %s", name)
+        conn.execute(text("ANALYZE chunk_records"))
+    logger.info("Migration complete")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sub-domain",
+        nargs="+",
+        choices=MUSIC_SUB_DOMAINS,
+        default=list(MUSIC_SUB_DOMAINS),
+        help="Sub-domains to index (default: all).",
+    )
+    parser.add_argument(
+        "--drop-stale",
+        action="store_true",
+        help="Drop partial indexes for sub-domains no longer in MUSIC_SUB_DOMAINS.",
+    )
+    parser.add_argument("--list", action="store_true", help="List existing indexes and exit.")
+    args = parser.parse_args()
+    if args.list:
+        present = existing_indexes()
+        for sd in sorted(set(MUSIC_SUB_DOMAINS) | set(present)):
+            status = "ok" if sd in present else "missing"
+            if sd not in MUSIC_SUB_DOMAINS:
+                status = "stale"
+            print(f"{sd:<20}{status}")
+    else:
+        run(args.sub_domain, drop_stale=args.drop_stale)
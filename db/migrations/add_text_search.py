@@ -0,0 +1,51 @@
+"""Migration: add generated tsvector column + GIN index to chunk_records. Idempotent."""
+
+import logging
+
+from sqlalchemy import text
+
+from db.models import TEXT_SEARCH_CONFIG
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+def run() -> None:
+    """Add the ``text_search`` tsvector column and its GIN index to chunk_records.
+
+    The column is ``GENERATED ALWAYS ... STORED`` from ``text``, so existing
+    rows are backfilled by the ``ALTER TABLE`` (a table rewrite — run it in a
+    maintenance window on large corpora) and new rows need no ingestion change.
+
+    Safe to run multiple times — checks for column existence before altering
+    and creates the index with ``IF NOT EXISTS``.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name='chunk_records' AND column_name='text_search'"
+            )
+        )
+        if result.fetchone():
+            logger.info("text_search column already exists — skipping ALTER")
+        else:
+            conn.execute(
+                text(
+                    "ALTER TABLE chunk_records ADD COLUMN text_search tsvector "
+                    f"GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', "
+                    "coalesce(text, ''))) STORED"
+                )
+            )
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_text_search_gin "
+                "ON chunk_records USING gin (text_search)"
+            )
+        )
+        logger.info("Migration complete")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()
@@ -6,6 +6,8 @@ Uses pgvector for embedding storage and similarity search.
 
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
+    BigInteger,
+    Computed,
     DateTime,
     ForeignKey,
     Index,
@@ -15,8 +17,14 @@ from sqlalchemy import (
     UniqueConstraint,
     func,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+# Text search configuration shared by the generated column and keyword queries.
+TEXT_SEARCH_CONFIG = "english"
+
+EMBEDDING_DIM = 1536
+
 
 class Base(DeclarativeBase):
     pass
@@ -63,7 +71,16 @@ class ChunkRecord(Base):
     text: Mapped[str] = mapped_column(Text)
     page_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
     sub_domain: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
-    embedding: Mapped[list[float]] = mapped_column(Vector(1536))
+    # Quantized search indexes ``embedding`` expressions (halfvec, binary) —
+    # see db/migrations/add_quantized_embeddings.py.
+    embedding: Mapped[list[float]] = mapped_column(Vector(EMBEDDING_DIM))
+    # Generated by Postgres from ``text`` — never written by the application.
+    text_search: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(text, ''))", persisted=True),
+        nullable=True,
+        deferred=True,
+    )
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     document: Mapped["Document | None"] = relationship(back_populates="chunks")
@@ -77,4 +94,26 @@ class ChunkRecord(Base):
             postgresql_with={"m": 16, "ef_construction": 64},
             postgresql_ops={"embedding": "vector_cosine_ops"},
         ),
+        Index("idx_chunk_text_search_gin", "text_search", postgresql_using="gin"),
+    )
+
+
+class IngestManifest(Base):
+    """One row per ingested file: what its chunks were built from.
+
+    ``size`` and ``mtime_ns`` let a re-run skip an unchanged file without
+    reading it; ``content_hash`` (SHA-256) tells a touched file from a
+    changed one.  Written by ``ingestion.ingest`` once every chunk of the
+    file is committed.
+    """
+
+    __tablename__ = "ingest_manifest"
+
+    source_path: Mapped[str] = mapped_column(String(512), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    mtime_ns: Mapped[int] = mapped_column(BigInteger)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    chunk_count: Mapped[int] = mapped_column(Integer, default=0)
+    ingested_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
@@ -4,11 +4,21 @@ Result reranking for search quality improvements.
 Implements document diversity, authority-based boosting, and MMR
 (Maximal Marginal Relevance) to improve perceived search quality
 and business value.
+
+Search results may be ORM ``ChunkRecord`` objects (carrying ``embedding``)
+or projection-only ``ChunkHit`` tuples.  For the latter, MMR loads the
+candidate embeddings in one batch through an ``embedding_loader``.
 """
 
+from collections.abc import Callable, Sequence
+
 import numpy as np
 
 from db.models import ChunkRecord
+from db.search import ChunkHit
+
+EmbeddingLoader = Callable[[Sequence[int]], np.ndarray]
+"""Maps chunk ids to a ``(len(ids), dim)`` embedding matrix, row-aligned."""
 
 
 def _cosine_similarity(a: list[float], b: list[float]) -> float:
@@ -29,6 +39,15 @@ def _cosine_similarity(a: list[float], b: list[float]) -> float:
     return float(np.dot(va, vb) / denom)
 
 
+def _sorted_by_score(
+    results: list[tuple[ChunkRecord | ChunkHit, float]], scores: np.ndarray
+) -> list[tuple[ChunkRecord | ChunkHit, float]]:
+    """Pair records with *scores* and sort descending (stable, like ``list.sort``)."""
+    order = np.argsort(-scores, kind="stable")
+    values = scores.tolist()
+    return [(results[i][0], values[i]) for i in order]
+
+
 def infer_content_type(source_path: str) -> str:
     """
     Infer content type from source path.
@@ -67,24 +86,23 @@ def apply_authority_boost(
     Returns:
         Same results with adjusted scores
     """
-    boosted = []
-
-    for record, score in results:
-        content_type = infer_content_type(record.source_path)
-
-        if content_type == "course":
-            adjusted_score = min(1.0, score * course_boost)  # Cap at 1.0
-        elif content_type == "youtube":
-            adjusted_score = score * youtube_boost
-        else:
-            adjusted_score = score
+    if not results:
+        return []
 
-        boosted.append((record, adjusted_score))
+    scores = np.fromiter((score for _, score in results), dtype=np.float64, count=len(results))
+    content_types = [infer_content_type(record.source_path) for record, _ in results]
+    multipliers = np.array(
+        [
+            course_boost if ct == "course" else youtube_boost if ct == "youtube" else 1.0
+            for ct in content_types
+        ]
+    )
+    is_course = np.array([ct == "course" for ct in content_types])
 
-    # Re-sort by adjusted scores
-    boosted.sort(key=lambda x: x[1], reverse=True)
+    adjusted = scores * multipliers
+    adjusted[is_course] = np.minimum(adjusted[is_course], 1.0)  # Cap at 1.0
 
-    return boosted
+    return _sorted_by_score(results, adjusted)
 
 
 def apply_filename_boost(
@@ -109,25 +127,18 @@ def apply_filename_boost(
     if not boost_keywords:
         return results
 
-    boosted = []
-
-    for record, score in results:
-        source_lower = record.source_name.lower()
-
-        # Check if any keyword matches filename
-        has_match = any(keyword.lower() in source_lower for keyword in boost_keywords)
-
-        if has_match:
-            adjusted_score = min(1.0, score * boost_multiplier)  # Cap at 1.0
-        else:
-            adjusted_score = score
+    keywords = [keyword.lower() for keyword in boost_keywords]
+    scores = np.fromiter((score for _, score in results), dtype=np.float64, count=len(results))
+    # Check if any keyword matches filename
+    has_match = np.array(
+        [any(k in record.source_name.lower() for k in keywords) for record, _ in results],
+        dtype=bool,
+    )
 
-        boosted.append((record, adjusted_score))
+    adjusted = scores.copy()
+    adjusted[has_match] = np.minimum(scores[has_match] * boost_multiplier, 1.0)  # Cap at 1.0
 
-    # Re-sort by adjusted scores
-    boosted.sort(key=lambda x: x[1], reverse=True)
-
-    return boosted
+    return _sorted_by_score(results, adjusted)
 
 
 def enforce_document_diversity(
@@ -166,12 +177,13 @@ def enforce_document_diversity(
 
 
 def mmr_rerank(
-    results: list[tuple[ChunkRecord, float]],
+    results: list[tuple[ChunkRecord | ChunkHit, float]],
     query_embedding: list[float],
     *,
     lambda_: float = 0.7,
     top_k: int = 5,
-) -> list[tuple[ChunkRecord, float]]:
+    embeddings: np.ndarray | None = None,
+) -> list[tuple[ChunkRecord | ChunkHit, float]]:
     """Select results via Maximal Marginal Relevance (MMR).
 
     MMR balances **relevance** (similarity to query) against
@@ -179,51 +191,67 @@ def mmr_rerank(
 
     ``score_mmr = lambda_ * relevance - (1 - lambda_) * max_redundancy``
 
+    Candidate embeddings are stacked and normalised once and the full
+    candidate-candidate similarity matrix comes from a single matrix
+    product; the greedy loop then only updates a running max-redundancy
+    vector — O(n·d + k·n) array work instead of O(k²·d) Python calls.
+
     Args:
-        results: Candidate ``(ChunkRecord, similarity_score)`` pairs.
-            Each ``ChunkRecord`` must have a populated ``embedding`` attribute.
+        results: Candidate ``(record, similarity_score)`` pairs.  Each record
+            must have a populated ``embedding`` attribute unless
+            *embeddings* is given.
         query_embedding: The query's embedding vector.
         lambda_: Trade-off parameter (0–1).  1.0 = pure relevance,
             0.0 = pure diversity.  Default 0.7.
         top_k: Number of results to return.
+        embeddings: Optional ``(len(results), dim)`` matrix whose row *i* is
+            the embedding of ``results[i]`` — used instead of
+            ``record.embedding``.
 
     Returns:
         Up to *top_k* ``(ChunkRecord, score)`` tuples reranked by MMR.
+
+    Raises:
+        ValueError: If *embeddings* does not have one row per result.
     """
     if not results:
         return []
 
-    candidates = list(results)
-    selected: list[tuple[ChunkRecord, float]] = []
-
-    while len(selected) < top_k and candidates:
-        best_mmr = float("-inf")
-        best_idx = 0
-
-        for i, (record, relevance) in enumerate(candidates):
-            # Max similarity to any already-selected result
-            if selected:
-                redundancy = max(
-                    _cosine_similarity(record.embedding, sel_rec.embedding)
-                    for sel_rec, _ in selected
-                )
-            else:
-                redundancy = 0.0
-
-            mmr_score = lambda_ * relevance - (1.0 - lambda_) * redundancy
-
-            if mmr_score > best_mmr:
-                best_mmr = mmr_score
-                best_idx = i
-
-        chosen_record, chosen_score = candidates.pop(best_idx)
-        selected.append((chosen_record, chosen_score))
-
-    return selected
+    if embeddings is None:
+        matrix = np.asarray([record.embedding for record, _ in results], dtype=np.float64)
+    else:
+        matrix = np.asarray(embeddings, dtype=np.float64)
+    if matrix.shape[0] != len(results):
+        raise ValueError(f"embeddings has {matrix.shape[0]} rows for {len(results)} results")
+    matrix = matrix.reshape(len(results), -1)
+
+    # Normalise once; zero vectors stay zero (similarity 0, like _cosine_similarity).
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    unit = matrix / norms
+    similarity = unit @ unit.T  # (n, n) candidate-candidate cosine, one GEMM
+
+    relevance = np.fromiter((score for _, score in results), dtype=np.float64, count=len(results))
+    # Max similarity of each candidate to anything selected so far
+    # (may be negative; 0 before the first pick).
+    redundancy = np.full(len(results), -np.inf)
+    available = np.ones(len(results), dtype=bool)
+    selected: list[int] = []
+
+    for _ in range(min(top_k, len(results))):
+        penalty = redundancy if selected else 0.0
+        mmr_scores = lambda_ * relevance - (1.0 - lambda_) * penalty
+        mmr_scores[~available] = -np.inf
+        best = int(np.argmax(mmr_scores))  # first max wins, as in a strict ">" scan
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return [results[i] for i in selected]
 
 
 def rerank_results(
-    results: list[tuple[ChunkRecord, float]],
+    results: list[tuple[ChunkRecord | ChunkHit, float]],
     top_k: int = 5,
     max_per_document: int = 1,
     course_boost: float = 1.25,
@@ -233,7 +261,8 @@ def rerank_results(
     query_embedding: list[float] | None = None,
     mmr_lambda: float = 0.7,
     use_mmr: bool = False,
-) -> list[tuple[ChunkRecord, float]]:
+    embedding_loader: EmbeddingLoader | None = None,
+) -> list[tuple[ChunkRecord | ChunkHit, float]]:
     """
     Full reranking pipeline: authority boost + filename boost + diversity.
 
@@ -251,6 +280,10 @@ def rerank_results(
         query_embedding: Query vector (required when ``use_mmr=True``)
         mmr_lambda: MMR trade-off parameter (0=diversity, 1=relevance)
         use_mmr: If True, use MMR for diversity instead of document-count
+        embedding_loader: Fetches embeddings by chunk id for results that
+            do not carry them (``ChunkHit``).  Called once, only when MMR
+            actually runs.  Without it, such results fall back to the
+            document-count filter.
 
     Returns:
         Reranked results optimized for quality and diversity
@@ -263,12 +296,21 @@ def rerank_results(
         boosted = apply_filename_boost(boosted, filename_keywords, filename_boost)
 
     # Step 3: Enforce diversity (MMR or document-count)
+    embeddings: np.ndarray | None = None
+    if use_mmr and query_embedding is not None and boosted:
+        if not all(hasattr(record, "embedding") for record, _ in boosted):
+            if embedding_loader is None:
+                use_mmr = False
+            else:
+                embeddings = embedding_loader([record.id for record, _ in boosted])
+
     if use_mmr and query_embedding is not None:
         diverse = mmr_rerank(
             boosted,
             query_embedding,
             lambda_=mmr_lambda,
             top_k=top_k,
+            embeddings=embeddings,
         )
     else:
         diverse = enforce_document_diversity(boosted, max_per_document, top_k)
@@ -2,14 +2,257 @@
 Semantic and keyword search queries against the chunk_records table.
 
 Uses pgvector's cosine distance operator for approximate nearest neighbor
-search over the HNSW index.  Optionally supports keyword search via
-PostgreSQL ``ILIKE`` for hybrid retrieval.
+search over the HNSW index.  Keyword search for hybrid retrieval uses
+PostgreSQL full-text search over a GIN-indexed generated ``tsvector``.
+
+``sub_domain`` filters are rendered as SQL literals (see
+:func:`_sub_domain_filter`) so the planner can prove the predicate of the
+per-sub-domain partial HNSW indexes built by
+``db/migrations/add_sub_domain_hnsw.py`` and walk a graph that holds only
+matching rows.
+
+``search_chunks_multi`` answers a multi-sub-domain query (per-domain top-k
+plus the global fallback) in a single round trip.  ``hybrid_search`` can run
+its keyword leg concurrently on a second pooled connection.
+
+Queries project only the metadata columns into :class:`ChunkHit` tuples —
+the 1536-float embedding never leaves Postgres unless MMR reranking asks
+for it via :func:`fetch_embeddings`.
+
+Environment variables
+---------------------
+``HYBRID_KEYWORD_TIMEOUT_MS``
+    Budget for the concurrent keyword leg of ``hybrid_search`` (default
+    ``250``).  A slower leg is abandoned and results are vector-only.
+
+``HYBRID_SEARCH_WORKERS``
+    Threads available for concurrent keyword legs (default ``8``).  Each
+    in-flight leg holds one pooled connection — keep this within
+    ``DB_MAX_OVERFLOW``.
+
+``SEARCH_QUANTIZATION``
+    First-stage embedding for ``search_chunks``: ``none`` (default, full
+    precision), ``halfvec`` or ``binary``.  Quantized modes shortlist
+    ``top_k * SEARCH_RESCORE_FACTOR`` candidates over the smaller index,
+    then rescore them against the full-precision ``embedding``.  Requires
+    the expression indexes of ``db/migrations/add_quantized_embeddings.py``.
+
+``SEARCH_RESCORE_FACTOR``
+    Shortlist oversampling for quantized search (default ``4`` for
+    ``halfvec``, ``16`` for ``binary``).
 """
 
-from sqlalchemy import func, select
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from typing import Any, Literal, NamedTuple
+
+import numpy as np
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import (
+    String,
+    cast,
+    false,
+    func,
+    literal,
+    select,
+    text,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.orm import Session
 
-from db.models import ChunkRecord
+from db.models import EMBEDDING_DIM, TEXT_SEARCH_CONFIG, ChunkRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYWORD_TIMEOUT_S: float = float(os.getenv("HYBRID_KEYWORD_TIMEOUT_MS", "250")) / 1000
+"""Budget for the concurrent hybrid keyword leg before degrading to vector-only."""
+
+_LEG_WORKERS: int = int(os.getenv("HYBRID_SEARCH_WORKERS", "8"))
+_LEG_EXECUTOR: ThreadPoolExecutor | None = None
+_LEG_EXECUTOR_LOCK = threading.Lock()
+
+SearchProfile = Literal["fast", "balanced", "exhaustive"]
+
+
+@dataclass(frozen=True, slots=True)
+class _ProfileSettings:
+    ef_search: int
+    iterative_scan: str  # "off" | "relaxed_order" | "strict_order" (pgvector >= 0.8)
+
+
+# Recall/latency presets for the HNSW index (m=16, ef_construction=64).
+# ef_search bounds the candidate list per query; iterative scan keeps
+# scanning when a WHERE filter (e.g. sub_domain) discards candidates.
+SEARCH_PROFILES: dict[str, _ProfileSettings] = {
+    "fast": _ProfileSettings(ef_search=40, iterative_scan="off"),
+    "balanced": _ProfileSettings(ef_search=100, iterative_scan="relaxed_order"),
+    "exhaustive": _ProfileSettings(ef_search=400, iterative_scan="strict_order"),
+}
+
+_ITERATIVE_SCAN_MIN_VERSION = (0, 8, 0)
+_pgvector_version: tuple[int, ...] | None = None
+
+# pgvector's default and maximum hnsw.ef_search.
+_DEFAULT_EF_SEARCH = 40
+_MAX_EF_SEARCH = 1000
+
+Quantization = Literal["none", "halfvec", "binary"]
+
+DEFAULT_QUANTIZATION: str = os.getenv("SEARCH_QUANTIZATION", "none")
+"""First-stage embedding used by ``search_chunks`` when none is passed."""
+
+# Binary codes lose far more ranking signal than halfvec, so shortlist wider.
+_RESCORE_FACTORS: dict[str, int] = {"halfvec": 4, "binary": 16}
+_RESCORE_FACTOR_OVERRIDE: int | None = (
+    int(os.environ["SEARCH_RESCORE_FACTOR"]) if os.getenv("SEARCH_RESCORE_FACTOR") else None
+)
+
+
+class ChunkHit(NamedTuple):
+    """Search result row — ``ChunkRecord`` metadata without the embedding.
+
+    Exposes the same attribute names the routes and reranker read from
+    ``ChunkRecord``.  Fetch embeddings on demand with :func:`fetch_embeddings`.
+    """
+
+    id: int
+    doc_id: str
+    source_path: str
+    source_name: str
+    chunk_index: int
+    token_start: int
+    token_end: int
+    text: str
+    page_number: int | None
+    sub_domain: str | None
+
+
+# Column projection matching ChunkHit field order.
+_HIT_COLUMNS = tuple(getattr(ChunkRecord, name) for name in ChunkHit._fields)
+
+
+def _to_hit(row: Any) -> ChunkHit:
+    """Build a :class:`ChunkHit` from a row selected with ``_HIT_COLUMNS``."""
+    return ChunkHit._make(row[: len(ChunkHit._fields)])
+
+
+def fetch_embeddings(session: Session, ids: Sequence[int]) -> np.ndarray:
+    """
+    Load embeddings for *ids* in one query, as a single float32 matrix.
+
+    Args:
+        session: Active SQLAlchemy session.
+        ids: Chunk ids.  Row *i* of the result belongs to ``ids[i]``.
+
+    Returns:
+        ``(len(ids), dim)`` float32 array (``(0, 0)`` when *ids* is empty).
+
+    Raises:
+        LookupError: If any id has no row in ``chunk_records``.
+    """
+    if not ids:
+        return np.empty((0, 0), dtype=np.float32)
+    rows = session.execute(
+        select(ChunkRecord.id, ChunkRecord.embedding).where(ChunkRecord.id.in_(set(ids)))
+    ).all()
+    by_id = {row.id: row.embedding for row in rows}
+    missing = [i for i in ids if i not in by_id]
+    if missing:
+        raise LookupError(f"No embeddings for chunk ids {missing[:10]}")
+    return np.asarray([by_id[i] for i in ids], dtype=np.float32)
+
+
+def _parse_version(raw: str | None) -> tuple[int, ...]:
+    """``"0.8.0"`` → ``(0, 8, 0)``; unknown or missing → ``(0,)``.  Pure function — no I/O."""
+    try:
+        return tuple(int(part) for part in str(raw).split("."))
+    except ValueError:
+        return (0,)
+
+
+def _get_pgvector_version(session: Session) -> tuple[int, ...]:
+    """Installed pgvector extension version — queried once per process."""
+    global _pgvector_version  # noqa: PLW0603
+    if _pgvector_version is None:
+        raw = session.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        _pgvector_version = _parse_version(raw)
+        logger.info("pgvector version: %s", raw)
+    return _pgvector_version
+
+
+def _apply_search_profile(
+    session: Session, profile: SearchProfile | None, *, min_ef_search: int = 0
+) -> None:
+    """
+    Set ``hnsw.ef_search`` (and iterative scan when supported) for the
+    current transaction only — the ``set_config(..., true)`` equivalent of
+    ``SET LOCAL``, batched into one round trip.
+
+    *min_ef_search* raises ``ef_search`` (capped at pgvector's maximum) so an
+    HNSW scan can return a shortlist of that many rows.
+
+    Raises:
+        ValueError: If *profile* is not a known profile name.
+    """
+    settings = None
+    if profile is not None:
+        settings = SEARCH_PROFILES.get(profile)
+        if settings is None:
+            raise ValueError(f"profile must be one of {sorted(SEARCH_PROFILES)}, got {profile!r}")
+
+    ef_search = settings.ef_search if settings is not None else _DEFAULT_EF_SEARCH
+    gucs: dict[str, str] = {}
+    if settings is not None or min_ef_search > ef_search:
+        gucs["hnsw.ef_search"] = str(min(max(ef_search, min_ef_search), _MAX_EF_SEARCH))
+    if settings is not None and _get_pgvector_version(session) >= _ITERATIVE_SCAN_MIN_VERSION:
+        gucs["hnsw.iterative_scan"] = settings.iterative_scan
+    if not gucs:
+        return
+    session.execute(select(*(func.set_config(name, value, True) for name, value in gucs.items())))
+
+
+def _sub_domain_filter(sub_domain: str) -> Any:
+    """``chunk_records.sub_domain = '<sub_domain>'`` with the value inlined.
+
+    A bound parameter hides the value from the planner once psycopg switches
+    to a server-side prepared statement with a generic plan, and a partial
+    index is only usable when its ``WHERE sub_domain = '...'`` predicate can
+    be proven from the query.  ``literal_execute`` renders the value into
+    the SQL at execution time instead.
+    """
+    return ChunkRecord.sub_domain == literal(sub_domain, String, literal_execute=True)
+
+
+def _rescore_factor(quantization: str) -> int:
+    """Shortlist oversampling for a quantized first stage.  Pure function — no I/O."""
+    if _RESCORE_FACTOR_OVERRIDE is not None:
+        return max(1, _RESCORE_FACTOR_OVERRIDE)
+    return _RESCORE_FACTORS[quantization]
+
+
+def _first_stage_distance(quantization: str, query_embedding: list[float]) -> Any:
+    """Distance over the quantized ``embedding`` for *quantization*.
+
+    The quantized side is the exact expression the migration's HNSW
+    expression index is built on, so the planner can use that index.
+    """
+    if quantization == "halfvec":
+        return cast(ChunkRecord.embedding, HALFVEC(EMBEDDING_DIM)).cosine_distance(
+            cast(query_embedding, HALFVEC(EMBEDDING_DIM))
+        )
+    return cast(func.binary_quantize(ChunkRecord.embedding), BIT(EMBEDDING_DIM)).hamming_distance(
+        func.binary_quantize(cast(query_embedding, Vector(EMBEDDING_DIM)))
+    )
 
 
 def search_chunks(
@@ -18,66 +261,121 @@ def search_chunks(
     top_k: int = 5,
     *,
     sub_domain: str | None = None,
-) -> list[tuple[ChunkRecord, float]]:
+    profile: SearchProfile | None = None,
+    quantization: Quantization | None = None,
+) -> list[tuple[ChunkHit, float]]:
     """
     Find the most similar chunks to a query embedding using cosine distance.
 
     Executes a pgvector cosine distance query against the HNSW index on
     ``chunk_records``.  Returns results ordered by similarity (highest first).
 
+    With a quantized first stage (``halfvec`` or ``binary``) the HNSW scan
+    runs over the smaller quantized index and shortlists
+    ``top_k * rescore factor`` ids; the same statement then rescores that
+    shortlist by exact cosine distance on the full-precision ``embedding``,
+    so scores are identical to the unquantized path.
+
     Args:
         session: Active SQLAlchemy session.
         query_embedding: Dense vector (1536 floats) representing the query.
         top_k: Maximum number of results to return.  Must be >= 1.
         sub_domain: Optional sub-domain filter (e.g. ``"mixing"``).
             When provided, only chunks tagged with this sub-domain are
-            considered.  Uses the partial index on ``chunk_records.sub_domain``
-            for efficient filtering.
+            considered.  Uses that sub-domain's partial HNSW index when it
+            exists, so the scan returns a full *top_k* without post-filtering.
+        profile: Optional recall/latency preset (``"fast"``, ``"balanced"``,
+            ``"exhaustive"`` — see ``SEARCH_PROFILES``).  ``None`` keeps the
+            server's ``hnsw.ef_search``.
+        quantization: First-stage embedding — ``"none"``, ``"halfvec"`` or
+            ``"binary"``.  ``None`` uses ``SEARCH_QUANTIZATION``.
 
     Returns:
-        List of ``(ChunkRecord, score)`` tuples where
+        List of ``(ChunkHit, score)`` tuples where
         ``score = 1 - cosine_distance``.  Score ranges from 0 (orthogonal)
         to 1 (identical).  Ordered by score descending.
 
     Raises:
-        ValueError: If *top_k* < 1.
+        ValueError: If *top_k* < 1, or *profile* or *quantization* is unknown.
     """
     if top_k < 1:
         raise ValueError(f"top_k must be >= 1, got {top_k}")
+    quantization = quantization or DEFAULT_QUANTIZATION
+    if quantization not in ("none", *_RESCORE_FACTORS):
+        raise ValueError(f"quantization must be one of none, halfvec, binary, got {quantization!r}")
 
     distance = ChunkRecord.embedding.cosine_distance(query_embedding).label("distance")
 
-    stmt = select(ChunkRecord, distance).order_by(distance).limit(top_k)
-
-    if sub_domain is not None:
-        stmt = stmt.where(ChunkRecord.sub_domain == sub_domain)
+    if quantization == "none":
+        _apply_search_profile(session, profile)
+        stmt = select(*_HIT_COLUMNS, distance).order_by(distance).limit(top_k)
+        if sub_domain is not None:
+            stmt = stmt.where(_sub_domain_filter(sub_domain))
+    else:
+        shortlist_k = top_k * _rescore_factor(quantization)
+        _apply_search_profile(session, profile, min_ef_search=shortlist_k)
+        shortlist = (
+            select(ChunkRecord.id)
+            .order_by(_first_stage_distance(quantization, query_embedding))
+            .limit(shortlist_k)
+        )
+        if sub_domain is not None:
+            shortlist = shortlist.where(_sub_domain_filter(sub_domain))
+        shortlist_cte = shortlist.cte("shortlist")
+        stmt = (
+            select(*_HIT_COLUMNS, distance)
+            .join(shortlist_cte, ChunkRecord.id == shortlist_cte.c.id)
+            .order_by(distance)
+            .limit(top_k)
+        )
 
     results = session.execute(stmt).all()
 
-    return [(row.ChunkRecord, 1.0 - row.distance) for row in results]
+    return [(_to_hit(row), 1.0 - row.distance) for row in results]
+
+
+def _websearch_query(query_terms: list[str]) -> str:
+    """
+    Build a ``websearch_to_tsquery`` string matching *any* of the terms.
+
+    Pure function — no I/O.  Each term is quoted so multi-word terms match
+    as phrases, and terms are joined with ``or``; embedded double quotes are
+    dropped.
+
+    Raises:
+        ValueError: If no term has searchable content.
+    """
+    cleaned = [" ".join(term.replace('"', " ").split()) for term in query_terms]
+    cleaned = [term for term in cleaned if term]
+    if not cleaned:
+        raise ValueError("query_terms must contain at least one non-blank term")
+    return " or ".join(f'"{term}"' for term in cleaned)
 
 
 def search_chunks_keyword(
     session: Session,
     query_terms: list[str],
     top_k: int = 5,
-) -> list[tuple[ChunkRecord, float]]:
+) -> list[tuple[ChunkHit, float]]:
     """
-    Keyword (ILIKE) search over chunk text.
+    Full-text keyword search over chunk text.
 
-    A lightweight alternative to PostgreSQL full-text search that works
-    without any additional setup (no ``tsvector`` columns or GIN indexes).
-    Each matched term contributes equally to the score.
+    Matches the generated ``chunk_records.text_search`` tsvector (GIN
+    indexed — see ``db/migrations/add_text_search.py``) against
+    ``websearch_to_tsquery`` and ranks with ``ts_rank_cd`` (cover density),
+    so the keyword leg is an index scan rather than an ``ILIKE`` pass over
+    every chunk.
 
     Args:
         session: Active SQLAlchemy session.
-        query_terms: Non-empty list of keywords to search for.
+        query_terms: Non-empty list of keywords to search for.  A chunk
+            matches when it contains any of them (stemmed).
         top_k: Maximum number of results to return.  Must be >= 1.
 
     Returns:
-        List of ``(ChunkRecord, score)`` tuples where score is
-        the fraction of *query_terms* matched (0–1).  Ordered by
-        score descending.
+        List of ``(ChunkHit, score)`` tuples where score is the
+        ``ts_rank_cd`` rank normalised to 0–1 (``rank / (rank + 1)``).
+        Ordered by score descending.
 
     Raises:
         ValueError: If *top_k* < 1 or *query_terms* is empty.
@@ -87,23 +385,100 @@ def search_chunks_keyword(
     if not query_terms:
         raise ValueError("query_terms must be a non-empty list")
 
-    # Build a score as the sum of per-term matches divided by total terms.
-    term_hits = [
-        func.cast(ChunkRecord.text.ilike(f"%{term}%"), type_=None).cast(int) for term in query_terms
-    ]
-    hit_count = sum(term_hits).label("hit_count")  # type: ignore[arg-type]
+    tsquery = func.websearch_to_tsquery(
+        cast(TEXT_SEARCH_CONFIG, REGCONFIG), _websearch_query(query_terms)
+    )
+    # Normalisation flag 32 maps the unbounded rank into [0, 1).
+    rank = func.ts_rank_cd(ChunkRecord.text_search, tsquery, 32).label("rank")
 
     stmt = (
-        select(ChunkRecord, hit_count)
-        .where(hit_count > 0)  # type: ignore[arg-type]
-        .order_by(hit_count.desc())  # type: ignore[union-attr]
+        select(*_HIT_COLUMNS, rank)
+        .where(ChunkRecord.text_search.bool_op("@@")(tsquery))
+        .order_by(rank.desc())
         .limit(top_k)
     )
 
     results = session.execute(stmt).all()
 
-    total = len(query_terms)
-    return [(row.ChunkRecord, row.hit_count / total) for row in results]
+    return [(_to_hit(row), float(row.rank)) for row in results]
+
+
+def _leg_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for concurrent hybrid keyword legs (created lazily)."""
+    global _LEG_EXECUTOR  # noqa: PLW0603
+    with _LEG_EXECUTOR_LOCK:
+        if _LEG_EXECUTOR is None:
+            _LEG_EXECUTOR = ThreadPoolExecutor(
+                max_workers=_LEG_WORKERS, thread_name_prefix="hybrid-keyword"
+            )
+        return _LEG_EXECUTOR
+
+
+def _keyword_leg(
+    session_factory: Callable[[], Session],
+    query_terms: list[str],
+    top_k: int,
+    timeout_s: float,
+) -> tuple[list[tuple[ChunkHit, float]], float]:
+    """Run :func:`search_chunks_keyword` on a fresh session, bounded server-side.
+
+    Returns:
+        ``(results, elapsed_ms)``.
+    """
+    t0 = time.perf_counter()
+    with session_factory() as session:
+        # SET LOCAL takes no bind parameters; the value is a validated int.
+        session.execute(text(f"SET LOCAL statement_timeout = {max(1, int(timeout_s * 1000))}"))
+        results = search_chunks_keyword(session, query_terms, top_k=top_k)
+        session.rollback()  # read-only; end the transaction, reset statement_timeout
+    return results, (time.perf_counter() - t0) * 1000
+
+
+class KeywordLeg:
+    """A keyword leg running concurrently on its own pooled connection.
+
+    Started on the shared leg pool as soon as it is built, so the caller
+    can run its vector leg meanwhile; :meth:`result` then waits at most
+    what is left of *timeout_s* and degrades to no keyword hits.
+
+    Args:
+        session_factory: Opens the leg's session.
+        query_terms: Keywords for :func:`search_chunks_keyword`.
+        top_k: Keyword candidates to fetch.
+        timeout_s: Budget from construction, also enforced server-side
+            through ``statement_timeout``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        query_terms: list[str],
+        top_k: int,
+        timeout_s: float = DEFAULT_KEYWORD_TIMEOUT_S,
+    ) -> None:
+        self._started = time.perf_counter()
+        self._timeout_s = timeout_s
+        self._future: Future[tuple[list[tuple[ChunkHit, float]], float]] = _leg_executor().submit(
+            _keyword_leg, session_factory, query_terms, top_k, timeout_s
+        )
+
+    def result(self, timings: dict[str, float]) -> list[tuple[ChunkHit, float]]:
+        """Keyword hits, or ``[]`` past the budget or on failure.
+
+        Fills ``keyword_ms`` in *timings*, plus ``keyword_timeout_ms`` when
+        the leg was abandoned.
+        """
+        remaining = self._timeout_s - (time.perf_counter() - self._started)
+        try:
+            results, timings["keyword_ms"] = self._future.result(timeout=max(remaining, 0.0))
+            return results
+        except FuturesTimeoutError:
+            logger.warning("Keyword leg exceeded %.0fms — vector-only", self._timeout_s * 1000)
+            timings["keyword_timeout_ms"] = self._timeout_s * 1000
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Keyword leg failed — vector-only: %s", exc)
+        timings["keyword_ms"] = (time.perf_counter() - self._started) * 1000
+        return []
 
 
 def hybrid_search(
@@ -116,7 +491,11 @@ def hybrid_search(
     keyword_weight: float = 0.3,
     rrf_k: int = 60,
     sub_domain: str | None = None,
-) -> list[tuple[ChunkRecord, float]]:
+    profile: SearchProfile | None = None,
+    session_factory: Callable[[], Session] | None = None,
+    keyword_timeout_s: float = DEFAULT_KEYWORD_TIMEOUT_S,
+    timings: dict[str, float] | None = None,
+) -> list[tuple[ChunkHit, float]]:
     """
     Combine vector and keyword search via Reciprocal Rank Fusion (RRF).
 
@@ -132,36 +511,107 @@ def hybrid_search(
     *order* of candidates; the cosine score is preserved so downstream confidence
     checks (``max_score >= threshold``) work correctly.
 
+    With a *session_factory* the keyword leg runs concurrently on its own
+    pooled connection while the vector leg runs on *session*.  The keyword
+    leg gets *keyword_timeout_s* (also enforced server-side through
+    ``statement_timeout``); past that the result degrades to vector-only
+    instead of stalling the caller.  Without a factory the legs run back to
+    back on *session*.
+
     Args:
         session: Active SQLAlchemy session.
         query_embedding: Dense query vector for cosine search.
-        query_terms: Keywords for ILIKE search.
+        query_terms: Keywords for the full-text search leg.
         top_k: Number of final results.
         vector_weight: Weight for vector search contribution.
         keyword_weight: Weight for keyword search contribution.
         rrf_k: RRF constant (higher = less emphasis on top ranks).
         sub_domain: Optional sub-domain filter propagated to vector search.
+        profile: Optional HNSW recall/latency preset for the vector leg.
+        session_factory: Opens a new session for the concurrent keyword leg
+            (e.g. ``db.session.SessionLocal``).
+        keyword_timeout_s: Keyword leg budget in concurrent mode.
+        timings: Optional out-param, filled with ``vector_ms`` and
+            ``keyword_ms``; ``keyword_timeout_ms`` is added when the keyword
+            leg was abandoned.
 
     Returns:
-        RRF-reranked ``(ChunkRecord, cosine_score)`` tuples, highest cosine first.
+        RRF-reranked ``(ChunkHit, cosine_score)`` tuples, highest cosine first.
         Chunks found only by keyword search (not vector search) carry a score of 0.0.
     """
     # Fetch more candidates from each source for better fusion
     fetch_k = top_k * 3
+    timings = timings if timings is not None else {}
+
+    if session_factory is None:
+        t0 = time.perf_counter()
+        vector_results = search_chunks(
+            session, query_embedding, top_k=fetch_k, sub_domain=sub_domain, profile=profile
+        )
+        timings["vector_ms"] = (time.perf_counter() - t0) * 1000
+
+        # Keyword search needs the text_search column (db/migrations/add_text_search.py)
+        # and Postgres full-text functions.  Fall back to vector-only when it fails.
+        t0 = time.perf_counter()
+        try:
+            keyword_results = search_chunks_keyword(session, query_terms, top_k=fetch_k)
+        except Exception:  # noqa: BLE001
+            keyword_results = []
+        timings["keyword_ms"] = (time.perf_counter() - t0) * 1000
+    else:
+        t_start = time.perf_counter()
+        keyword_leg = KeywordLeg(session_factory, query_terms, fetch_k, keyword_timeout_s)
+        vector_results = search_chunks(
+            session, query_embedding, top_k=fetch_k, sub_domain=sub_domain, profile=profile
+        )
+        timings["vector_ms"] = (time.perf_counter() - t_start) * 1000
+        keyword_results = keyword_leg.result(timings)
+
+    return reciprocal_rank_fusion(
+        vector_results,
+        keyword_results,
+        top_k,
+        vector_weight=vector_weight,
+        keyword_weight=keyword_weight,
+        rrf_k=rrf_k,
+    )
 
-    vector_results = search_chunks(session, query_embedding, top_k=fetch_k, sub_domain=sub_domain)
 
-    # Keyword search may not be supported on all DB backends (e.g. pgvector cast
-    # syntax differs from SQLite used in tests).  Fall back to vector-only when it fails.
-    try:
-        keyword_results = search_chunks_keyword(session, query_terms, top_k=fetch_k)
-    except Exception:  # noqa: BLE001
-        keyword_results = []
+def reciprocal_rank_fusion(
+    vector_results: list[tuple[ChunkHit, float]],
+    keyword_results: list[tuple[ChunkHit, float]],
+    top_k: int,
+    *,
+    vector_weight: float = 0.7,
+    keyword_weight: float = 0.3,
+    rrf_k: int = 60,
+) -> list[tuple[ChunkHit, float]]:
+    """
+    Merge a vector and a keyword result list via weighted RRF.
+
+    Pure function — no I/O.  Candidates are ordered by RRF score but carry
+    their original cosine similarity (0.0 for keyword-only hits), exactly as
+    documented on :func:`hybrid_search`.
+
+    Args:
+        vector_results: ``(record, cosine_score)`` tuples, best first.
+        keyword_results: ``(record, keyword_score)`` tuples, best first.
+        top_k: Number of fused results to return.
+        vector_weight: Weight for vector search contribution.
+        keyword_weight: Weight for keyword search contribution.
+        rrf_k: RRF constant (higher = less emphasis on top ranks).
+
+    Returns:
+        Up to *top_k* ``(record, cosine_score)`` tuples in RRF order.
+    """
+    if not keyword_results:
+        # A single ranked list fuses to itself.
+        return vector_results[:top_k]
 
     # Build RRF scores and preserve original cosine similarity scores
     rrf_scores: dict[int, float] = {}
     cosine_scores: dict[int, float] = {}
-    record_map: dict[int, ChunkRecord] = {}
+    record_map: dict[int, ChunkHit] = {}
 
     for rank, (record, cosine_score) in enumerate(vector_results):
         rrf_scores[record.id] = rrf_scores.get(record.id, 0.0) + vector_weight / (rrf_k + rank + 1)
@@ -178,3 +628,108 @@ def hybrid_search(
     sorted_ids = sorted(rrf_scores, key=rrf_scores.get, reverse=True)  # type: ignore[arg-type]
 
     return [(record_map[rid], cosine_scores[rid]) for rid in sorted_ids[:top_k]]
+
+
+def search_chunks_multi(
+    session: Session,
+    query_embedding: list[float],
+    sub_domains: Sequence[str],
+    *,
+    per_domain_k: int,
+    global_k: int,
+    min_results: int = 3,
+    profile: SearchProfile | None = None,
+) -> tuple[list[tuple[ChunkHit, float]], bool]:
+    """
+    Per-sub-domain top-k plus global fallback in one SQL statement.
+
+    Replaces N filtered :func:`search_chunks` calls (one per sub-domain)
+    followed by an optional global search.  The statement has three parts:
+
+    - ``scoped`` CTE — a ``UNION ALL`` of one distance-ordered
+      ``LIMIT per_domain_k`` leg per sub-domain, each filtered on a literal
+      ``sub_domain`` so it can scan that sub-domain's partial HNSW index
+      and return a complete top-k.
+    - A global ``LIMIT global_k`` leg guarded by
+      ``(SELECT count(*) FROM scoped) < min_results``.  Postgres evaluates
+      the uncorrelated guard once (InitPlan / one-time filter), so the global
+      scan only runs when the filtered legs came back too thin.
+    - The ``UNION ALL`` of both legs is joined back to ``chunk_records`` to
+      fetch the projected metadata columns once.
+
+    Args:
+        session: Active SQLAlchemy session.
+        query_embedding: Dense query vector (1536 floats).
+        sub_domains: Non-empty list of sub-domains to search.  Duplicates
+            are ignored.
+        per_domain_k: Maximum results per sub-domain.  Must be >= 1.
+        global_k: Maximum results from the global fallback.  Must be >= 1.
+        min_results: Fall back to global results when the filtered legs
+            return fewer than this many distinct chunks.
+        profile: Optional HNSW recall/latency preset applied to every leg.
+
+    Returns:
+        ``(results, used_fallback)``.  *results* are ``(ChunkHit, score)``
+        tuples ordered by score descending and deduplicated by chunk id.
+        When *used_fallback* is True they come from the global leg only.
+
+    Raises:
+        ValueError: If *sub_domains* is empty, *per_domain_k* / *global_k* < 1,
+            or *profile* is unknown.
+    """
+    if not sub_domains:
+        raise ValueError("sub_domains must be a non-empty list")
+    if per_domain_k < 1:
+        raise ValueError(f"per_domain_k must be >= 1, got {per_domain_k}")
+    if global_k < 1:
+        raise ValueError(f"global_k must be >= 1, got {global_k}")
+    _apply_search_profile(session, profile)
+
+    distance = ChunkRecord.embedding.cosine_distance(query_embedding)
+
+    # One leg per sub-domain rather than a LATERAL join over a VALUES list:
+    # a correlated filter cannot match a partial index predicate.
+    legs = [
+        select(ChunkRecord.id.label("id"), distance.label("distance"))
+        .where(_sub_domain_filter(sd))
+        .order_by(distance)
+        .limit(per_domain_k)
+        for sd in dict.fromkeys(sub_domains)
+    ]
+    scoped = (legs[0] if len(legs) == 1 else union_all(*legs)).cte("scoped")
+    global_leg = (
+        select(ChunkRecord.id.label("id"), distance.label("distance"))
+        .order_by(distance)
+        .limit(global_k)
+        .subquery("global_leg")
+    )
+    scoped_count = select(func.count()).select_from(scoped).scalar_subquery()
+
+    hits = union_all(
+        select(scoped.c.id, scoped.c.distance, false().label("is_fallback")),
+        select(global_leg.c.id, global_leg.c.distance, true().label("is_fallback")).where(
+            scoped_count < min_results
+        ),
+    ).subquery("hits")
+
+    stmt = (
+        select(*_HIT_COLUMNS, hits.c.distance, hits.c.is_fallback)
+        .join(hits, ChunkRecord.id == hits.c.id)
+        .order_by(hits.c.distance)
+    )
+    rows = session.execute(stmt).all()
+
+    scoped_results: list[tuple[ChunkHit, float]] = []
+    global_results: list[tuple[ChunkHit, float]] = []
+    seen: set[tuple[bool, int]] = set()
+    for row in rows:
+        key = (bool(row.is_fallback), row.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        target = global_results if row.is_fallback else scoped_results
+        target.append((_to_hit(row), 1.0 - row.distance))
+
+    if len(scoped_results) < min_results:
+        return global_results, True
+    return scoped_results, False
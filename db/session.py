@@ -1,8 +1,10 @@
 """
-SQLAlchemy session factory.
+SQLAlchemy session factories.
 
 Reads connection parameters from environment variables and provides a
-``SessionLocal`` sessionmaker plus a ``get_session`` context manager.
+``SessionLocal`` sessionmaker plus a ``get_session`` context manager, and
+``AsyncSessionLocal`` for the async ``/ask`` pipeline (same URL — psycopg 3
+speaks both the sync and asyncio protocols).
 
 Environment variables
 ---------------------
@@ -16,12 +18,19 @@ Environment variables
 ``DB_MAX_OVERFLOW``
     Extra connections allowed above ``pool_size`` under burst
     load (default ``10``).
+
+``DB_ASYNC_POOL_SIZE``
+    Persistent connections for the async engine (default ``10``).  Async
+    requests only hold a connection while a query runs, so a small pool
+    serves many in-flight requests; bursts borrow up to
+    ``DB_MAX_OVERFLOW`` more.
 """
 
 import os
 from collections.abc import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 DATABASE_URL: str = os.getenv(
@@ -31,6 +40,7 @@ DATABASE_URL: str = os.getenv(
 
 _pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
 _max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+_async_pool_size: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
 
 engine = create_engine(
     DATABASE_URL,
@@ -46,6 +56,21 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# No connection is opened until the first query, so importing this module
+# from sync-only code costs nothing.
+async_engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=_async_pool_size,
+    max_overflow=_max_overflow,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_session() -> Generator[Session, None, None]:
     """Yield a SQLAlchemy session, closing it on exit."""
@@ -0,0 +1,413 @@
+"""
+In-process memory-mapped vector index — an alternative search backend to pgvector.
+
+The whole corpus (~12k chunks x 1536 dims) fits in ~70 MB of float32, so an
+exact brute-force scan with one matrix-vector product answers a query in a
+few milliseconds without a network round trip.  This keeps ``/ask`` and
+``/search`` working when Postgres is slow or down.
+
+On-disk layout (one directory)::
+
+    embeddings.npy   float32 matrix, shape (n, dim), rows L2-normalised
+    metadata.json    sidecar table — one column list per ChunkRecord field
+
+The matrix is opened with ``np.load(mmap_mode="r")`` so pages are shared
+between uvicorn workers through the OS page cache.
+
+CLI::
+
+    python -m db.vector_index build --out data/vector_index
+    python -m db.vector_index info --path data/vector_index
+
+Environment variables
+---------------------
+``SEARCH_BACKEND``
+    ``"pgvector"`` (default) or ``"mmap"`` — which backend the API routes
+    query first.  With ``"pgvector"`` the index is still used as a fallback
+    when the database search fails.
+
+``VECTOR_INDEX_PATH``
+    Directory holding the index files (default ``data/vector_index``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from db.models import ChunkRecord
+from db.search import ChunkHit, search_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path(os.getenv("VECTOR_INDEX_PATH", "data/vector_index"))
+
+_MATRIX_FILE = "embeddings.npy"
+_METADATA_FILE = "metadata.json"
+_FORMAT_VERSION = 1
+
+# Metadata columns persisted in the sidecar table (embedding lives in the matrix).
+_COLUMNS: tuple[str, ...] = ChunkHit._fields
+
+
+class SearchBackend(Protocol):
+    """Anything that can answer a top-k cosine query over chunk embeddings.
+
+    Results mirror :func:`db.search.search_chunks`: ``(ChunkHit, score)``
+    tuples where ``score = 1 - cosine_distance``, ordered by score descending.
+    """
+
+    name: str
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        *,
+        sub_domain: str | None = None,
+    ) -> list[tuple[ChunkHit, float]]: ...
+
+
+class PgVectorBackend:
+    """:class:`SearchBackend` adapter over :func:`db.search.search_chunks` (HNSW).
+
+    Args:
+        session: Active SQLAlchemy session.
+    """
+
+    name = "pgvector"
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        *,
+        sub_domain: str | None = None,
+    ) -> list[tuple[ChunkHit, float]]:
+        """Run an approximate HNSW query in Postgres."""
+        return search_chunks(self._session, query_embedding, top_k=top_k, sub_domain=sub_domain)
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* largest scores, ordered by score descending."""
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class MmapVectorIndex:
+    """Exact cosine top-k search over a memory-mapped float32 matrix.
+
+    Satisfies the :class:`SearchBackend` protocol.  Use :meth:`load` to
+    open an index written by :func:`write_index` / :func:`build_index`.
+
+    Args:
+        matrix: ``(n, dim)`` float32 matrix with L2-normalised rows.
+        columns: Sidecar metadata — one list of length ``n`` per column.
+    """
+
+    name = "mmap"
+
+    def __init__(self, matrix: np.ndarray, columns: dict[str, list[Any]]) -> None:
+        if matrix.ndim != 2:
+            raise ValueError(f"matrix must be 2-D, got shape {matrix.shape}")
+        missing = [c for c in _COLUMNS if c not in columns]
+        if missing:
+            raise ValueError(f"metadata is missing columns: {missing}")
+        for col in _COLUMNS:
+            if len(columns[col]) != matrix.shape[0]:
+                raise ValueError(
+                    f"metadata column {col!r} has {len(columns[col])} rows, "
+                    f"matrix has {matrix.shape[0]}"
+                )
+        self._matrix = matrix
+        self._columns = columns
+        self._row_by_id: dict[int, int] | None = None
+        # Row positions per sub_domain — filtered search scans only these rows.
+        self._rows_by_sub_domain: dict[str, np.ndarray] = {}
+        sub_domains = np.asarray(
+            [sd if sd is not None else "" for sd in columns["sub_domain"]], dtype=object
+        )
+        for sd in {sd for sd in columns["sub_domain"] if sd is not None}:
+            self._rows_by_sub_domain[sd] = np.flatnonzero(sub_domains == sd)
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_INDEX_PATH) -> MmapVectorIndex:
+        """Open an index directory, memory-mapping the embedding matrix.
+
+        Raises:
+            FileNotFoundError: If the index files do not exist.
+            ValueError: If the files are inconsistent or of an unknown version.
+        """
+        root = Path(path)
+        matrix_path = root / _MATRIX_FILE
+        meta_path = root / _METADATA_FILE
+        if not matrix_path.exists() or not meta_path.exists():
+            raise FileNotFoundError(f"Vector index not found at {root}")
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index version: {meta.get('version')!r}")
+        matrix = np.load(matrix_path, mmap_mode="r")
+        if matrix.dtype != np.float32:
+            raise ValueError(f"Expected float32 matrix, got {matrix.dtype}")
+        index = cls(matrix, meta["columns"])
+        logger.info("Loaded vector index: %d rows x %d dims from %s", len(index), index.dim, root)
+        return index
+
+    def __len__(self) -> int:
+        return int(self._matrix.shape[0])
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimensionality."""
+        return int(self._matrix.shape[1])
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The (read-only, memory-mapped) normalised embedding matrix."""
+        return self._matrix
+
+    def _hit(self, row: int) -> ChunkHit:
+        return ChunkHit._make(self._columns[col][row] for col in _COLUMNS)
+
+    def fetch_embeddings(self, ids: Sequence[int]) -> np.ndarray:
+        """Embeddings for *ids*, row-aligned — the local twin of
+        :func:`db.search.fetch_embeddings` for MMR reranking.
+
+        Raises:
+            LookupError: If any id is not in the index.
+        """
+        if self._row_by_id is None:
+            self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(self._columns["id"])}
+        try:
+            rows = [self._row_by_id[i] for i in ids]
+        except KeyError as exc:
+            raise LookupError(f"Chunk id {exc.args[0]} is not in the vector index") from exc
+        return np.asarray(self._matrix[rows], dtype=np.float32).reshape(len(rows), self.dim)
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+        *,
+        sub_domain: str | None = None,
+        block_size: int | None = None,
+    ) -> list[tuple[ChunkHit, float]]:
+        """Find the *top_k* rows most similar to *query_embedding*.
+
+        Args:
+            query_embedding: Dense query vector of length :attr:`dim`.
+            top_k: Maximum number of results.  Must be >= 1.
+            sub_domain: Only consider chunks tagged with this sub-domain.
+            block_size: Scan the matrix in blocks of this many rows, keeping a
+                running top-k.  ``None`` scores every candidate in one
+                matrix-vector product (fastest when the matrix is resident).
+
+        Returns:
+            ``(ChunkHit, cosine_similarity)`` tuples, highest first.
+
+        Raises:
+            ValueError: If *top_k* < 1 or the query has the wrong dimension.
+        """
+        if top_k < 1:
+            raise ValueError(f"top_k must be >= 1, got {top_k}")
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(f"query must have shape ({self.dim},), got {query.shape}")
+        norm = float(np.linalg.norm(query))
+        if norm > 0.0:
+            query = query / norm
+
+        rows: np.ndarray | None = None
+        if sub_domain is not None:
+            rows = self._rows_by_sub_domain.get(sub_domain)
+            if rows is None:
+                return []
+        total = len(self) if rows is None else rows.shape[0]
+        if total == 0:
+            return []
+
+        step = total if block_size is None or block_size >= total else max(1, block_size)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, total, step):
+            if rows is None:
+                block_rows = np.arange(start, min(start + step, total), dtype=np.int64)
+                scores = self._matrix[start : start + step] @ query
+            else:
+                block_rows = rows[start : start + step]
+                scores = self._matrix[block_rows] @ query
+            keep = _top_k_indices(scores, top_k)
+            best_rows = np.concatenate([best_rows, block_rows[keep]])
+            best_scores = np.concatenate([best_scores, scores[keep]])
+            if best_rows.shape[0] > top_k:
+                keep = _top_k_indices(best_scores, top_k)
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = _top_k_indices(best_scores, top_k)
+        return [(self._hit(int(best_rows[i])), float(best_scores[i])) for i in order]
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+
+def write_index(
+    rows: Iterable[dict[str, Any]],
+    out_dir: str | Path,
+    *,
+    count: int,
+    dim: int = 1536,
+) -> int:
+    """Write an index from an iterable of row dicts.
+
+    Each row carries every metadata column plus ``embedding``.  Rows are
+    streamed into a memory-mapped output file, so peak memory stays at the
+    size of the metadata rather than the matrix.  Files are written to a
+    temporary directory and swapped in atomically, so a running API never
+    sees a half-written index.
+
+    Args:
+        rows: Row dicts (e.g. from :func:`_iter_chunk_rows`).
+        out_dir: Destination directory (created or replaced).
+        count: Exact number of rows *rows* will yield.
+        dim: Embedding dimensionality.
+
+    Returns:
+        Number of rows written.
+
+    Raises:
+        ValueError: If *rows* yields a different number of rows than *count*
+            or an embedding of the wrong dimension.
+    """
+    out = Path(out_dir)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{out.name}-", dir=out.parent))
+    try:
+        matrix = np.lib.format.open_memmap(
+            tmp / _MATRIX_FILE, mode="w+", dtype=np.float32, shape=(count, dim)
+        )
+        columns: dict[str, list[Any]] = {c: [] for c in _COLUMNS}
+        written = 0
+        for row in rows:
+            if written >= count:
+                raise ValueError(f"rows yielded more than count={count} rows")
+            vec = np.asarray(row["embedding"], dtype=np.float32)
+            if vec.shape != (dim,):
+                raise ValueError(f"row {row.get('id')!r}: expected dim {dim}, got {vec.shape}")
+            norm = float(np.linalg.norm(vec))
+            matrix[written] = vec / norm if norm > 0.0 else vec
+            for col in _COLUMNS:
+                columns[col].append(row[col])
+            written += 1
+        if written != count:
+            raise ValueError(f"expected {count} rows, got {written}")
+        matrix.flush()
+        del matrix
+
+        meta = {
+            "version": _FORMAT_VERSION,
+            "dim": dim,
+            "count": count,
+            "built_at": time.time(),
+            "columns": columns,
+        }
+        (tmp / _METADATA_FILE).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+        if out.exists():
+            backup = out.with_name(f".{out.name}-old")
+            shutil.rmtree(backup, ignore_errors=True)
+            out.rename(backup)
+            tmp.rename(out)
+            shutil.rmtree(backup, ignore_errors=True)
+        else:
+            tmp.rename(out)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return written
+
+
+def _iter_chunk_rows(session: Session, batch_size: int) -> Iterable[dict[str, Any]]:
+    """Stream ``chunk_records`` rows (ordered by id) as plain dicts."""
+    stmt = (
+        select(*(getattr(ChunkRecord, c) for c in _COLUMNS), ChunkRecord.embedding)
+        .order_by(ChunkRecord.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in session.execute(stmt):
+        yield dict(row._mapping)
+
+
+def build_index(
+    session: Session,
+    out_dir: str | Path = DEFAULT_INDEX_PATH,
+    *,
+    batch_size: int = 1000,
+    dim: int = 1536,
+) -> int:
+    """Build (or rebuild) the index from ``chunk_records``.
+
+    Args:
+        session: Active SQLAlchemy session.
+        out_dir: Destination directory.
+        batch_size: Rows fetched per server-side cursor batch.
+        dim: Embedding dimensionality.
+
+    Returns:
+        Number of rows indexed.
+    """
+    count = session.execute(select(func.count(ChunkRecord.id))).scalar_one()
+    return write_index(_iter_chunk_rows(session, batch_size), out_dir, count=count, dim=dim)
+
+
+def main() -> None:
+    """Parse CLI arguments and build or describe the index."""
+    parser = argparse.ArgumentParser(description="Manage the in-process mmap vector index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_p = sub.add_parser("build", help="Rebuild the index from chunk_records.")
+    build_p.add_argument("--out", default=str(DEFAULT_INDEX_PATH), help="Index directory.")
+    build_p.add_argument("--batch-size", type=int, default=1000, help="Rows per DB fetch.")
+
+    info_p = sub.add_parser("info", help="Print index size and build time.")
+    info_p.add_argument("--path", default=str(DEFAULT_INDEX_PATH), help="Index directory.")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from db.session import SessionLocal
+
+        t0 = time.perf_counter()
+        with SessionLocal() as session:
+            n = build_index(session, args.out, batch_size=args.batch_size)
+        print(f"Indexed {n} chunk(s) into {args.out} in {time.perf_counter() - t0:.1f}s")
+    else:
+        index = MmapVectorIndex.load(args.path)
+        meta = json.loads((Path(args.path) / _METADATA_FILE).read_text(encoding="utf-8"))
+        size_mb = (Path(args.path) / _MATRIX_FILE).stat().st_size / 1e6
+        print(f"rows={len(index)} dim={index.dim} matrix={size_mb:.1f}MB")
+        print(f"built_at={time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(meta['built_at']))}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
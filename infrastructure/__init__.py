@@ -6,4 +6,5 @@ Modules:
     rate_limiter  Per-session sliding-window rate limiter.
     circuit_breaker  Circuit breaker for external API calls.
     metrics     Prometheus metrics registry.
+    stages      Concurrent scheduler for independent request-pipeline stages.
 """
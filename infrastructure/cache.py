@@ -1,13 +1,54 @@
 """Redis-backed response cache for the Musical Intelligence Platform.
 
-Two cache tiers:
+Three cache tiers:
     1. Embedding cache (in-memory, already in ingestion/cache.py) — fast, per-process.
-    2. Response cache (Redis) — shared across workers, survives restarts.
+    2. Retrieval cache (in-memory, ``RetrievalCache``) — reranked chunks per
+       query embedding, so a rephrased question that lands on the same
+       retrieval skips the database.
+    3. Response cache — two tiers: an in-process LRU (L1) of parsed
+       responses in front of Redis (L2), which is shared across workers and
+       survives restarts.
 
 Response cache key = SHA-256(query + top_k + confidence_threshold).
-Entries are stored as JSON with a TTL. Invalidation is tag-based: every entry
-is tagged with its source filenames; when a source is re-ingested the tag is
-deleted, expiring all dependent responses.
+Entries are stored as compact JSON (``orjson`` when installed), compressed
+above ``_COMPRESS_MIN_BYTES`` (zstd when ``zstandard`` is installed, zlib
+otherwise), with a TTL.  Invalidation is tag-based: every entry is tagged
+with its source filenames; when a source is re-ingested the tag is
+deleted, expiring all dependent responses.  A write — payload, tags and
+registry — is one pipelined round trip.  Response and tag keys are also
+recorded in two sorted-set registries scored by expiry, so ``stats`` and
+``flush`` never scan the keyspace (entries written before the registries
+existed are not counted and age out by TTL).
+
+A hot query is answered from L1 without a network round trip or a JSON
+parse.  L1 is filled on every Redis hit and write, and bounded by the
+serialized size of its entries.  ``invalidate_source`` and ``flush`` are
+broadcast on a Redis pub/sub channel, so every worker evicts the same
+entries from its L1 (and its semantic index) rather than serving them until
+they age out; if the subscription drops, L1 is cleared and the L1 TTL bounds
+anything missed while it reconnects.
+
+The exact key only matches the same wording.  A semantic layer
+(``ResponseCache.get_similar`` / ``index_query``) keeps the embeddings of
+cached queries in a per-process nearest-neighbour index, so a rephrased
+question whose embedding is close enough to a cached one — same ``top_k``,
+threshold and detected sub-domains — is answered from that entry.
+
+Identical requests that arrive while the first is still being answered are
+coalesced (``infrastructure.singleflight``); across workers, the leader
+holds a short Redis lock (``claim_flight``) and the others poll the cache
+for its answer (``wait_for_flight``).
+
+Entries have a soft TTL below the Redis (hard) TTL: past it, ``is_stale``
+is true and the API serves the entry while refreshing it in the background
+(stale-while-revalidate), so a popular question is not recomputed on the
+request path when it expires.
+
+Cacheable /ask requests are counted in a per-day query log
+(``record_query`` / ``popular_queries``).  ``python -m infrastructure.cache
+warm`` replays the most frequent ones, plus the golden evaluation set,
+through the API to refill the caches after a deploy or a flush (see
+:mod:`infrastructure.cache_warm`).
 
 Usage::
 
@@ -19,21 +60,87 @@ Usage::
         return hit
     result = ... # run pipeline
     cache.set(query, top_k=5, threshold=0.58, response=result, sources=["bob_katz.pdf"])
+
+Environment variables
+---------------------
+``RETRIEVAL_CACHE_SIZE``
+    Maximum retrieval cache entries per process (default ``512``; ``0``
+    disables the cache).
+
+``RETRIEVAL_CACHE_TTL_SECONDS``
+    Retrieval cache entry lifetime (default ``600``).
+
+``RESPONSE_CACHE_SOFT_TTL_SECONDS``
+    Age after which a cached response is stale — still served, but
+    refreshed in the background (default ``43200`` = 12h; ``0`` disables).
+    Entries are removed at the hard TTL (24h).
+
+``QUERY_LOG_DAYS``
+    Days of query log kept, and replayed by ``warm`` (default ``7``).
+
+``RESPONSE_CACHE_L1_BYTES``
+    Per-process L1 budget, counted as the serialized size of the cached
+    responses (default ``33554432`` = 32 MiB; ``0`` disables L1).
+
+``RESPONSE_CACHE_L1_TTL_SECONDS``
+    L1 entry lifetime (default ``300``).
+
+``SEMANTIC_CACHE_SIZE``
+    Cached-query embeddings kept per process for semantic lookups (default
+    ``2048``; ``0`` disables the semantic layer).
+
+``SEMANTIC_CACHE_THRESHOLD``
+    Minimum cosine similarity between a new query and a cached one for a
+    semantic hit (default ``0.92``).
+
+``SEMANTIC_CACHE_NEAR_MARGIN``
+    Lookups whose best match falls within this margin below the threshold
+    count as near-hits — a miss, but the metric to watch when tuning the
+    threshold (default ``0.05``).
+
+CLI::
+
+    python -m infrastructure.cache warm                      # in-process
+    python -m infrastructure.cache warm --url http://api:8000 --concurrency 8
 """
 
 from __future__ import annotations
 
+import argparse
 import hashlib
 import json
 import logging
 import os
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Sequence
+from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
+
+from infrastructure.metrics import record_semantic_cache_lookup
+
 try:
     import redis as redis_lib
 except ImportError:
     redis_lib = None  # type: ignore[assignment]
 
+# Faster JSON and better compression for cached payloads (both in
+# requirements.txt; the fallbacks keep a bare environment working).
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
 # Cache TTL: 24 hours. Musical knowledge doesn't change within a session.
@@ -43,24 +150,152 @@ _TAG_TTL_SECONDS = 90_000
 # Redis key namespace
 _NS = "mip:resp:"
 _TAG_NS = "mip:tag:"
+# Pub/sub channel carrying invalidations to every worker's L1
+_INVALIDATION_CHANNEL = "mip:cache:invalidate"
+# Sorted sets of live response / tag keys, scored by expiry time
+_RESP_REGISTRY = "mip:registry:resp"
+_TAG_REGISTRY = "mip:registry:tag"
+# Keys deleted per DEL command on flush
+_DELETE_BATCH = 1000
+# Cross-worker single-flight locks, and how often followers poll for the answer
+_FLIGHT_NS = "mip:flight:"
+_FLIGHT_POLL_SECONDS = 0.05
+# Delete a flight lock only if this worker still holds it
+_RELEASE_FLIGHT_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_EXTEND_FLIGHT_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Payload format: one marker byte, then the (possibly compressed) JSON body.
+# Entries without a marker are plain JSON from before the format existed.
+_FMT_JSON = b"\x00"
+_FMT_ZLIB = b"\x01"
+_FMT_ZSTD = b"\x02"
+# Smaller bodies are stored uncompressed — the header overhead isn't worth it
+_COMPRESS_MIN_BYTES = 512
+
+_RESPONSE_CACHE_SOFT_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_SOFT_TTL_SECONDS", "43200"))
+_RESPONSE_CACHE_L1_BYTES = int(os.getenv("RESPONSE_CACHE_L1_BYTES", str(32 * 1024 * 1024)))
+_RESPONSE_CACHE_L1_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_L1_TTL_SECONDS", "300"))
+
+_RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+_RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "600"))
+_SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2048"))
+_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+_SEMANTIC_CACHE_NEAR_MARGIN = float(os.getenv("SEMANTIC_CACHE_NEAR_MARGIN", "0.05"))
+# Rows a semantic index bucket starts with; it doubles when full
+_SEMANTIC_BUCKET_INITIAL_ROWS = 16
+_QUERY_LOG_DAYS = int(os.getenv("QUERY_LOG_DAYS", "7"))
+# Per-day sorted sets of query -> request count; each keeps its top entries
+_QUERY_LOG_NS = "mip:querylog:"
+_QUERY_LOG_MAX_ENTRIES = 10_000
+# Embedding components are rounded to 1/_EMBEDDING_KEY_SCALE after
+# normalisation, so float noise between equal queries maps to one key.
+_EMBEDDING_KEY_SCALE = 127
 
 
-def _make_key(query: str, top_k: int, threshold: float) -> str:
+def _normalize_query(query: str) -> str:
+    """Lower-case *query* and fold its whitespace runs.  Pure function — no I/O."""
+    return " ".join(query.lower().split())
+
+
+def _make_key(query: str, top_k: int, threshold: float, profile: str | None = None) -> str:
     """Deterministic cache key from query parameters.
 
     Args:
         query: The user query string.
         top_k: Number of results requested.
         threshold: Confidence threshold used.
+        profile: Search profile; the default (None) keeps the key it
+            always had.
 
     Returns:
         Namespaced Redis key string.
     """
-    raw = f"{query.strip().lower()}|{top_k}|{threshold:.4f}"
+    raw = f"{_normalize_query(query)}|{top_k}|{threshold:.4f}"
+    if profile is not None:
+        raw += f"|{profile}"
     digest = hashlib.sha256(raw.encode()).hexdigest()
     return f"{_NS}{digest}"
 
 
+def _encode_payload(response: dict[str, Any]) -> tuple[bytes, int]:
+    """Serialize a response for Redis.
+
+    Pure function — no I/O.
+
+    Returns:
+        ``(payload, size)`` — the stored bytes and the uncompressed JSON size.
+    """
+    if orjson is not None:
+        body = orjson.dumps(response)
+    else:
+        body = json.dumps(response, separators=(",", ":")).encode()
+    if len(body) < _COMPRESS_MIN_BYTES:
+        return _FMT_JSON + body, len(body)
+    if zstandard is not None:
+        return _FMT_ZSTD + zstandard.compress(body), len(body)
+    return _FMT_ZLIB + zlib.compress(body), len(body)
+
+
+def _decode_payload(raw: bytes | str) -> tuple[dict[str, Any], int]:
+    """Inverse of :func:`_encode_payload`; also reads legacy plain-JSON entries.
+
+    Pure function — no I/O.
+
+    Raises:
+        ValueError: If the entry is corrupt, or zstd-compressed and
+            ``zstandard`` is not installed in this process.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode()
+    marker, body = raw[:1], raw[1:]
+    if marker == _FMT_ZLIB:
+        body = zlib.decompress(body)
+    elif marker == _FMT_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+        body = zstandard.decompress(body)
+    elif marker != _FMT_JSON:
+        body = raw
+    data = orjson.loads(body) if orjson is not None else json.loads(body)
+    return data, len(body)
+
+
+def _as_str(value: bytes | str) -> str:
+    """Redis replies are bytes (the client keeps payloads binary)."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _semantic_bucket(
+    top_k: int, threshold: float, scope: Sequence[str], profile: str | None = None
+) -> str:
+    """Parameters a semantic hit must share with the cached query.
+
+    Pure function — no I/O.
+    """
+    return f"{top_k}|{threshold:.4f}|{','.join(sorted(set(scope)))}|{profile or ''}"
+
+
+def _flight_key(key: str) -> str:
+    """Single-flight lock key for response cache key *key*."""
+    return _FLIGHT_NS + key.removeprefix(_NS)
+
+
+def _query_log_key(timestamp: float) -> str:
+    """Query log sorted set for the UTC day containing *timestamp*."""
+    return _QUERY_LOG_NS + time.strftime("%Y%m%d", time.gmtime(timestamp))
+
+
 def _tag_key(source_name: str) -> str:
     """Redis key for a source invalidation tag set.
 
@@ -73,62 +308,317 @@ def _tag_key(source_name: str) -> str:
     return f"{_TAG_NS}{source_name}"
 
 
+class _SemanticBucket:
+    """Rows of one :class:`SemanticQueryIndex` bucket in a preallocated matrix.
+
+    The matrix doubles when full, so adding a row is amortised O(1); a
+    removed row is replaced by the last one.  Not thread-safe — the index
+    holds its lock.
+    """
+
+    def __init__(self, dim: int) -> None:
+        self.keys: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.matrix = np.empty((_SEMANTIC_BUCKET_INITIAL_ROWS, dim), np.float32)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the rows in use."""
+        return self.matrix[: len(self.keys)]
+
+    def add(self, key: str, vec: np.ndarray) -> None:
+        size = len(self.keys)
+        if size == self.matrix.shape[0]:
+            grown = np.empty((2 * size, self.matrix.shape[1]), np.float32)
+            grown[:size] = self.matrix
+            self.matrix = grown
+        self.matrix[size] = vec
+        self.rows[key] = size
+        self.keys.append(key)
+
+    def remove(self, key: str) -> None:
+        row = self.rows.pop(key)
+        last_key = self.keys.pop()
+        if last_key != key:
+            last = len(self.keys)
+            self.matrix[row] = self.matrix[last]
+            self.keys[row] = last_key
+            self.rows[last_key] = row
+
+
+class SemanticQueryIndex:
+    """In-process nearest-neighbour index over the embeddings of cached queries.
+
+    Vectors are L2-normalised and grouped into buckets of compatible request
+    parameters; a lookup is one matrix-vector product over its bucket.  The
+    index holds only Redis keys — responses stay in Redis.  When full, the
+    oldest entry is evicted.  Adding and removing an entry are amortised
+    O(1) — nothing is copied per insert.  Thread-safe.
+
+    Args:
+        max_entries: Capacity across all buckets.
+    """
+
+    def __init__(self, max_entries: int = _SEMANTIC_CACHE_SIZE) -> None:
+        """Initialize an empty index."""
+        self._max = max_entries
+        self._buckets: dict[str, _SemanticBucket] = {}
+        self._order: OrderedDict[str, str] = OrderedDict()  # key -> bucket, oldest first
+        self._lock = threading.Lock()
+        self._counts = {"hit": 0, "near_hit": 0, "miss": 0}
+
+    def add(self, key: str, bucket: str, embedding: Sequence[float]) -> None:
+        """Index *embedding* under *key* in *bucket* (replacing an earlier vector)."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0:
+            return
+        vec = vec / norm
+        with self._lock:
+            self._discard(key)
+            entry = self._buckets.get(bucket)
+            if entry is None:
+                entry = self._buckets[bucket] = _SemanticBucket(vec.size)
+            entry.add(key, vec)
+            self._order[key] = bucket
+            while len(self._order) > self._max:
+                self._discard(next(iter(self._order)))
+
+    def nearest(self, bucket: str, embedding: Sequence[float]) -> tuple[str, float] | None:
+        """Return ``(key, cosine similarity)`` of the closest entry in *bucket*."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        with self._lock:
+            entry = self._buckets.get(bucket)
+            if entry is None or norm == 0:
+                return None
+            if entry.matrix.shape[1] != vec.size:
+                return None
+            sims = entry.vectors @ (vec / norm)
+            best = int(np.argmax(sims))
+            return entry.keys[best], float(sims[best])
+
+    def discard(self, key: str) -> None:
+        """Remove *key* if present."""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Remove every entry (counters are kept)."""
+        with self._lock:
+            self._buckets.clear()
+            self._order.clear()
+
+    def count(self, outcome: str) -> None:
+        """Count a lookup outcome: ``hit``, ``near_hit`` or ``miss``."""
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return entry count, capacity and lookup counters."""
+        with self._lock:
+            return {"entries": len(self._order), "max_entries": self._max, **self._counts}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _discard(self, key: str) -> None:
+        """Remove *key* from its bucket.  Caller holds the lock."""
+        bucket = self._order.pop(key, None)
+        if bucket is None:
+            return
+        entry = self._buckets[bucket]
+        entry.remove(key)
+        if not entry:
+            del self._buckets[bucket]
+
+
+class LocalResponseCache:
+    """In-process LRU of parsed responses — the L1 in front of Redis.
+
+    Bounded by the total serialized size of its entries rather than their
+    count, since response sizes vary with answer length and source count.
+    Returned dicts are shared between callers and must not be mutated.
+    Thread-safe.
+
+    Args:
+        max_bytes: Size budget (default: ``RESPONSE_CACHE_L1_BYTES``).
+            ``0`` disables the tier.
+        ttl_seconds: Entry lifetime (default: ``RESPONSE_CACHE_L1_TTL_SECONDS``).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = _RESPONSE_CACHE_L1_BYTES,
+        ttl_seconds: float = _RESPONSE_CACHE_L1_TTL_SECONDS,
+    ) -> None:
+        """Initialize an empty cache."""
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[dict[str, Any], int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the response stored under *key*, or None on miss / expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[2] > self._ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: str, response: dict[str, Any], size: int) -> None:
+        """Store *response*, evicting least recently used entries to fit *size* bytes."""
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (response, size, time.time())
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def discard(self, keys: Iterable[str]) -> int:
+        """Remove *keys* if present.  Returns the number removed."""
+        with self._lock:
+            return sum(self._drop(key) for key in keys)
+
+    def clear(self) -> int:
+        """Remove every entry (counters are kept).  Returns the number removed."""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        """Return entry count, byte usage and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def _drop(self, key: str) -> bool:
+        """Remove *key*.  Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+
+
 class ResponseCache:
-    """Redis-backed cache for /ask responses.
+    """Two-tier cache for /ask responses: in-process L1, Redis L2.
 
     Falls back gracefully to a no-op if Redis is unavailable — the API
-    continues working, just without caching.
+    continues working, just without caching.  L1 is only used while Redis
+    is reachable, since invalidations reach other workers through it.
 
     Args:
         redis_url: Redis connection URL (default: from REDIS_URL env var or
             ``redis://localhost:6379/0``).
         ttl_seconds: Cache TTL in seconds (default: 86400 = 24h).
+        soft_ttl_seconds: Age at which entries become stale (default:
+            ``RESPONSE_CACHE_SOFT_TTL_SECONDS``).  ``0`` disables staleness.
+        semantic_threshold: Minimum cosine similarity for a semantic hit
+            (default: ``SEMANTIC_CACHE_THRESHOLD``).
+        semantic_max_entries: Capacity of the semantic index (default:
+            ``SEMANTIC_CACHE_SIZE``).  ``0`` disables semantic lookups.
+        local_max_bytes: L1 size budget (default: ``RESPONSE_CACHE_L1_BYTES``).
+            ``0`` disables L1.
+        subscribe: Follow other workers' invalidations on a subscriber
+            thread (default).  ``False`` for processes that only publish
+            them, such as ingestion; L1 and the semantic layer, which
+            could not follow, are then disabled.
     """
 
+    # Class-level defaults: instances built without __init__ (test doubles)
+    # have no L1, semantic layer, soft TTL or invalidation subscriber.
+    _local: LocalResponseCache | None = None
+    _semantic: SemanticQueryIndex | None = None
+    _semantic_threshold: float = _SEMANTIC_CACHE_THRESHOLD
+    _soft_ttl: float = 0.0
+    _instance_id: str = ""
+    _listeners: tuple[Callable[[str], None], ...] = ()
+
     def __init__(
         self,
         redis_url: str | None = None,
         ttl_seconds: int = _DEFAULT_TTL_SECONDS,
+        soft_ttl_seconds: float = _RESPONSE_CACHE_SOFT_TTL_SECONDS,
+        semantic_threshold: float = _SEMANTIC_CACHE_THRESHOLD,
+        semantic_max_entries: int = _SEMANTIC_CACHE_SIZE,
+        local_max_bytes: int = _RESPONSE_CACHE_L1_BYTES,
+        subscribe: bool = True,
     ) -> None:
         """Initialize Redis connection (lazy — fails gracefully)."""
         self._ttl = ttl_seconds
+        self._soft_ttl = soft_ttl_seconds
+        self._semantic_threshold = semantic_threshold
+        if not subscribe:
+            semantic_max_entries = local_max_bytes = 0
+        self._semantic = SemanticQueryIndex(semantic_max_entries) if semantic_max_entries else None
+        self._local = LocalResponseCache(local_max_bytes) if local_max_bytes else None
+        self._instance_id = uuid.uuid4().hex
         self._client: Any = None
         url = redis_url or os.environ.get("REDIS_URL", "redis://localhost:6379/0")
         try:
             if redis_lib is None:
                 raise ImportError("redis package not installed")
-            self._client = redis_lib.from_url(url, decode_responses=True, socket_timeout=0.5)
+            # Binary replies: payloads are compressed bytes
+            self._client = redis_lib.from_url(url, socket_timeout=0.5)
             self._client.ping()
             logger.info("ResponseCache: connected to Redis at %s", url)
         except Exception as exc:  # noqa: BLE001
             logger.warning("ResponseCache: Redis unavailable (%s) — caching disabled", exc)
             self._client = None
+        if self._client is not None and subscribe:
+            self._subscribe()
 
     @property
     def available(self) -> bool:
         """True if Redis is reachable."""
         return self._client is not None
 
-    def get(self, query: str, *, top_k: int, threshold: float) -> dict[str, Any] | None:
+    def get(
+        self, query: str, *, top_k: int, threshold: float, profile: str | None = None
+    ) -> dict[str, Any] | None:
         """Return cached response dict or None on miss / error.
 
+        L1 is checked first; a Redis hit is copied into L1.  The returned
+        dict may be shared with other requests — do not mutate it.
+
         Args:
             query: User query string.
             top_k: Number of results parameter.
             threshold: Confidence threshold parameter.
+            profile: Search profile parameter.
 
         Returns:
             Cached response dict if found and valid, None otherwise.
         """
         if not self._client:
             return None
-        key = _make_key(query, top_k, threshold)
+        key = _make_key(query, top_k, threshold, profile)
         try:
-            raw = self._client.get(key)
-            if raw is None:
-                return None
-            data: dict[str, Any] = json.loads(raw)
-            logger.debug("ResponseCache HIT: %s", query[:60])
+            data = self._fetch(key)
+            if data is not None:
+                logger.debug("ResponseCache HIT: %s", query[:60])
             return data
         except Exception as exc:  # noqa: BLE001
             logger.warning("ResponseCache.get error: %s", exc)
@@ -142,40 +632,140 @@ class ResponseCache:
         threshold: float,
         response: dict[str, Any],
         sources: list[str] | None = None,
+        profile: str | None = None,
     ) -> None:
         """Store response in cache and register source tags.
 
+        The payload, tag memberships and registry entries go out in one
+        pipelined transaction.  The stored copy is stamped with its write
+        time (``_cached_at``) for :meth:`is_stale`.
+
         Args:
             query: User query string.
             top_k: Number of results parameter.
             threshold: Confidence threshold parameter.
-            response: Full response dict to cache.
+            response: Full response dict to cache.  L1 keeps a stamped
+                shallow copy, so the caller must not mutate it afterwards.
             sources: List of source filenames cited in the response.
                 Used for tag-based invalidation.
+            profile: Search profile parameter.
         """
         if not self._client:
             return
-        key = _make_key(query, top_k, threshold)
+        key = _make_key(query, top_k, threshold, profile)
         try:
-            payload = json.dumps(response)
-            self._client.setex(key, self._ttl, payload)
-
+            now = time.time()
+            stamped = {**response, "_cached_at": now}
+            payload, size = _encode_payload(stamped)
+            pipe = self._client.pipeline()
+            pipe.setex(key, self._ttl, payload)
+            pipe.zadd(_RESP_REGISTRY, {key: now + self._ttl})
+            pipe.zremrangebyscore(_RESP_REGISTRY, "-inf", now)
             # Register key under each source tag for invalidation
-            if sources:
-                for source in sources:
-                    tag = _tag_key(source)
-                    self._client.sadd(tag, key)
-                    self._client.expire(tag, _TAG_TTL_SECONDS)
+            for source in sources or ():
+                tag = _tag_key(source)
+                pipe.sadd(tag, key)
+                pipe.expire(tag, _TAG_TTL_SECONDS)
+                pipe.zadd(_TAG_REGISTRY, {tag: now + _TAG_TTL_SECONDS})
+            pipe.execute()
+            if self._local is not None:
+                self._local.set(key, stamped, size)
 
             logger.debug("ResponseCache SET: %s (sources=%s)", query[:60], sources)
         except Exception as exc:  # noqa: BLE001
             logger.warning("ResponseCache.set error: %s", exc)
 
+    def get_similar(
+        self,
+        query_embedding: Sequence[float],
+        *,
+        top_k: int,
+        threshold: float,
+        scope: Sequence[str] = (),
+        profile: str | None = None,
+    ) -> tuple[dict[str, Any], float] | None:
+        """Return the cached response of the nearest previously cached query.
+
+        Only queries indexed with the same ``top_k``, *threshold*,
+        detected sub-domains (*scope*) and *profile* are candidates.  A candidate whose
+        Redis entry has expired or been invalidated is dropped from the
+        index and the lookup misses.  Each lookup is recorded as ``hit``,
+        ``near_hit`` or ``miss``.
+
+        Args:
+            query_embedding: Embedding of the new query.
+            top_k: Number of results parameter.
+            threshold: Confidence threshold parameter.
+            scope: Sub-domains detected for the new query.
+            profile: Search profile parameter.
+
+        Returns:
+            ``(response, similarity)`` on a hit, None otherwise.
+        """
+        if not self._client or self._semantic is None:
+            return None
+        match = self._semantic.nearest(
+            _semantic_bucket(top_k, threshold, scope, profile), query_embedding
+        )
+        if match is None or match[1] < self._semantic_threshold:
+            near = match is not None and match[1] >= (
+                self._semantic_threshold - _SEMANTIC_CACHE_NEAR_MARGIN
+            )
+            self._semantic.count("near_hit" if near else "miss")
+            record_semantic_cache_lookup("near_hit" if near else "miss")
+            return None
+        key, similarity = match
+        try:
+            data = self._fetch(key)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.get_similar error: %s", exc)
+            return None
+        if data is None:
+            self._semantic.discard(key)
+            self._semantic.count("miss")
+            record_semantic_cache_lookup("miss")
+            return None
+        self._semantic.count("hit")
+        record_semantic_cache_lookup("hit")
+        logger.debug("ResponseCache semantic HIT (similarity=%.3f)", similarity)
+        return data, similarity
+
+    def index_query(
+        self,
+        query: str,
+        query_embedding: Sequence[float],
+        *,
+        top_k: int,
+        threshold: float,
+        scope: Sequence[str] = (),
+        profile: str | None = None,
+    ) -> None:
+        """Make the response cached for *query* reachable by :meth:`get_similar`.
+
+        Call after :meth:`set` with the same parameters.
+
+        Args:
+            query: User query string the response was cached under.
+            query_embedding: Embedding of *query*.
+            top_k: Number of results parameter.
+            threshold: Confidence threshold parameter.
+            scope: Sub-domains detected for *query*.
+            profile: Search profile parameter.
+        """
+        if not self._client or self._semantic is None:
+            return
+        self._semantic.add(
+            _make_key(query, top_k, threshold, profile),
+            _semantic_bucket(top_k, threshold, scope, profile),
+            query_embedding,
+        )
+
     def invalidate_source(self, source_name: str) -> int:
         """Invalidate all cached responses that cited a given source.
 
         Called after re-ingestion of a document to ensure stale answers
-        are not served.
+        are not served.  The invalidation is broadcast so every worker
+        evicts the same keys from its L1 and semantic index.
 
         Args:
             source_name: Filename or source identifier to invalidate.
@@ -187,11 +777,19 @@ class ResponseCache:
             return 0
         tag = _tag_key(source_name)
         try:
-            keys = self._client.smembers(tag)
+            keys = [_as_str(key) for key in self._client.smembers(tag)]
+            deleted = self._client.delete(*keys) if keys else 0
+            pipe = self._client.pipeline()
+            pipe.delete(tag)
+            pipe.zrem(_TAG_REGISTRY, tag)
+            if keys:
+                pipe.zrem(_RESP_REGISTRY, *keys)
+            pipe.execute()
+            # Evict after the Redis delete, so no L1 refill can resurrect a key
+            self._evict(keys)
+            self._publish({"source": source_name, "keys": keys})
             if not keys:
                 return 0
-            deleted = self._client.delete(*keys)
-            self._client.delete(tag)
             logger.info(
                 "ResponseCache: invalidated %d entries for source '%s'", deleted, source_name
             )
@@ -209,12 +807,18 @@ class ResponseCache:
         if not self._client:
             return 0
         try:
-            keys = list(self._client.scan_iter(f"{_NS}*"))
-            tag_keys = list(self._client.scan_iter(f"{_TAG_NS}*"))
+            keys = list(self._client.zrange(_RESP_REGISTRY, 0, -1))
+            tag_keys = list(self._client.zrange(_TAG_REGISTRY, 0, -1))
             all_keys = keys + tag_keys
+            deleted = sum(
+                self._client.delete(*all_keys[i : i + _DELETE_BATCH])
+                for i in range(0, len(all_keys), _DELETE_BATCH)
+            )
+            self._client.delete(_RESP_REGISTRY, _TAG_REGISTRY)
+            self._evict_all()
+            self._publish({"flush": True})
             if not all_keys:
                 return 0
-            deleted = self._client.delete(*all_keys)
             logger.info("ResponseCache: flushed %d keys", deleted)
             return int(deleted)
         except Exception as exc:  # noqa: BLE001
@@ -224,15 +828,562 @@ class ResponseCache:
     def stats(self) -> dict[str, Any]:
         """Return basic cache statistics.
 
+        Key counts come from the registries (one round trip, no keyspace
+        scan); expired members are pruned first.
+
         Returns:
-            Dict with keys: available, response_keys, tag_keys.
+            Dict with keys: available, response_keys, tag_keys, plus
+            ``local`` (L1 entries, bytes and hit / miss counters) and
+            ``semantic`` (index size and hit / near-hit / miss counters)
+            when those layers are enabled.
         """
         if not self._client:
             return {"available": False, "response_keys": 0, "tag_keys": 0}
         try:
-            resp_keys = sum(1 for _ in self._client.scan_iter(f"{_NS}*"))
-            tag_keys = sum(1 for _ in self._client.scan_iter(f"{_TAG_NS}*"))
-            return {"available": True, "response_keys": resp_keys, "tag_keys": tag_keys}
+            now = time.time()
+            pipe = self._client.pipeline()
+            for registry in (_RESP_REGISTRY, _TAG_REGISTRY):
+                pipe.zremrangebyscore(registry, "-inf", now)
+                pipe.zcard(registry)
+            _, resp_keys, _, tag_keys = pipe.execute()
+            stats: dict[str, Any] = {
+                "available": True,
+                "response_keys": resp_keys,
+                "tag_keys": tag_keys,
+            }
+            if self._local is not None:
+                stats["local"] = self._local.stats()
+            if self._semantic is not None:
+                stats["semantic"] = self._semantic.stats()
+            return stats
         except Exception as exc:  # noqa: BLE001
             logger.warning("ResponseCache.stats error: %s", exc)
             return {"available": False, "response_keys": 0, "tag_keys": 0}
+
+    def is_stale(self, entry: dict[str, Any]) -> bool:
+        """True if cached *entry* is older than the soft TTL.
+
+        Entries written before write times were recorded are never stale.
+        """
+        cached_at = entry.get("_cached_at")
+        if not self._soft_ttl or cached_at is None:
+            return False
+        return time.time() - cached_at > self._soft_ttl
+
+    @staticmethod
+    def make_key(query: str, *, top_k: int, threshold: float, profile: str | None = None) -> str:
+        """The cache key :meth:`get` and :meth:`set` use for these parameters."""
+        return _make_key(query, top_k, threshold, profile)
+
+    def claim_flight(self, key: str, ttl_seconds: float) -> bool:
+        """Try to become the worker that answers *key* (a :meth:`make_key` key).
+
+        The lock expires after *ttl_seconds* in case its holder dies.
+
+        Returns:
+            True if this worker should compute the answer — it took the lock,
+            or Redis is unavailable.  False if another worker holds it.
+        """
+        if not self._client:
+            return True
+        try:
+            claimed = self._client.set(
+                _flight_key(key), self._instance_id, nx=True, px=int(ttl_seconds * 1000)
+            )
+            return bool(claimed)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.claim_flight error: %s", exc)
+            return True
+
+    def release_flight(self, key: str) -> None:
+        """Release a lock taken by :meth:`claim_flight` (best-effort)."""
+        if not self._client:
+            return
+        try:
+            self._client.eval(_RELEASE_FLIGHT_SCRIPT, 1, _flight_key(key), self._instance_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.release_flight error: %s", exc)
+
+    def extend_flight(self, key: str, ttl_seconds: float) -> bool:
+        """Push back the expiry of a lock taken by :meth:`claim_flight`.
+
+        Returns:
+            True if this worker still holds the lock (or Redis is
+            unavailable), False if it expired or another worker holds it.
+        """
+        if not self._client:
+            return True
+        try:
+            extended = self._client.eval(
+                _EXTEND_FLIGHT_SCRIPT,
+                1,
+                _flight_key(key),
+                self._instance_id,
+                int(ttl_seconds * 1000),
+            )
+            return bool(extended)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.extend_flight error: %s", exc)
+            return True
+
+    def wait_for_flight(self, key: str, timeout: float) -> dict[str, Any] | None:
+        """Wait for the worker holding *key*'s flight lock to cache its answer.
+
+        Returns:
+            The cached response, or None if the lock was released without
+            one (the leader failed or its answer is not cacheable), the
+            timeout passed, or Redis failed.  Do not mutate the result.
+        """
+        if not self._client:
+            return None
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                data = self._fetch(key)
+                if data is not None:
+                    return data
+                if not self._client.exists(_flight_key(key)):
+                    # Released between the two reads: the answer may have landed
+                    return self._fetch(key)
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(_FLIGHT_POLL_SECONDS)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.wait_for_flight error: %s", exc)
+            return None
+
+    def record_query(
+        self, query: str, *, top_k: int, threshold: float, profile: str | None = None
+    ) -> None:
+        """Count one request for *query* in today's query log (best-effort).
+
+        The query is logged normalised as in its cache key, so spellings
+        that share one cache entry share one count.
+
+        Args:
+            query: User query string.
+            top_k: Number of results parameter.
+            threshold: Confidence threshold parameter.
+            profile: HNSW search profile (part of the cache key).
+        """
+        if not self._client:
+            return
+        key = _query_log_key(time.time())
+        fields: list[Any] = [_normalize_query(query), top_k, threshold]
+        if profile is not None:
+            # Default-profile members keep the three-field form they were
+            # logged with before the profile was, so their counts add up
+            fields.append(profile)
+        member = json.dumps(fields)
+        try:
+            pipe = self._client.pipeline()
+            pipe.zincrby(key, 1, member)
+            pipe.expire(key, (_QUERY_LOG_DAYS + 1) * 86_400)
+            pipe.zremrangebyrank(key, 0, -_QUERY_LOG_MAX_ENTRIES - 1)
+            pipe.execute()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.record_query error: %s", exc)
+
+    def popular_queries(self, limit: int = 100, days: int = _QUERY_LOG_DAYS) -> list[LoggedQuery]:
+        """Most requested queries over the last *days* days, most frequent first.
+
+        Returns:
+            Up to *limit* entries; empty when Redis is unavailable.
+        """
+        if not self._client:
+            return []
+        now = time.time()
+        try:
+            pipe = self._client.pipeline()
+            for day in range(days):
+                pipe.zrevrange(
+                    _query_log_key(now - day * 86_400),
+                    0,
+                    _QUERY_LOG_MAX_ENTRIES - 1,
+                    withscores=True,
+                )
+            counts: Counter[str] = Counter()
+            for rows in pipe.execute():
+                for member, score in rows:
+                    counts[_as_str(member)] += int(score)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache.popular_queries error: %s", exc)
+            return []
+        return [
+            LoggedQuery(*json.loads(member), count=count)
+            for member, count in counts.most_common(limit)
+        ]
+
+    def add_invalidation_listener(self, callback: Callable[[str], None]) -> None:
+        """Call *callback(source_name)* when another worker invalidates a source.
+
+        Lets other per-process caches (e.g. the retrieval cache) follow the
+        same broadcast.  Runs on the subscriber thread; exceptions are logged.
+        """
+        self._listeners = (*self._listeners, callback)
+
+    def _fetch(self, key: str) -> dict[str, Any] | None:
+        """L1, then Redis (filling L1).  Redis errors propagate."""
+        if self._local is not None:
+            data = self._local.get(key)
+            if data is not None:
+                return data
+        raw = self._client.get(key)
+        if raw is None:
+            return None
+        try:
+            data, size = _decode_payload(raw)
+        except ValueError as exc:
+            # e.g. a zstd entry from a worker that has zstandard, read during
+            # a rolling deploy by one that does not.  A miss: this worker's
+            # own answer overwrites it in a format every worker reads.
+            logger.debug("ResponseCache: unreadable entry %s treated as a miss: %s", key, exc)
+            return None
+        if self._local is not None:
+            self._local.set(key, data, size)
+        return data
+
+    def _evict(self, keys: Iterable[str]) -> None:
+        """Drop *keys* from this process's L1 and semantic index."""
+        keys = list(keys)
+        if self._local is not None:
+            self._local.discard(keys)
+        if self._semantic is not None:
+            for key in keys:
+                self._semantic.discard(key)
+
+    def _evict_all(self) -> None:
+        """Empty this process's L1 and semantic index."""
+        if self._local is not None:
+            self._local.clear()
+        if self._semantic is not None:
+            self._semantic.clear()
+
+    def _publish(self, message: dict[str, Any]) -> None:
+        """Broadcast an invalidation to the other workers (best-effort)."""
+        try:
+            self._client.publish(
+                _INVALIDATION_CHANNEL, json.dumps({**message, "origin": self._instance_id})
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache: invalidation broadcast failed: %s", exc)
+
+    def _subscribe(self) -> None:
+        """Start the background thread applying other workers' invalidations."""
+        try:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{_INVALIDATION_CHANNEL: self._on_invalidation})
+            pubsub.run_in_thread(
+                sleep_time=0.1, daemon=True, exception_handler=self._on_subscriber_error
+            )
+        except Exception as exc:  # noqa: BLE001
+            # Without the broadcast an L1 hit could outlive an invalidation
+            # by up to the L1 TTL — run without L1 instead.
+            logger.warning("ResponseCache: pub/sub unavailable (%s) — L1 disabled", exc)
+            self._local = None
+
+    def _on_invalidation(self, message: dict[str, Any]) -> None:
+        """Apply one broadcast invalidation (subscriber thread)."""
+        try:
+            data = json.loads(message["data"])
+            if data.get("origin") == self._instance_id:
+                return
+            if data.get("flush"):
+                self._evict_all()
+                return
+            self._evict(data.get("keys", ()))
+            source = data.get("source")
+            if source:
+                for callback in self._listeners:
+                    callback(source)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("ResponseCache: invalidation message failed: %s", exc)
+
+    def _on_subscriber_error(self, exc: BaseException, pubsub: Any, thread: Any) -> None:
+        """Subscription lost: drop L1 (invalidations may be missed), then retry."""
+        logger.warning("ResponseCache: invalidation subscriber error (%s) — L1 cleared", exc)
+        self._evict_all()
+        time.sleep(1.0)
+
+
+# ---------------------------------------------------------------------------
+# Retrieval cache
+# ---------------------------------------------------------------------------
+
+
+def _embedding_digest(query_embedding: Sequence[float]) -> str:
+    """SHA-256 of the L2-normalised embedding quantized to int8.
+
+    Pure function — no I/O.
+
+    Args:
+        query_embedding: Dense query vector.
+
+    Returns:
+        Hex digest identifying the (quantized) query direction.
+    """
+    vec = np.asarray(query_embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec = vec / norm
+    quantized = np.rint(vec * _EMBEDDING_KEY_SCALE).astype(np.int8)
+    return hashlib.sha256(quantized.tobytes()).hexdigest()
+
+
+@dataclass(frozen=True)
+class LoggedQuery:
+    """A cacheable /ask request from the query log, with its request count."""
+
+    query: str
+    top_k: int
+    threshold: float
+    profile: str | None = None
+    count: int = 0
+
+
+@dataclass(frozen=True)
+class RetrievalEntry:
+    """Cached retrieval: reranked ``(chunk, score)`` pairs plus the resolved scope."""
+
+    results: tuple[tuple[Any, float], ...]
+    sub_domains: tuple[str, ...]
+    timestamp: float
+
+    @property
+    def chunk_ids(self) -> list[int | None]:
+        """Ordered chunk ids of the cached results."""
+        return [getattr(chunk, "id", None) for chunk, _ in self.results]
+
+
+class RetrievalCache:
+    """In-process TTL + LRU cache of reranked retrieval results.
+
+    Sits between embedding and generation: the key is the quantized query
+    embedding plus everything else that shapes the ranking (detected
+    sub-domains, ``top_k``, rerank settings), and the value is the ordered
+    ``(chunk, score)`` list — chunks are projection-only ``ChunkHit`` rows,
+    so a hit needs no database round trip.
+
+    Entries are indexed by ``source_name`` so re-ingesting a document can
+    drop every retrieval that returned one of its chunks.  The cache is
+    per-process, but invalidation reaches every worker: ``api.deps``
+    registers :meth:`invalidate_source` as a listener on the
+    :class:`ResponseCache` pub/sub channel, so a
+    :meth:`ResponseCache.invalidate_source` in another worker or in the
+    ingestion process evicts here too (``/cache/invalidate`` calls both
+    caches directly for the worker that serves it).  The TTL only bounds
+    staleness while Redis is unreachable.
+
+    Args:
+        max_entries: LRU capacity (default: ``RETRIEVAL_CACHE_SIZE``).
+            ``0`` disables caching.
+        ttl_seconds: Entry lifetime (default: ``RETRIEVAL_CACHE_TTL_SECONDS``).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = _RETRIEVAL_CACHE_SIZE,
+        ttl_seconds: float = _RETRIEVAL_CACHE_TTL_SECONDS,
+    ) -> None:
+        """Initialize an empty cache."""
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, RetrievalEntry] = OrderedDict()
+        self._by_source: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True if entries are stored at all."""
+        return self._max > 0
+
+    @staticmethod
+    def make_key(
+        query_embedding: Sequence[float],
+        *,
+        scope: Sequence[str],
+        top_k: int,
+        settings: Hashable = (),
+    ) -> str:
+        """Deterministic cache key for a retrieval.
+
+        Args:
+            query_embedding: Dense query vector.
+            scope: Sub-domains detected for the query (order-insensitive).
+            top_k: Number of results requested.
+            settings: Hashable rerank / search settings (keyword terms,
+                MMR lambda, search profile, ...).
+
+        Returns:
+            Hex digest string.
+        """
+        raw = f"{_embedding_digest(query_embedding)}|{sorted(set(scope))}|{top_k}|{settings!r}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(
+        self,
+        query_embedding: Sequence[float],
+        *,
+        scope: Sequence[str],
+        top_k: int,
+        settings: Hashable = (),
+    ) -> RetrievalEntry | None:
+        """Return the cached retrieval or None on miss / expiry.
+
+        Args:
+            query_embedding: Dense query vector.
+            scope: Sub-domains detected for the query.
+            top_k: Number of results requested.
+            settings: Rerank / search settings used to build the key.
+
+        Returns:
+            The cached entry if present and fresh, None otherwise.
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(query_embedding, scope=scope, top_k=top_k, settings=settings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.timestamp > self._ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def set(
+        self,
+        query_embedding: Sequence[float],
+        *,
+        scope: Sequence[str],
+        top_k: int,
+        settings: Hashable = (),
+        results: Sequence[tuple[Any, float]],
+        sub_domains: Sequence[str] = (),
+    ) -> None:
+        """Store reranked results, evicting the least recently used entry if full.
+
+        Args:
+            query_embedding: Dense query vector.
+            scope: Sub-domains detected for the query.
+            top_k: Number of results requested.
+            settings: Rerank / search settings used to build the key.
+            results: Ordered ``(chunk, score)`` pairs.
+            sub_domains: Sub-domains the retrieval actually searched (empty
+                after a global fallback).
+        """
+        if not self.enabled:
+            return
+        key = self.make_key(query_embedding, scope=scope, top_k=top_k, settings=settings)
+        entry = RetrievalEntry(
+            results=tuple(results), sub_domains=tuple(sub_domains), timestamp=time.time()
+        )
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            for chunk, _ in entry.results:
+                source = getattr(chunk, "source_name", None)
+                if isinstance(source, str):
+                    self._by_source.setdefault(source, set()).add(key)
+            while len(self._entries) > self._max:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_source(self, source_name: str) -> int:
+        """Drop every cached retrieval that returned a chunk of *source_name*.
+
+        Args:
+            source_name: Filename or source identifier to invalidate.
+
+        Returns:
+            Number of entries removed.
+        """
+        with self._lock:
+            keys = list(self._by_source.get(source_name, ()))
+            for key in keys:
+                self._drop(key)
+        if keys:
+            logger.info(
+                "RetrievalCache: invalidated %d entries for source '%s'", len(keys), source_name
+            )
+        return len(keys)
+
+    def clear(self) -> int:
+        """Remove all entries and reset counters.
+
+        Returns:
+            Number of entries removed.
+        """
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._by_source.clear()
+            self._hits = self._misses = 0
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        """Return entry count and hit/miss counters.
+
+        Returns:
+            Dict with keys: enabled, entries, max_entries, hits, misses.
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self._max,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def _drop(self, key: str) -> None:
+        """Remove *key* and its source-index references.  Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for chunk, _ in entry.results:
+            source = getattr(chunk, "source_name", None)
+            keys = self._by_source.get(source) if isinstance(source, str) else None
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_source[source]
+
+
+def main() -> None:
+    """Parse CLI arguments and run the cache command."""
+    parser = argparse.ArgumentParser(description="Manage the /ask response cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    warm_p = sub.add_parser(
+        "warm", help="Replay popular logged queries and the golden set through /ask."
+    )
+    warm_p.add_argument("--url", help="Base URL of a running API (default: in-process app).")
+    warm_p.add_argument("--limit", type=int, default=200, help="Logged queries to replay.")
+    warm_p.add_argument(
+        "--days", type=int, default=_QUERY_LOG_DAYS, help="Days of query log to rank."
+    )
+    warm_p.add_argument("--no-golden", action="store_true", help="Skip the golden dataset.")
+    warm_p.add_argument("--concurrency", type=int, default=4, help="Requests in flight.")
+    warm_p.add_argument("--rate", type=float, default=2.0, help="Requests per second (0 = no cap).")
+
+    args = parser.parse_args()
+
+    from infrastructure.cache_warm import collect_queries, make_client, warm
+
+    queries = collect_queries(
+        ResponseCache(), limit=args.limit, days=args.days, golden=not args.no_golden
+    )
+    print(f"Warming {len(queries)} queries ({args.concurrency} in flight, {args.rate}/s)")
+    with make_client(args.url) as client:
+        report = warm(client, queries, concurrency=args.concurrency, rate=args.rate)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
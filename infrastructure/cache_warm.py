@@ -0,0 +1,210 @@
+"""Cache warming — replay popular and golden questions through ``POST /ask``.
+
+After a deploy (empty per-process caches) or a Redis flush, every popular
+question pays the full pipeline again.  ``python -m infrastructure.cache
+warm`` replays the most requested queries of the query log
+(:meth:`~infrastructure.cache.ResponseCache.popular_queries`) and the
+golden evaluation questions through /ask, so the embedding, retrieval and
+response caches are filled before users ask.
+
+Requests go through the API itself: against a running server (``--url``),
+which also warms its workers' in-process caches, or against the app
+in-process, which fills the shared tiers (Redis response cache and
+``EMBEDDING_CACHE_STORE``).  Concurrency and request rate are bounded so
+warming neither starves live traffic nor trips the LLM provider's rate
+limits.  The report's hit ratio is the share of answered queries that were
+already cached — close to 1.0 means the caches were warm to begin with.
+
+Usage::
+
+    from infrastructure.cache import ResponseCache
+    from infrastructure.cache_warm import collect_queries, make_client, warm
+
+    queries = collect_queries(ResponseCache(), limit=200)
+    with make_client("http://localhost:8000") as client:
+        print(warm(client, queries, concurrency=4, rate=2.0).summary())
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from infrastructure.cache import LoggedQuery, ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Session ids of warm-up requests start with this.  Each request gets its
+# own, so the per-session rate limit does not throttle the replay, and the
+# API leaves them out of the query log.
+WARM_SESSION_PREFIX = "cache-warm"
+
+# A cold request runs the whole pipeline, generation included
+_REQUEST_TIMEOUT_SECONDS = 120.0
+
+
+@dataclass
+class WarmReport:
+    """Outcome of one warm-up run."""
+
+    sent: int = 0
+    answered: int = 0
+    refused: int = 0
+    failed: int = 0
+    cache_hits: int = 0
+    embedding_cache_hits: int = 0
+    retrieval_cache_hits: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of answered queries that were already in the response cache."""
+        return self.cache_hits / self.answered if self.answered else 0.0
+
+    def record(self, status_code: int, usage: dict[str, Any] | None = None) -> None:
+        """Count one replayed request."""
+        self.sent += 1
+        if status_code == 200 and usage is not None:
+            self.answered += 1
+            self.cache_hits += bool(usage.get("cache_hit"))
+            self.embedding_cache_hits += bool(usage.get("embedding_cache_hit"))
+            self.retrieval_cache_hits += bool(usage.get("retrieval_cache_hit"))
+        elif status_code == 422:
+            self.refused += 1  # insufficient knowledge — nothing to cache
+        else:
+            self.failed += 1
+
+    def summary(self) -> str:
+        """One-line human-readable report."""
+        return (
+            f"sent={self.sent} answered={self.answered} refused={self.refused} "
+            f"failed={self.failed} hit_ratio={self.hit_ratio:.2f} "
+            f"embedding_hits={self.embedding_cache_hits} "
+            f"retrieval_hits={self.retrieval_cache_hits} elapsed={self.elapsed_s:.1f}s"
+        )
+
+
+class _Pacer:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        time.sleep(slot - now)
+
+
+def collect_queries(
+    response_cache: ResponseCache,
+    *,
+    limit: int = 200,
+    days: int = 7,
+    golden: bool = True,
+) -> list[LoggedQuery]:
+    """The queries to replay: most requested first, then the golden set.
+
+    Adversarial golden questions are skipped — they are refused, not
+    cached.  Duplicates (same response cache key) are dropped.
+
+    Args:
+        response_cache: Cache whose query log is ranked.
+        limit: Maximum logged queries.
+        days: Days of query log to rank.
+        golden: Also replay ``eval.dataset.GOLDEN_DATASET`` with the
+            request defaults.
+    """
+    queries = response_cache.popular_queries(limit, days)
+    if golden:
+        from api.schemas.ask import AskRequest
+        from eval.dataset import GOLDEN_DATASET
+
+        top_k = AskRequest.model_fields["top_k"].default
+        threshold = AskRequest.model_fields["confidence_threshold"].default
+        queries += [
+            LoggedQuery(q.question, top_k, threshold) for q in GOLDEN_DATASET if not q.adversarial
+        ]
+    seen: set[str] = set()
+    unique: list[LoggedQuery] = []
+    for q in queries:
+        key = ResponseCache.make_key(
+            q.query, top_k=q.top_k, threshold=q.threshold, profile=q.profile
+        )
+        if key not in seen:
+            seen.add(key)
+            unique.append(q)
+    return unique
+
+
+def make_client(url: str | None = None) -> httpx.Client:
+    """HTTP client for *url*, or a ``TestClient`` on the in-process app."""
+    if url:
+        return httpx.Client(base_url=url, timeout=_REQUEST_TIMEOUT_SECONDS)
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    return TestClient(app)
+
+
+def warm(
+    client: httpx.Client,
+    queries: list[LoggedQuery],
+    *,
+    concurrency: int = 4,
+    rate: float = 2.0,
+) -> WarmReport:
+    """Replay *queries* through ``POST /ask`` as pure-RAG requests.
+
+    Args:
+        client: Client for the API (see :func:`make_client`).
+        queries: Queries to replay, in order.
+        concurrency: Requests in flight at once.
+        rate: Maximum requests started per second (``0`` = unlimited).
+
+    Returns:
+        Counts of answered / refused / failed requests and cache hits.
+    """
+    report = WarmReport()
+    pacer = _Pacer(rate)
+    lock = threading.Lock()
+
+    def replay(i: int, q: LoggedQuery) -> None:
+        pacer.wait()
+        payload = {
+            "query": q.query,
+            "top_k": q.top_k,
+            "confidence_threshold": q.threshold,
+            "profile": q.profile,
+            "use_tools": False,
+            "session_id": f"{WARM_SESSION_PREFIX}-{i}",
+        }
+        try:
+            response = client.post("/ask", json=payload)
+            usage = response.json().get("usage") if response.status_code == 200 else None
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Warm-up request failed for %r: %s", q.query[:60], exc)
+            status_code, usage = 0, None
+        else:
+            status_code = response.status_code
+        with lock:
+            report.record(status_code, usage)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="warm") as pool:
+        list(pool.map(replay, range(len(queries)), queries))
+    report.elapsed_s = time.perf_counter() - t0
+    return report
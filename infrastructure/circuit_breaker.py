@@ -48,7 +48,7 @@ from __future__ import annotations
 import logging
 import threading
 import time
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, TypeVar
@@ -216,20 +216,11 @@ class CircuitBreaker:
                     exc,
                 )
 
-    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
-        """Execute a function through the circuit breaker.
-
-        Args:
-            func: The callable to protect (e.g. generator.generate).
-            *args: Positional arguments forwarded to func.
-            **kwargs: Keyword arguments forwarded to func.
-
-        Returns:
-            The return value of func.
+    def _admit(self) -> None:
+        """Count a call and reject it while OPEN (probing once the timeout passed).
 
         Raises:
             CircuitOpenError: If circuit is OPEN (call was rejected).
-            Exception: Any exception raised by func (recorded as failure).
         """
         with self._lock:
             self.stats.total_calls += 1
@@ -245,6 +236,23 @@ class CircuitBreaker:
                     reset_in = self._reset_timeout - (time.time() - self._last_failure_time)
                     raise CircuitOpenError(self.name, max(0.0, reset_in))
 
+    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Execute a function through the circuit breaker.
+
+        Args:
+            func: The callable to protect (e.g. generator.generate).
+            *args: Positional arguments forwarded to func.
+            **kwargs: Keyword arguments forwarded to func.
+
+        Returns:
+            The return value of func.
+
+        Raises:
+            CircuitOpenError: If circuit is OPEN (call was rejected).
+            Exception: Any exception raised by func (recorded as failure).
+        """
+        self._admit()
+
         # Execute outside the lock to avoid blocking other threads
         try:
             result = func(*args, **kwargs)
@@ -256,6 +264,28 @@ class CircuitBreaker:
                 self._on_failure(exc)
             raise
 
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Await a coroutine function through the circuit breaker.
+
+        Same state machine and counters as :meth:`call`, shared with it —
+        sync and async callers of one breaker trip it together.  The lock
+        is only held for bookkeeping, never across the ``await``.
+
+        Raises:
+            CircuitOpenError: If circuit is OPEN (call was rejected).
+            Exception: Any exception raised by func (recorded as failure).
+        """
+        self._admit()
+        try:
+            result = await func(*args, **kwargs)
+            with self._lock:
+                self._on_success()
+            return result
+        except self._tracked_exceptions as exc:
+            with self._lock:
+                self._on_failure(exc)
+            raise
+
     def reset(self) -> None:
         """Manually force circuit to CLOSED state (e.g. after maintenance).
 
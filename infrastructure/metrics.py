@@ -9,6 +9,8 @@ Metrics:
     cache_hits_total                 Counter of response cache hits
     cache_misses_total               Counter of response cache misses
     embedding_cache_hits_total       Counter of embedding cache hits
+    semantic_cache_lookups_total     Semantic response cache lookups by result (hit/near_hit/miss)
+    single_flight_total              Coalesced /ask requests by role (leader/follower)
     rate_limited_total               Requests rejected by rate limiter
     circuit_breaker_trips_total      Times a circuit breaker tripped to OPEN
     circuit_breaker_rejected_total   Calls rejected while circuit is OPEN
@@ -77,6 +79,20 @@ try:
         registry=_REGISTRY,
     )
 
+    semantic_cache_lookups_total = Counter(
+        "mip_semantic_cache_lookups_total",
+        "Semantic response cache lookups by result (hit, near_hit, miss)",
+        ["result"],
+        registry=_REGISTRY,
+    )
+
+    single_flight_total = Counter(
+        "mip_single_flight_total",
+        "Single-flight /ask requests by role (leader computes, follower waits)",
+        ["role"],
+        registry=_REGISTRY,
+    )
+
     rate_limited_total = Counter(
         "mip_rate_limited_total",
         "Requests rejected by rate limiter",
@@ -147,6 +163,28 @@ def record_embedding_cache_hit() -> None:
         embedding_cache_hits_total.inc()
 
 
+def record_semantic_cache_lookup(result: str) -> None:
+    """Increment the semantic response cache lookup counter.
+
+    Args:
+        result: ``"hit"``, ``"near_hit"`` (best match just below the
+            similarity threshold) or ``"miss"``.
+    """
+    if _registry_available:
+        semantic_cache_lookups_total.labels(result=result).inc()
+
+
+def record_single_flight(role: str) -> None:
+    """Increment the single-flight counter.
+
+    Args:
+        role: ``"leader"`` (computed the result) or ``"follower"`` (waited
+            for an identical in-flight request).
+    """
+    if _registry_available:
+        single_flight_total.labels(role=role).inc()
+
+
 def record_rate_limited() -> None:
     """Increment rate-limited requests counter."""
     if _registry_available:
@@ -0,0 +1,406 @@
+"""Single-flight — coalesce identical concurrent requests into one computation.
+
+When a burst of clients asks the same question before its answer reaches
+the response cache, each request would embed, search and generate on its
+own.  A :class:`SingleFlight` keyed on the response cache key lets the
+first request (the leader) compute while the identical requests that arrive
+meanwhile (followers) wait for its result — one LLM call instead of N.
+
+- :meth:`SingleFlight.do` shares a return value or exception.
+- :meth:`SingleFlight.submit` starts a call in the background unless one
+  is already in flight for the key — e.g. one refresh per stale cache entry.
+- :meth:`SingleFlight.stream` fans a stream out.  The first request for a
+  key starts a detached producer (a thread, or a loop task for
+  :class:`AsyncSingleFlight`) that publishes every event; the leader and
+  the followers all only read, replaying the events so far and then
+  receiving new ones as they arrive.  Any subscriber may leave — the leader
+  included — without cutting the stream short for the others; the
+  producer stops once nobody is listening.  A producer error is raised in
+  every subscriber after the events published before it.
+
+:class:`AsyncSingleFlight` is the same contract on the event loop.  Both
+coalesce within one process; across uvicorn workers,
+:meth:`~infrastructure.cache.ResponseCache.claim_flight` takes a Redis lock
+so followers elsewhere wait for the leader's answer to land in the
+response cache (``SINGLE_FLIGHT_DISTRIBUTED``).  Streams coalesce per
+process only — their events are not cached.
+
+Usage::
+
+    from infrastructure.singleflight import SingleFlight
+
+    flights = SingleFlight()
+    response, shared = flights.do(cache_key, answer, body)
+
+Environment variables
+---------------------
+``SINGLE_FLIGHT_DISTRIBUTED``
+    ``true`` to also coalesce across workers through a Redis lock (default
+    ``false``).  Needs Redis; without it every worker leads its own flight.
+
+``SINGLE_FLIGHT_WAIT_SECONDS``
+    How long a follower in another worker waits for the leader's answer
+    before computing its own, and the lifetime of the Redis lock (default
+    ``30``).  A stale-entry refresh extends its lock every third of that
+    while it runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from concurrent.futures import Executor, Future
+from typing import Any, TypeVar
+
+from infrastructure.metrics import record_single_flight
+from infrastructure.stages import _stage_executor
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_DISTRIBUTED: bool = os.getenv("SINGLE_FLIGHT_DISTRIBUTED", "false").lower() == "true"
+SINGLE_FLIGHT_WAIT_SECONDS: float = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "30"))
+
+
+class _Broadcast:
+    """Append-only event log that late subscribers replay from the start."""
+
+    def __init__(self) -> None:
+        self.events: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event: Any) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def close(self, error: BaseException | None = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def replay(self) -> Iterator[Any]:
+        seen = 0
+        while True:
+            with self._cond:
+                while seen == len(self.events) and not self.done:
+                    self._cond.wait()
+                batch = self.events[seen:]
+                finished = self.done
+            seen += len(batch)
+            yield from batch
+            if finished and seen == len(self.events):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key (threads).
+
+    Keys are released as soon as the leader finishes, so a flight never
+    serves a result computed before the caller arrived — caching results
+    is the response cache's job.
+
+    Args:
+        executor: Pool for :meth:`submit`.  Defaults to the shared
+            ``ASK_STAGE_WORKERS`` pool.
+    """
+
+    def __init__(self, executor: Executor | None = None) -> None:
+        self._executor = executor
+        self._calls: dict[str, Future[Any]] = {}
+        self._streams: dict[str, _Broadcast] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> tuple[T, bool]:
+        """Run ``fn(*args, **kwargs)`` once for all concurrent callers of *key*.
+
+        Returns:
+            ``(result, shared)`` — *shared* is True for followers.
+
+        Raises:
+            Exception: Whatever the leader's call raised, in every caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            record_single_flight("follower")
+            return future.result(), True
+        record_single_flight("leader")
+        return self._lead(key, future, fn, args, kwargs), False
+
+    def submit(self, key: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> bool:
+        """Start ``fn(*args, **kwargs)`` in the background as *key*'s leader.
+
+        :meth:`do` calls for *key* follow it while it runs.  Its result or
+        error goes only to those followers.  The caller's context variables
+        are copied into the worker.
+
+        Returns:
+            True if started, False if a flight for *key* was already running.
+        """
+        with self._lock:
+            if key in self._calls:
+                return False
+            future = self._calls[key] = Future()
+        record_single_flight("leader")
+        ctx = contextvars.copy_context()
+        executor = self._executor or _stage_executor()
+        executor.submit(ctx.run, self._lead, key, future, fn, args, kwargs)
+        return True
+
+    def _lead(
+        self, key: str, future: Future[Any], fn: Callable[..., T], args: tuple, kwargs: dict
+    ) -> T:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stream(self, key: str, produce: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """Iterate ``produce()`` once for all concurrent streams of *key*.
+
+        ``produce()`` runs on its own thread (with the caller's context
+        variables); every subscriber receives every event from the first
+        one on, and keeps receiving them whoever else leaves.
+
+        Raises:
+            Exception: Whatever ``produce()`` raised, after its earlier events.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+            broadcast.subscribers += 1
+        record_single_flight("leader" if leader else "follower")
+        if leader:
+            ctx = contextvars.copy_context()
+            threading.Thread(
+                target=ctx.run,
+                args=(self._produce, key, broadcast, produce),
+                name="single-flight-stream",
+                daemon=True,
+            ).start()
+        try:
+            yield from broadcast.replay()
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+
+    def _produce(self, key: str, broadcast: _Broadcast, produce: Callable[[], Iterator[T]]) -> None:
+        """Publish ``produce()`` until it ends or every subscriber has left."""
+        error: BaseException | None = None
+        events = produce()
+        try:
+            for event in events:
+                broadcast.publish(event)
+                with self._lock:
+                    if not broadcast.subscribers:  # nobody is listening any more
+                        del self._streams[key]
+                        break
+        except Exception as exc:  # goes to every subscriber
+            error = exc
+        finally:
+            try:
+                close = getattr(events, "close", None)
+                if close is not None:
+                    close()
+            finally:
+                with self._lock:
+                    if self._streams.get(key) is broadcast:
+                        del self._streams[key]
+                broadcast.close(error)
+
+
+class _AsyncBroadcast:
+    """:class:`_Broadcast` on the event loop."""
+
+    def __init__(self) -> None:
+        self.events: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.producer: asyncio.Task[None] | None = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Any) -> None:
+        self.events.append(event)
+        self._changed.set()
+
+    def close(self, error: BaseException | None = None) -> None:
+        self.done = True
+        self.error = error
+        self._changed.set()
+
+    async def replay(self) -> AsyncIterator[Any]:
+        seen = 0
+        while True:
+            if seen == len(self.events) and not self.done:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+            batch = self.events[seen:]
+            seen += len(batch)
+            for event in batch:
+                yield event
+            if self.done and seen == len(self.events):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class AsyncSingleFlight:
+    """:class:`SingleFlight` for coroutines on one event loop.
+
+    A follower whose leader is cancelled (its client went away) takes over
+    as the new leader instead of failing.  Stream producers are loop tasks
+    of their own, so cancelling any subscriber leaves the others' stream
+    intact.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future[Any]] = {}
+        self._streams: dict[str, _AsyncBroadcast] = {}
+        # Strong references to submitted flights and stream producers — the
+        # loop keeps weak ones
+        self._background: set[asyncio.Task[Any]] = set()
+
+    async def do(
+        self, key: str, fn: Callable[..., Awaitable[T]], /, *args: Any, **kwargs: Any
+    ) -> tuple[T, bool]:
+        """Await ``fn(*args, **kwargs)`` once for all concurrent callers of *key*.
+
+        Returns:
+            ``(result, shared)`` — *shared* is True for followers.
+
+        Raises:
+            Exception: Whatever the leader's call raised, in every caller.
+        """
+        while (future := self._calls.get(key)) is not None:
+            record_single_flight("follower")
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if future.cancelled() and not (task is not None and task.cancelling()):
+                    continue  # the leader was cancelled, not us — lead ourselves
+                raise
+        record_single_flight("leader")
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        return await self._lead(key, future, fn, args, kwargs), False
+
+    def submit(
+        self, key: str, fn: Callable[..., Awaitable[Any]], /, *args: Any, **kwargs: Any
+    ) -> bool:
+        """Start ``fn(*args, **kwargs)`` as a loop task leading *key*'s flight.
+
+        Returns:
+            True if started, False if a flight for *key* was already running.
+        """
+        if key in self._calls:
+            return False
+        record_single_flight("leader")
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(self._lead(key, future, fn, args, kwargs))
+        self._background.add(task)
+        task.add_done_callback(self._forget)
+        return True
+
+    async def _lead(
+        self,
+        key: str,
+        future: asyncio.Future[Any],
+        fn: Callable[..., Awaitable[T]],
+        args: tuple,
+        kwargs: dict,
+    ) -> T:
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved — there may be no followers
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def _forget(self, task: asyncio.Task[Any]) -> None:
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()  # mark retrieved — the error went to any followers
+
+    async def stream(self, key: str, produce: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Iterate ``produce()`` once for all concurrent streams of *key*.
+
+        ``produce()`` runs as a detached task; see :meth:`SingleFlight.stream`.
+
+        Raises:
+            Exception: Whatever ``produce()`` raised, after its earlier events.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            record_single_flight("leader")
+            broadcast = self._streams[key] = _AsyncBroadcast()
+            task = broadcast.producer = asyncio.create_task(self._produce(key, broadcast, produce))
+            self._background.add(task)
+            task.add_done_callback(self._forget)
+        else:
+            record_single_flight("follower")
+        broadcast.subscribers += 1
+        try:
+            async for event in broadcast.replay():
+                yield event
+        finally:
+            broadcast.subscribers -= 1
+            if not broadcast.subscribers and not broadcast.done:
+                # Nobody is listening any more; a new request starts afresh
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.producer.cancel()
+
+    async def _produce(
+        self, key: str, broadcast: _AsyncBroadcast, produce: Callable[[], AsyncIterator[T]]
+    ) -> None:
+        """Publish ``produce()`` to *broadcast* until it ends or is cancelled."""
+        error: BaseException | None = None
+        events = produce()
+        try:
+            async for event in events:
+                broadcast.publish(event)
+        except asyncio.CancelledError:
+            error = RuntimeError("stream producer cancelled")
+            raise
+        except Exception as exc:  # goes to every subscriber
+            error = exc
+        finally:
+            try:
+                aclose = getattr(events, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            finally:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.close(error)
@@ -0,0 +1,224 @@
+"""Stage scheduler — overlap the independent stages of a request pipeline.
+
+The /ask RAG path reads as a chain, but only part of it is one: embed →
+search → rerank is the critical path, while the memory lookup needs only
+the query embedding and the genre recipe / task classification need only
+the raw query.  A :class:`StageScheduler` starts those side stages on a
+shared worker pool as soon as their inputs exist, runs the critical path
+inline, and joins the side stages just before generation — the
+pre-generation wall clock becomes the longest chain instead of the sum.
+
+Every stage, inline or background, is timed; :attr:`StageScheduler.timings`
+ends up in the response's ``usage.stages_ms``.  :class:`AsyncStageScheduler`
+is the same contract on the event loop (tasks instead of threads) for
+:mod:`api.routes.ask_async`.
+
+Usage::
+
+    from infrastructure.stages import StageScheduler
+
+    stages = StageScheduler()
+    stages.submit("genre_recipe", genre_context, body.query)
+    query_embedding = stages.run("embedding", embed, expanded_query)
+    stages.submit("memory", memory_context, memory_store, query_embedding)
+    reranked = stages.run("search", search_and_rerank, db, query_embedding)
+    genre = stages.result("genre_recipe")  # join before generation
+
+Environment variables
+---------------------
+``ASK_STAGE_WORKERS``
+    Size of the shared worker pool for background stages (default ``32``).
+    Stages queue when it is saturated, so size it to roughly the API
+    threadpool (40 by default) times the side stages per request that
+    actually overlap.
+
+``ASK_CRITICAL_WORKERS``
+    Size of the separate pool for critical-path work started in the
+    background (:meth:`StageScheduler.submit_critical`, default ``40``).
+    A request holds at most one such stage at a time, so sizing it to the
+    API threadpool means it never queues behind side stages or cache
+    refreshes on the shared pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_STAGE_WORKERS: int = int(os.getenv("ASK_STAGE_WORKERS", "32"))
+_CRITICAL_WORKERS: int = int(os.getenv("ASK_CRITICAL_WORKERS", "40"))
+_EXECUTOR: ThreadPoolExecutor | None = None
+_CRITICAL_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _stage_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for background stages (created lazily)."""
+    global _EXECUTOR  # noqa: PLW0603
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=_STAGE_WORKERS, thread_name_prefix="stage")
+        return _EXECUTOR
+
+
+def _critical_executor() -> ThreadPoolExecutor:
+    """Pool for critical-path stages started in the background (created lazily)."""
+    global _CRITICAL_EXECUTOR  # noqa: PLW0603
+    with _EXECUTOR_LOCK:
+        if _CRITICAL_EXECUTOR is None:
+            _CRITICAL_EXECUTOR = ThreadPoolExecutor(
+                max_workers=_CRITICAL_WORKERS, thread_name_prefix="critical"
+            )
+        return _CRITICAL_EXECUTOR
+
+
+class _StageTimings:
+    """Per-stage durations, shared by both schedulers."""
+
+    def __init__(self) -> None:
+        self._ms: dict[str, float] = {}
+
+    def _timed(self, name: str, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._ms[name] = (time.perf_counter() - t0) * 1000
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """Milliseconds per finished stage, rounded to 0.01 ms."""
+        return {name: round(ms, 2) for name, ms in self._ms.items()}
+
+
+class StageScheduler(_StageTimings):
+    """Run independent pipeline stages concurrently; join them by name.
+
+    One scheduler per request.  Stage names are unique within it.  A
+    background stage's exception is re-raised by :meth:`result`, so
+    best-effort stages should catch their own errors.  A stage that is never
+    joined — speculative work the request turned out not to need — still
+    runs to completion; its result and any error are dropped.
+
+    Args:
+        executor: Pool for background stages.  Defaults to the shared
+            ``ASK_STAGE_WORKERS`` pool.
+        critical_executor: Pool for :meth:`submit_critical`.  Defaults to
+            the ``ASK_CRITICAL_WORKERS`` pool.
+    """
+
+    def __init__(
+        self, executor: Executor | None = None, critical_executor: Executor | None = None
+    ) -> None:
+        super().__init__()
+        self._executor = executor
+        self._critical_executor = critical_executor
+        self._futures: dict[str, Future[Any]] = {}
+
+    def submit(self, name: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> None:
+        """Start *fn* in the background as stage *name*.
+
+        The caller's context variables are copied into the worker.
+
+        Raises:
+            ValueError: If a stage called *name* was already submitted.
+        """
+        self._start(self._executor or _stage_executor(), name, fn, args, kwargs)
+
+    def submit_critical(
+        self, name: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> None:
+        """Start critical-path stage *name* early, off the shared side-stage pool.
+
+        For work the request will join next (e.g. the query embedding started
+        alongside tool routing): a burst of side stages or cache refreshes
+        saturating the shared pool must not delay it.
+
+        Raises:
+            ValueError: If a stage called *name* was already submitted.
+        """
+        self._start(self._critical_executor or _critical_executor(), name, fn, args, kwargs)
+
+    def _start(
+        self, executor: Executor, name: str, fn: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> None:
+        if name in self._futures:
+            raise ValueError(f"stage {name!r} already submitted")
+        ctx = contextvars.copy_context()
+        self._futures[name] = executor.submit(ctx.run, self._timed, name, fn, args, kwargs)
+
+    def run(self, name: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Run *fn* inline (on the critical path) as stage *name*, timing it."""
+        return self._timed(name, fn, args, kwargs)
+
+    def result(self, name: str, timeout: float | None = None) -> Any:
+        """Block until background stage *name* finishes and return its value.
+
+        Raises:
+            KeyError: If no stage called *name* was submitted.
+            TimeoutError: If *timeout* seconds pass first.
+            Exception: Whatever the stage raised.
+        """
+        return self._futures[name].result(timeout)
+
+
+# Strong references to in-flight stage tasks: the loop only keeps weak ones,
+# and a stage nobody joins (e.g. a speculative embedding after a tool hit)
+# must still run to completion.
+_PENDING_TASKS: set[asyncio.Task[Any]] = set()
+
+
+def _forget_task(task: asyncio.Task[Any]) -> None:
+    _PENDING_TASKS.discard(task)
+    if not task.cancelled():
+        task.exception()  # mark retrieved — an unjoined failure is not an error
+
+
+class AsyncStageScheduler(_StageTimings):
+    """:class:`StageScheduler` for coroutines — background stages are loop tasks."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._tasks: dict[str, asyncio.Task[Any]] = {}
+
+    async def _atimed(
+        self, name: str, fn: Callable[..., Awaitable[T]], args: tuple, kwargs: dict
+    ) -> T:
+        t0 = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self._ms[name] = (time.perf_counter() - t0) * 1000
+
+    def submit(
+        self, name: str, fn: Callable[..., Awaitable[Any]], /, *args: Any, **kwargs: Any
+    ) -> None:
+        """Schedule coroutine function *fn* as stage *name* on the running loop.
+
+        Raises:
+            ValueError: If a stage called *name* was already submitted.
+        """
+        if name in self._tasks:
+            raise ValueError(f"stage {name!r} already submitted")
+        task = asyncio.create_task(self._atimed(name, fn, args, kwargs))
+        _PENDING_TASKS.add(task)
+        task.add_done_callback(_forget_task)
+        self._tasks[name] = task
+
+    async def run(
+        self, name: str, fn: Callable[..., Awaitable[T]], /, *args: Any, **kwargs: Any
+    ) -> T:
+        """Await *fn* inline as stage *name*, timing it."""
+        return await self._atimed(name, fn, args, kwargs)
+
+    async def result(self, name: str) -> Any:
+        """Await background stage *name* and return its value (or raise its error)."""
+        return await self._tasks[name]
@@ -2,13 +2,55 @@
 Embedding cache with TTL (Time-To-Live) and LRU (Least Recently Used) eviction.
 
 Reduces latency for repeated queries by caching embedding API results.
+
+Two levels:
+    1. ``EmbeddingCache`` — in-process LRU, per provider instance.
+    2. An optional shared ``EmbeddingStore`` behind it — Redis (shared by
+       every API worker) or a SQLite file (survives ingestion and eval
+       re-runs).  Keys are SHA-256(model + text); vectors are stored as
+       float32 bytes.
+
+``TieredEmbeddingCache`` combines the two with multi-key lookups, so a
+batch with partial hits sends only its misses to the embedding API.
+
+Environment variables
+---------------------
+``EMBEDDING_CACHE_STORE``
+    Shared second level: a ``redis://`` / ``rediss://`` URL, or a path to a
+    SQLite file (created on first use).  Unset or empty: in-process only.
+
+``EMBEDDING_CACHE_STORE_TTL_SECONDS``
+    Lifetime of Redis entries (default ``2592000`` = 30 days).  SQLite
+    entries do not expire — delete the file to reset.
 """
 
 import hashlib
+import logging
+import os
+import sqlite3
 import time
 from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import closing
 from dataclasses import dataclass
+from pathlib import Path
 from threading import Lock
+from typing import Protocol
+
+import numpy as np
+
+try:
+    import redis as redis_lib
+except ImportError:
+    redis_lib = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_STORE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_STORE_TTL_SECONDS", str(30 * 86_400)))
+# Redis key namespace
+_EMB_NS = "mip:emb:"
+# SQLite bound-parameter budget per SELECT ... IN (...)
+_SQLITE_BATCH = 500
 
 
 @dataclass(frozen=True)
@@ -109,6 +151,15 @@ class EmbeddingCache:
             # Move to end (mark as recently used)
             self._cache.move_to_end(key)
 
+    def get_many(self, queries: Sequence[str]) -> list[list[float] | None]:
+        """Batch :meth:`get` — one result (or None) per query, in order."""
+        return [self.get(query) for query in queries]
+
+    def put_many(self, queries: Sequence[str], embeddings: Sequence[list[float]]) -> None:
+        """Batch :meth:`put`."""
+        for query, embedding in zip(queries, embeddings, strict=True):
+            self.put(query, embedding)
+
     def clear(self) -> None:
         """Clear all cached entries."""
         with self._lock:
@@ -143,3 +194,202 @@ class EmbeddingCache:
                 evicted += 1
 
         return evicted
+
+
+# ---------------------------------------------------------------------------
+# Shared second level
+# ---------------------------------------------------------------------------
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Store key for *text* embedded by *model*.
+
+    Pure function — no I/O.
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+def _to_bytes(embedding: Sequence[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _from_bytes(raw: bytes) -> list[float]:
+    return np.frombuffer(raw, dtype=np.float32).tolist()
+
+
+class EmbeddingStore(Protocol):
+    """Shared key → float32-bytes store behind the in-process cache.
+
+    Implementations are best-effort: errors read as misses and failed
+    writes are dropped, never raised into the embedding call.
+    """
+
+    def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        """Return the stored bytes (or None) for each key, in order."""
+        ...
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        """Store every ``key -> bytes`` pair."""
+        ...
+
+
+class RedisEmbeddingStore:
+    """Embedding store on Redis: one ``MGET`` per lookup, one pipeline per write.
+
+    Args:
+        client: A Redis client with binary replies (``decode_responses=False``).
+        ttl_seconds: Entry lifetime (default: ``EMBEDDING_CACHE_STORE_TTL_SECONDS``).
+    """
+
+    def __init__(self, client: object, ttl_seconds: int = _STORE_TTL_SECONDS) -> None:
+        self._client = client
+        self._ttl = ttl_seconds
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisEmbeddingStore | None":
+        """Connect to *url*; None (logged) if Redis is unreachable."""
+        try:
+            if redis_lib is None:
+                raise ImportError("redis package not installed")
+            client = redis_lib.from_url(url, socket_timeout=0.5)
+            client.ping()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("EmbeddingStore: Redis unavailable (%s) — shared level disabled", exc)
+            return None
+        return cls(client)
+
+    def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        """See :class:`EmbeddingStore`."""
+        try:
+            return list(self._client.mget([_EMB_NS + key for key in keys]))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("RedisEmbeddingStore.get_many error: %s", exc)
+            return [None] * len(keys)
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        """See :class:`EmbeddingStore`."""
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, raw in items.items():
+                pipe.set(_EMB_NS + key, raw, ex=self._ttl)
+            pipe.execute()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("RedisEmbeddingStore.put_many error: %s", exc)
+
+
+class SQLiteEmbeddingStore:
+    """Embedding store in a local SQLite file — persists across runs.
+
+    Thread-safety: a connection per call, WAL mode.
+
+    Args:
+        db_path: Path to the SQLite file.  Created on first use.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self._db_path), check_same_thread=False, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        """See :class:`EmbeddingStore`."""
+        found: dict[str, bytes] = {}
+        try:
+            with closing(self._connect()) as conn:
+                for i in range(0, len(keys), _SQLITE_BATCH):
+                    batch = list(keys[i : i + _SQLITE_BATCH])
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",  # noqa: S608
+                        batch,
+                    )
+                    found.update(rows)
+        except sqlite3.Error as exc:
+            logger.warning("SQLiteEmbeddingStore.get_many error: %s", exc)
+        return [found.get(key) for key in keys]
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        """See :class:`EmbeddingStore`."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    items.items(),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("SQLiteEmbeddingStore.put_many error: %s", exc)
+
+
+def create_embedding_store(spec: str | None = None) -> EmbeddingStore | None:
+    """Build the shared level from *spec* (default: ``EMBEDDING_CACHE_STORE``).
+
+    Returns:
+        A Redis store for ``redis://`` / ``rediss://`` URLs, a SQLite store
+        for anything else, or None when *spec* is empty or Redis is down.
+    """
+    spec = os.environ.get("EMBEDDING_CACHE_STORE", "") if spec is None else spec
+    if not spec:
+        return None
+    if spec.startswith(("redis://", "rediss://")):
+        return RedisEmbeddingStore.from_url(spec)
+    return SQLiteEmbeddingStore(Path(spec))
+
+
+class TieredEmbeddingCache:
+    """In-process LRU in front of an optional shared :class:`EmbeddingStore`.
+
+    Lookups take the whole batch: local hits first, then one store round
+    trip for the rest; store hits are promoted into the local level.
+
+    Args:
+        model: Embedding model name — part of every store key, so models
+            never share vectors.
+        local: First level.
+        store: Shared second level, or None for in-process only.
+    """
+
+    def __init__(
+        self, model: str, local: EmbeddingCache, store: EmbeddingStore | None = None
+    ) -> None:
+        self.model = model
+        self.local = local
+        self.store = store
+
+    def get_many(self, texts: Sequence[str]) -> list[list[float] | None]:
+        """Cached vector (or None) per text, checking the local level first."""
+        found = self.local.get_many(texts)
+        missing = [i for i, vec in enumerate(found) if vec is None]
+        if missing and self.store is not None:
+            for i, vec in zip(missing, self.get_shared([texts[i] for i in missing]), strict=True):
+                found[i] = vec
+        return found
+
+    def get_shared(self, texts: Sequence[str]) -> list[list[float] | None]:
+        """Second level only (promoting hits); all None without a store."""
+        if self.store is None:
+            return [None] * len(texts)
+        raws = self.store.get_many([embedding_key(self.model, text) for text in texts])
+        vectors = [None if raw is None else _from_bytes(raw) for raw in raws]
+        hits = [(text, vec) for text, vec in zip(texts, vectors, strict=True) if vec is not None]
+        if hits:
+            self.local.put_many(*zip(*hits, strict=True))
+        return vectors
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[list[float]]) -> None:
+        """Store in both levels (one store write for the batch)."""
+        self.local.put_many(texts, embeddings)
+        if self.store is not None:
+            self.store.put_many(
+                {
+                    embedding_key(self.model, text): _to_bytes(vec)
+                    for text, vec in zip(texts, embeddings, strict=True)
+                }
+            )
@@ -0,0 +1,320 @@
+"""
+Embedding scheduler — keep several ingestion batches in flight within the API limits.
+
+Embedding one batch at a time leaves the pipeline idle for a full round
+trip per batch.  :class:`EmbeddingScheduler` embeds up to ``concurrency``
+batches at once on a thread pool and hands the results back in input
+order, while staying inside the provider's limits:
+
+- Two :class:`TokenBucket` budgets — requests per minute and tokens per
+  minute — pace the calls before they are sent.
+- :class:`AdaptiveConcurrency` halves the number of batches in flight on
+  every burst of 429s and grows it back by one after each window of
+  successes (AIMD), so the scheduler settles just below the real limit.
+- Each batch retries on its own: a throttled or transiently failed batch
+  (connection error, timeout, 408/409/429, 5xx) backs off (honouring
+  ``Retry-After``) without holding a concurrency slot, so the other
+  batches keep going.  Any other error fails the batch at once.
+
+The embedder's own client retries should be off
+(``OpenAIEmbeddingProvider(max_retries=0)``) — they would hide the 429s
+the scheduler adapts to.  ``scripts/stub_embedding_server.py`` is a local
+OpenAI-compatible endpoint with latency and a rate limit to test against.
+
+Usage::
+
+    from ingestion.embedding_scheduler import EmbeddingScheduler
+    from ingestion.embeddings import OpenAIEmbeddingProvider
+
+    scheduler = EmbeddingScheduler(OpenAIEmbeddingProvider(max_retries=0))
+    for batch, vectors in scheduler.map(batches, lambda b: [c.text for c in b]):
+        persist(batch, vectors)
+
+Environment variables
+---------------------
+``EMBED_CONCURRENCY``
+    Maximum batches in flight (default ``8``).
+
+``EMBED_REQUESTS_PER_MINUTE``
+    Request budget (default ``3000``, OpenAI tier 1 for embeddings).
+
+``EMBED_TOKENS_PER_MINUTE``
+    Input token budget (default ``1000000``).
+
+``EMBED_MAX_RETRIES``
+    Retries per batch after the first attempt (default ``6``).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TypeVar
+
+import openai
+
+from core.embeddings.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EMBED_CONCURRENCY: int = int(os.getenv("EMBED_CONCURRENCY", "8"))
+EMBED_REQUESTS_PER_MINUTE: float = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "3000"))
+EMBED_TOKENS_PER_MINUTE: float = float(os.getenv("EMBED_TOKENS_PER_MINUTE", "1000000"))
+EMBED_MAX_RETRIES: int = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+# Bursts are capped at this many seconds of budget
+_BURST_SECONDS = 10.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at *per_minute*.
+
+    :meth:`acquire` reserves its amount at once and sleeps until the
+    bucket would have held it, so callers are served in arrival order and
+    an amount larger than the burst capacity still gets through.
+
+    Args:
+        per_minute: Refill rate.  ``0`` disables the bucket.
+        burst_seconds: Capacity, in seconds of refill.
+    """
+
+    def __init__(self, per_minute: float, *, burst_seconds: float = _BURST_SECONDS) -> None:
+        self._rate = per_minute / 60.0
+        self._capacity = self._rate * burst_seconds
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take *amount* tokens, sleeping while the budget is in debt.
+
+        Returns:
+            Seconds slept.
+        """
+        if self._rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= amount
+            wait = max(0.0, -self._tokens / self._rate)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on concurrent calls.
+
+    A throttled call halves the limit — once per burst: throttles from
+    calls admitted before the last cut are ignored.  Every ``limit``
+    consecutive successes raise it by one, up to *maximum*.
+
+    Args:
+        maximum: Upper (and initial) limit.
+        minimum: Lower limit.
+    """
+
+    def __init__(self, maximum: int, *, minimum: int = 1) -> None:
+        self.maximum = max(1, maximum)
+        self._minimum = max(1, min(minimum, self.maximum))
+        self._limit = self.maximum
+        self._in_flight = 0
+        self._successes = 0
+        self._epoch = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Calls currently allowed in flight."""
+        return self._limit
+
+    def acquire(self) -> int:
+        """Wait for a free slot.
+
+        Returns:
+            The admission epoch, to pass back to :meth:`release`.
+        """
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+            return self._epoch
+
+    def release(self, epoch: int, *, throttled: bool = False) -> None:
+        """Free a slot and adapt the limit to the call's outcome."""
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._successes = 0
+                if epoch == self._epoch:
+                    self._limit = max(self._minimum, self._limit // 2)
+                    self._epoch += 1
+                    logger.info("Embedding throttled — concurrency cut to %d", self._limit)
+            else:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.maximum:
+                    self._limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+def _status_code(exc: Exception) -> int | None:
+    return getattr(exc, "status_code", None)
+
+
+def _is_throttle(exc: Exception) -> bool:
+    return _status_code(exc) == 429
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Connection errors, timeouts, 408/409/429 and 5xx — anything else fails fast."""
+    if isinstance(exc, openai.APIConnectionError | openai.APITimeoutError):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+def _retry_after(exc: Exception) -> float:
+    """Seconds the server asked us to wait (``Retry-After``), or 0."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[header]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def _estimate_tokens(texts: list[str]) -> int:
+    """About four characters per token — the budget only needs an estimate."""
+    return sum(len(t) // 4 + 1 for t in texts)
+
+
+class EmbeddingScheduler:
+    """Embed batches concurrently within request / token budgets.
+
+    Args:
+        embedder: Any ``EmbeddingProvider``; called from worker threads.
+        concurrency: Maximum batches in flight.
+        requests_per_minute: Request budget (``0`` = unlimited).
+        tokens_per_minute: Input token budget (``0`` = unlimited).
+        max_retries: Retries per batch after the first attempt.
+        base_seconds: Backoff base; attempt *n* waits ``base * 2**n``
+            (±25% jitter), at least the server's ``Retry-After``.
+        max_seconds: Backoff cap.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider,
+        *,
+        concurrency: int = EMBED_CONCURRENCY,
+        requests_per_minute: float = EMBED_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = EMBED_TOKENS_PER_MINUTE,
+        max_retries: int = EMBED_MAX_RETRIES,
+        base_seconds: float = 1.0,
+        max_seconds: float = 60.0,
+    ) -> None:
+        self._embedder = embedder
+        self._limit = AdaptiveConcurrency(concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._max_retries = max_retries
+        self._base_seconds = base_seconds
+        self._max_seconds = max_seconds
+        self._calls = 0
+        self._calls_lock = threading.Lock()
+
+    @property
+    def concurrency(self) -> int:
+        """Batches currently allowed in flight (adapts to throttling)."""
+        return self._limit.limit
+
+    @property
+    def requests(self) -> int:
+        """Embedding calls made so far, retries included."""
+        return self._calls
+
+    def embed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        """Embed one batch within the budgets, retrying transient failures.
+
+        Args:
+            texts: The batch.
+            tokens: Its input tokens, if known (estimated otherwise).
+
+        Raises:
+            RuntimeError: If the batch still fails after ``max_retries``
+                retries, or fails with a non-retryable error.
+        """
+        cost = tokens if tokens is not None else _estimate_tokens(texts)
+        for attempt in range(self._max_retries + 1):
+            epoch = self._limit.acquire()
+            throttled = False
+            try:
+                self._requests.acquire()
+                self._tokens.acquire(cost)
+                with self._calls_lock:
+                    self._calls += 1
+                return self._embedder.embed_texts(texts)
+            except Exception as exc:  # noqa: BLE001
+                throttled = _is_throttle(exc)
+                if not _is_retryable(exc) or attempt == self._max_retries:
+                    raise RuntimeError(
+                        f"Embedding failed after {attempt + 1} attempt(s): {exc}"
+                    ) from exc
+                wait = min(self._base_seconds * 2**attempt, self._max_seconds)
+                wait = max(wait * random.uniform(0.75, 1.25), _retry_after(exc))  # noqa: S311
+                logger.warning(
+                    "Embedding batch attempt %d/%d failed (%s), retrying in %.2fs",
+                    attempt + 1,
+                    self._max_retries + 1,
+                    exc,
+                    wait,
+                )
+            finally:
+                self._limit.release(epoch, throttled=throttled)
+            time.sleep(wait)  # without a slot — the other batches keep going
+        raise AssertionError("unreachable")
+
+    def map(
+        self,
+        items: Iterable[T],
+        texts: Callable[[T], list[str]],
+        tokens: Callable[[T], int] | None = None,
+    ) -> Iterator[tuple[T, list[list[float]]]]:
+        """Embed *items* concurrently, yielding ``(item, vectors)`` in input order.
+
+        Batches are submitted at most ``2 * concurrency`` ahead of the
+        caller.  The first failed batch raises here; closing the iterator
+        cancels the batches not yet started.
+
+        Args:
+            items: Batches, in any container the *texts* callable understands.
+            texts: The texts to embed for an item.
+            tokens: The item's input tokens, if known.
+        """
+        window = 2 * self._limit.maximum
+        pool = ThreadPoolExecutor(max_workers=self._limit.maximum, thread_name_prefix="embed")
+        pending: deque[tuple[T, Future[list[list[float]]]]] = deque()
+        try:
+            for item in items:
+                cost = tokens(item) if tokens is not None else None
+                pending.append((item, pool.submit(self.embed, texts(item), cost)))
+                while pending and (len(pending) >= window or pending[0][1].done()):
+                    head, future = pending.popleft()
+                    yield head, future.result()
+            while pending:
+                head, future = pending.popleft()
+                yield head, future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
@@ -6,12 +6,23 @@ the OpenAI embeddings API.  Lives in ingestion/ because it
 performs network I/O (core/ must remain pure).
 """
 
+import asyncio
 import os
 
 import openai
 from dotenv import load_dotenv
 
-from ingestion.cache import EmbeddingCache
+from ingestion.cache import (
+    EmbeddingCache,
+    EmbeddingStore,
+    TieredEmbeddingCache,
+    create_embedding_store,
+)
+
+# Per-request limits of the OpenAI embeddings endpoint: total input tokens
+# (counted with cl100k_base, the encoding ``core.chunking`` uses) and inputs.
+MAX_REQUEST_TOKENS = 300_000
+MAX_REQUEST_INPUTS = 2048
 
 
 class OpenAIEmbeddingProvider:
@@ -21,6 +32,10 @@ class OpenAIEmbeddingProvider:
     Reads ``OPENAI_API_KEY`` from the environment.  Model name is
     configurable (default: ``text-embedding-3-small``).
 
+    Every call — single query or batch — goes through the two-level
+    embedding cache (see :mod:`ingestion.cache`); only the texts missing
+    from both levels are sent to the API, once each.
+
     Satisfies the ``EmbeddingProvider`` protocol.
     """
 
@@ -29,23 +44,40 @@ class OpenAIEmbeddingProvider:
         model: str = "text-embedding-3-small",
         *,
         api_key: str | None = None,
+        base_url: str | None = None,
+        max_retries: int | None = None,
         cache_enabled: bool = True,
         cache_max_size: int = 1000,
         cache_ttl_seconds: float = 3600.0,
+        cache_store: EmbeddingStore | None = None,
     ) -> None:
         load_dotenv()
         resolved_key = api_key or os.environ.get("OPENAI_API_KEY", "")
         if not resolved_key:
             raise ValueError("OPENAI_API_KEY must be set in the environment or passed explicitly")
-        self._client = openai.OpenAI(api_key=resolved_key)
+        # base_url: any OpenAI-compatible endpoint (OPENAI_BASE_URL when None).
+        # max_retries: the client's own retries — 0 when a caller such as
+        # the ingestion EmbeddingScheduler retries and adapts to 429s itself.
+        self._client_options: dict[str, object] = {"api_key": resolved_key}
+        if base_url is not None:
+            self._client_options["base_url"] = base_url
+        if max_retries is not None:
+            self._client_options["max_retries"] = max_retries
+        self._client = openai.OpenAI(**self._client_options)  # type: ignore[arg-type]
+        self._async_client: openai.AsyncOpenAI | None = None
         self._model = model
         # text-embedding-3-small produces 1536-dim vectors by default
         self._embedding_dim = 1536
 
-        # Optional embedding cache with TTL + LRU
+        # Optional embedding cache: in-process TTL + LRU, plus the shared
+        # store (cache_store, or EMBEDDING_CACHE_STORE when not given)
         self._cache_enabled = cache_enabled
         if cache_enabled:
-            self._cache = EmbeddingCache(max_size=cache_max_size, ttl_seconds=cache_ttl_seconds)
+            self._cache: TieredEmbeddingCache | None = TieredEmbeddingCache(
+                model,
+                EmbeddingCache(max_size=cache_max_size, ttl_seconds=cache_ttl_seconds),
+                cache_store if cache_store is not None else create_embedding_store(),
+            )
         else:
             self._cache = None
 
@@ -72,26 +104,65 @@ class OpenAIEmbeddingProvider:
         """
         if not texts:
             raise ValueError("texts must be a non-empty list")
+        if self._cache is None:
+            self._last_cache_hit = False
+            return self._request(texts)
+
+        vectors = self._cache.get_many(texts)
+        misses = _unique_misses(texts, vectors)
+        if misses:
+            fresh = self._request(misses)
+            self._cache.put_many(misses, fresh)
+            vectors = _fill(texts, vectors, dict(zip(misses, fresh, strict=True)))
+        self._last_cache_hit = not misses
+        return vectors  # type: ignore[return-value]
+
+    async def aembed_texts(self, texts: list[str]) -> list[list[float]]:
+        """
+        Async variant of :meth:`embed_texts` using ``openai.AsyncOpenAI``.
 
-        # Single-query optimization: check cache for single text
-        if len(texts) == 1 and self._cache_enabled and self._cache:
-            cached = self._cache.get(texts[0])
-            if cached is not None:
-                self._last_cache_hit = True
-                return [cached]
+        Shares the embedding cache with the sync path; the shared store's
+        blocking I/O runs in a worker thread.  The async client is created
+        on first use so sync-only processes never open its pool.
 
-        # Cache miss or batch request: call API
-        self._last_cache_hit = False
+        Raises:
+            ValueError: If *texts* is empty.
+        """
+        if not texts:
+            raise ValueError("texts must be a non-empty list")
+        if self._cache is None:
+            self._last_cache_hit = False
+            return await self._arequest(texts)
+
+        vectors = self._cache.local.get_many(texts)
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        if missing and self._cache.store is not None:
+            shared = await asyncio.to_thread(self._cache.get_shared, [texts[i] for i in missing])
+            for i, vec in zip(missing, shared, strict=True):
+                vectors[i] = vec
+        misses = _unique_misses(texts, vectors)
+        if misses:
+            fresh = await self._arequest(misses)
+            if self._cache.store is not None:
+                await asyncio.to_thread(self._cache.put_many, misses, fresh)
+            else:
+                self._cache.put_many(misses, fresh)
+            vectors = _fill(texts, vectors, dict(zip(misses, fresh, strict=True)))
+        # Set after the awaits — other requests may have run on the loop meanwhile
+        self._last_cache_hit = not misses
+        return vectors  # type: ignore[return-value]
+
+    def _request(self, texts: list[str]) -> list[list[float]]:
+        """One embeddings API call, in input order."""
         response = self._client.embeddings.create(input=texts, model=self._model)
         # Sort by index to guarantee order matches input
-        sorted_data = sorted(response.data, key=lambda d: d.index)
-        embeddings = [item.embedding for item in sorted_data]
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
 
-        # Cache single-query result
-        if len(texts) == 1 and self._cache_enabled and self._cache:
-            self._cache.put(texts[0], embeddings[0])
-
-        return embeddings
+    async def _arequest(self, texts: list[str]) -> list[list[float]]:
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(**self._client_options)  # type: ignore[arg-type]
+        response = await self._async_client.embeddings.create(input=texts, model=self._model)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
 
     @property
     def last_cache_hit(self) -> bool:
@@ -99,6 +170,18 @@ class OpenAIEmbeddingProvider:
         Check if the last embed_texts() call was a cache hit.
 
         Returns:
-            True if last embedding was retrieved from cache, False otherwise.
+            True if every text of the last call was served from the cache
+            (either level), False otherwise.
         """
         return self._last_cache_hit
+
+
+def _unique_misses(texts: list[str], vectors: list[list[float] | None]) -> list[str]:
+    """Texts without a cached vector, first occurrence order, no duplicates."""
+    return list(dict.fromkeys(t for t, vec in zip(texts, vectors, strict=True) if vec is None))
+
+
+def _fill(
+    texts: list[str], vectors: list[list[float] | None], fresh: dict[str, list[float]]
+) -> list[list[float] | None]:
+    return [vec if vec is not None else fresh[t] for t, vec in zip(texts, vectors, strict=True)]
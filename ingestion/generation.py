@@ -2,7 +2,8 @@
 LLM generation providers — OpenAI and Anthropic implementations.
 
 Implements the ``GenerationProvider`` protocol from core using
-the OpenAI and Anthropic APIs. Lives in ingestion/ because it
+the OpenAI and Anthropic APIs, plus ``AsyncGenerationProvider`` via
+their async clients (created lazily on first async call). Lives in ingestion/ because it
 performs network I/O (core/ must remain pure).
 
 Usage::
@@ -12,7 +13,7 @@ Usage::
 """
 
 import os
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 
 import anthropic
 import openai
@@ -42,6 +43,8 @@ class OpenAIGenerationProvider:
         if not resolved_key:
             raise ValueError("OPENAI_API_KEY must be set in the environment or passed explicitly")
         self._client = openai.OpenAI(api_key=resolved_key)
+        self._api_key = resolved_key
+        self._async_client: openai.AsyncOpenAI | None = None
         self._model = model
 
     def generate(self, request: GenerationRequest) -> GenerationResponse:
@@ -107,6 +110,59 @@ class OpenAIGenerationProvider:
         except Exception as exc:
             raise RuntimeError(f"OpenAI streaming failed: {exc}") from exc
 
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=self._api_key)
+        return self._async_client
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        """Async variant of :meth:`generate` using ``openai.AsyncOpenAI``.
+
+        Raises:
+            RuntimeError: If the API call fails.
+        """
+        messages = [{"role": m.role, "content": m.content} for m in request.messages]
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self._model,
+                messages=messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+            )
+        except Exception as exc:
+            raise RuntimeError(f"OpenAI generation failed: {exc}") from exc
+
+        choice = response.choices[0]
+        usage = response.usage
+
+        return GenerationResponse(
+            content=choice.message.content or "",
+            model=response.model,
+            usage_input_tokens=usage.prompt_tokens if usage else 0,
+            usage_output_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def agenerate_stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """Async variant of :meth:`generate_stream`.
+
+        Raises:
+            RuntimeError: If the streaming API call fails.
+        """
+        messages = [{"role": m.role, "content": m.content} for m in request.messages]
+        try:
+            stream = await self._get_async_client().chat.completions.create(
+                model=self._model,
+                messages=messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as exc:
+            raise RuntimeError(f"OpenAI streaming failed: {exc}") from exc
+
 
 class AnthropicGenerationProvider:
     """
@@ -135,6 +191,8 @@ class AnthropicGenerationProvider:
                 "ANTHROPIC_API_KEY must be set in the environment or passed explicitly"
             )
         self._client = anthropic.Anthropic(api_key=resolved_key)
+        self._api_key = resolved_key
+        self._async_client: anthropic.AsyncAnthropic | None = None
         self._model = model
 
     def generate(self, request: GenerationRequest) -> GenerationResponse:
@@ -218,6 +276,60 @@ class AnthropicGenerationProvider:
         except Exception as exc:
             raise RuntimeError(f"Anthropic streaming failed: {exc}") from exc
 
+    def _get_async_client(self) -> anthropic.AsyncAnthropic:
+        if self._async_client is None:
+            self._async_client = anthropic.AsyncAnthropic(api_key=self._api_key)
+        return self._async_client
+
+    def _request_kwargs(self, request: GenerationRequest) -> dict:
+        system_text, conversation = _split_system_messages(request.messages)
+        kwargs: dict = {
+            "model": self._model,
+            "messages": [{"role": m.role, "content": m.content} for m in conversation],
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+        if system_text:
+            kwargs["system"] = system_text
+        return kwargs
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        """Async variant of :meth:`generate` using ``anthropic.AsyncAnthropic``.
+
+        Raises:
+            RuntimeError: If the API call fails.
+        """
+        try:
+            response = await self._get_async_client().messages.create(
+                **self._request_kwargs(request)
+            )
+        except Exception as exc:
+            raise RuntimeError(f"Anthropic generation failed: {exc}") from exc
+
+        content = "".join(block.text for block in response.content if block.type == "text")
+        return GenerationResponse(
+            content=content,
+            model=response.model,
+            usage_input_tokens=response.usage.input_tokens,
+            usage_output_tokens=response.usage.output_tokens,
+        )
+
+    async def agenerate_stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """Async variant of :meth:`generate_stream`.
+
+        Raises:
+            RuntimeError: If the streaming API call fails.
+        """
+        try:
+            async with self._get_async_client().messages.stream(
+                **self._request_kwargs(request)
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
+        except Exception as exc:
+            raise RuntimeError(f"Anthropic streaming failed: {exc}") from exc
+
 
 def _split_system_messages(
     messages: tuple[Message, ...],
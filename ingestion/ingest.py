@@ -1,6 +1,27 @@
 """
 Ingestion pipeline: load -> chunk -> embed -> persist.
 
+The stages stream into each other: documents are loaded and chunked one at
+a time, chunks are grouped into embedding batches, and every embedded batch
+is upserted and committed as soon as it lands.  Batches are packed by
+token count (``--batch-tokens``), not by a fixed number of texts, so short
+chunks share a request and long ones never overflow it.  Each stage runs
+in its own thread, connected by bounded queues (``--queue-depth``
+batches), so loading and chunking overlap the embedding calls, and peak
+memory stays flat — a few batches plus one document — whatever the size
+of the corpus.  Embedding itself keeps several batches in flight within
+the API's rate limits (:class:`~ingestion.embedding_scheduler.EmbeddingScheduler`).
+
+Re-runs are incremental (:mod:`ingestion.manifest`): files whose size,
+mtime or content hash match the manifest are skipped before they are
+read.  A changed file has its old chunks replaced in a single transaction
+— readers see either the old or the new version, never a mix — and the
+cached answers citing it are invalidated.
+
+Resume works at batch granularity: an interrupted run keeps every batch it
+committed, and a re-run skips the chunks already in the database before
+they are embedded.
+
 CLI entry point::
 
     python -m ingestion.ingest --data-dir data --limit 10
@@ -9,27 +30,80 @@ CLI entry point::
 from __future__ import annotations
 
 import argparse
+import functools
+import itertools
 import logging
+import os
 import pathlib
+import queue
+import threading
 import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TypeVar
 
+from sqlalchemy import delete
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
 
 from core.chunking import Chunk, chunk_text
 from core.text import extract_pdf_text, extract_text
 from db.models import Base, ChunkRecord
 from db.session import SessionLocal, engine
-from ingestion.embeddings import OpenAIEmbeddingProvider
-from ingestion.loaders import LoadedDocument, load_documents, load_pdf_pages
+from infrastructure.cache import ResponseCache
+from ingestion.embedding_scheduler import EMBED_CONCURRENCY, EmbeddingScheduler
+from ingestion.embeddings import MAX_REQUEST_INPUTS, MAX_REQUEST_TOKENS, OpenAIEmbeddingProvider
+from ingestion.loaders import LoadedDocument, iter_documents, load_pdf_pages
+from ingestion.manifest import FileFingerprint, FileStatus, Manifest, record_file
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Chunks shorter than this are too small to produce useful embeddings.
 MIN_CHUNK_TOKENS = 20
 
-# Retry parameters for transient embedding API errors.
-_MAX_RETRIES = 3
-_RETRY_BASE_SECONDS = 2.0
+# Input tokens per embedding request.  Well under the provider's
+# MAX_REQUEST_TOKENS, so several batches stay in flight and each commit
+# stays small; 128 full-size (512-token) chunks, many more short ones.
+_BATCH_TOKENS = 65_536
+
+# Batches buffered between two pipeline stages.
+_QUEUE_DEPTH = 2
+
+# Processes extracting PDF text (see ``ingestion.loaders.iter_documents``).
+_PDF_WORKERS = os.cpu_count() or 1
+
+# How often a blocked stage re-checks whether the pipeline was stopped.
+_STOP_POLL_SECONDS = 0.1
+
+
+@dataclass
+class IngestStats:
+    """Counters of one :func:`run_pipeline` run."""
+
+    documents: int = 0
+    chunks: int = 0
+    skipped_small: int = 0
+    skipped_existing: int = 0
+    skipped_unchanged: int = 0
+    replaced: int = 0
+    batches: int = 0
+    inserted: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _PendingDocument:
+    """A document whose chunks are not all persisted yet."""
+
+    fingerprint: FileFingerprint
+    chunk_count: int
+    remaining: int
+    # Changed file: its chunks are replaced in a transaction of its own
+    replace: bool = False
+    session: Session | None = None
 
 
 def _extract_text(doc: LoadedDocument) -> str:
@@ -45,16 +119,17 @@ def _extract_text(doc: LoadedDocument) -> str:
 def _chunk_pdf_document(doc: LoadedDocument) -> list[Chunk]:
     """Chunk a PDF document page by page, preserving page numbers.
 
-    Each PDF page is extracted via :func:`load_pdf_pages`, its text is
-    normalised with :func:`extract_pdf_text`, and then chunked
-    independently.  Every resulting :class:`Chunk` carries the
+    Uses the pages the loader already extracted (``doc.pages``); only a
+    document built without them is re-read via :func:`load_pdf_pages`.
+    Each page's text is normalised with :func:`extract_pdf_text` and then
+    chunked independently.  Every resulting :class:`Chunk` carries the
     originating ``page_number`` so downstream citations can reference
     the exact page.
 
     ``chunk_index`` is globally sequential across all pages of the
     document (not reset per page).
     """
-    pages = load_pdf_pages(doc.path)
+    pages = doc.pages if doc.pages is not None else load_pdf_pages(doc.path)
     all_chunks: list[Chunk] = []
     global_chunk_index = 0
 
@@ -104,46 +179,6 @@ def _chunks_to_records(
     return records
 
 
-def _embed_with_retry(
-    embedder: OpenAIEmbeddingProvider,
-    texts: list[str],
-    *,
-    max_retries: int = _MAX_RETRIES,
-    base_seconds: float = _RETRY_BASE_SECONDS,
-) -> list[list[float]]:
-    """Embed texts with exponential backoff on transient failures.
-
-    Args:
-        embedder: Embedding provider instance.
-        texts: Batch of texts to embed.
-        max_retries: Maximum retry attempts (default: 3).
-        base_seconds: Base sleep duration for backoff (default: 2s).
-
-    Returns:
-        List of embedding vectors.
-
-    Raises:
-        RuntimeError: If all retry attempts are exhausted.
-    """
-    last_exc: Exception | None = None
-    for attempt in range(max_retries):
-        try:
-            return embedder.embed_texts(texts)
-        except Exception as exc:  # noqa: BLE001
-            last_exc = exc
-            wait = base_seconds * (2**attempt)
-            logger.warning(
-                "Embedding attempt %d/%d failed (%s), retrying in %.1fs",
-                attempt + 1,
-                max_retries,
-                exc,
-                wait,
-            )
-            time.sleep(wait)
-
-    raise RuntimeError(f"Embedding failed after {max_retries} attempts: {last_exc}") from last_exc
-
-
 def _get_existing_chunk_keys(
     session: SessionLocal,  # type: ignore[type-arg]
     source_paths: list[str],
@@ -165,13 +200,32 @@ def _get_existing_chunk_keys(
     return {(r.source_path, r.chunk_index) for r in rows}
 
 
+def _get_stored_chunks(session: Session, source_path: str) -> dict[int, str]:
+    """The stored chunk texts of *source_path*, by ``chunk_index``."""
+    rows = (
+        session.query(ChunkRecord.chunk_index, ChunkRecord.text)
+        .filter(ChunkRecord.source_path == source_path)
+        .all()
+    )
+    return {r.chunk_index: r.text for r in rows}
+
+
 def _bulk_upsert(session: SessionLocal, records: list[ChunkRecord]) -> int:  # type: ignore[type-arg]
     """Insert records using ON CONFLICT DO NOTHING for true idempotency.
 
+    Commits the session — and so whatever else its transaction holds.
+
     Returns the number of rows actually inserted.
     """
     if not records:
         return 0
+    inserted = _insert_records(session, records)
+    session.commit()
+    return inserted
+
+
+def _insert_records(session: Session, records: list[ChunkRecord]) -> int:
+    """:func:`_bulk_upsert` without the commit."""
 
     values = [
         {
@@ -194,117 +248,381 @@ def _bulk_upsert(session: SessionLocal, records: list[ChunkRecord]) -> int:  # t
         .on_conflict_do_nothing(constraint="uq_chunk_source_index")
     )
     result = session.execute(stmt)
-    session.commit()
     return result.rowcount  # type: ignore[return-value]
 
 
+@functools.cache
+def _response_cache() -> ResponseCache:
+    # Publish-only: ingestion serves no answers, so it runs no subscriber
+    return ResponseCache(subscribe=False)
+
+
+def _invalidate_source(source_path: str) -> None:
+    """Drop the cached answers citing a replaced file, on every API worker."""
+    source_name = pathlib.Path(source_path).name
+    deleted = _response_cache().invalidate_source(source_name)
+    print(f"  Invalidated {deleted} cached answer(s) citing {source_name}")
+
+
+def _replace_document(session: Session, source_path: str) -> None:
+    """Open the replacement of a changed file: delete its old chunks.
+
+    Uncommitted — readers keep seeing the old chunks until the new ones
+    are committed in the same transaction.
+    """
+    session.execute(delete(ChunkRecord).where(ChunkRecord.source_path == source_path))
+
+
+def _prefetch(items: Iterable[T], depth: int) -> Iterator[T]:
+    """Iterate *items* in a background thread, at most *depth* items ahead.
+
+    One pipeline stage: the producer blocks once *depth* items wait for
+    the consumer.  Its exceptions are re-raised in the consumer.  Closing
+    the returned iterator (or leaving it with an exception) stops and joins
+    the producer, which closes *items* in turn.
+    """
+    buffer: queue.Queue[tuple[bool, T | BaseException | None]] = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(entry: tuple[bool, T | BaseException | None]) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=_STOP_POLL_SECONDS)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put((False, item)):
+                    return
+        except BaseException as exc:  # noqa: BLE001 — re-raised in the consumer
+            put((True, exc))
+        else:
+            put((True, None))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name="ingest-stage", daemon=True)
+    thread.start()
+    try:
+        while True:
+            done, payload = buffer.get()
+            if done:
+                if payload is not None:
+                    raise payload  # type: ignore[misc]
+                return
+            yield payload  # type: ignore[misc]
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _chunk_document(doc: LoadedDocument) -> list[Chunk] | None:
+    """Chunk one document; ``None`` if it is empty after extraction."""
+    extension = pathlib.PurePosixPath(doc.name).suffix.lower()
+    if extension == ".pdf":
+        # Page-aware chunking for PDFs
+        return _chunk_pdf_document(doc)
+    text = _extract_text(doc)
+    if not text.strip():
+        return None
+    return chunk_text(text, source_path=doc.path)
+
+
+def _iter_new_chunks(
+    docs: Iterable[LoadedDocument],
+    stats: IngestStats,
+    changes: dict[str, tuple[FileStatus, FileFingerprint]],
+    pending: dict[str, _PendingDocument],
+) -> Iterator[Chunk]:
+    """Chunk *docs* one at a time, yielding the chunks still to ingest.
+
+    Applies the ``MIN_CHUNK_TOKENS`` quality gate, then drops the chunks
+    already in the database (resume support) — except for a changed file
+    (see *changes*), all of whose chunks replace the stored ones.  A new
+    file whose stored chunks are not a subset of its own (by index and
+    text — e.g. chunks of an older version stored before the manifest) is
+    replaced the same way.  The lookup runs per document, on a session of
+    its own — this stage runs in its own thread.
+
+    A document with chunks to embed is registered in *pending* before its
+    first chunk is yielded; one with none settles its manifest row here.
+    """
+    with SessionLocal() as session:
+        for doc in docs:
+            stats.documents += 1
+            status, fingerprint = changes.pop(doc.path)
+            replace = status == "changed"
+            doc_chunks = _chunk_document(doc)
+            if doc_chunks is None:
+                print(f"  [skip] {doc.name}: empty after extraction")
+                doc_chunks = []
+
+            # Quality gate: drop chunks below MIN_CHUNK_TOKENS
+            quality_chunks = [
+                c for c in doc_chunks if (c.token_end - c.token_start) >= MIN_CHUNK_TOKENS
+            ]
+            stats.skipped_small += len(doc_chunks) - len(quality_chunks)
+            stats.chunks += len(quality_chunks)
+
+            if replace:
+                new_chunks = quality_chunks
+            else:
+                stored = _get_stored_chunks(session, doc.path)
+                session.rollback()  # end the read transaction between documents
+                current = {c.chunk_index: c.text for c in quality_chunks}
+                replace = any(current.get(i) != text for i, text in stored.items())
+                new_chunks = [c for c in quality_chunks if replace or c.chunk_index not in stored]
+            stats.skipped_existing += len(quality_chunks) - len(new_chunks)
+            label = "changed, " if replace else ""
+            print(f"  {doc.name}: {label}{len(quality_chunks)} chunk(s), {len(new_chunks)} new")
+
+            if not new_chunks:
+                # Nothing to embed: record the file (dropping a changed
+                # file's old chunks) right away
+                if replace:
+                    _replace_document(session, doc.path)
+                record_file(session, doc.path, fingerprint, len(quality_chunks))
+                session.commit()
+                if replace:
+                    stats.replaced += 1
+                    _invalidate_source(doc.path)
+                continue
+
+            pending[doc.path] = _PendingDocument(
+                fingerprint, len(quality_chunks), len(new_chunks), replace=replace
+            )
+            yield from new_chunks
+
+
+def _persist_batch(
+    session: Session,
+    records: list[ChunkRecord],
+    pending: dict[str, _PendingDocument],
+    stats: IngestStats,
+) -> int:
+    """Persist one embedded batch and settle the documents it completes.
+
+    Chunks of new or resumed files are upserted and committed together
+    with the manifest rows of the files they complete.  Chunks of a
+    changed file go to that file's own transaction, which deletes its old
+    chunks first and commits with its last chunk.
+
+    Returns:
+        Rows inserted.
+    """
+    inserted = 0
+    records_to_commit: list[ChunkRecord] = []
+    for source_path, group in itertools.groupby(records, key=lambda r: r.source_path):
+        doc_records = list(group)
+        doc = pending[source_path]
+        doc.remaining -= len(doc_records)
+        if not doc.replace:
+            records_to_commit += doc_records
+            if not doc.remaining:
+                record_file(session, source_path, doc.fingerprint, doc.chunk_count)
+                del pending[source_path]
+            continue
+        if doc.session is None:
+            doc.session = SessionLocal()
+            _replace_document(doc.session, source_path)
+        inserted += _insert_records(doc.session, doc_records)
+        if not doc.remaining:
+            record_file(doc.session, source_path, doc.fingerprint, doc.chunk_count)
+            doc.session.commit()
+            doc.session.close()
+            del pending[source_path]
+            stats.replaced += 1
+            _invalidate_source(source_path)
+    return inserted + _bulk_upsert(session, records_to_commit)
+
+
+def _chunk_tokens(chunk: Chunk) -> int:
+    return chunk.token_end - chunk.token_start
+
+
+def _pack_by_tokens(
+    chunks: Iterable[Chunk],
+    max_tokens: int,
+    *,
+    max_items: int = MAX_REQUEST_INPUTS,
+) -> Iterator[tuple[Chunk, ...]]:
+    """Group *chunks*, in order, into batches of at most *max_tokens* tokens.
+
+    A batch is closed before the chunk that would overflow it, or once it
+    holds *max_items* chunks.  A single chunk above *max_tokens* still gets
+    a batch of its own.
+    """
+    batch: list[Chunk] = []
+    tokens = 0
+    for chunk in chunks:
+        size = _chunk_tokens(chunk)
+        if batch and (tokens + size > max_tokens or len(batch) >= max_items):
+            yield tuple(batch)
+            batch, tokens = [], 0
+        batch.append(chunk)
+        tokens += size
+    if batch:
+        yield tuple(batch)
+
+
+def _batch_texts(batch: tuple[Chunk, ...]) -> list[str]:
+    return [c.text for c in batch]
+
+
+def _batch_tokens(batch: tuple[Chunk, ...]) -> int:
+    return sum(_chunk_tokens(c) for c in batch)
+
+
 def run_pipeline(
     data_dir: str,
     *,
     limit: int | None = None,
     batch_size: int = 64,
-) -> None:
+    batch_tokens: int | None = _BATCH_TOKENS,
+    queue_depth: int = _QUEUE_DEPTH,
+    workers: int = _PDF_WORKERS,
+    concurrency: int = EMBED_CONCURRENCY,
+) -> IngestStats:
     """
     Execute the full ingestion pipeline.
 
-    1. Load ``.md`` / ``.txt`` / ``.pdf`` files from *data_dir*.
+    1. Load ``.md`` / ``.txt`` / ``.pdf`` files from *data_dir*, one at a time,
+       skipping the files the ingestion manifest shows unchanged (see
+       :mod:`ingestion.manifest`) before they are read.
+       PDFs are parsed once, by a pool of *workers* processes.
     2. Extract and normalize text.
     3. Chunk each document (skip chunks below ``MIN_CHUNK_TOKENS``).
        For PDFs, chunking is page-aware: each page is chunked separately
        and the resulting ``Chunk`` objects carry a ``page_number``.
-    4. Skip chunks already in the database (resume support).
-    5. Embed new chunk texts via OpenAI (with retry).
-    6. Persist ``ChunkRecord`` rows to Postgres via ``ON CONFLICT DO NOTHING``.
-    7. Print summary statistics and a sample row.
+    4. Skip chunks already in the database (resume support) — except for
+       changed files, whose chunks all replace the stored ones.
+    5. Embed new chunk texts via OpenAI in batches of up to *batch_tokens*
+       tokens (capped at the provider's per-request limits), or of a fixed
+       *batch_size* texts when *batch_tokens* is ``None``, up to
+       *concurrency* batches at once within the rate limits (see
+       :mod:`ingestion.embedding_scheduler`), each retried on its own.
+    6. Persist each embedded batch to Postgres via ``ON CONFLICT DO NOTHING``
+       and commit it, with the manifest rows of the files it completes.
+       A changed file is swapped in a single transaction of its own, then
+       its cached answers are invalidated (``ResponseCache.invalidate_source``).
+    7. Print summary statistics (embedding requests and wall time
+       included) and a sample row.
+
+    Steps 1-4, 5 and 6 run concurrently, at most *queue_depth* batches
+    apart.
+
+    Returns:
+        Counters of the run.
+
+    Raises:
+        FileNotFoundError: If *data_dir* does not exist.
+        RuntimeError: If a batch cannot be embedded.  The batches committed
+            before it stay in the database.
     """
     # --- 0. Ensure tables exist ---
     Base.metadata.create_all(bind=engine)
 
-    # --- 1. Load ---
-    docs = load_documents(data_dir, limit=limit)
-    if not docs:
-        print(f"No supported files found in {data_dir}")
-        return
-
-    print(f"Loaded {len(docs)} document(s) from {data_dir}")
-
-    # --- 2 & 3. Extract + Chunk (with quality gate) ---
-    all_chunks: list[Chunk] = []
-    skipped_small = 0
-    for doc in docs:
-        extension = pathlib.PurePosixPath(doc.name).suffix.lower()
-
-        if extension == ".pdf":
-            # Page-aware chunking for PDFs
-            doc_chunks = _chunk_pdf_document(doc)
-        else:
-            text = _extract_text(doc)
-            if not text.strip():
-                print(f"  [skip] {doc.name}: empty after extraction")
-                continue
-            doc_chunks = chunk_text(text, source_path=doc.path)
-
-        # Quality gate: drop chunks below MIN_CHUNK_TOKENS
-        quality_chunks = [
-            c for c in doc_chunks if (c.token_end - c.token_start) >= MIN_CHUNK_TOKENS
-        ]
-        skipped_small += len(doc_chunks) - len(quality_chunks)
-        all_chunks.extend(quality_chunks)
-        print(f"  {doc.name}: {len(quality_chunks)} chunk(s)")
-
-    if skipped_small:
-        print(f"  Skipped {skipped_small} chunk(s) below {MIN_CHUNK_TOKENS} tokens")
-
-    if not all_chunks:
-        print("No chunks produced — nothing to embed.")
-        return
-
-    print(f"Total chunks: {len(all_chunks)}")
-
-    # --- 4. Resume: skip chunks already in DB ---
+    started = time.perf_counter()
+    stats = IngestStats()
+    with SessionLocal() as session:
+        manifest = Manifest.load(session)
+    changes: dict[str, tuple[FileStatus, FileFingerprint]] = {}
+    touched: list[tuple[str, FileFingerprint]] = []
+    pending: dict[str, _PendingDocument] = {}
+
+    def _include(path: pathlib.Path) -> bool:
+        status, fingerprint = manifest.classify(path)
+        if status in ("unchanged", "touched"):
+            stats.skipped_unchanged += 1
+            if status == "touched":
+                touched.append((str(path), fingerprint))
+            return False
+        changes[str(path)] = (status, fingerprint)
+        return True
+
+    docs = iter_documents(data_dir, limit=limit, workers=workers, include=_include)
+    # The scheduler retries and adapts to 429s — no client-side retries
+    scheduler = EmbeddingScheduler(OpenAIEmbeddingProvider(max_retries=0), concurrency=concurrency)
+    sample: ChunkRecord | None = None
+
+    # --- 1-5. Load + chunk + resume filter | embed, each in its own thread ---
+    new_chunks = _iter_new_chunks(docs, stats, changes, pending)
+    if batch_tokens is None:
+        batches = itertools.batched(new_chunks, batch_size)
+    else:
+        batches = _pack_by_tokens(new_chunks, min(batch_tokens, MAX_REQUEST_TOKENS))
+    chunk_batches = _prefetch(batches, queue_depth)
+    embedded = _prefetch(scheduler.map(chunk_batches, _batch_texts, _batch_tokens), queue_depth)
+
+    # --- 6. Persist + commit each batch as it lands ---
     session = SessionLocal()
     try:
-        source_paths = list({c.source_path for c in all_chunks})
-        existing_keys = _get_existing_chunk_keys(session, source_paths)
-
-        new_chunks = [c for c in all_chunks if (c.source_path, c.chunk_index) not in existing_keys]
-        skipped_existing = len(all_chunks) - len(new_chunks)
-        if skipped_existing:
-            print(f"  Skipping {skipped_existing} chunk(s) already in DB (resume)")
-
-        if not new_chunks:
-            print("All chunks already persisted — nothing to embed.")
-            return
-
-        # --- 5. Embed new chunks (in batches, with retry) ---
-        embedder = OpenAIEmbeddingProvider()
-        all_embeddings: list[list[float]] = []
-        texts = [c.text for c in new_chunks]
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            batch_embeddings = _embed_with_retry(embedder, batch)
-            all_embeddings.extend(batch_embeddings)
-            print(f"  Embedded batch {i // batch_size + 1} ({len(batch)} texts)")
-
-        # --- 6. Persist via ON CONFLICT DO NOTHING ---
-        records = _chunks_to_records(new_chunks, all_embeddings)
-        inserted = _bulk_upsert(session, records)
-        print(f"Inserted {inserted} new chunk(s), skipped {len(records) - inserted} existing.")
-
-        # --- 7. Summary ---
-        if records:
-            sample = records[0]
-            print("\n--- Sample row ---")
-            print(f"  doc_id:      {sample.doc_id}")
-            print(f"  chunk_index: {sample.chunk_index}")
-            print(f"  text:        {sample.text[:80]}...")
-            print("--- Done ---")
-
+        for batch, embeddings in embedded:
+            records = _chunks_to_records(list(batch), embeddings)
+            inserted = _persist_batch(session, records, pending, stats)
+            stats.batches += 1
+            stats.inserted += inserted
+            sample = sample or records[0]
+            print(f"  Committed batch {stats.batches} ({len(batch)} chunks, {inserted} new)")
+        # Unchanged content under a new mtime: refresh the stat only
+        for source_path, fingerprint in touched:
+            record_file(session, source_path, fingerprint)
+        session.commit()
     except Exception:
         session.rollback()
         raise
     finally:
+        # Stop the upstream stages if persisting failed
+        embedded.close()
+        chunk_batches.close()
+        # An unfinished replacement rolls back: the old chunks stay
+        for doc in pending.values():
+            if doc.session is not None:
+                doc.session.close()
         session.close()
+        stats.requests = scheduler.requests
+        stats.seconds = time.perf_counter() - started
+
+    # --- 7. Summary ---
+    if not stats.documents:
+        if stats.skipped_unchanged:
+            print(f"All {stats.skipped_unchanged} file(s) in {data_dir} unchanged since last run")
+        else:
+            print(f"No supported files found in {data_dir}")
+        return stats
+    print(f"Processed {stats.documents} document(s) from {data_dir}: {stats.chunks} chunk(s)")
+    if stats.skipped_unchanged:
+        print(f"  Skipped {stats.skipped_unchanged} unchanged file(s) (manifest)")
+    if stats.replaced:
+        print(f"  Replaced the chunks of {stats.replaced} changed file(s)")
+    if stats.skipped_small:
+        print(f"  Skipped {stats.skipped_small} chunk(s) below {MIN_CHUNK_TOKENS} tokens")
+    if stats.skipped_existing:
+        print(f"  Skipped {stats.skipped_existing} chunk(s) already in DB (resume)")
+    embedded_count = stats.chunks - stats.skipped_existing
+    print(
+        f"Inserted {stats.inserted} new chunk(s) in {stats.batches} batch(es), "
+        f"skipped {embedded_count - stats.inserted} existing."
+    )
+    batching = f"fixed {batch_size}" if batch_tokens is None else f"<= {batch_tokens} tokens"
+    print(
+        f"Embedding: {stats.requests} request(s), batches of {batching}; "
+        f"total {stats.seconds:.1f}s"
+    )
+    if sample is not None:
+        print("\n--- Sample row ---")
+        print(f"  doc_id:      {sample.doc_id}")
+        print(f"  chunk_index: {sample.chunk_index}")
+        print(f"  text:        {sample.text[:80]}...")
+        print("--- Done ---")
+    return stats
 
 
 def main() -> None:
@@ -327,10 +645,45 @@ def main() -> None:
         "--batch-size",
         type=int,
         default=64,
-        help="Number of texts per embedding API call (default: 64).",
+        help="Texts per embedding API call with --batch-tokens 0 (default: 64).",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=_BATCH_TOKENS,
+        help=(
+            f"Input tokens per embedding API call (default: {_BATCH_TOKENS}); "
+            "0 = fixed --batch-size batches."
+        ),
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=_QUEUE_DEPTH,
+        help=f"Batches buffered between pipeline stages (default: {_QUEUE_DEPTH}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_PDF_WORKERS,
+        help=f"Processes extracting PDF text (default: {_PDF_WORKERS}, the CPU count).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=EMBED_CONCURRENCY,
+        help=f"Embedding batches in flight (default: {EMBED_CONCURRENCY}).",
     )
     args = parser.parse_args()
-    run_pipeline(args.data_dir, limit=args.limit, batch_size=args.batch_size)
+    run_pipeline(
+        args.data_dir,
+        limit=args.limit,
+        batch_size=args.batch_size,
+        batch_tokens=args.batch_tokens or None,
+        queue_depth=args.queue_depth,
+        workers=args.workers,
+        concurrency=args.concurrency,
+    )
 
 
 if __name__ == "__main__":
@@ -25,8 +25,6 @@ from db.models import Base
 from db.session import SessionLocal, engine
 from ingestion.embeddings import OpenAIEmbeddingProvider
 from ingestion.ingest import (
-    _MAX_RETRIES,
-    _RETRY_BASE_SECONDS,
     MIN_CHUNK_TOKENS,
     _bulk_upsert,
     _chunks_to_records,
@@ -41,6 +39,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Retry parameters for transient embedding API errors.
+_MAX_RETRIES = 3
+_RETRY_BASE_SECONDS = 2.0
+
 
 def _chunk_ocr_document(pdf_path: str) -> list[Chunk]:
     """OCR a scanned PDF page-by-page and return chunks with page numbers.
@@ -89,7 +91,7 @@ def _embed_with_retry(
     embedder: OpenAIEmbeddingProvider,
     texts: list[str],
 ) -> list[list[float]]:
-    """Embed with exponential backoff (mirrors ingest.py)."""
+    """Embed with exponential backoff."""
     last_exc: Exception | None = None
     for attempt in range(_MAX_RETRIES):
         try:
@@ -3,23 +3,37 @@ File loaders for the ingestion pipeline.
 
 Recursively discovers and reads ``.md``, ``.txt``, and ``.pdf`` files
 from a directory.
+
+PDF text extraction (pdfplumber) is the slowest ingestion step, so each
+PDF is parsed exactly once: its pages travel downstream on
+``LoadedDocument.pages`` for page-aware chunking.  With ``workers > 1``,
+:func:`iter_documents` fans extraction out across a process pool — one
+task per document, or per ``pages_per_task`` page range for long books —
+while still yielding documents in path order.  The page count is read from
+the PDF catalog, and each range task parses only its own pages.
 """
 
+import itertools
+import multiprocessing
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import pdfplumber
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import LITERAL_PAGE, LITERAL_PAGES, PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import PDFObjRef, dict_value, list_value, resolve1
+from pdfplumber.page import Page
 
 SUPPORTED_EXTENSIONS: frozenset[str] = frozenset({".md", ".txt", ".pdf"})
 
-
-@dataclass(frozen=True)
-class LoadedDocument:
-    """A document loaded from disk."""
-
-    path: str
-    name: str
-    content: str
+# PDFs longer than this are split into page ranges of this size, so one
+# huge book is extracted by the whole pool instead of a single worker.
+PDF_PAGES_PER_TASK = 32
 
 
 @dataclass(frozen=True)
@@ -35,12 +49,150 @@ class LoadedPage:
     text: str
 
 
-def load_pdf_pages(file_path: str | Path) -> list[LoadedPage]:
+@dataclass(frozen=True)
+class LoadedDocument:
+    """A document loaded from disk.
+
+    Attributes:
+        path: Full path to the file.
+        name: Basename of the file.
+        content: Full text.  For PDFs, the page texts joined by blank lines.
+        pages: For PDFs, the non-empty pages ``content`` was built from, so
+            they need not be extracted again.  ``None`` for other formats.
+    """
+
+    path: str
+    name: str
+    content: str
+    pages: tuple[LoadedPage, ...] | None = None
+
+
+def _check_pdf_path(file_path: str | Path) -> Path:
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"PDF file does not exist: {path}")
+    if path.suffix.lower() != ".pdf":
+        raise ValueError(f"Expected a .pdf file, got: {path.suffix!r}")
+    return path
+
+
+def _extract_pages(path: str | Path, first: int = 0, last: int | None = None) -> list[LoadedPage]:
+    """Extract the non-empty pages ``first <= index < last`` (0-based) of a PDF.
+
+    Module-level so it can run in a worker process.  With *last*, only the
+    range's branch of the page tree is parsed (see :func:`_page_range`), so
+    the page-range tasks of a long book do not each parse the whole book.
+    """
+    if last is None:
+        with pdfplumber.open(path) as pdf:
+            return _page_texts(pdf.pages[first:])
+    with open(path, "rb") as f:
+        # Not closed through pdfplumber: PDF.close() sets up every page again
+        pdf = pdfplumber.PDF(f, stream_is_external=True, path=Path(path))
+        return _page_texts(
+            Page(pdf, page, page_number=number)
+            for number, page in _page_range(pdf.doc, first, last)
+        )
+
+
+def _page_texts(pages: Iterable[Page]) -> list[LoadedPage]:
+    loaded: list[LoadedPage] = []
+    for page in pages:
+        text = page.extract_text() or ""
+        page.close()  # drop the parsed layout objects — books are large
+        if text.strip():
+            loaded.append(LoadedPage(page_number=page.page_number, text=text))
+    return loaded
+
+
+class _PageTreeMismatch(Exception):
+    """A page tree whose ``/Count`` entries do not describe its pages."""
+
+
+def _page_range(doc: PDFDocument, first: int, last: int) -> list[tuple[int, PDFPage]]:
+    """Pages ``first <= index < last`` (0-based) of *doc*, with their 1-based numbers.
+
+    ``PDFPage.create_pages`` parses every page dictionary before the range.
+    Here subtrees outside it are skipped by their ``/Count``, and the kids
+    of a node whose ``/Count`` equals its number of kids (all pages — the
+    common flat or balanced layout) are only parsed inside the range.
+    Trees that do not add up fall back to the full walk.
+    """
+    found: list[tuple[int, PDFPage]] = []
+    visited: set[int] = set()
+
+    def visit(obj: Any, inherited: dict[str, Any], start: int, page_only: bool) -> int:
+        """Collect the range's pages under *obj*, whose first page is *start*; count its pages."""
+        objid = obj.objid if isinstance(obj, PDFObjRef) else None
+        if objid is not None:
+            if objid in visited:
+                raise _PageTreeMismatch(f"page tree cycle at object {objid}")
+            visited.add(objid)
+        node = dict_value(obj).copy()
+        for key in PDFPage.INHERITABLE_ATTRS & inherited.keys() - node.keys():
+            node[key] = inherited[key]
+        kind = node.get("Type")
+        if kind is LITERAL_PAGE:
+            if first <= start < last:
+                found.append((start + 1, PDFPage(doc, objid, node, None)))
+            return 1
+        if page_only or kind is not LITERAL_PAGES:
+            raise _PageTreeMismatch(f"unexpected page tree node {kind!r}")
+        kids = list_value(node.get("Kids", []))
+        count = resolve1(node.get("Count"))
+        if count == len(kids):
+            for index in range(max(first - start, 0), min(last - start, len(kids))):
+                visit(kids[index], node, start + index, page_only=True)
+            return count
+        end = start
+        for kid in kids:
+            child = dict_value(kid)
+            size = 1 if child.get("Type") is LITERAL_PAGE else resolve1(child.get("Count"))
+            if not isinstance(size, int):
+                raise _PageTreeMismatch("page tree node without a /Count")
+            if end < last and end + size > first:
+                visit(kid, node, end, page_only=False)
+            end += size
+        return end - start
+
+    try:
+        visit(doc.catalog["Pages"], {}, 0, page_only=False)
+    except (KeyError, _PageTreeMismatch):
+        walk = itertools.islice(PDFPage.create_pages(doc), first, last)
+        return list(enumerate(walk, start=first + 1))
+    return found
+
+
+def _pdf_page_count(path: str | Path) -> int:
+    """Page count from the catalog's page tree, without setting up any page.
+
+    Falls back to walking the page tree when ``/Count`` is missing or bad.
+    """
+    with open(path, "rb") as f:
+        doc = PDFDocument(PDFParser(f))
+        try:
+            count = resolve1(resolve1(doc.catalog["Pages"])["Count"])
+        except (KeyError, TypeError):
+            count = None
+        if isinstance(count, int) and count >= 0:
+            return count
+        return sum(1 for _ in PDFPage.create_pages(doc))
+
+
+def load_pdf_pages(
+    file_path: str | Path,
+    *,
+    executor: Executor | None = None,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+) -> list[LoadedPage]:
     """
     Extract text from each page of a PDF using pdfplumber.
 
     Args:
         file_path: Path to the PDF file.
+        executor: Optional process pool.  PDFs longer than *pages_per_task*
+            are then extracted in page ranges across its workers.
+        pages_per_task: Pages per pool task.
 
     Returns:
         List of ``LoadedPage`` objects, one per page with non-empty text.
@@ -51,38 +203,59 @@ def load_pdf_pages(file_path: str | Path) -> list[LoadedPage]:
         FileNotFoundError: If *file_path* does not exist.
         ValueError: If *file_path* is not a ``.pdf`` file.
     """
-    path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"PDF file does not exist: {path}")
-    if path.suffix.lower() != ".pdf":
-        raise ValueError(f"Expected a .pdf file, got: {path.suffix!r}")
+    path = _check_pdf_path(file_path)
+    if executor is None:
+        return _extract_pages(path)
+    return _collect_pages(_submit_pdf(executor, path, pages_per_task))
 
-    pages: list[LoadedPage] = []
-    with pdfplumber.open(path) as pdf:
-        for i, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            if text.strip():
-                pages.append(LoadedPage(page_number=i, text=text))
-    return pages
 
+def _submit_pdf(
+    executor: Executor, path: Path, pages_per_task: int
+) -> list[Future[list[LoadedPage]]]:
+    """Queue the extraction of *path*, in page ranges if it is long."""
+    page_count = _pdf_page_count(path)
+    if page_count <= pages_per_task:
+        return [executor.submit(_extract_pages, path)]
+    return [
+        executor.submit(_extract_pages, path, first, first + pages_per_task)
+        for first in range(0, page_count, pages_per_task)
+    ]
 
-def load_documents(
+
+def _collect_pages(futures: list[Future[list[LoadedPage]]]) -> list[LoadedPage]:
+    return [page for future in futures for page in future.result()]
+
+
+def _pdf_document(path: Path, pages: list[LoadedPage]) -> LoadedDocument:
+    return LoadedDocument(
+        path=str(path),
+        name=path.name,
+        content="\n\n".join(p.text for p in pages),
+        pages=tuple(pages),
+    )
+
+
+def iter_documents(
     data_dir: str | Path,
     *,
     limit: int | None = None,
-) -> list[LoadedDocument]:
+    workers: int = 1,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    include: Callable[[Path], bool] | None = None,
+) -> Iterator[LoadedDocument]:
     """
-    Recursively load ``.md``, ``.txt``, and ``.pdf`` files from *data_dir*.
+    Lazily load ``.md``, ``.txt``, and ``.pdf`` files from *data_dir*.
 
-    For PDF files, all pages are concatenated into a single ``content``
-    string (page-aware chunking is handled downstream in the pipeline).
+    Same documents, in the same order, as :func:`load_documents`, but each
+    file is read only when the caller asks for it — so at most one document
+    is held in memory by the loader, whatever the size of the corpus.
 
-    Args:
-        data_dir: Root directory to scan.
-        limit: Maximum number of files to return.  ``None`` means no limit.
+    With ``workers > 1``, PDFs are extracted in a process pool of that
+    size, up to ``2 * workers`` documents ahead of the caller.
 
-    Returns:
-        List of ``LoadedDocument`` objects sorted by path.
+    *include*, when given, is asked about every supported file before it
+    is read; files it rejects are neither loaded nor counted towards
+    *limit* (the ingestion manifest uses it to skip unchanged files).
 
     Raises:
         FileNotFoundError: If *data_dir* does not exist.
@@ -93,28 +266,83 @@ def load_documents(
         raise FileNotFoundError(f"Data directory does not exist: {root}")
     if not root.is_dir():
         raise ValueError(f"Path is not a directory: {root}")
+    paths = _iter_paths(root, limit, include)
+    if workers > 1:
+        return _iter_documents_parallel(paths, workers, pages_per_task)
+    return (_load_document(path) for path in paths)
+
 
-    documents: list[LoadedDocument] = []
+def _iter_paths(
+    root: Path, limit: int | None, include: Callable[[Path], bool] | None = None
+) -> Iterator[Path]:
+    count = 0
     for path in sorted(root.rglob("*")):
+        if limit is not None and count >= limit:
+            return
         if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
             continue
         if not path.is_file():
             continue
+        if include is not None and not include(path):
+            continue
+        yield path
+        count += 1
+
+
+def _load_document(path: Path) -> LoadedDocument:
+    if path.suffix.lower() == ".pdf":
+        return _pdf_document(path, _extract_pages(path))
+    return LoadedDocument(path=str(path), name=path.name, content=path.read_text(encoding="utf-8"))
+
+
+def _iter_documents_parallel(
+    paths: Iterator[Path], workers: int, pages_per_task: int
+) -> Iterator[LoadedDocument]:
+    # spawn, not fork: the ingestion pipeline runs this from a stage thread
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    try:
+        pending: deque[tuple[Path, list[Future[list[LoadedPage]]] | None]] = deque()
+        for path in paths:
+            if path.suffix.lower() == ".pdf":
+                pending.append((path, _submit_pdf(pool, path, pages_per_task)))
+            else:
+                pending.append((path, None))
+            while len(pending) > 2 * workers or (pending and pending[0][1] is None):
+                yield _finish(*pending.popleft())
+        while pending:
+            yield _finish(*pending.popleft())
+    finally:
+        # Closed early: drop the extractions nobody will read
+        pool.shutdown(cancel_futures=True)
 
-        if path.suffix.lower() == ".pdf":
-            pages = load_pdf_pages(path)
-            content = "\n\n".join(p.text for p in pages)
-        else:
-            content = path.read_text(encoding="utf-8")
-
-        documents.append(
-            LoadedDocument(
-                path=str(path),
-                name=path.name,
-                content=content,
-            )
-        )
-        if limit is not None and len(documents) >= limit:
-            break
 
-    return documents
+def _finish(path: Path, futures: list[Future[list[LoadedPage]]] | None) -> LoadedDocument:
+    if futures is None:
+        return _load_document(path)
+    return _pdf_document(path, _collect_pages(futures))
+
+
+def load_documents(
+    data_dir: str | Path,
+    *,
+    limit: int | None = None,
+) -> list[LoadedDocument]:
+    """
+    Recursively load ``.md``, ``.txt``, and ``.pdf`` files from *data_dir*.
+
+    For PDF files, all pages are concatenated into a single ``content``
+    string (page-aware chunking is handled downstream in the pipeline).
+
+    Args:
+        data_dir: Root directory to scan.
+        limit: Maximum number of files to return.  ``None`` means no limit.
+
+    Returns:
+        List of ``LoadedDocument`` objects sorted by path.
+
+    Raises:
+        FileNotFoundError: If *data_dir* does not exist.
+        ValueError: If *data_dir* is not a directory.
+    """
+    return list(iter_documents(data_dir, limit=limit))
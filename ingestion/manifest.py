@@ -0,0 +1,131 @@
+"""
+Ingestion manifest — skip unchanged files before they are parsed.
+
+The ``ingest_manifest`` table (:class:`db.models.IngestManifest`) records,
+for every ingested file, its size, modification time and SHA-256.  Before
+a file is loaded, :meth:`Manifest.classify` compares it with its row:
+
+- ``unchanged`` — same size and mtime; the file is not even read.
+- ``touched``   — new size or mtime but the same hash; nothing to
+  re-ingest, only the row's stat is refreshed.
+- ``changed``   — a different hash; its chunks must be replaced.
+- ``new``       — no row yet.
+
+A file's row is written (:func:`record_file`) in the same transaction
+as its last chunks, so an interrupted run re-processes exactly the files
+it did not finish.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from db.models import IngestManifest
+
+FileStatus = Literal["new", "changed", "touched", "unchanged"]
+
+# Bytes read per hashing step
+_HASH_BLOCK = 1 << 20
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """What a file's chunks were built from."""
+
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+def hash_file(path: str | Path) -> str:
+    """SHA-256 hex digest of *path*, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """The manifest rows of one run, loaded once up front.
+
+    Args:
+        entries: Fingerprints by ``source_path``.
+    """
+
+    def __init__(self, entries: dict[str, FileFingerprint] | None = None) -> None:
+        self._entries = dict(entries or {})
+
+    @classmethod
+    def load(cls, session: Session) -> Manifest:
+        """Read every manifest row."""
+        rows = session.query(
+            IngestManifest.source_path,
+            IngestManifest.size,
+            IngestManifest.mtime_ns,
+            IngestManifest.content_hash,
+        ).all()
+        return cls(
+            {r.source_path: FileFingerprint(r.size, r.mtime_ns, r.content_hash) for r in rows}
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def classify(self, path: str | Path) -> tuple[FileStatus, FileFingerprint]:
+        """Compare *path* with its manifest row.
+
+        Only hashes the file when its size or mtime differ from the row
+        (or there is no row).
+
+        Returns:
+            The file's status and its current fingerprint.
+        """
+        stat = Path(path).stat()
+        known = self._entries.get(str(path))
+        if known is not None and (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return "unchanged", known
+        current = FileFingerprint(stat.st_size, stat.st_mtime_ns, hash_file(path))
+        if known is None:
+            return "new", current
+        if known.content_hash == current.content_hash:
+            return "touched", current
+        return "changed", current
+
+
+def record_file(
+    session: Session,
+    source_path: str,
+    fingerprint: FileFingerprint,
+    chunk_count: int | None = None,
+) -> None:
+    """Upsert the manifest row of *source_path* (without committing).
+
+    Args:
+        session: Session whose transaction the row joins.
+        source_path: File path, as stored on its chunks.
+        fingerprint: The file's current fingerprint.
+        chunk_count: Chunks stored for the file; ``None`` keeps the
+            row's count (a touched file).
+    """
+    values = {
+        "size": fingerprint.size,
+        "mtime_ns": fingerprint.mtime_ns,
+        "content_hash": fingerprint.content_hash,
+    }
+    if chunk_count is not None:
+        values["chunk_count"] = chunk_count
+    stmt = pg_insert(IngestManifest).values(source_path=source_path, **values)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[IngestManifest.source_path],
+            set_={**values, "ingested_at": func.now()},
+        )
+    )
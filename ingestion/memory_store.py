@@ -21,12 +21,14 @@ Schema (auto-created on first use):
 
 from __future__ import annotations
 
+import asyncio
 import json
 import math
 import sqlite3
 import uuid
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from core.memory.decay import compute_decay_weight, filter_active_memories
 from core.memory.types import MemoryEntry, MemoryType
@@ -337,3 +339,33 @@ class MemoryStore:
 
         scored.sort(key=lambda t: t[1], reverse=True)
         return scored[:top_k]
+
+
+class AsyncMemoryStore:
+    """Awaitable facade over :class:`MemoryStore` for the async ``/ask`` pipeline.
+
+    ``sqlite3`` has no async driver, and ``search_relevant`` is a pure-Python
+    linear scan, so each call runs in the default thread pool — the event
+    loop keeps serving other requests while a lookup is in flight.  Wraps
+    the same store (and file) as the sync API.
+
+    Args:
+        store: The underlying sync store.
+    """
+
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    def create_entry(self, *args: Any, **kwargs: Any) -> MemoryEntry:
+        """Same as :meth:`MemoryStore.create_entry` — no I/O, so not awaitable."""
+        return self.store.create_entry(*args, **kwargs)
+
+    async def save(self, entry: MemoryEntry, embedding: list[float] | None = None) -> None:
+        """Await :meth:`MemoryStore.save` off the event loop."""
+        await asyncio.to_thread(self.store.save, entry, embedding)
+
+    async def search_relevant(
+        self, query_embedding: list[float], now: datetime, **kwargs: Any
+    ) -> list[tuple[MemoryEntry, float]]:
+        """Await :meth:`MemoryStore.search_relevant` off the event loop."""
+        return await asyncio.to_thread(self.store.search_relevant, query_embedding, now, **kwargs)
@@ -0,0 +1,257 @@
+"""
+Load benchmark: sync vs async ``POST /ask`` pipeline with stubbed providers.
+
+Drives each router in-process over ASGI (``httpx.ASGITransport``) with a
+fixed number of concurrent clients.  Embedding, search and generation are
+stubs with configurable latency: the sync stubs ``time.sleep`` (holding a
+threadpool thread, like the sync OpenAI / SQLAlchemy clients), the async
+stubs ``await asyncio.sleep`` (like ``AsyncOpenAI`` / ``AsyncSession``).
+Everything else — expansion, rerank, prompt building, citations — is the
+real pipeline.  No network, database or API keys.
+
+Reports throughput, latency percentiles and the median pre-generation
+wall clock (``usage.pre_generation_ms``) per path.  The sync path tops
+out around ``threadpool size / request latency`` requests per second.
+
+Usage:
+    python scripts/bench_ask_pipelines.py
+    python scripts/bench_ask_pipelines.py --requests 1000 --concurrency 200 --gen-ms 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import zlib
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.deps import (  # noqa: E402
+    get_async_db,
+    get_db,
+    get_embedding_provider,
+    get_generation_provider,
+    get_memory_store,
+    get_rate_limiter,
+    get_response_cache,
+    get_vector_index,
+)
+from api.routes import ask as sync_ask  # noqa: E402
+from api.routes import ask_async  # noqa: E402
+from core.generation.base import GenerationRequest, GenerationResponse  # noqa: E402
+from db.search import ChunkHit  # noqa: E402
+from infrastructure.cache import ResponseCache  # noqa: E402
+from infrastructure.rate_limiter import RateLimiter  # noqa: E402
+
+_CHUNKS = [
+    (
+        ChunkHit(
+            id=i,
+            doc_id=f"doc-{i}",
+            source_path=f"/data/pdfs/mixing_{i}.pdf",
+            source_name=f"mixing_{i}.pdf",
+            chunk_index=0,
+            token_start=0,
+            token_end=512,
+            text=f"Cut low mids around 300Hz on vocals ({i}).",
+            page_number=1,
+            sub_domain=None,
+        ),
+        0.8 - i * 0.01,
+    )
+    for i in range(15)
+]
+_EMBEDDINGS = np.random.default_rng(0).random((len(_CHUNKS), 1536), dtype=np.float32)
+_RESPONSE = GenerationResponse(
+    content="Cut around 300Hz [1].", model="stub", usage_input_tokens=800, usage_output_tokens=60
+)
+
+
+def _vector(text: str) -> list[float]:
+    # Distinct per query so the retrieval cache never answers
+    return np.random.default_rng(zlib.crc32(text.encode())).random(1536).tolist()
+
+
+class _StubEmbedder:
+    last_cache_hit = False
+
+    def __init__(self, delay_s: float) -> None:
+        self.delay_s = delay_s
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.delay_s)
+        return [_vector(t) for t in texts]
+
+    async def aembed_texts(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.delay_s)
+        return [_vector(t) for t in texts]
+
+
+class _StubGenerator:
+    def __init__(self, delay_s: float) -> None:
+        self.delay_s = delay_s
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        time.sleep(self.delay_s)
+        return _RESPONSE
+
+    def generate_stream(self, request: GenerationRequest):  # type: ignore[no-untyped-def]
+        time.sleep(self.delay_s)
+        yield _RESPONSE.content
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        await asyncio.sleep(self.delay_s)
+        return _RESPONSE
+
+    async def agenerate_stream(self, request: GenerationRequest):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(self.delay_s)
+        yield _RESPONSE.content
+
+
+class _StubAsyncSession:
+    """Awaits the search latency, then runs the shared retrieval code."""
+
+    def __init__(self, delay_s: float) -> None:
+        self.delay_s = delay_s
+
+    async def run_sync(self, fn, *args, **kwargs):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(self.delay_s)
+        return fn(MagicMock(spec=Session), *args, **kwargs)
+
+
+def _build_app(router_module, args: argparse.Namespace) -> FastAPI:  # type: ignore[no-untyped-def]
+    app = FastAPI()
+    app.include_router(router_module.router)
+    limiter = RateLimiter.__new__(RateLimiter)
+    limiter._client = None
+    cache = ResponseCache.__new__(ResponseCache)
+    cache._client = None
+    memory = MagicMock()
+    memory.search_relevant.side_effect = lambda *a, **kw: time.sleep(args.memory_ms / 1000) or []
+    embedder = _StubEmbedder(args.embed_ms / 1000)
+    generator = _StubGenerator(args.gen_ms / 1000)
+
+    def _db():  # type: ignore[no-untyped-def]
+        yield MagicMock(spec=Session)
+
+    app.dependency_overrides.update(
+        {
+            get_db: _db,
+            get_async_db: lambda: _StubAsyncSession(args.search_ms / 1000),
+            get_embedding_provider: lambda: embedder,
+            get_generation_provider: lambda: generator,
+            get_memory_store: lambda: memory,
+            get_rate_limiter: lambda: limiter,
+            get_response_cache: lambda: cache,
+            get_vector_index: lambda: None,
+        }
+    )
+    return app
+
+
+def _percentiles(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+    }
+
+
+async def _drive(
+    app: FastAPI, n_requests: int, concurrency: int
+) -> tuple[float, list[float], list[float], int]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    pre_generation: list[float] = []
+    errors = 0
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(n_requests):
+        queue.put_nowait(i)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            body = {"query": f"How do I EQ vocals in a dense mix? #{i}", "use_tools": False}
+            t0 = time.perf_counter()
+            response = await client.post("/ask", json=body)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if response.status_code == 200:
+                pre_generation.append(response.json()["usage"]["pre_generation_ms"])
+            else:
+                errors += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as c:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop(c) for _ in range(concurrency)))
+        wall_s = time.perf_counter() - t0
+    return wall_s, latencies, pre_generation, errors
+
+
+def _search_stubs(delay_s: float) -> dict:
+    """Stand-ins for the ``api.routes.ask`` search entry points."""
+
+    def _search(*_args, **_kwargs):  # type: ignore[no-untyped-def]
+        time.sleep(delay_s)
+        return list(_CHUNKS)
+
+    def _search_multi(*_args, **_kwargs):  # type: ignore[no-untyped-def]
+        time.sleep(delay_s)
+        return list(_CHUNKS), False
+
+    return {
+        "hybrid_search": _search,
+        "search_chunks": _search,
+        "search_chunks_multi": _search_multi,
+        "fetch_embeddings": lambda _db, ids: _EMBEDDINGS[: len(ids)],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync vs async /ask load benchmark")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--embed-ms", type=float, default=40.0)
+    parser.add_argument("--search-ms", type=float, default=15.0)
+    parser.add_argument("--memory-ms", type=float, default=30.0)
+    parser.add_argument("--gen-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent — stub latency "
+        f"embed {args.embed_ms:.0f}ms / search {args.search_ms:.0f}ms / "
+        f"memory {args.memory_ms:.0f}ms / gen {args.gen_ms:.0f}ms"
+    )
+    print(
+        f"\n{'pipeline':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'pre-gen p50':>13}{'errors':>8}"
+    )
+    for name, module in (("sync", sync_ask), ("async", ask_async)):
+        app = _build_app(module, args)
+        # The sync path blocks inside search; the async stub session already
+        # awaited the latency, so its search returns immediately.
+        stubs = _search_stubs(args.search_ms / 1000 if name == "sync" else 0.0)
+        with patch.multiple(sync_ask, **stubs):
+            wall_s, latencies, pre_generation, errors = asyncio.run(
+                _drive(app, args.requests, args.concurrency)
+            )
+        pct = _percentiles(latencies)
+        pre_gen = _percentiles(pre_generation)["p50"] if pre_generation else float("nan")
+        print(
+            f"{name:<10}{args.requests / wall_s:>10.1f}{pct['p50']:>10.1f}"
+            f"{pct['p95']:>10.1f}{pre_gen:>13.1f}{errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: embedding batches of a fixed 64 texts vs batches packed by token count.
+
+Before, ingestion grouped chunks into fixed batches of ``--batch-size``
+texts whatever their length: a run of short chunks (page tails, short
+notes) under-filled its requests.  ``_pack_by_tokens`` fills each request
+up to ``--batch-tokens`` input tokens instead, using the token span every
+chunk already carries.
+
+Embeds a synthetic corpus of ``--chunks`` chunks, a ``--short-ratio``
+share of them short (20-200 tokens) and the rest full-size (512 tokens),
+through the :class:`~ingestion.embedding_scheduler.EmbeddingScheduler`
+and a real ``OpenAIEmbeddingProvider``, against
+``scripts/stub_embedding_server.py`` with a fixed per-request latency
+plus a per-token cost.  Reports requests and wall time per strategy.
+
+Usage:
+    python scripts/bench_embedding_batching.py
+    python scripts/bench_embedding_batching.py --short-ratio 0.7 --batch-tokens 32768
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.chunking import Chunk  # noqa: E402
+from ingestion.embedding_scheduler import EmbeddingScheduler  # noqa: E402
+from ingestion.embeddings import OpenAIEmbeddingProvider  # noqa: E402
+from ingestion.ingest import _BATCH_TOKENS, _batch_texts, _pack_by_tokens  # noqa: E402
+from scripts.stub_embedding_server import StubEmbeddingServer  # noqa: E402
+
+
+def _corpus(chunks: int, short_ratio: float, seed: int = 7) -> list[Chunk]:
+    """Chunks whose text is about as many stub tokens as their token span."""
+    rng = random.Random(seed)  # noqa: S311
+    corpus: list[Chunk] = []
+    for i in range(chunks):
+        tokens = rng.randint(20, 200) if rng.random() < short_ratio else 512
+        corpus.append(
+            Chunk(
+                doc_id="bench",
+                source_path="bench.txt",
+                source_name="bench.txt",
+                chunk_index=i,
+                text=" ".join(f"w{i % 100:02d}" for _ in range(tokens)),
+                token_start=0,
+                token_end=tokens,
+            )
+        )
+    return corpus
+
+
+def _run(server: StubEmbeddingServer, batches: list[tuple[Chunk, ...]], concurrency: int) -> dict:
+    provider = OpenAIEmbeddingProvider(
+        api_key="stub", base_url=server.base_url, max_retries=0, cache_enabled=False
+    )
+    scheduler = EmbeddingScheduler(provider, concurrency=concurrency, tokens_per_minute=0)
+    t0 = time.perf_counter()
+    vectors = sum(len(v) for _, v in scheduler.map(batches, _batch_texts))
+    return {"seconds": time.perf_counter() - t0, "vectors": vectors, "requests": scheduler.requests}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--chunks", type=int, default=12_000)
+    parser.add_argument("--short-ratio", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--batch-tokens", type=int, default=_BATCH_TOKENS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Per request.")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=2.0)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.chunks, args.short_ratio)
+    strategies = {
+        f"fixed {args.batch_size}": list(itertools.batched(corpus, args.batch_size)),
+        f"{args.batch_tokens} tok": list(_pack_by_tokens(corpus, args.batch_tokens)),
+    }
+    server = StubEmbeddingServer(
+        latency_ms=args.latency_ms, ms_per_1k_tokens=args.ms_per_1k_tokens
+    ).start()
+    try:
+        runs = {
+            name: _run(server, batches, args.concurrency) for name, batches in strategies.items()
+        }
+    finally:
+        server.stop()
+
+    tokens = sum(c.token_end - c.token_start for c in corpus)
+    print(
+        f"{len(corpus)} chunks, {tokens} tokens ({args.short_ratio:.0%} short), "
+        f"{args.concurrency} in flight, {args.latency_ms:.0f} ms + "
+        f"{args.ms_per_1k_tokens} ms/1k tokens per request\n"
+    )
+    print(f"{'batching':<12} {'requests':>9} {'tok/req':>8} {'seconds':>8} {'speedup':>8}")
+    baseline = runs[next(iter(runs))]["seconds"]
+    for name, run in runs.items():
+        print(
+            f"{name:<12} {run['requests']:>9} {tokens // run['requests']:>8} "
+            f"{run['seconds']:>8.2f} {baseline / run['seconds']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: embedding a full corpus — one batch at a time vs the EmbeddingScheduler.
+
+Before, ``run_pipeline`` embedded its batches strictly one after another,
+so every batch paid a full API round trip on its own.  The
+:class:`~ingestion.embedding_scheduler.EmbeddingScheduler` keeps several
+batches in flight, within request / token budgets, backing off on 429s.
+
+Runs against ``scripts/stub_embedding_server.py`` (started in-process)
+through a real ``OpenAIEmbeddingProvider``, so the HTTP client, the
+429 handling and ``Retry-After`` are all exercised.  Measures
+``--chunks`` chunks in batches of ``--batch-size``:
+
+- ``serial``     — concurrency 1, the old path.
+- ``concurrent`` — ``--concurrency`` batches in flight.
+
+With ``--max-concurrent`` the stub answers 429 above that many requests
+in flight, so the scheduler has to find the limit.
+
+Usage:
+    python scripts/bench_embedding_scheduler.py
+    python scripts/bench_embedding_scheduler.py --latency-ms 400 --concurrency 16
+    python scripts/bench_embedding_scheduler.py --max-concurrent 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ingestion.embedding_scheduler import EmbeddingScheduler  # noqa: E402
+from ingestion.embeddings import OpenAIEmbeddingProvider  # noqa: E402
+from scripts.stub_embedding_server import StubEmbeddingServer  # noqa: E402
+
+_TEXT = "Sidechain the bass to the kick with a fast release, chunk {i}"
+
+
+def _run(server: StubEmbeddingServer, batches: list[list[str]], concurrency: int) -> dict:
+    provider = OpenAIEmbeddingProvider(
+        api_key="stub", base_url=server.base_url, max_retries=0, cache_enabled=False
+    )
+    scheduler = EmbeddingScheduler(
+        provider, concurrency=concurrency, base_seconds=0.05, max_seconds=2.0
+    )
+    requests, throttled = server.requests, server.throttled
+    t0 = time.perf_counter()
+    vectors = sum(len(v) for _, v in scheduler.map(batches, lambda b: b))
+    seconds = time.perf_counter() - t0
+    return {
+        "seconds": seconds,
+        "vectors": vectors,
+        "requests": server.requests - requests,
+        "throttled": server.throttled - throttled,
+        "final": scheduler.concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--chunks", type=int, default=12_000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=250.0, help="Stub round trip.")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="Stub 429 limit (0 = off).")
+    args = parser.parse_args()
+
+    texts = [_TEXT.format(i=i) for i in range(args.chunks)]
+    batches = [texts[i : i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    server = StubEmbeddingServer(
+        latency_ms=args.latency_ms, max_concurrent=args.max_concurrent
+    ).start()
+    try:
+        serial = _run(server, batches, 1)
+        concurrent = _run(server, batches, args.concurrency)
+    finally:
+        server.stop()
+
+    print(
+        f"{args.chunks} chunks in {len(batches)} batches of {args.batch_size}, "
+        f"{args.latency_ms:.0f} ms per request, stub limit {args.max_concurrent or 'off'}\n"
+    )
+    print(
+        f"{'path':<11} {'seconds':>8} {'chunks/s':>9} {'requests':>9} "
+        f"{'429s':>6} {'in flight':>9} {'speedup':>8}"
+    )
+    for name, run in (("serial", serial), ("concurrent", concurrent)):
+        print(
+            f"{name:<11} {run['seconds']:>8.2f} {run['vectors'] / run['seconds']:>9.0f} "
+            f"{run['requests']:>9} {run['throttled']:>6} {run['final']:>9} "
+            f"{serial['seconds'] / run['seconds']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
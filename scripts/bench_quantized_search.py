@@ -0,0 +1,128 @@
+"""
+Compare full-precision, halfvec and binary first-stage search.
+
+For a sample of query vectors (stored chunk embeddings with a little noise),
+measures per ``SEARCH_QUANTIZATION`` mode:
+- Latency percentiles (p50, p95) of ``search_chunks(quantization=...)``
+- Recall@k against an exact scan (index scans disabled for the transaction)
+
+and prints the on-disk size of each HNSW index, which is what has to stay in
+shared buffers.  Modes whose index has not been built are skipped.
+
+Usage:
+    python -m db.migrations.add_quantized_embeddings --index halfvec binary
+    python scripts/bench_quantized_search.py --queries 200 --top-k 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.models import ChunkRecord  # noqa: E402
+from db.search import search_chunks  # noqa: E402
+from db.session import SessionLocal  # noqa: E402
+
+_INDEXES = {
+    "none": "idx_chunk_embedding_hnsw",
+    "halfvec": "idx_chunk_embedding_half_hnsw",
+    "binary": "idx_chunk_embedding_bit_hnsw",
+}
+
+
+def _percentiles(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+    }
+
+
+def _recall(candidate: list[list[int]], truth: list[list[int]]) -> float:
+    per_query = [len(set(c) & set(t)) / len(t) for c, t in zip(candidate, truth, strict=True) if t]
+    return statistics.mean(per_query) if per_query else 0.0
+
+
+def _index_sizes(session: Session) -> dict[str, int]:
+    rows = session.execute(
+        text(
+            "SELECT indexname, pg_relation_size(quote_ident(indexname)::regclass) AS bytes "
+            "FROM pg_indexes WHERE tablename = 'chunk_records'"
+        )
+    ).all()
+    return {row.indexname: row.bytes for row in rows}
+
+
+def _time_mode(
+    session: Session, queries: list[list[float]], mode: str, top_k: int
+) -> tuple[list[list[int]], list[float]]:
+    ids: list[list[int]] = []
+    latencies: list[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        results = search_chunks(session, q, top_k=top_k, quantization=mode)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        session.rollback()  # SET LOCAL must not leak into the next query
+        ids.append([hit.id for hit, _ in results])
+    return ids, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Quantized two-stage search benchmark")
+    parser.add_argument("--queries", type=int, default=100, help="Number of query vectors.")
+    parser.add_argument("--top-k", type=int, default=15, help="Results per query.")
+    parser.add_argument("--noise", type=float, default=0.01, help="Query perturbation stddev.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with SessionLocal() as session:
+        sizes = _index_sizes(session)
+        vectors = session.execute(
+            select(ChunkRecord.embedding).order_by(func.random()).limit(args.queries)
+        ).scalars()
+        queries = [
+            (np.asarray(v, dtype=np.float32) + rng.normal(0, args.noise, len(v))).tolist()
+            for v in vectors
+        ]
+        session.rollback()
+        if not queries:
+            print("No chunks in chunk_records — ingest first.")
+            return
+
+        truth: list[list[int]] = []
+        for q in queries:
+            session.execute(text("SET LOCAL enable_indexscan = off"))
+            truth.append(
+                [
+                    hit.id
+                    for hit, _ in search_chunks(session, q, top_k=args.top_k, quantization="none")
+                ]
+            )
+            session.rollback()
+
+        print(f"\n{'mode':<10}{'index MB':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall@k':>11}")
+        for mode, index_name in _INDEXES.items():
+            if index_name not in sizes:
+                print(f"{mode:<10}{'—':>10}  (index {index_name} not built)")
+                continue
+            _time_mode(session, queries[:5], mode, args.top_k)  # warm the pool
+            ids, latencies = _time_mode(session, queries, mode, args.top_k)
+            pct = _percentiles(latencies)
+            print(
+                f"{mode:<10}{sizes[index_name] / 2**20:>10.1f}{pct['p50']:>10.2f}"
+                f"{pct['p95']:>10.2f}{_recall(ids, truth):>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Micro-benchmark for db/rerank.py — full rerank pipeline latency with MMR.
+
+Builds synthetic ``ChunkHit`` candidates with random 1536-dim embeddings and
+times ``rerank_results(use_mmr=True)`` at several candidate counts.  A
+pairwise-cosine MMR loop (the pre-vectorisation algorithm) runs alongside
+as a baseline.  No database or network access.
+
+Usage:
+    python scripts/bench_rerank.py
+    python scripts/bench_rerank.py --sizes 15 50 200 --repeats 200 --top-k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.rerank import _cosine_similarity, rerank_results  # noqa: E402
+from db.search import ChunkHit  # noqa: E402
+
+
+def _candidates(n: int, dim: int, rng: np.random.Generator) -> tuple[list, np.ndarray]:
+    hits = [
+        ChunkHit(
+            id=i,
+            doc_id=f"doc-{i}",
+            source_path=f"/data/{'courses' if i % 4 == 0 else 'pdfs'}/doc_{i}.pdf",
+            source_name=f"{'mixing' if i % 3 == 0 else 'notes'}_{i}.pdf",
+            chunk_index=0,
+            token_start=0,
+            token_end=512,
+            text=f"chunk {i}",
+            page_number=None,
+            sub_domain=None,
+        )
+        for i in range(n)
+    ]
+    scores = np.sort(rng.uniform(0.4, 0.9, size=n))[::-1]
+    embeddings = rng.normal(size=(n, dim)).astype(np.float32)
+    return list(zip(hits, scores.tolist(), strict=True)), embeddings
+
+
+def _pairwise_mmr(results: list, embeddings: np.ndarray, lambda_: float, top_k: int) -> list:
+    """Baseline: greedy MMR with a pairwise cosine call per candidate pair."""
+    vectors = [row.tolist() for row in embeddings]
+    candidates = [(r, s, v) for (r, s), v in zip(results, vectors, strict=True)]
+    selected: list = []
+    while len(selected) < top_k and candidates:
+        best_mmr, best_idx = float("-inf"), 0
+        for i, (_r, relevance, vec) in enumerate(candidates):
+            redundancy = max((_cosine_similarity(vec, sv) for _, _, sv in selected), default=0.0)
+            mmr_score = lambda_ * relevance - (1.0 - lambda_) * redundancy
+            if mmr_score > best_mmr:
+                best_mmr, best_idx = mmr_score, i
+        selected.append(candidates.pop(best_idx))
+    return [(r, s) for r, s, _ in selected]
+
+
+def _time(fn: Callable[[], object], repeats: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rerank / MMR micro-benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50, 200])
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    query = rng.normal(size=args.dim).tolist()
+
+    print(f"{'candidates':>10}{'rerank p50':>13}{'rerank p95':>13}{'pairwise p50':>15}")
+    for n in args.sizes:
+        results, embeddings = _candidates(n, args.dim, rng)
+
+        def run_rerank(results: list = results, embeddings: np.ndarray = embeddings) -> object:
+            return rerank_results(
+                results,
+                top_k=args.top_k,
+                filename_keywords=["mixing"],
+                filename_boost=1.2,
+                query_embedding=query,
+                use_mmr=True,
+                embedding_loader=lambda _ids: embeddings,
+            )
+
+        def run_pairwise(results: list = results, embeddings: np.ndarray = embeddings) -> object:
+            return _pairwise_mmr(results, embeddings, 0.7, args.top_k)
+
+        vectorised = _time(run_rerank, args.repeats)
+        pairwise = _time(run_pairwise, max(1, args.repeats // 10))
+        print(
+            f"{n:>10}{vectorised['p50']:>11.3f}ms{vectorised['p95']:>11.3f}ms"
+            f"{pairwise['p50']:>13.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
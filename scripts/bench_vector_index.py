@@ -0,0 +1,113 @@
+"""
+Benchmark the in-process mmap vector index against the pgvector HNSW path.
+
+For a sample of query vectors (stored chunk embeddings with a little noise,
+so each query has a known neighbourhood), measures:
+- Latency percentiles (p50, p95, max) for HNSW, mmap exact and mmap blocked
+- Recall@k of HNSW and blocked search against the exact mmap result
+
+Usage:
+    # Build the index first
+    python -m db.vector_index build
+
+    # Run the benchmark (needs DATABASE_URL for the HNSW leg)
+    python scripts/bench_vector_index.py --queries 200 --top-k 15
+
+    # Index-only (no database)
+    python scripts/bench_vector_index.py --skip-db
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.vector_index import DEFAULT_INDEX_PATH, MmapVectorIndex  # noqa: E402
+
+
+def _percentiles(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+def _time_queries(
+    fn: Callable[[list[float]], list], queries: list[list[float]]
+) -> tuple[list[list[int]], list[float]]:
+    ids: list[list[int]] = []
+    latencies: list[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        results = fn(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids.append([hit.id for hit, _ in results])
+    return ids, latencies
+
+
+def _recall(candidate: list[list[int]], truth: list[list[int]]) -> float:
+    per_query = [len(set(c) & set(t)) / len(t) for c, t in zip(candidate, truth, strict=True) if t]
+    return statistics.mean(per_query) if per_query else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mmap index vs pgvector HNSW benchmark")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="Index directory.")
+    parser.add_argument("--queries", type=int, default=100, help="Number of query vectors.")
+    parser.add_argument("--top-k", type=int, default=15, help="Results per query.")
+    parser.add_argument("--block-size", type=int, default=2048, help="Rows per scan block.")
+    parser.add_argument("--skip-db", action="store_true", help="Skip the pgvector HNSW leg.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = MmapVectorIndex.load(args.index)
+    print(
+        f"Loaded {len(index)} rows x {index.dim} dims in {(time.perf_counter() - t0) * 1000:.1f}ms"
+    )
+
+    rng = np.random.default_rng(args.seed)
+    rows = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    queries = [
+        (np.asarray(index.matrix[r]) + rng.normal(0, 0.01, index.dim)).astype(np.float32).tolist()
+        for r in rows
+    ]
+
+    legs: dict[str, tuple[list[list[int]], list[float]]] = {}
+    legs["mmap_exact"] = _time_queries(lambda q: index.search(q, top_k=args.top_k), queries)
+    legs["mmap_blocked"] = _time_queries(
+        lambda q: index.search(q, top_k=args.top_k, block_size=args.block_size), queries
+    )
+
+    if not args.skip_db:
+        from db.search import search_chunks
+        from db.session import SessionLocal
+
+        with SessionLocal() as session:
+            search_chunks(session, queries[0], top_k=args.top_k)  # warm the pool
+            legs["pgvector_hnsw"] = _time_queries(
+                lambda q: search_chunks(session, q, top_k=args.top_k), queries
+            )
+
+    truth = legs["mmap_exact"][0]
+    print(f"\n{'backend':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'recall@k':>11}")
+    for name, (ids, latencies) in legs.items():
+        pct = _percentiles(latencies)
+        print(
+            f"{name:<16}{pct['p50']:>10.2f}{pct['p95']:>10.2f}{pct['max']:>10.2f}"
+            f"{_recall(ids, truth):>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Local OpenAI-compatible embeddings endpoint for exercising the ingestion scheduler.
+
+``POST /v1/embeddings`` answers after ``latency_ms`` (plus
+``ms_per_1k_tokens`` for the input it embeds) with deterministic
+vectors (seeded by each input text).  With ``max_concurrent`` set, a
+request that arrives while that many are already in flight gets
+``429 Too Many Requests`` with a ``Retry-After`` header, like a provider
+enforcing its limit.  Counters (requests, throttled, peak concurrency)
+are kept on the server for assertions and reports.
+
+Point a provider at it with
+``OpenAIEmbeddingProvider(base_url=server.base_url, max_retries=0)``.
+
+Usage:
+    python scripts/stub_embedding_server.py --port 8089 --latency-ms 300 --max-concurrent 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubEmbeddingServer(ThreadingHTTPServer):
+    """Threaded stub server; ``start()`` serves from a daemon thread.
+
+    Args:
+        port: TCP port (``0`` = any free port).
+        latency_ms: Delay before each successful answer.
+        ms_per_1k_tokens: Extra delay per 1000 input tokens (estimated as
+            four characters per token).
+        max_concurrent: Requests served at once before answering 429
+            (``0`` = unlimited).
+        retry_after: ``Retry-After`` seconds sent with a 429.
+        dim: Vector dimensionality.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128  # the default (5) drops connects from a burst of batches
+
+    def __init__(
+        self,
+        port: int = 0,
+        *,
+        latency_ms: float = 0.0,
+        ms_per_1k_tokens: float = 0.0,
+        max_concurrent: int = 0,
+        retry_after: float = 0.05,
+        dim: int = 8,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.dim = dim
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI ``base_url`` of this server."""
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> StubEmbeddingServer:
+        threading.Thread(target=self.serve_forever, name="stub-embeddings", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def vector(self, text: str) -> list[float]:
+        rng = random.Random(text)  # noqa: S311
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dim)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubEmbeddingServer
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            if server.max_concurrent and server.in_flight >= server.max_concurrent:
+                server.throttled += 1
+                throttled = True
+            else:
+                throttled = False
+                server.in_flight += 1
+                server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        if throttled:
+            self._reply(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {"Retry-After": str(server.retry_after)},
+            )
+            return
+        try:
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            tokens = sum(len(t) // 4 + 1 for t in texts)
+            time.sleep((server.latency_ms + server.ms_per_1k_tokens * tokens / 1000) / 1000)
+            self._reply(
+                200,
+                {
+                    "object": "list",
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": server.vector(t)}
+                        for i, t in enumerate(texts)
+                    ],
+                    "model": body.get("model", "stub"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+        raw = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass  # quiet — benchmarks send thousands of requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="0 = no 429s.")
+    args = parser.parse_args()
+    server = StubEmbeddingServer(
+        args.port,
+        latency_ms=args.latency_ms,
+        ms_per_1k_tokens=args.ms_per_1k_tokens,
+        max_concurrent=args.max_concurrent,
+    )
+    print(f"Stub embeddings on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
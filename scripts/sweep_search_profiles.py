@@ -0,0 +1,116 @@
+"""
+Offline sweep of the HNSW search profiles against exact (sequential) search.
+
+For a sample of query vectors (stored chunk embeddings with a little noise,
+so each query has a known neighbourhood), measures per profile:
+- Latency percentiles (p50, p95) of ``search_chunks(profile=...)``
+- Recall@k against an exact scan (index scans disabled for the transaction)
+
+Optionally repeats the sweep with a ``sub_domain`` filter, where iterative
+scan (pgvector >= 0.8) matters most.
+
+Usage:
+    python scripts/sweep_search_profiles.py --queries 200 --top-k 15
+    python scripts/sweep_search_profiles.py --sub-domain mixing
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.models import ChunkRecord  # noqa: E402
+from db.search import SEARCH_PROFILES, search_chunks  # noqa: E402
+from db.session import SessionLocal  # noqa: E402
+
+
+def _percentiles(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+    }
+
+
+def _recall(candidate: list[list[int]], truth: list[list[int]]) -> float:
+    per_query = [len(set(c) & set(t)) / len(t) for c, t in zip(candidate, truth, strict=True) if t]
+    return statistics.mean(per_query) if per_query else 0.0
+
+
+def _sample_queries(session: Session, n: int, noise: float, seed: int) -> list[list[float]]:
+    rng = np.random.default_rng(seed)
+    rows = session.execute(select(ChunkRecord.embedding).order_by(func.random()).limit(n)).scalars()
+    return [
+        (np.asarray(vec, dtype=np.float32) + rng.normal(0, noise, len(vec))).tolist()
+        for vec in rows
+    ]
+
+
+def _exact(session: Session, query: list[float], top_k: int, sub_domain: str | None) -> list[int]:
+    session.execute(text("SET LOCAL enable_indexscan = off"))
+    results = search_chunks(session, query, top_k=top_k, sub_domain=sub_domain, quantization="none")
+    ids = [hit.id for hit, _ in results]
+    session.rollback()
+    return ids
+
+
+def _sweep(
+    session: Session, queries: list[list[float]], profile: str, top_k: int, sub_domain: str | None
+) -> tuple[list[list[int]], list[float]]:
+    ids: list[list[int]] = []
+    latencies: list[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        results = search_chunks(session, q, top_k=top_k, sub_domain=sub_domain, profile=profile)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        session.rollback()  # SET LOCAL must not leak into the next query
+        ids.append([hit.id for hit, _ in results])
+    return ids, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HNSW search profile recall/latency sweep")
+    parser.add_argument("--queries", type=int, default=100, help="Number of query vectors.")
+    parser.add_argument("--top-k", type=int, default=15, help="Results per query.")
+    parser.add_argument("--sub-domain", default=None, help="Optional sub_domain filter.")
+    parser.add_argument("--noise", type=float, default=0.01, help="Query perturbation stddev.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        queries = _sample_queries(session, args.queries, args.noise, args.seed)
+        session.rollback()
+        if not queries:
+            print("No chunks in chunk_records — ingest first.")
+            return
+
+        t0 = time.perf_counter()
+        truth = [_exact(session, q, args.top_k, args.sub_domain) for q in queries]
+        print(
+            f"Exact ground truth for {len(queries)} queries in "
+            f"{(time.perf_counter() - t0) * 1000:.0f}ms"
+        )
+
+        _sweep(session, queries[:5], "fast", args.top_k, args.sub_domain)  # warm the pool
+
+        print(f"\n{'profile':<12}{'ef_search':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall@k':>11}")
+        for name, settings in SEARCH_PROFILES.items():
+            ids, latencies = _sweep(session, queries, name, args.top_k, args.sub_domain)
+            pct = _percentiles(latencies)
+            print(
+                f"{name:<12}{settings.ef_search:>10}{pct['p50']:>10.2f}{pct['p95']:>10.2f}"
+                f"{_recall(ids, truth):>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from api.deps import get_db, get_embedding_provider
+from api.deps import get_db, get_embedding_provider, get_retrieval_cache
 from api.main import app
 
 # ---------------------------------------------------------------------------
@@ -94,3 +94,21 @@ def api_client():
         yield c
 
     app.dependency_overrides.clear()
+
+
+# ---------------------------------------------------------------------------
+# Retrieval cache isolation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def _clear_retrieval_cache():
+    """Start and end every test with an empty process-wide retrieval cache.
+
+    Route tests patch search per test; a warm entry from an earlier test
+    would otherwise answer instead of the patched search.
+    """
+    cache = get_retrieval_cache()
+    cache.clear()
+    yield
+    cache.clear()
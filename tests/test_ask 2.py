@@ -75,12 +75,14 @@ class TestAskEndpoint:
         yield
         app.dependency_overrides.clear()
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_successful_ask_with_citations(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         # Setup mocks
         mock_embedder = MagicMock()
@@ -96,6 +98,7 @@ class TestAskEndpoint:
         )
         mock_search.return_value = [(chunk1, 0.92), (chunk2, 0.85)]
         mock_hybrid.return_value = [(chunk1, 0.92), (chunk2, 0.85)]
+        mock_multi.return_value = ([(chunk1, 0.92), (chunk2, 0.85)], False)
 
         mock_generator = MagicMock()
         mock_generator.generate.return_value = GenerationResponse(
@@ -326,7 +329,7 @@ class TestSubDomainRoutingInAsk:
     Verifies that:
     - Queries with clear sub-domain signals trigger namespaced search.
     - Queries with no sub-domain signals use global search.
-    - When filtered search returns < MIN_FILTERED_RESULTS, global search is used.
+    - When filtered search falls back to global search, the prompt stays generic.
     - The system prompt contains Focus Areas when sub-domains are active.
     """
 
@@ -353,7 +356,7 @@ class TestSubDomainRoutingInAsk:
     def _setup_mocks(
         self,
         mock_search: MagicMock,
-        search_results: list,
+        search_results: list | tuple[list, bool],
         answer: str = "Answer [1].",
     ) -> TestClient:
         """Wire up a TestClient with mocked embedder, search, and generator."""
@@ -372,11 +375,11 @@ class TestSubDomainRoutingInAsk:
         mock_search.return_value = search_results
         return TestClient(app)
 
-    @patch("api.routes.ask.search_chunks")
-    def test_mixing_query_calls_search_with_sub_domain(self, mock_search: MagicMock) -> None:
-        """A mixing-heavy query should trigger at least one sub-domain search call."""
+    @patch("api.routes.ask.search_chunks_multi")
+    def test_mixing_query_calls_search_with_sub_domain(self, mock_multi: MagicMock) -> None:
+        """A mixing-heavy query should search at least one sub-domain."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
-        client = self._setup_mocks(mock_search, chunks)
+        client = self._setup_mocks(mock_multi, (chunks, False))
 
         response = client.post(
             "/ask",
@@ -384,10 +387,8 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        sub_domain_calls = [
-            c for c in mock_search.call_args_list if c.kwargs.get("sub_domain") is not None
-        ]
-        assert len(sub_domain_calls) >= 1
+        sub_domains_searched = mock_multi.call_args.args[2]
+        assert "mixing" in sub_domains_searched
 
     @patch("api.routes.ask.search_chunks")
     def test_generic_query_uses_global_search(self, mock_search: MagicMock) -> None:
@@ -402,23 +403,17 @@ class TestSubDomainRoutingInAsk:
         for call in mock_search.call_args_list:
             assert call.kwargs.get("sub_domain") is None
 
-    @patch("api.routes.ask.hybrid_search")
-    @patch("api.routes.ask.search_chunks")
+    @patch("api.routes.ask.KeywordLeg")
+    @patch("api.routes.ask.search_chunks_multi")
     def test_fallback_to_global_when_filtered_results_too_few(
-        self, mock_search: MagicMock, mock_hybrid: MagicMock
+        self, mock_multi: MagicMock, mock_leg: MagicMock
     ) -> None:
-        """When each filtered search returns < MIN_FILTERED_RESULTS, global search runs."""
-        few = [(_make_chunk_record(text="single chunk"), 0.85)]
+        """When filtered search returns < MIN_FILTERED_RESULTS, global results are used."""
         many = [(_make_chunk_record(text=f"global {i}"), 0.80) for i in range(5)]
-
-        def _side_effect(*args, **kwargs):  # type: ignore[no-untyped-def]
-            if kwargs.get("sub_domain") is not None:
-                return few  # 1 result per filtered call — triggers fallback
-            return many  # global fallback returns enough
-
-        mock_search.side_effect = _side_effect
-        # hybrid_search is used in the global fallback when query_terms present
-        mock_hybrid.return_value = many
+        for i, (record, _) in enumerate(many):
+            record.id = i + 1  # RRF fuses the keyword leg by id
+        mock_multi.return_value = (many, True)
+        mock_leg.return_value.result.return_value = []
 
         mock_embedder = MagicMock()
         mock_embedder.embed_texts.return_value = [[0.1] * 1536]
@@ -440,16 +435,14 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        # Either search_chunks (global, no sub_domain) or hybrid_search was called
-        # for the fallback — depending on whether query_terms were extracted
-        global_search_calls = [
-            c for c in mock_search.call_args_list if c.kwargs.get("sub_domain") is None
-        ]
-        assert len(global_search_calls) >= 1 or mock_hybrid.call_count >= 1
+        assert len(response.json()["sources"]) >= 1
+        # Fallback results are global, so the prompt carries no Focus Areas
+        gen_call = mock_generator.generate.call_args[0][0]
+        assert "## Focus Areas" not in gen_call.messages[0].content
 
-    @patch("api.routes.ask.search_chunks")
+    @patch("api.routes.ask.search_chunks_multi")
     def test_system_prompt_includes_focus_areas_for_domain_query(
-        self, mock_search: MagicMock
+        self, mock_multi: MagicMock
     ) -> None:
         """The system prompt should contain Focus Areas for sub-domain queries."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
@@ -466,7 +459,7 @@ class TestSubDomainRoutingInAsk:
             usage_output_tokens=20,
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
-        mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         client = TestClient(app)
         client.post(
@@ -512,11 +505,11 @@ class TestSubDomainRoutingInAsk:
         system_content = gen_call.messages[0].content
         assert "## Focus Areas" not in system_content
 
-    @patch("api.routes.ask.search_chunks")
-    def test_multi_domain_query_searches_multiple_sub_domains(self, mock_search: MagicMock) -> None:
+    @patch("api.routes.ask.search_chunks_multi")
+    def test_multi_domain_query_searches_multiple_sub_domains(self, mock_multi: MagicMock) -> None:
         """A query covering mixing + sound_design should search both sub-domains."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(6)]
-        client = self._setup_mocks(mock_search, chunks)
+        client = self._setup_mocks(mock_multi, (chunks, False))
 
         response = client.post(
             "/ask",
@@ -524,13 +517,9 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        sub_domains_searched = {
-            c.kwargs.get("sub_domain")
-            for c in mock_search.call_args_list
-            if c.kwargs.get("sub_domain") is not None
-        }
-        # At least one sub-domain was searched
-        assert len(sub_domains_searched) >= 1
+        # Every detected sub-domain goes to the one search_chunks_multi round trip
+        mock_multi.assert_called_once()
+        assert len(mock_multi.call_args.args[2]) >= 1
 
 
 # ---------------------------------------------------------------------------
@@ -567,7 +556,9 @@ class TestGenreRecipeInjectionInAsk:
         yield
         app.dependency_overrides.clear()
 
-    def _wire(self, mock_search: MagicMock, answer: str = "Answer [1].") -> TestClient:
+    def _wire(
+        self, mock_search: MagicMock, mock_multi: MagicMock, answer: str = "Answer [1]."
+    ) -> TestClient:
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
         mock_embedder = MagicMock()
         mock_embedder.embed_texts.return_value = [[0.1] * 1536]
@@ -582,10 +573,14 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
         return TestClient(app)
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_organic_house_query_injects_genre_reference(self, mock_search: MagicMock) -> None:
+    def test_organic_house_query_injects_genre_reference(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """An organic house query should inject ## Genre Reference into system prompt."""
         from unittest.mock import patch as _patch
 
@@ -603,6 +598,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         with _patch("api.routes.ask.load_recipe", return_value="BPM: 124. Key: A minor."):
             client = TestClient(app)
@@ -612,8 +608,11 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert "## Genre Reference" in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_genre_recipe_content_in_system_prompt(self, mock_search: MagicMock) -> None:
+    def test_genre_recipe_content_in_system_prompt(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """The recipe text should appear verbatim in the system prompt."""
         from unittest.mock import patch as _patch
 
@@ -631,6 +630,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         recipe_text = "BPM: 124. Typical keys: A minor."
         with _patch("api.routes.ask.load_recipe", return_value=recipe_text):
@@ -641,10 +641,13 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert recipe_text in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_no_genre_query_no_genre_reference(self, mock_search: MagicMock) -> None:
+    def test_no_genre_query_no_genre_reference(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """A generic query should NOT inject ## Genre Reference."""
-        client = self._wire(mock_search)
+        client = self._wire(mock_search, mock_multi)
         client.post("/ask", json={"query": "how do I use reverb?"})
 
         mock_generator = app.dependency_overrides[get_generation_provider]()
@@ -652,8 +655,11 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert "## Genre Reference" not in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_recipe_load_failure_does_not_crash(self, mock_search: MagicMock) -> None:
+    def test_recipe_load_failure_does_not_crash(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """If load_recipe returns None (file missing), /ask still returns 200."""
         from unittest.mock import patch as _patch
 
@@ -671,6 +677,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         with _patch("api.routes.ask.load_recipe", return_value=None):
             client = TestClient(app)
@@ -7,8 +7,13 @@ full pipeline without real API calls or database queries.
 Uses FastAPI dependency_overrides pattern for proper injection mocking.
 """
 
+import asyncio
+import threading
+import time
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -20,11 +25,16 @@ from api.deps import (
     get_response_cache,
 )
 from api.main import app
+from api.schemas.ask import AskResponse, UsageMetadata
 from core.generation.base import GenerationResponse
 from db.models import ChunkRecord
-from infrastructure.cache import ResponseCache
+from db.search import ChunkHit
+from infrastructure.cache import ResponseCache, SemanticQueryIndex
+from infrastructure.cache_warm import WARM_SESSION_PREFIX
 from infrastructure.rate_limiter import RateLimiter
 
+_HitRow = namedtuple("_HitRow", [*ChunkHit._fields, "distance", "is_fallback"])
+
 
 def _make_chunk_record(
     text: str = "Sample chunk about EQ.",
@@ -75,12 +85,14 @@ class TestAskEndpoint:
         yield
         app.dependency_overrides.clear()
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_successful_ask_with_citations(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         # Setup mocks
         mock_embedder = MagicMock()
@@ -96,6 +108,7 @@ class TestAskEndpoint:
         )
         mock_search.return_value = [(chunk1, 0.92), (chunk2, 0.85)]
         mock_hybrid.return_value = [(chunk1, 0.92), (chunk2, 0.85)]
+        mock_multi.return_value = ([(chunk1, 0.92), (chunk2, 0.85)], False)
 
         mock_generator = MagicMock()
         mock_generator.generate.return_value = GenerationResponse(
@@ -326,7 +339,7 @@ class TestSubDomainRoutingInAsk:
     Verifies that:
     - Queries with clear sub-domain signals trigger namespaced search.
     - Queries with no sub-domain signals use global search.
-    - When filtered search returns < MIN_FILTERED_RESULTS, global search is used.
+    - When filtered search falls back to global search, the prompt stays generic.
     - The system prompt contains Focus Areas when sub-domains are active.
     """
 
@@ -353,7 +366,7 @@ class TestSubDomainRoutingInAsk:
     def _setup_mocks(
         self,
         mock_search: MagicMock,
-        search_results: list,
+        search_results: list | tuple[list, bool],
         answer: str = "Answer [1].",
     ) -> TestClient:
         """Wire up a TestClient with mocked embedder, search, and generator."""
@@ -372,11 +385,11 @@ class TestSubDomainRoutingInAsk:
         mock_search.return_value = search_results
         return TestClient(app)
 
-    @patch("api.routes.ask.search_chunks")
-    def test_mixing_query_calls_search_with_sub_domain(self, mock_search: MagicMock) -> None:
-        """A mixing-heavy query should trigger at least one sub-domain search call."""
+    @patch("api.routes.ask.search_chunks_multi")
+    def test_mixing_query_calls_search_with_sub_domain(self, mock_multi: MagicMock) -> None:
+        """A mixing-heavy query should search at least one sub-domain."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
-        client = self._setup_mocks(mock_search, chunks)
+        client = self._setup_mocks(mock_multi, (chunks, False))
 
         response = client.post(
             "/ask",
@@ -384,10 +397,8 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        sub_domain_calls = [
-            c for c in mock_search.call_args_list if c.kwargs.get("sub_domain") is not None
-        ]
-        assert len(sub_domain_calls) >= 1
+        sub_domains_searched = mock_multi.call_args.args[2]
+        assert "mixing" in sub_domains_searched
 
     @patch("api.routes.ask.search_chunks")
     def test_generic_query_uses_global_search(self, mock_search: MagicMock) -> None:
@@ -402,23 +413,17 @@ class TestSubDomainRoutingInAsk:
         for call in mock_search.call_args_list:
             assert call.kwargs.get("sub_domain") is None
 
-    @patch("api.routes.ask.hybrid_search")
-    @patch("api.routes.ask.search_chunks")
+    @patch("api.routes.ask.KeywordLeg")
+    @patch("api.routes.ask.search_chunks_multi")
     def test_fallback_to_global_when_filtered_results_too_few(
-        self, mock_search: MagicMock, mock_hybrid: MagicMock
+        self, mock_multi: MagicMock, mock_leg: MagicMock
     ) -> None:
-        """When each filtered search returns < MIN_FILTERED_RESULTS, global search runs."""
-        few = [(_make_chunk_record(text="single chunk"), 0.85)]
+        """When filtered search returns < MIN_FILTERED_RESULTS, global results are used."""
         many = [(_make_chunk_record(text=f"global {i}"), 0.80) for i in range(5)]
-
-        def _side_effect(*args, **kwargs):  # type: ignore[no-untyped-def]
-            if kwargs.get("sub_domain") is not None:
-                return few  # 1 result per filtered call — triggers fallback
-            return many  # global fallback returns enough
-
-        mock_search.side_effect = _side_effect
-        # hybrid_search is used in the global fallback when query_terms present
-        mock_hybrid.return_value = many
+        for i, (record, _) in enumerate(many):
+            record.id = i + 1  # RRF fuses the keyword leg by id
+        mock_multi.return_value = (many, True)
+        mock_leg.return_value.result.return_value = []
 
         mock_embedder = MagicMock()
         mock_embedder.embed_texts.return_value = [[0.1] * 1536]
@@ -440,16 +445,14 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        # Either search_chunks (global, no sub_domain) or hybrid_search was called
-        # for the fallback — depending on whether query_terms were extracted
-        global_search_calls = [
-            c for c in mock_search.call_args_list if c.kwargs.get("sub_domain") is None
-        ]
-        assert len(global_search_calls) >= 1 or mock_hybrid.call_count >= 1
+        assert len(response.json()["sources"]) >= 1
+        # Fallback results are global, so the prompt carries no Focus Areas
+        gen_call = mock_generator.generate.call_args[0][0]
+        assert "## Focus Areas" not in gen_call.messages[0].content
 
-    @patch("api.routes.ask.search_chunks")
+    @patch("api.routes.ask.search_chunks_multi")
     def test_system_prompt_includes_focus_areas_for_domain_query(
-        self, mock_search: MagicMock
+        self, mock_multi: MagicMock
     ) -> None:
         """The system prompt should contain Focus Areas for sub-domain queries."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
@@ -466,7 +469,7 @@ class TestSubDomainRoutingInAsk:
             usage_output_tokens=20,
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
-        mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         client = TestClient(app)
         client.post(
@@ -512,11 +515,11 @@ class TestSubDomainRoutingInAsk:
         system_content = gen_call.messages[0].content
         assert "## Focus Areas" not in system_content
 
-    @patch("api.routes.ask.search_chunks")
-    def test_multi_domain_query_searches_multiple_sub_domains(self, mock_search: MagicMock) -> None:
+    @patch("api.routes.ask.search_chunks_multi")
+    def test_multi_domain_query_searches_multiple_sub_domains(self, mock_multi: MagicMock) -> None:
         """A query covering mixing + sound_design should search both sub-domains."""
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(6)]
-        client = self._setup_mocks(mock_search, chunks)
+        client = self._setup_mocks(mock_multi, (chunks, False))
 
         response = client.post(
             "/ask",
@@ -524,13 +527,9 @@ class TestSubDomainRoutingInAsk:
         )
 
         assert response.status_code == 200
-        sub_domains_searched = {
-            c.kwargs.get("sub_domain")
-            for c in mock_search.call_args_list
-            if c.kwargs.get("sub_domain") is not None
-        }
-        # At least one sub-domain was searched
-        assert len(sub_domains_searched) >= 1
+        # Every detected sub-domain goes to the one search_chunks_multi round trip
+        mock_multi.assert_called_once()
+        assert len(mock_multi.call_args.args[2]) >= 1
 
 
 # ---------------------------------------------------------------------------
@@ -567,7 +566,9 @@ class TestGenreRecipeInjectionInAsk:
         yield
         app.dependency_overrides.clear()
 
-    def _wire(self, mock_search: MagicMock, answer: str = "Answer [1].") -> TestClient:
+    def _wire(
+        self, mock_search: MagicMock, mock_multi: MagicMock, answer: str = "Answer [1]."
+    ) -> TestClient:
         chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(5)]
         mock_embedder = MagicMock()
         mock_embedder.embed_texts.return_value = [[0.1] * 1536]
@@ -582,10 +583,14 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
         return TestClient(app)
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_organic_house_query_injects_genre_reference(self, mock_search: MagicMock) -> None:
+    def test_organic_house_query_injects_genre_reference(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """An organic house query should inject ## Genre Reference into system prompt."""
         from unittest.mock import patch as _patch
 
@@ -603,6 +608,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         with _patch("api.routes.ask.load_recipe", return_value="BPM: 124. Key: A minor."):
             client = TestClient(app)
@@ -612,8 +618,11 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert "## Genre Reference" in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_genre_recipe_content_in_system_prompt(self, mock_search: MagicMock) -> None:
+    def test_genre_recipe_content_in_system_prompt(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """The recipe text should appear verbatim in the system prompt."""
         from unittest.mock import patch as _patch
 
@@ -631,6 +640,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         recipe_text = "BPM: 124. Typical keys: A minor."
         with _patch("api.routes.ask.load_recipe", return_value=recipe_text):
@@ -641,10 +651,13 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert recipe_text in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_no_genre_query_no_genre_reference(self, mock_search: MagicMock) -> None:
+    def test_no_genre_query_no_genre_reference(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """A generic query should NOT inject ## Genre Reference."""
-        client = self._wire(mock_search)
+        client = self._wire(mock_search, mock_multi)
         client.post("/ask", json={"query": "how do I use reverb?"})
 
         mock_generator = app.dependency_overrides[get_generation_provider]()
@@ -652,8 +665,11 @@ class TestGenreRecipeInjectionInAsk:
         system_content = gen_call.messages[0].content
         assert "## Genre Reference" not in system_content
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.search_chunks")
-    def test_recipe_load_failure_does_not_crash(self, mock_search: MagicMock) -> None:
+    def test_recipe_load_failure_does_not_crash(
+        self, mock_search: MagicMock, mock_multi: MagicMock
+    ) -> None:
         """If load_recipe returns None (file missing), /ask still returns 200."""
         from unittest.mock import patch as _patch
 
@@ -671,6 +687,7 @@ class TestGenreRecipeInjectionInAsk:
         )
         app.dependency_overrides[get_generation_provider] = lambda: mock_generator
         mock_search.return_value = chunks
+        mock_multi.return_value = (chunks, False)
 
         with _patch("api.routes.ask.load_recipe", return_value=None):
             client = TestClient(app)
@@ -681,3 +698,816 @@ class TestGenreRecipeInjectionInAsk:
         gen_call = mock_generator.generate.call_args[0][0]
         system_content = gen_call.messages[0].content
         assert "## Genre Reference" not in system_content
+
+
+class TestSearchLegTimings:
+    """Per-leg hybrid search timings surface in UsageMetadata."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _ask(self, legs: dict[str, float], **body: object) -> dict:
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+
+        def _hybrid(*args, timings=None, **kwargs):  # type: ignore[no-untyped-def]
+            timings.update(legs)
+            return chunks
+
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", side_effect=_hybrid) as mock_hybrid,
+        ):
+            response = TestClient(app).post("/ask", json={"query": "How to EQ vocals?", **body})
+        assert mock_hybrid.call_args.kwargs["session_factory"] is not None
+        assert response.status_code == 200
+        self.hybrid_kwargs = mock_hybrid.call_args.kwargs
+        return response.json()
+
+    def test_leg_timings_in_usage(self) -> None:
+        data = self._ask({"vector_ms": 12.345, "keyword_ms": 8.0})
+        assert data["usage"]["search_legs_ms"] == {"vector_ms": 12.35, "keyword_ms": 8.0}
+        assert "keyword_search_timeout" not in data["warnings"]
+
+    def test_keyword_timeout_adds_warning(self) -> None:
+        data = self._ask({"vector_ms": 10.0, "keyword_ms": 250.0, "keyword_timeout_ms": 250.0})
+        assert data["usage"]["search_legs_ms"]["keyword_timeout_ms"] == 250.0
+        assert "keyword_search_timeout" in data["warnings"]
+
+    def test_profile_forwarded_to_hybrid_search(self) -> None:
+        self._ask({}, profile="exhaustive")
+        assert self.hybrid_kwargs["profile"] == "exhaustive"
+
+    def test_profile_defaults_to_none(self) -> None:
+        self._ask({})
+        assert self.hybrid_kwargs["profile"] is None
+
+    def test_unknown_profile_rejected(self) -> None:
+        response = TestClient(app).post("/ask", json={"query": "How to EQ vocals?", "profile": "x"})
+        assert response.status_code == 422
+
+
+class TestMultiDomainHybridFallback:
+    """The multi-sub-domain global fallback keeps hybrid_search's keyword leg."""
+
+    def _retrieve(self, used_fallback: bool) -> tuple[MagicMock, MagicMock, list]:
+        from api.routes.ask import _retrieve_candidates
+
+        vector = [(_make_chunk_record(text=f"v{i}"), 0.8) for i in range(3)]
+        keyword = [(_make_chunk_record(text="k"), 1.0)]
+        for i, (record, _) in enumerate(vector + keyword):
+            record.id = i + 1  # RRF fuses by id
+        factory = MagicMock()
+        with (
+            patch(
+                "api.routes.ask.search_chunks_multi", return_value=(vector, used_fallback)
+            ) as mock_multi,
+            patch("api.routes.ask.KeywordLeg") as mock_leg,
+            patch("api.routes.ask.search_chunks_keyword") as mock_sequential,
+        ):
+            mock_leg.return_value.result.return_value = keyword
+            results, _ = _retrieve_candidates(
+                MagicMock(),
+                [0.1] * 1536,
+                ["eq"],
+                ["mixing"],
+                top_k=5,
+                session_factory=factory,
+            )
+        mock_sequential.assert_not_called()
+        return mock_multi, mock_leg, results
+
+    def test_fallback_fuses_keyword_leg(self) -> None:
+        mock_multi, mock_leg, results = self._retrieve(used_fallback=True)
+        # Same candidate count per leg as hybrid_search: global_k (15) * 3
+        assert mock_multi.call_args.kwargs["global_k"] == 45
+        assert mock_leg.call_args.args[1:] == (["eq"], 45)
+        mock_leg.return_value.result.assert_called_once()
+        assert "k" in [record.text for record, _ in results]
+
+    def test_filtered_results_start_no_keyword_leg(self) -> None:
+        _, mock_leg, results = self._retrieve(used_fallback=False)
+        mock_leg.assert_not_called()  # no second connection, no FTS scan
+        assert len(results) == 3
+
+
+class TestMultiDomainSearchInAsk:
+    """``_retrieve_candidates`` over the real ``search_chunks_multi`` and a mocked session."""
+
+    @staticmethod
+    def _hit(record_id: int) -> ChunkHit:
+        return ChunkHit(
+            id=record_id,
+            doc_id="doc",
+            source_path=f"/data/doc_{record_id}.md",
+            source_name=f"doc_{record_id}.md",
+            chunk_index=0,
+            token_start=0,
+            token_end=100,
+            text=f"chunk {record_id}",
+            page_number=None,
+            sub_domain="mixing",
+        )
+
+    def _row(self, record_id: int, distance: float, is_fallback: bool) -> tuple:
+        return _HitRow(*self._hit(record_id), distance, is_fallback)
+
+    def _retrieve(self, rows: list, keyword: list) -> tuple[MagicMock, MagicMock, list, list]:
+        from sqlalchemy.orm import Session
+
+        from api.routes.ask import _retrieve_candidates
+
+        session = MagicMock(spec=Session)
+        session.execute.return_value.all.return_value = rows
+        with patch("api.routes.ask.KeywordLeg") as mock_leg:
+            mock_leg.return_value.result.return_value = keyword
+            results, sub_domains = _retrieve_candidates(
+                session,
+                [0.1] * 1536,
+                ["eq"],
+                ["mixing", "sound_design"],
+                top_k=5,
+                session_factory=MagicMock(),
+            )
+        return session, mock_leg, results, sub_domains
+
+    def test_scoped_hits_keep_sub_domains(self) -> None:
+        rows = [self._row(i, 0.1 * i, False) for i in (1, 2, 3)]
+        session, mock_leg, results, sub_domains = self._retrieve(rows, [])
+        statements = [str(c.args[0]) for c in session.execute.call_args_list]
+        assert sum("UNION ALL" in sql for sql in statements) == 1  # one round trip
+        mock_leg.assert_not_called()
+        assert [hit.id for hit, _ in results] == [1, 2, 3]
+        assert results[0][1] == pytest.approx(0.9)
+        assert sub_domains == ["mixing", "sound_design"]
+
+    def test_thin_scoped_hits_fall_back_to_fused_global_results(self) -> None:
+        rows = [self._row(1, 0.1, False), self._row(7, 0.2, True), self._row(8, 0.3, True)]
+        _, mock_leg, results, sub_domains = self._retrieve(rows, [(self._hit(9), 1.0)])
+        mock_leg.assert_called_once()
+        assert {hit.id for hit, _ in results} == {7, 8, 9}
+        assert sub_domains == []
+
+
+class TestRetrievalCacheInAsk:
+    """A repeated question reuses the cached retrieval instead of searching again."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _ask_twice(self, *bodies: dict) -> tuple[MagicMock, list[dict]]:
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks) as mock_hybrid,
+        ):
+            client = TestClient(app)
+            responses = [client.post("/ask", json=body) for body in bodies]
+        assert all(r.status_code == 200 for r in responses)
+        return mock_hybrid, [r.json() for r in responses]
+
+    def test_second_request_skips_search(self) -> None:
+        body = {"query": "How to EQ vocals?", "use_tools": False}
+        mock_hybrid, (first, second) = self._ask_twice(body, body)
+        assert mock_hybrid.call_count == 1
+        assert first["usage"]["retrieval_cache_hit"] is False
+        assert second["usage"]["retrieval_cache_hit"] is True
+        assert second["sources"] == first["sources"]
+
+    def test_profile_is_part_of_key(self) -> None:
+        body = {"query": "How to EQ vocals?", "use_tools": False}
+        mock_hybrid, _ = self._ask_twice(body, {**body, "profile": "exhaustive"})
+        assert mock_hybrid.call_count == 2
+
+
+class TestStageOverlapInAsk:
+    """Memory lookup and genre recipe run alongside search and are timed per stage."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        self.memory = MagicMock()
+        self.memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: self.memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _ask(self, search_delay: float = 0.0) -> dict:
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+
+        def _hybrid(*args, **kwargs):  # type: ignore[no-untyped-def]
+            time.sleep(search_delay)
+            return chunks
+
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", side_effect=_hybrid),
+        ):
+            response = TestClient(app).post(
+                "/ask", json={"query": "How to EQ vocals?", "use_tools": False}
+            )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_stage_timings_in_usage(self) -> None:
+        usage = self._ask()["usage"]
+        assert {"embedding", "search", "memory", "genre_recipe"} <= usage["stages_ms"].keys()
+        assert 0 < usage["pre_generation_ms"] <= usage["total_ms"]
+
+    def test_memory_lookup_overlaps_search(self) -> None:
+        def _slow_memories(**kwargs):  # type: ignore[no-untyped-def]
+            time.sleep(0.2)
+            return []
+
+        self.memory.search_relevant.side_effect = _slow_memories
+        usage = self._ask(search_delay=0.2)["usage"]
+        assert usage["stages_ms"]["memory"] >= 200
+        assert usage["stages_ms"]["search"] >= 200
+        assert usage["pre_generation_ms"] < 350  # sequential would be >= 400
+
+    def test_memory_failure_is_best_effort(self) -> None:
+        self.memory.search_relevant.side_effect = RuntimeError("sqlite locked")
+        data = self._ask()
+        assert data["mode"] == "rag"
+        assert "memory" in data["usage"]["stages_ms"]
+
+
+class TestSpeculativeEmbedding:
+    """The query embedding starts while tool routing runs."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        self.embedded = threading.Event()
+        self.embed_delay = 0.0
+
+        def _embed(texts: list[str]) -> list[list[float]]:
+            time.sleep(self.embed_delay)
+            self.embedded.set()
+            return [[0.1] * 1536 for _ in texts]
+
+        self.embedder = MagicMock()
+        self.embedder.embed_texts.side_effect = _embed
+        app.dependency_overrides[get_embedding_provider] = lambda: self.embedder
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _ask(self, tool_route: object) -> httpx.Response:
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        with (
+            patch("api.routes.ask._try_tool_route", side_effect=tool_route),
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks),
+        ):
+            return TestClient(app).post("/ask", json={"query": "How to EQ vocals?"})
+
+    def test_tool_miss_reuses_embedding_started_during_routing(self) -> None:
+        def _slow_miss(**kwargs):  # type: ignore[no-untyped-def]
+            time.sleep(0.2)
+
+        self.embed_delay = 0.2
+        response = self._ask(_slow_miss)
+        assert response.status_code == 200, response.text
+        usage = response.json()["usage"]
+        self.embedder.embed_texts.assert_called_once()
+        assert usage["stages_ms"]["tool_route"] >= 200
+        assert usage["embedding_ms"] >= 200
+        assert usage["pre_generation_ms"] < 350  # sequential would be >= 400
+
+    def test_tool_hit_still_embeds_for_the_cache(self) -> None:
+        response = self._ask(lambda **kwargs: _tool_answer())
+        assert response.status_code == 200
+        assert response.json()["mode"] == "tool"
+        assert self.embedded.wait(timeout=2)
+
+    def test_embedding_failure_ignored_on_tool_hit(self) -> None:
+        self.embedder.embed_texts.side_effect = RuntimeError("OpenAI down")
+        response = self._ask(lambda **kwargs: _tool_answer())
+        assert response.status_code == 200
+        assert response.json()["mode"] == "tool"
+
+    def test_embedding_failure_surfaces_on_tool_miss(self) -> None:
+        self.embedder.embed_texts.side_effect = RuntimeError("OpenAI down")
+        response = self._ask(lambda **kwargs: None)
+        assert response.status_code == 503
+        assert response.json()["detail"]["reason"] == "embedding_unavailable"
+
+
+class _DictRedis:
+    """The slice of the Redis client ResponseCache uses, backed by a dict."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    def get(self, key: str) -> str | None:
+        return self.data.get(key)
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self.data[key] = value
+
+    def set(self, key: str, value: str, nx: bool = False, px: int | None = None) -> bool | None:
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def eval(self, script: str, numkeys: int, key: str, owner: str, *args: object) -> int:
+        if self.data.get(key) != owner:
+            return 0
+        if not args:  # release; with a TTL argument it is an extend
+            del self.data[key]
+        return 1
+
+    def pipeline(self) -> "_DictRedis":
+        return self  # commands apply immediately; execute() is a no-op
+
+    def execute(self) -> list:
+        return []
+
+    def sadd(self, key: str, *members: str) -> None:
+        pass
+
+    def expire(self, key: str, ttl: int) -> None:
+        pass
+
+    def zadd(self, key: str, mapping: dict) -> None:
+        pass
+
+    def zremrangebyscore(self, key: str, low: object, high: object) -> None:
+        pass
+
+
+class TestSemanticCacheInAsk:
+    """A reworded question close to a cached one is answered from the cache."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        cache = ResponseCache.__new__(ResponseCache)
+        cache._client = _DictRedis()
+        cache._ttl = 86400
+        cache._semantic = SemanticQueryIndex(max_entries=16)
+        cache._semantic_threshold = 0.9
+        app.dependency_overrides[get_response_cache] = lambda: cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        self.embedder = MagicMock()
+        app.dependency_overrides[get_embedding_provider] = lambda: self.embedder
+        self.generator = MagicMock()
+        self.generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: self.generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _ask(self, query: str, embedding: list[float], **body) -> dict:  # type: ignore[no-untyped-def]
+        self.embedder.embed_texts.return_value = [embedding + [0.0] * (1536 - len(embedding))]
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks),
+        ):
+            response = TestClient(app).post(
+                "/ask", json={"query": query, "use_tools": False, **body}
+            )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_reworded_query_served_from_cache(self) -> None:
+        first = self._ask("How do I EQ vocals?", [1.0, 0.0])
+        second = self._ask("what EQ should I use on a vocal", [0.98, 0.1])
+        assert self.generator.generate.call_count == 1
+        assert first["usage"]["cache_hit"] is False
+        assert second["usage"]["cache_hit"] is True
+        assert second["usage"]["semantic_similarity"] > 0.9
+        assert second["query"] == "what EQ should I use on a vocal"
+        assert second["answer"] == first["answer"]
+
+    def test_semantic_hit_is_not_also_counted_as_a_miss(self) -> None:
+        with (
+            patch("api.routes.ask.record_cache_miss") as miss,
+            patch("api.routes.ask.record_cache_hit") as hit,
+        ):
+            self._ask("How do I EQ vocals?", [1.0, 0.0])
+            self._ask("what EQ should I use on a vocal", [0.98, 0.1])
+        assert (miss.call_count, hit.call_count) == (1, 1)
+
+    def test_dissimilar_query_generates(self) -> None:
+        self._ask("How do I EQ vocals?", [1.0, 0.0])
+        second = self._ask("How do I sidechain a kick?", [0.0, 1.0])
+        assert self.generator.generate.call_count == 2
+        assert second["usage"]["semantic_similarity"] is None
+
+    def test_different_top_k_does_not_match(self) -> None:
+        self._ask("How do I EQ vocals?", [1.0, 0.0])
+        self._ask("what EQ should I use on a vocal", [0.98, 0.1], top_k=3)
+        assert self.generator.generate.call_count == 2
+
+
+class TestSingleFlightInAsk:
+    """Identical concurrent questions share one pipeline run."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        self.cache = ResponseCache.__new__(ResponseCache)
+        self.cache._client = None
+        self.cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: self.cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        self.generator = MagicMock()
+
+        def _slow_generate(request):  # type: ignore[no-untyped-def]
+            time.sleep(0.2)
+            return GenerationResponse(
+                content="Cut at 300Hz [1].",
+                model="gpt-4o",
+                usage_input_tokens=100,
+                usage_output_tokens=20,
+            )
+
+        def _slow_stream(request):  # type: ignore[no-untyped-def]
+            for part in ("Cut at ", "300Hz [1]."):
+                time.sleep(0.1)
+                yield part
+
+        self.generator.generate.side_effect = _slow_generate
+        self.generator.generate_stream.side_effect = _slow_stream
+        app.dependency_overrides[get_generation_provider] = lambda: self.generator
+        yield
+        app.dependency_overrides.clear()
+
+    async def _post_concurrently(self, path: str, queries: list[str]) -> list[httpx.Response]:
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        transport = httpx.ASGITransport(app=app)
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks),
+        ):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(
+                    *(client.post(path, json={"query": q, "use_tools": False}) for q in queries)
+                )
+
+    async def test_identical_requests_generate_once(self) -> None:
+        responses = await self._post_concurrently("/ask", ["How to EQ vocals?"] * 3)
+        assert all(r.status_code == 200 for r in responses)
+        assert self.generator.generate.call_count == 1
+        usages = [r.json()["usage"] for r in responses]
+        assert sorted(u["coalesced"] for u in usages) == [False, True, True]
+        assert {r.json()["answer"] for r in responses} == {"Cut at 300Hz [1]."}
+
+    async def test_different_requests_do_not_coalesce(self) -> None:
+        responses = await self._post_concurrently("/ask", ["How to EQ vocals?", "How to EQ bass?"])
+        assert self.generator.generate.call_count == 2
+        assert not any(r.json()["usage"]["coalesced"] for r in responses)
+
+    async def test_identical_streams_share_one_generation(self) -> None:
+        responses = await self._post_concurrently("/ask/stream", ["How to EQ vocals?"] * 3)
+        assert self.generator.generate_stream.call_count == 1
+        assert len({r.text for r in responses}) == 1
+        assert '"type": "done"' in responses[0].text
+
+    def test_waits_for_another_workers_answer(self) -> None:
+        cached = {
+            "query": "How to EQ vocals?",
+            "answer": "From the other worker [1].",
+            "sources": [],
+            "citations": [1],
+            "usage": UsageMetadata(
+                input_tokens=1,
+                output_tokens=1,
+                total_tokens=2,
+                embedding_ms=1.0,
+                search_ms=1.0,
+                generation_ms=1.0,
+                total_ms=3.0,
+                model="gpt-4o",
+            ).model_dump(),
+        }
+        with (
+            patch("api.routes.ask.SINGLE_FLIGHT_DISTRIBUTED", True),
+            patch.object(self.cache, "claim_flight", return_value=False) as claim,
+            patch.object(self.cache, "wait_for_flight", return_value=cached),
+        ):
+            response = TestClient(app).post(
+                "/ask", json={"query": "How to EQ vocals?", "use_tools": False}
+            )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["answer"] == "From the other worker [1]."
+        assert data["usage"]["coalesced"] is True
+        assert data["usage"]["cache_hit"] is True
+        assert claim.call_args[0][0] == ResponseCache.make_key(
+            "How to EQ vocals?", top_k=5, threshold=0.7
+        )
+        self.generator.generate.assert_not_called()
+
+
+class TestStaleWhileRevalidate:
+    """A cached answer past its soft TTL is served, then refreshed in the background."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        self.cache = ResponseCache.__new__(ResponseCache)
+        self.cache._client = _DictRedis()
+        self.cache._ttl = 86400
+        self.cache._soft_ttl = 3600
+        app.dependency_overrides[get_response_cache] = lambda: self.cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        self.memory = MagicMock()
+        self.memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: self.memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        self.generator = MagicMock()
+        self.answers = iter(["Cut at 300Hz [1].", "Cut at 250Hz [1].", "Cut at 200Hz [1]."])
+        self.gate = threading.Event()
+        self.gate.set()
+
+        def _generate(request):  # type: ignore[no-untyped-def]
+            self.gate.wait(5)
+            return GenerationResponse(
+                content=next(self.answers),
+                model="gpt-4o",
+                usage_input_tokens=100,
+                usage_output_tokens=20,
+            )
+
+        self.generator.generate.side_effect = _generate
+        app.dependency_overrides[get_generation_provider] = lambda: self.generator
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks),
+            patch("api.routes.ask._extract_and_store_memories") as self.extract,
+        ):
+            yield
+        app.dependency_overrides.clear()
+
+    def _ask(self) -> dict:
+        response = TestClient(app).post(
+            "/ask", json={"query": "How to EQ vocals?", "use_tools": False}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def _wait_for_generations(self, n: int) -> None:
+        deadline = time.monotonic() + 5
+        while self.generator.generate.call_count < n and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)  # let the refresh write the cache
+
+    def test_fresh_entry_is_not_stale(self) -> None:
+        self._ask()
+        usage = self._ask()["usage"]
+        assert usage["cache_hit"] is True
+        assert usage["stale"] is False
+        assert self.generator.generate.call_count == 1
+
+    def test_stale_entry_served_then_refreshed(self) -> None:
+        first = self._ask()
+        self.cache._soft_ttl = 1e-6
+        stale = self._ask()
+        assert stale["answer"] == first["answer"]
+        assert stale["usage"]["cache_hit"] is True
+        assert stale["usage"]["stale"] is True
+
+        self._wait_for_generations(2)
+        self.cache._soft_ttl = 3600
+        refreshed = self._ask()
+        assert refreshed["answer"] == "Cut at 250Hz [1]."
+        assert refreshed["usage"]["stale"] is False
+        self.extract.assert_called_once()  # the refresh is not a conversation turn
+
+    def test_one_refresh_per_entry(self) -> None:
+        self._ask()
+        self.cache._soft_ttl = 1e-6
+        self.gate.clear()  # hold the refresh in flight
+        for _ in range(3):
+            assert self._ask()["usage"]["stale"] is True
+        self.gate.set()
+        self._wait_for_generations(2)
+        assert self.generator.generate.call_count == 2
+
+    def test_refresh_extends_its_flight_lock_until_done(self) -> None:
+        self._ask()
+        self.cache._soft_ttl = 1e-6
+        self.gate.clear()  # a refresh that outlives the lock's TTL
+        with (
+            patch("api.routes.ask.SINGLE_FLIGHT_WAIT_SECONDS", 0.03),
+            patch.object(self.cache, "extend_flight", wraps=self.cache.extend_flight) as extend,
+        ):
+            self._ask()
+            time.sleep(0.15)
+            assert extend.call_count >= 2
+            assert extend.call_args[0][1] == 0.03
+            self.gate.set()
+            self._wait_for_generations(2)
+            extends = extend.call_count
+            time.sleep(0.05)
+            assert extend.call_count == extends  # the lease stopped with the refresh
+        assert not any(k.startswith("mip:flight:") for k in self.cache._client.data)
+
+    def test_refresh_is_not_counted_as_a_cache_miss(self) -> None:
+        with patch("api.routes.ask.record_cache_miss") as miss:
+            self._ask()
+            self.cache._soft_ttl = 1e-6
+            self._ask()
+            self._wait_for_generations(2)
+        assert miss.call_count == 1  # the first request only
+
+
+class TestQueryLogInAsk:
+    """Pure-RAG questions are counted for cache warming; warm-up replays are not."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = GenerationResponse(
+            content="Cut at 300Hz [1].",
+            model="gpt-4o",
+            usage_input_tokens=100,
+            usage_output_tokens=20,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+        chunks = [(_make_chunk_record(text=f"chunk {i}"), 0.85) for i in range(3)]
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks),
+            patch("api.routes.ask._try_tool_route", return_value=None),
+            patch.object(noop_cache, "record_query") as self.record_query,
+        ):
+            yield
+        app.dependency_overrides.clear()
+
+    def _ask(self, **body: object) -> None:
+        response = TestClient(app).post("/ask", json={"query": "How to EQ vocals?", **body})
+        assert response.status_code == 200, response.text
+
+    def test_rag_question_is_recorded(self) -> None:
+        self._ask(use_tools=False, top_k=3, profile="fast")
+        self.record_query.assert_called_once_with(
+            "How to EQ vocals?", top_k=3, threshold=0.7, profile="fast"
+        )
+
+    def test_warm_up_replay_is_not_recorded(self) -> None:
+        self._ask(use_tools=False, session_id=f"{WARM_SESSION_PREFIX}-0")
+        self.record_query.assert_not_called()
+
+    def test_tool_mode_request_is_not_recorded(self) -> None:
+        self._ask(use_tools=True)
+        self.record_query.assert_not_called()
+
+
+def _tool_answer() -> AskResponse:
+    return AskResponse(
+        query="How to EQ vocals?",
+        answer="Done.",
+        sources=[],
+        citations=[],
+        usage=UsageMetadata(
+            input_tokens=0,
+            output_tokens=0,
+            total_tokens=0,
+            embedding_ms=0.0,
+            search_ms=0.0,
+            generation_ms=0.0,
+            total_ms=0.0,
+            model="none",
+        ),
+        mode="tool",
+    )
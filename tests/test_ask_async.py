@@ -0,0 +1,275 @@
+"""
+Tests for the async /ask pipeline (api/routes/ask_async.py).
+
+The async router is mounted on its own app (``ASK_PIPELINE=async`` does the
+same in api/main.py).  Search runs through a fake ``AsyncSession`` whose
+``run_sync`` hands a mock sync session to the shared retrieval code, so the
+usual ``api.routes.ask`` search patches apply.
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from api.deps import (
+    get_async_db,
+    get_embedding_provider,
+    get_generation_provider,
+    get_memory_store,
+    get_rate_limiter,
+    get_response_cache,
+)
+from api.routes.ask import _sources_payload
+from api.routes.ask_async import router
+from core.generation.base import GenerationRequest, GenerationResponse
+from db.models import ChunkRecord
+from infrastructure.cache import ResponseCache
+from infrastructure.rate_limiter import RateLimiter
+
+app = FastAPI()
+app.include_router(router)
+
+_RESPONSE = GenerationResponse(
+    content="Cut at 300Hz [1].", model="gpt-4o", usage_input_tokens=100, usage_output_tokens=20
+)
+
+
+def _chunks(n: int = 3, score: float = 0.85) -> list:
+    return [
+        (
+            ChunkRecord(
+                doc_id="test-doc",
+                source_path=f"/data/mixing_{i}.pdf",
+                source_name=f"mixing_{i}.pdf",
+                chunk_index=0,
+                text=f"chunk {i}",
+                token_start=0,
+                token_end=100,
+                embedding=[0.1] * 1536,
+                page_number=1,
+            ),
+            score,
+        )
+        for i in range(n)
+    ]
+
+
+class _FakeAsyncSession:
+    """``AsyncSession`` stand-in: ``run_sync`` calls through with a mock sync session."""
+
+    def __init__(self) -> None:
+        self.run_sync_calls = 0
+        self.closed = False
+
+    async def __aenter__(self) -> "_FakeAsyncSession":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.closed = True
+
+    async def run_sync(self, fn, *args, **kwargs):  # type: ignore[no-untyped-def]
+        self.run_sync_calls += 1
+        return fn(MagicMock(spec=Session), *args, **kwargs)
+
+
+class _AsyncEmbedder:
+    last_cache_hit = False
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        raise AssertionError("sync embed_texts called on the async pipeline")
+
+    async def aembed_texts(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.delay)
+        return [[0.1] * 1536 for _ in texts]
+
+
+class _AsyncGenerator:
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        raise AssertionError("sync generate called on the async pipeline")
+
+    def generate_stream(self, request: GenerationRequest):  # type: ignore[no-untyped-def]
+        raise AssertionError("sync generate_stream called on the async pipeline")
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM down")
+        return _RESPONSE
+
+    async def agenerate_stream(self, request: GenerationRequest):  # type: ignore[no-untyped-def]
+        for part in ("Cut at ", "300Hz [1]."):
+            yield part
+
+
+class TestAsyncAsk:
+    """POST /ask on the async pipeline."""
+
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self) -> None:
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        self.db = _FakeAsyncSession()
+        app.dependency_overrides[get_async_db] = lambda: self.db
+        self.stream_db = _FakeAsyncSession()
+        self.embedder = _AsyncEmbedder()
+        app.dependency_overrides[get_embedding_provider] = lambda: self.embedder
+        self.generator = _AsyncGenerator()
+        app.dependency_overrides[get_generation_provider] = lambda: self.generator
+        yield
+        app.dependency_overrides.clear()
+
+    def _post(self, path: str = "/ask", *, score: float = 0.85, **body) -> httpx.Response:  # type: ignore[no-untyped-def]
+        payload = {"query": "How to EQ vocals?", "use_tools": False, **body}
+        chunks = _chunks(score=score)
+        with (
+            patch("api.routes.ask_async.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=chunks) as self.mock_hybrid,
+            patch("api.routes.ask.search_chunks", return_value=chunks),
+            patch("api.routes.ask_async.AsyncSessionLocal", return_value=self.stream_db),
+        ):
+            return TestClient(app).post(path, json=payload)
+
+    def test_rag_answer_on_async_providers(self) -> None:
+        response = self._post()
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["mode"] == "rag"
+        assert data["answer"] == _RESPONSE.content
+        assert data["usage"]["model"] == "gpt-4o"
+        assert len(data["sources"]) == 3
+
+    def test_search_runs_on_async_session_without_second_connection(self) -> None:
+        self._post()
+        assert self.db.run_sync_calls == 1
+        assert self.mock_hybrid.call_args.kwargs["session_factory"] is None
+
+    def test_sync_only_providers_run_in_executor(self) -> None:
+        embedder = MagicMock(spec=["embed_texts", "last_cache_hit"])
+        embedder.embed_texts.return_value = [[0.1] * 1536]
+        embedder.last_cache_hit = False
+        generator = MagicMock(spec=["generate", "generate_stream"])
+        generator.generate.return_value = _RESPONSE
+        app.dependency_overrides[get_embedding_provider] = lambda: embedder
+        app.dependency_overrides[get_generation_provider] = lambda: generator
+        response = self._post()
+        assert response.status_code == 200, response.text
+        embedder.embed_texts.assert_called_once()
+        generator.generate.assert_called_once()
+
+    def test_generation_failure_degrades(self) -> None:
+        self.generator.fail = True
+        response = self._post()
+        assert response.status_code == 200
+        assert response.json()["mode"] == "degraded"
+
+    def test_search_failure_returns_503(self) -> None:
+        with patch("api.routes.ask_async._search_and_rerank", side_effect=RuntimeError("db down")):
+            response = self._post()
+        assert response.status_code == 503
+        assert response.json()["detail"]["reason"] == "search_unavailable"
+
+    def test_low_confidence_returns_422(self) -> None:
+        response = self._post(score=0.1)
+        assert response.status_code == 422
+        assert response.json()["detail"]["reason"] == "insufficient_knowledge"
+
+    def test_embedding_starts_alongside_tool_routing(self) -> None:
+        def _slow_miss(**kwargs):  # type: ignore[no-untyped-def]
+            time.sleep(0.2)
+
+        self.embedder.delay = 0.2
+        with patch("api.routes.ask_async._try_tool_route", side_effect=_slow_miss):
+            response = self._post(use_tools=True)
+        assert response.status_code == 200, response.text
+        usage = response.json()["usage"]
+        assert usage["stages_ms"]["tool_route"] >= 200
+        assert usage["pre_generation_ms"] < 350  # sequential would be >= 400
+
+    def test_stream_emits_async_chunks(self) -> None:
+        response = self._post("/ask/stream")
+        assert response.status_code == 200
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert [e["content"] for e in events if e["type"] == "chunk"] == [
+            "Cut at ",
+            "300Hz [1].",
+        ]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["citations"] == [1]
+
+    def test_stream_searches_on_its_own_session(self) -> None:
+        """The detached stream producer never touches the request's session."""
+        self._post("/ask/stream")
+        assert self.db.run_sync_calls == 0
+        assert self.stream_db.run_sync_calls == 1
+        assert self.stream_db.closed
+
+    def test_stream_sources_match_sync_route(self) -> None:
+        response = self._post("/ask/stream")
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        (sources,) = [e["sources"] for e in events if e["type"] == "sources"]
+        assert sources == _sources_payload(sources)
+        assert [set(src) for src in sources] == [
+            {"index", "source_name", "source_path", "page_number", "score"}
+        ] * 3
+        assert sorted(src["source_name"] for src in sources) == [
+            f"mixing_{i}.pdf" for i in range(3)
+        ]
+
+    @pytest.mark.load
+    async def test_concurrent_requests_overlap_on_one_loop(self) -> None:
+        """50 requests each waiting 2 x 50ms on providers finish far faster than serially."""
+        self.embedder.delay = 0.05
+        self.generator.delay = 0.05
+
+        transport = httpx.ASGITransport(app=app)
+        with (
+            patch("api.routes.ask_async.detect_sub_domains", return_value=MagicMock(active=[])),
+            patch("api.routes.ask.hybrid_search", return_value=_chunks()),
+        ):
+            t0 = time.perf_counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                responses = await asyncio.gather(
+                    *(
+                        client.post(
+                            "/ask", json={"query": f"How to EQ vocals {i}?", "use_tools": False}
+                        )
+                        for i in range(50)
+                    )
+                )
+            elapsed = time.perf_counter() - t0
+
+        assert all(r.status_code == 200 for r in responses)
+        assert elapsed < 50 * 0.1 / 2  # serial would take ~5s
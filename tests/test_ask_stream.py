@@ -141,12 +141,14 @@ class TestAskStream:
         assert response.status_code == 200
         assert "text/event-stream" in response.headers["content-type"]
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_stream_emits_correct_event_sequence(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         """Events must appear in order: steps → sources → chunks → done."""
         mock_embedder = MagicMock()
@@ -157,6 +159,7 @@ class TestAskStream:
         chunk = _make_chunk_record(text="Use a compressor with fast attack for pumping.")
         mock_search.return_value = [(chunk, 0.90)]
         mock_hybrid.return_value = [(chunk, 0.90)]
+        mock_multi.return_value = ([(chunk, 0.90)], False)
 
         mock_generator = MagicMock()
         mock_generator.generate_stream.return_value = iter(["Fast ", "attack ", "compressor."])
@@ -187,12 +190,14 @@ class TestAskStream:
         # At least one chunk
         assert "chunk" in event_types
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_stream_chunks_form_complete_answer(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         """Concatenated chunk content must equal the generated answer."""
         mock_embedder = MagicMock()
@@ -203,6 +208,7 @@ class TestAskStream:
         chunk = _make_chunk_record(text="Kick drum at 60Hz with fast attack.")
         mock_search.return_value = [(chunk, 0.88)]
         mock_hybrid.return_value = [(chunk, 0.88)]
+        mock_multi.return_value = ([(chunk, 0.88)], False)
 
         expected_answer = "Use 60Hz kick with short decay and fast attack."
         fragments = [
@@ -236,12 +242,14 @@ class TestAskStream:
         assembled = "".join(e["content"] for e in chunk_events)
         assert assembled == expected_answer
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_stream_sources_payload(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         """sources event must include source_name and score for each retrieved chunk."""
         mock_embedder = MagicMock()
@@ -256,6 +264,7 @@ class TestAskStream:
         )
         mock_search.return_value = [(chunk, 0.80)]
         mock_hybrid.return_value = [(chunk, 0.80)]
+        mock_multi.return_value = ([(chunk, 0.80)], False)
 
         mock_generator = MagicMock()
         mock_generator.generate_stream.return_value = iter(["Reverb tips."])
@@ -402,12 +411,14 @@ class TestAskStream:
         )
         assert response.status_code == 429
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_stream_generation_failure_emits_error_event(
         self,
         mock_search: MagicMock,
         mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
     ) -> None:
         """If generator.generate_stream raises mid-stream, error event is emitted."""
 
@@ -423,6 +434,7 @@ class TestAskStream:
         chunk = _make_chunk_record()
         mock_search.return_value = [(chunk, 0.80)]
         mock_hybrid.return_value = [(chunk, 0.80)]
+        mock_multi.return_value = ([(chunk, 0.80)], False)
 
         mock_generator = MagicMock()
         mock_generator.generate_stream.side_effect = _failing_stream
@@ -446,3 +458,96 @@ class TestAskStream:
         # At least one chunk was yielded before the failure
         chunk_events = [e for e in events if e["type"] == "chunk"]
         assert len(chunk_events) >= 1
+
+    # ------------------------------------------------------------------
+    # Retrieval cache
+    # ------------------------------------------------------------------
+
+    @patch("api.routes.ask.search_chunks_multi")
+    @patch("api.routes.ask.hybrid_search")
+    @patch("api.routes.ask.search_chunks")
+    def test_stream_reuses_cached_retrieval(
+        self,
+        mock_search: MagicMock,
+        mock_hybrid: MagicMock,
+        mock_multi: MagicMock,
+    ) -> None:
+        """A repeated question streams from the retrieval cache without searching."""
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        mock_embedder.last_cache_hit = False
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+
+        chunk = _make_chunk_record()
+        mock_search.return_value = [(chunk, 0.85)]
+        mock_hybrid.return_value = [(chunk, 0.85)]
+        mock_multi.return_value = ([(chunk, 0.85)], False)
+
+        mock_generator = MagicMock()
+        mock_generator.generate_stream.side_effect = lambda *_: iter(["Ratio ", "4:1."])
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+
+        client = TestClient(app)
+        done_events = []
+        search_calls = []
+        for _ in range(2):
+            with client.stream(
+                "POST",
+                "/ask/stream",
+                json={"query": "Explain compression ratios?", "use_tools": False},
+            ) as resp:
+                events = _parse_sse_events(resp.iter_lines())
+            done_events.append(next(e for e in events if e["type"] == "done"))
+            search_calls.append(
+                mock_search.call_count + mock_hybrid.call_count + mock_multi.call_count
+            )
+
+        assert search_calls[0] >= 1
+        assert search_calls[1] == search_calls[0]
+        assert done_events[0]["usage"]["retrieval_cache_hit"] is False
+        assert done_events[1]["usage"]["retrieval_cache_hit"] is True
+
+    # ------------------------------------------------------------------
+    # Session ownership
+    # ------------------------------------------------------------------
+
+    @patch("api.routes.ask.SessionLocal")
+    @patch("api.routes.ask.hybrid_search")
+    @patch("api.routes.ask.search_chunks")
+    def test_stream_searches_on_its_own_session(
+        self,
+        mock_search: MagicMock,
+        mock_hybrid: MagicMock,
+        mock_session_local: MagicMock,
+    ) -> None:
+        """The detached producer opens and closes its own session for the search."""
+        mock_embedder = MagicMock()
+        mock_embedder.embed_texts.return_value = [[0.1] * 1536]
+        mock_embedder.last_cache_hit = False
+        app.dependency_overrides[get_embedding_provider] = lambda: mock_embedder
+
+        chunk = _make_chunk_record()
+        mock_search.return_value = [(chunk, 0.85)]
+        mock_hybrid.return_value = [(chunk, 0.85)]
+
+        mock_generator = MagicMock()
+        mock_generator.generate_stream.return_value = iter(["Ratio ", "4:1."])
+        app.dependency_overrides[get_generation_provider] = lambda: mock_generator
+
+        client = TestClient(app)
+        with (
+            patch("api.routes.ask.detect_sub_domains", return_value=MagicMock(active=[])),
+            client.stream(
+                "POST",
+                "/ask/stream",
+                json={"query": "Explain compression ratios?", "use_tools": False},
+            ) as resp,
+        ):
+            events = _parse_sse_events(resp.iter_lines())
+
+        assert events[-1]["type"] == "done"
+        session = mock_session_local.return_value.__enter__.return_value
+        search_calls = mock_search.call_args_list + mock_hybrid.call_args_list
+        assert search_calls
+        assert all(c.args[0] is session for c in search_calls)
+        mock_session_local.return_value.__exit__.assert_called_once()
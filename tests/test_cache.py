@@ -1,8 +1,19 @@
-"""Tests for embedding cache with TTL and LRU eviction."""
+"""Tests for embedding cache with TTL and LRU eviction, and its shared second level."""
 
 import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
-from ingestion.cache import EmbeddingCache
+from ingestion.cache import (
+    EmbeddingCache,
+    RedisEmbeddingStore,
+    SQLiteEmbeddingStore,
+    TieredEmbeddingCache,
+    create_embedding_store,
+    embedding_key,
+)
+from ingestion.embeddings import OpenAIEmbeddingProvider
 
 
 class TestEmbeddingCache:
@@ -143,3 +154,116 @@ class TestEmbeddingCache:
         assert cache.get("Query") == [0.1]
         assert cache.get("query") == [0.2]
         assert cache.size() == 2
+
+
+class TestTieredEmbeddingCache:
+    """In-process LRU in front of a shared store."""
+
+    def _tiered(self, tmp_path: Path, model: str = "m") -> TieredEmbeddingCache:
+        store = SQLiteEmbeddingStore(tmp_path / "emb.db")
+        return TieredEmbeddingCache(model, EmbeddingCache(max_size=10), store)
+
+    def test_store_survives_a_new_process(self, tmp_path: Path) -> None:
+        """A fresh local level (new worker / re-run) reads vectors back from the store."""
+        self._tiered(tmp_path).put_many(["a", "b"], [[0.5, 0.25], [1.0, 2.0]])
+        fresh = self._tiered(tmp_path)
+        assert fresh.get_many(["b", "x", "a"]) == [[1.0, 2.0], None, [0.5, 0.25]]
+        assert fresh.local.size() == 2  # store hits promoted
+
+    def test_vectors_stored_as_float32(self, tmp_path: Path) -> None:
+        self._tiered(tmp_path).put_many(["a"], [[0.1, 0.2]])
+        (vec,) = self._tiered(tmp_path).get_many(["a"])
+        assert vec is not None
+        assert abs(vec[0] - 0.1) < 1e-7
+        raw = SQLiteEmbeddingStore(tmp_path / "emb.db").get_many([embedding_key("m", "a")])[0]
+        assert raw is not None and len(raw) == 2 * 4
+
+    def test_models_do_not_share_vectors(self, tmp_path: Path) -> None:
+        self._tiered(tmp_path, model="small").put_many(["a"], [[0.1]])
+        assert self._tiered(tmp_path, model="large").get_many(["a"]) == [None]
+
+    def test_local_only_without_store(self) -> None:
+        cache = TieredEmbeddingCache("m", EmbeddingCache(max_size=10))
+        cache.put_many(["a"], [[0.1]])
+        assert cache.get_many(["a", "b"]) == [[0.1], None]
+        assert cache.get_shared(["a"]) == [None]
+
+
+class TestRedisEmbeddingStore:
+    def test_one_mget_and_one_pipeline(self) -> None:
+        client = MagicMock()
+        client.mget.return_value = [b"\x00\x00\x80?", None]
+        store = RedisEmbeddingStore(client, ttl_seconds=60)
+        assert store.get_many(["k1", "k2"]) == [b"\x00\x00\x80?", None]
+        client.mget.assert_called_once_with(["mip:emb:k1", "mip:emb:k2"])
+        store.put_many({"k1": b"x", "k2": b"y"})
+        pipe = client.pipeline.return_value
+        assert pipe.set.call_count == 2
+        pipe.set.assert_any_call("mip:emb:k1", b"x", ex=60)
+        pipe.execute.assert_called_once()
+
+    def test_errors_read_as_misses(self) -> None:
+        client = MagicMock()
+        client.mget.side_effect = ConnectionError("Redis down")
+        client.pipeline.side_effect = ConnectionError("Redis down")
+        store = RedisEmbeddingStore(client)
+        assert store.get_many(["k1", "k2"]) == [None, None]
+        store.put_many({"k1": b"x"})  # must not raise
+
+    def test_factory(self, tmp_path: Path) -> None:
+        assert create_embedding_store("") is None
+        assert isinstance(create_embedding_store(str(tmp_path / "e.db")), SQLiteEmbeddingStore)
+        with patch("ingestion.cache.redis_lib") as mock_redis:
+            mock_redis.from_url.side_effect = ConnectionError("no redis")
+            assert create_embedding_store("redis://nowhere:6379/0") is None
+
+
+class TestProviderBatchCaching:
+    """OpenAIEmbeddingProvider sends only cache misses to the API."""
+
+    def _provider(self, tmp_path: Path) -> tuple[OpenAIEmbeddingProvider, MagicMock]:
+        provider = OpenAIEmbeddingProvider(
+            api_key="sk-test", cache_store=SQLiteEmbeddingStore(tmp_path / "emb.db")
+        )
+        create = MagicMock(
+            side_effect=lambda input, model: SimpleNamespace(  # noqa: A002
+                data=[
+                    SimpleNamespace(index=i, embedding=[float(len(t)), 1.0])
+                    for i, t in enumerate(input)
+                ]
+            )
+        )
+        provider._client = MagicMock()
+        provider._client.embeddings.create = create
+        return provider, create
+
+    def test_partial_batch_hit_sends_only_misses(self, tmp_path: Path) -> None:
+        provider, create = self._provider(tmp_path)
+        provider.embed_texts(["aa", "bbb"])
+        result = provider.embed_texts(["bbb", "c", "aa", "c"])
+        assert result == [[3.0, 1.0], [1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        assert create.call_args.kwargs["input"] == ["c"]
+        assert provider.last_cache_hit is False
+        provider.embed_texts(["c", "aa"])
+        assert create.call_count == 2
+        assert provider.last_cache_hit is True
+
+    def test_batch_reuses_shared_store_after_restart(self, tmp_path: Path) -> None:
+        first, _ = self._provider(tmp_path)
+        first.embed_texts(["aa", "bbb"])
+        second, create = self._provider(tmp_path)
+        assert second.embed_texts(["bbb", "aa"]) == [[3.0, 1.0], [2.0, 1.0]]
+        create.assert_not_called()
+
+    async def test_async_path_shares_the_cache(self, tmp_path: Path) -> None:
+        provider, create = self._provider(tmp_path)
+        provider.embed_texts(["aa"])
+        provider._async_client = MagicMock()
+
+        async def _acreate(input, model):  # noqa: A002
+            return create(input=input, model=model)
+
+        provider._async_client.embeddings.create = _acreate
+        result = await provider.aembed_texts(["aa", "dddd"])
+        assert result == [[2.0, 1.0], [4.0, 1.0]]
+        assert create.call_args.kwargs["input"] == ["dddd"]
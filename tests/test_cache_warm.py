@@ -0,0 +1,118 @@
+"""Tests for the cache warm-up job (infrastructure/cache_warm.py)."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import httpx
+
+from eval.dataset import GOLDEN_DATASET
+from infrastructure.cache import LoggedQuery, ResponseCache
+from infrastructure.cache_warm import (
+    WARM_SESSION_PREFIX,
+    WarmReport,
+    collect_queries,
+    warm,
+)
+
+
+class _FakeApi:
+    """``client.post`` stand-in: answers /ask, cached on the second request."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.payloads: list[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started: list[float] = []
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def post(self, path: str, json: dict) -> httpx.Response:
+        with self._lock:
+            self.payloads.append(json)
+            self.started.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            cached = json["query"] in self._seen
+            self._seen.add(json["query"])
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if json["query"] == "unknown":
+            return httpx.Response(422, json={"detail": {"reason": "insufficient_knowledge"}})
+        if json["query"] == "boom":
+            raise httpx.ConnectError("connection refused")
+        usage = {"cache_hit": cached, "embedding_cache_hit": cached, "retrieval_cache_hit": False}
+        return httpx.Response(200, json={"answer": "x", "usage": usage})
+
+
+def _queries(*texts: str) -> list[LoggedQuery]:
+    return [LoggedQuery(text, 5, 0.7) for text in texts]
+
+
+class TestCollectQueries:
+    def test_logged_queries_first_then_non_adversarial_golden(self) -> None:
+        cache = MagicMock(spec=ResponseCache)
+        cache.popular_queries.return_value = _queries("How to EQ vocals?")
+        queries = collect_queries(cache, limit=10, days=3)
+        cache.popular_queries.assert_called_once_with(10, 3)
+        assert queries[0].query == "How to EQ vocals?"
+        golden = [q for q in GOLDEN_DATASET if not q.adversarial]
+        assert [q.query for q in queries[1:]] == [q.question for q in golden]
+        assert {(q.top_k, q.threshold) for q in queries[1:]} == {(5, 0.7)}
+
+    def test_duplicates_by_cache_key_are_dropped(self) -> None:
+        cache = MagicMock(spec=ResponseCache)
+        cache.popular_queries.return_value = _queries("EQ vocals", "eq vocals ", "sidechain")
+        queries = collect_queries(cache, golden=False)
+        assert [q.query for q in queries] == ["EQ vocals", "sidechain"]
+
+    def test_profiles_of_one_query_are_kept_apart(self) -> None:
+        cache = MagicMock(spec=ResponseCache)
+        cache.popular_queries.return_value = [
+            LoggedQuery("EQ vocals", 5, 0.7),
+            LoggedQuery("EQ vocals", 5, 0.7, "exhaustive"),
+        ]
+        queries = collect_queries(cache, golden=False)
+        assert [q.profile for q in queries] == [None, "exhaustive"]
+
+
+class TestWarm:
+    def test_replays_as_pure_rag_with_warm_sessions(self) -> None:
+        api = _FakeApi()
+        warm(api, _queries("EQ vocals"), rate=0)  # type: ignore[arg-type]
+        payload = api.payloads[0]
+        assert payload["use_tools"] is False
+        assert (payload["top_k"], payload["confidence_threshold"]) == (5, 0.7)
+        assert payload["session_id"].startswith(WARM_SESSION_PREFIX)
+        assert payload["profile"] is None
+
+    def test_replays_the_logged_profile(self) -> None:
+        api = _FakeApi()
+        warm(api, [LoggedQuery("EQ vocals", 5, 0.7, "fast")], rate=0)  # type: ignore[arg-type]
+        assert api.payloads[0]["profile"] == "fast"
+
+    def test_report_counts_outcomes_and_hit_ratio(self) -> None:
+        api = _FakeApi()
+        queries = _queries("EQ vocals", "sidechain", "unknown", "boom")
+        warm(api, queries, concurrency=1, rate=0)  # type: ignore[arg-type]
+        report = warm(api, queries, concurrency=1, rate=0)  # type: ignore[arg-type]
+        assert (report.sent, report.answered, report.refused, report.failed) == (4, 2, 1, 1)
+        assert report.hit_ratio == 1.0
+        assert report.embedding_cache_hits == 2
+        assert "hit_ratio=1.00" in report.summary()
+
+    def test_concurrency_is_bounded(self) -> None:
+        api = _FakeApi(delay=0.05)
+        warm(api, _queries(*(f"q{i}" for i in range(12))), concurrency=3, rate=0)  # type: ignore[arg-type]
+        assert api.max_in_flight == 3
+
+    def test_rate_spaces_request_starts(self) -> None:
+        api = _FakeApi()
+        warm(api, _queries("a", "b", "c", "d"), concurrency=4, rate=20)  # type: ignore[arg-type]
+        starts = sorted(api.started)
+        assert starts[-1] - starts[0] >= 3 / 20 - 0.01
+
+    def test_empty_report_has_zero_hit_ratio(self) -> None:
+        assert WarmReport().hit_ratio == 0.0
@@ -151,6 +151,7 @@ def _setup(
         cache = MagicMock(spec=ResponseCache)
         cache.available = False
         cache.get.return_value = None
+        cache.get_similar.return_value = None
         cache.set.return_value = None
         cache.stats.return_value = {"available": False}
 
@@ -203,13 +204,14 @@ def _ask(
 
 
 def _search_patches(text: str = "EQ kick with high-pass at 80Hz."):
-    """Context manager patching both search_chunks and hybrid_search."""
+    """Context manager patching search_chunks, hybrid_search and search_chunks_multi."""
     from contextlib import ExitStack
 
     result = [_make_chunk_record(text=text)]
     stack = ExitStack()
     stack.enter_context(patch("api.routes.ask.search_chunks", return_value=result))
     stack.enter_context(patch("api.routes.ask.hybrid_search", return_value=result))
+    stack.enter_context(patch("api.routes.ask.search_chunks_multi", return_value=(result, False)))
     return stack
 
 
@@ -230,6 +232,7 @@ class TestPostgresFailure:
             with (
                 patch("api.routes.ask.search_chunks", side_effect=db_error),
                 patch("api.routes.ask.hybrid_search", side_effect=db_error),
+                patch("api.routes.ask.search_chunks_multi", side_effect=db_error),
             ):
                 resp = _ask(client)
 
@@ -246,6 +249,7 @@ class TestPostgresFailure:
             with (
                 patch("api.routes.ask.search_chunks", side_effect=Exception("DB timeout")),
                 patch("api.routes.ask.hybrid_search", side_effect=Exception("DB timeout")),
+                patch("api.routes.ask.search_chunks_multi", side_effect=Exception("DB timeout")),
             ):
                 resp = _ask(client)
 
@@ -261,6 +265,7 @@ class TestPostgresFailure:
             with (
                 patch("api.routes.ask.search_chunks", side_effect=Exception("crash")),
                 patch("api.routes.ask.hybrid_search", side_effect=Exception("crash")),
+                patch("api.routes.ask.search_chunks_multi", side_effect=Exception("crash")),
             ):
                 for _ in range(5):
                     resp = _ask(client)
@@ -276,6 +281,9 @@ class TestPostgresFailure:
             with (
                 patch("api.routes.ask.search_chunks", side_effect=RuntimeError("pgvector crash")),
                 patch("api.routes.ask.hybrid_search", side_effect=RuntimeError("pgvector crash")),
+                patch(
+                    "api.routes.ask.search_chunks_multi", side_effect=RuntimeError("pgvector crash")
+                ),
             ):
                 resp = _ask(client)
 
@@ -338,6 +346,7 @@ class TestLLMFailure:
             with (
                 patch("api.routes.ask.search_chunks", return_value=result),
                 patch("api.routes.ask.hybrid_search", return_value=result),
+                patch("api.routes.ask.search_chunks_multi", return_value=(result, False)),
             ):
                 resp = _ask(client, query="What LUFS for Spotify?")
 
@@ -470,6 +479,7 @@ class TestRedisFailure:
         no_redis_cache = MagicMock(spec=ResponseCache)
         no_redis_cache.available = False
         no_redis_cache.get.return_value = None
+        no_redis_cache.get_similar.return_value = None
         no_redis_cache.set.return_value = None
 
         client, _ = _setup(cache=no_redis_cache)
@@ -504,6 +514,7 @@ class TestRedisFailure:
         flaky_cache = MagicMock(spec=ResponseCache)
         flaky_cache.available = True
         flaky_cache.get.return_value = None  # cache miss
+        flaky_cache.get_similar.return_value = None
         flaky_cache.set.side_effect = ConnectionError("Redis write failed")
 
         client, _ = _setup(cache=flaky_cache)
@@ -549,6 +560,7 @@ class TestRedisFailure:
         no_cache = MagicMock(spec=ResponseCache)
         no_cache.available = False
         no_cache.get.return_value = None
+        no_cache.get_similar.return_value = None
         no_cache.set.return_value = None
 
         no_rl = MagicMock(spec=RateLimiter)
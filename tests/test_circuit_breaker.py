@@ -8,6 +8,7 @@ Covers:
 - reset() forces CLOSED
 - status() snapshot
 - success_threshold > 1 requires multiple successes
+- acall() shares state with call() for coroutine functions
 """
 
 from __future__ import annotations
@@ -350,3 +351,32 @@ class TestThreadSafety:
         assert len(results) == 50
         assert b.stats.successful_calls == 50
         assert b.stats.total_calls == 50
+
+
+# ---------------------------------------------------------------------------
+# Async calls
+# ---------------------------------------------------------------------------
+
+
+class TestAsyncCall:
+    async def test_acall_returns_awaited_result(self) -> None:
+        b = _make_breaker()
+
+        async def _ok(x: int) -> int:
+            return x * 2
+
+        assert await b.acall(_ok, 21) == 42
+        assert b.stats.successful_calls == 1
+
+    async def test_acall_failures_trip_shared_state(self) -> None:
+        b = _make_breaker(failure_threshold=2)
+
+        async def _boom() -> None:
+            raise RuntimeError("down")
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await b.acall(_boom)
+        assert b.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError):
+            b.call(_succeed)
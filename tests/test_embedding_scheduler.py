@@ -0,0 +1,187 @@
+"""
+Tests for the ingestion embedding scheduler.
+
+Budgets, adaptive concurrency and per-batch retry run against mocks;
+the end-to-end cases talk to ``scripts/stub_embedding_server.py`` over
+HTTP through a real ``OpenAIEmbeddingProvider``.
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from ingestion.embedding_scheduler import AdaptiveConcurrency, EmbeddingScheduler, TokenBucket
+from ingestion.embeddings import OpenAIEmbeddingProvider
+from scripts.stub_embedding_server import StubEmbeddingServer
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(headers=headers or {})
+
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+
+def _scheduler(embedder: object, **kwargs: object) -> EmbeddingScheduler:
+    options: dict = {"requests_per_minute": 0, "tokens_per_minute": 0, "base_seconds": 0.0}
+    options.update(kwargs)
+    return EmbeddingScheduler(embedder, **options)  # type: ignore[arg-type]
+
+
+class TestTokenBucket:
+    def test_burst_is_free_then_paced(self) -> None:
+        bucket = TokenBucket(60.0, burst_seconds=2.0)  # 1/s, capacity 2
+        with patch("ingestion.embedding_scheduler.time.sleep") as sleep:
+            assert bucket.acquire() == 0.0
+            assert bucket.acquire() == 0.0
+            assert bucket.acquire() == pytest.approx(1.0, abs=0.05)
+        sleep.assert_called_once()
+
+    def test_zero_rate_is_unlimited(self) -> None:
+        assert TokenBucket(0).acquire(1e9) == 0.0
+
+
+class TestAdaptiveConcurrency:
+    def test_throttle_halves_once_per_burst(self) -> None:
+        limit = AdaptiveConcurrency(8)
+        epochs = [limit.acquire() for _ in range(4)]
+        for epoch in epochs:
+            limit.release(epoch, throttled=True)
+        assert limit.limit == 4  # four 429s from one burst — one cut
+
+    def test_successes_grow_the_limit_back(self) -> None:
+        limit = AdaptiveConcurrency(4)
+        limit.release(limit.acquire(), throttled=True)
+        assert limit.limit == 2
+        for _ in range(2):
+            limit.release(limit.acquire())
+        assert limit.limit == 3
+
+    def test_never_below_minimum(self) -> None:
+        limit = AdaptiveConcurrency(2)
+        for _ in range(3):
+            limit.release(limit.acquire(), throttled=True)
+        assert limit.limit == 1
+
+
+class TestEmbed:
+    @pytest.mark.parametrize(
+        "error",
+        [
+            openai.APIConnectionError(request=_REQUEST),
+            openai.APITimeoutError(request=_REQUEST),
+            _HTTPError(408),
+            _HTTPError(409),
+            _HTTPError(502),
+        ],
+    )
+    def test_retries_transient_errors(self, error: Exception) -> None:
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = [error, [[0.1, 0.2]]]
+        with patch("ingestion.embedding_scheduler.time.sleep"):
+            assert _scheduler(embedder).embed(["hello"]) == [[0.1, 0.2]]
+        assert embedder.embed_texts.call_count == 2
+
+    @pytest.mark.parametrize("error", [_HTTPError(400), ValueError("bad input"), KeyError("x")])
+    def test_other_errors_are_not_retried(self, error: Exception) -> None:
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = error
+        with pytest.raises(RuntimeError, match="after 1 attempt"):
+            _scheduler(embedder).embed(["hello"])
+        assert embedder.embed_texts.call_count == 1
+
+    def test_raises_after_exhausting_retries(self) -> None:
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = _HTTPError(503)
+        with (
+            patch("ingestion.embedding_scheduler.time.sleep"),
+            pytest.raises(RuntimeError, match="after 3 attempt"),
+        ):
+            _scheduler(embedder, max_retries=2).embed(["hello"])
+
+    def test_honours_retry_after(self) -> None:
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = [_HTTPError(429, {"retry-after": "7"}), [[0.1]]]
+        with patch("ingestion.embedding_scheduler.time.sleep") as sleep:
+            scheduler = _scheduler(embedder, concurrency=4)
+            scheduler.embed(["hello"])
+        assert sleep.call_args.args[0] >= 7.0
+        assert scheduler.concurrency == 2
+
+
+class TestMap:
+    def test_yields_in_input_order_with_batches_in_flight(self) -> None:
+        in_flight = peak = 0
+        lock = threading.Lock()
+
+        def _embed(texts: list[str]) -> list[list[float]]:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02 if texts[0] == "0" else 0.005)  # first batch is slowest
+            with lock:
+                in_flight -= 1
+            return [[float(t)] for t in texts]
+
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = _embed
+        batches = [[str(i)] for i in range(12)]
+        results = list(_scheduler(embedder, concurrency=4).map(batches, lambda b: b))
+        assert [batch for batch, _ in results] == batches
+        assert [vectors for _, vectors in results] == [[[float(i)]] for i in range(12)]
+        assert peak > 1
+
+    def test_failed_batch_does_not_stall_the_others(self) -> None:
+        attempts: dict[str, int] = {}
+
+        def _embed(texts: list[str]) -> list[list[float]]:
+            attempts[texts[0]] = attempts.get(texts[0], 0) + 1
+            if texts[0] == "0" and attempts["0"] == 1:
+                time.sleep(0.05)
+                raise _HTTPError(500)
+            return [[0.0]]
+
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = _embed
+        scheduler = _scheduler(embedder, concurrency=2)
+        results = list(scheduler.map([[str(i)] for i in range(6)], lambda b: b))
+        assert len(results) == 6
+        assert attempts == {"0": 2, "1": 1, "2": 1, "3": 1, "4": 1, "5": 1}
+
+    def test_first_failure_raises(self) -> None:
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = _HTTPError(401)
+        with pytest.raises(RuntimeError, match="Embedding failed"):
+            list(_scheduler(embedder).map([["a"], ["b"]], lambda b: b))
+
+
+@pytest.mark.slow
+class TestAgainstStubServer:
+    @pytest.fixture
+    def server(self) -> Iterator[StubEmbeddingServer]:
+        server = StubEmbeddingServer(latency_ms=50, max_concurrent=4, retry_after=0.01).start()
+        yield server
+        server.stop()
+
+    def test_concurrent_batches_adapt_to_the_limit(self, server: StubEmbeddingServer) -> None:
+        provider = OpenAIEmbeddingProvider(
+            api_key="test", base_url=server.base_url, max_retries=0, cache_enabled=False
+        )
+        scheduler = _scheduler(provider, concurrency=8, base_seconds=0.01)
+        batches = [[f"text {i}-{j}" for j in range(4)] for i in range(40)]
+
+        results = list(scheduler.map(batches, lambda b: b))
+
+        assert [batch for batch, _ in results] == batches
+        assert results[0][1][0] == server.vector("text 0-0")
+        assert 1 < server.peak_in_flight <= 4
+        assert server.throttled > 0
@@ -1,7 +1,11 @@
 """Tests for infrastructure/ resilience layer.
 
 Covers:
-- ResponseCache: get/set/invalidate/flush, graceful Redis failure
+- ResponseCache: get/set/invalidate/flush, graceful Redis failure,
+  compact payloads, pipelined writes, registry-backed stats
+- LocalResponseCache: in-process L1, pub/sub invalidation across workers
+- RetrievalCache: embedding-keyed LRU/TTL, source invalidation
+- Semantic response cache: nearest cached query above a similarity threshold
 - RateLimiter: allow/deny, sliding window, graceful failure
 - retry decorator: backoff, max attempts, exception filtering
 - metrics: no-op when prometheus_client absent
@@ -9,11 +13,26 @@ Covers:
 
 from __future__ import annotations
 
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from infrastructure.cache import ResponseCache, _make_key, _tag_key
+from infrastructure.cache import (
+    _INVALIDATION_CHANNEL,
+    _RESP_REGISTRY,
+    _TAG_REGISTRY,
+    LocalResponseCache,
+    LoggedQuery,
+    ResponseCache,
+    RetrievalCache,
+    SemanticQueryIndex,
+    _decode_payload,
+    _embedding_digest,
+    _encode_payload,
+    _make_key,
+    _tag_key,
+)
 from infrastructure.rate_limiter import RateLimiter
 from infrastructure.retry import with_retry
 
@@ -42,6 +61,7 @@ def _make_mock_redis() -> MagicMock:
     client.expire.return_value = True
     client.pipeline.return_value.__enter__ = MagicMock(return_value=MagicMock())
     client.pipeline.return_value.__exit__ = MagicMock(return_value=False)
+    client.pipeline.return_value.execute.return_value = [0, 0, 0, 0]
     return client
 
 
@@ -74,6 +94,13 @@ class TestCacheKeyHelpers:
         k2 = _make_key("q", top_k=5, threshold=0.70)
         assert k1 != k2
 
+    def test_make_key_differs_on_profile(self) -> None:
+        default = _make_key("q", top_k=5, threshold=0.58)
+        assert default != _make_key("q", top_k=5, threshold=0.58, profile="exhaustive")
+        assert _make_key("q", top_k=5, threshold=0.58, profile="fast") != _make_key(
+            "q", top_k=5, threshold=0.58, profile="exhaustive"
+        )
+
     def test_tag_key_namespace(self) -> None:
         assert _tag_key("Bob_Katz.pdf").startswith("mip:tag:")
 
@@ -150,7 +177,7 @@ class TestResponseCacheWithRedis:
     def test_set_calls_setex(self) -> None:
         cache, mock_client = self._make_cache()
         cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
-        assert mock_client.setex.called
+        assert mock_client.pipeline.return_value.setex.called
 
     def test_set_registers_source_tags(self) -> None:
         cache, mock_client = self._make_cache()
@@ -161,8 +188,9 @@ class TestResponseCacheWithRedis:
             response={"answer": "x"},
             sources=["Bob_Katz.pdf"],
         )
-        mock_client.sadd.assert_called_once()
-        call_args = mock_client.sadd.call_args[0]
+        pipe = mock_client.pipeline.return_value
+        pipe.sadd.assert_called_once()
+        call_args = pipe.sadd.call_args[0]
         assert call_args[0] == _tag_key("Bob_Katz.pdf")
 
     def test_invalidate_source_deletes_tagged_keys(self) -> None:
@@ -186,10 +214,604 @@ class TestResponseCacheWithRedis:
 
     def test_set_error_does_not_raise(self) -> None:
         cache, mock_client = self._make_cache()
-        mock_client.setex.side_effect = ConnectionError("Redis down")
+        mock_client.pipeline.return_value.execute.side_effect = ConnectionError("Redis down")
         # Must not raise
         cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
 
+    def test_set_is_one_pipelined_round_trip(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.set(
+            "q", top_k=5, threshold=0.58, response={"answer": "x"}, sources=["a.pdf", "b.pdf"]
+        )
+        pipe = mock_client.pipeline.return_value
+        pipe.execute.assert_called_once()
+        assert pipe.sadd.call_count == 2
+        registries = {c.args[0] for c in pipe.zadd.call_args_list}
+        assert registries == {_RESP_REGISTRY, _TAG_REGISTRY}
+        mock_client.setex.assert_not_called()
+        mock_client.sadd.assert_not_called()
+
+    def test_stats_reads_registries_without_scanning(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.pipeline.return_value.execute.return_value = [0, 7, 1, 3]
+        stats = cache.stats()
+        assert (stats["response_keys"], stats["tag_keys"]) == (7, 3)
+        mock_client.scan_iter.assert_not_called()
+
+    def test_flush_deletes_registered_keys(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.zrange.side_effect = lambda name, *_: (
+            [b"mip:resp:a", b"mip:resp:b"] if name == _RESP_REGISTRY else [b"mip:tag:x.pdf"]
+        )
+        mock_client.delete.return_value = 3
+        assert cache.flush() == 3
+        mock_client.delete.assert_any_call(b"mip:resp:a", b"mip:resp:b", b"mip:tag:x.pdf")
+        mock_client.delete.assert_any_call(_RESP_REGISTRY, _TAG_REGISTRY)
+        mock_client.scan_iter.assert_not_called()
+
+
+class TestCachePayload:
+    def test_small_payload_stored_uncompressed(self) -> None:
+        payload, size = _encode_payload({"answer": "x"})
+        assert payload[:1] == b"\x00"
+        assert size == len(payload) - 1
+        assert _decode_payload(payload) == ({"answer": "x"}, size)
+
+    def test_large_payload_compressed_and_round_trips(self) -> None:
+        response = {"answer": "Cut around 300Hz. " * 200, "citations": [1, 2]}
+        payload, size = _encode_payload(response)
+        assert payload[:1] in (b"\x01", b"\x02")
+        assert len(payload) < size / 5
+        assert _decode_payload(payload) == (response, size)
+
+    def test_zlib_fallback_without_optional_packages(self) -> None:
+        response = {"answer": "x" * 2000}
+        with (
+            patch("infrastructure.cache.orjson", None),
+            patch("infrastructure.cache.zstandard", None),
+        ):
+            payload, _ = _encode_payload(response)
+            assert payload[:1] == b"\x01"
+            assert _decode_payload(payload)[0] == response
+
+    def test_legacy_json_entry_still_readable(self) -> None:
+        assert _decode_payload('{"answer": "x"}')[0] == {"answer": "x"}
+        assert _decode_payload(b'{"answer": "x"}')[0] == {"answer": "x"}
+
+    def test_zstd_entry_without_zstandard_raises(self) -> None:
+        with (
+            patch("infrastructure.cache.zstandard", None),
+            pytest.raises(ValueError, match="zstandard"),
+        ):
+            _decode_payload(b"\x02abc")
+
+
+# ---------------------------------------------------------------------------
+# Two-tier response cache — L1 + pub/sub invalidation
+# ---------------------------------------------------------------------------
+
+
+class TestLocalResponseCache:
+    def test_lru_bounded_by_bytes(self) -> None:
+        cache = LocalResponseCache(max_bytes=100)
+        cache.set("a", {"answer": "a"}, 40)
+        cache.set("b", {"answer": "b"}, 40)
+        cache.get("a")  # a is now most recent
+        cache.set("c", {"answer": "c"}, 40)
+        assert cache.get("b") is None
+        assert cache.get("a") == {"answer": "a"}
+        assert cache.stats()["bytes"] == 80
+
+    def test_oversized_entry_not_stored(self) -> None:
+        cache = LocalResponseCache(max_bytes=10)
+        cache.set("a", {"answer": "a"}, 11)
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_ttl_expiry(self) -> None:
+        cache = LocalResponseCache(max_bytes=100, ttl_seconds=10)
+        with patch("infrastructure.cache.time.time", return_value=1000.0):
+            cache.set("a", {"answer": "a"}, 10)
+        with patch("infrastructure.cache.time.time", return_value=1011.0):
+            assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_discard_and_clear(self) -> None:
+        cache = LocalResponseCache(max_bytes=100)
+        cache.set("a", {}, 10)
+        cache.set("b", {}, 10)
+        assert cache.discard(["a", "missing"]) == 1
+        assert cache.clear() == 1
+        assert cache.stats()["bytes"] == 0
+
+
+class TestResponseCacheTwoTier:
+    def _make_cache(self) -> tuple[ResponseCache, MagicMock]:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0")
+        return cache, mock_client
+
+    @staticmethod
+    def _message(**data: object) -> dict:
+        import json
+
+        return {"type": "message", "channel": _INVALIDATION_CHANNEL, "data": json.dumps(data)}
+
+    def test_subscribes_to_invalidation_channel(self) -> None:
+        _, mock_client = self._make_cache()
+        pubsub = mock_client.pubsub.return_value
+        assert _INVALIDATION_CHANNEL in pubsub.subscribe.call_args.kwargs
+        pubsub.run_in_thread.assert_called_once()
+
+    def test_publish_only_cache_runs_no_subscriber(self) -> None:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0", subscribe=False)
+        mock_client.pubsub.assert_not_called()
+        assert cache._local is None and cache._semantic is None
+        mock_client.smembers.return_value = {"mip:resp:k"}
+        cache.invalidate_source("Bob_Katz.pdf")
+        assert mock_client.publish.call_args.args[0] == _INVALIDATION_CHANNEL
+
+    def test_repeat_get_served_from_l1(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.get.return_value = '{"answer": "x"}'
+        assert cache.get("q", top_k=5, threshold=0.58) == {"answer": "x"}
+        assert cache.get("q", top_k=5, threshold=0.58) == {"answer": "x"}
+        assert mock_client.get.call_count == 1
+        assert cache.stats()["local"]["hits"] == 1
+
+    def test_set_fills_l1_with_a_copy(self) -> None:
+        cache, mock_client = self._make_cache()
+        response = {"answer": "x"}
+        cache.set("q", top_k=5, threshold=0.58, response=response)
+        response["answer"] = "mutated"
+        cached = cache.get("q", top_k=5, threshold=0.58)
+        assert cached == {"answer": "x", "_cached_at": pytest.approx(time.time(), abs=60)}
+        mock_client.get.assert_not_called()
+
+    def test_set_does_not_decode_its_own_payload(self) -> None:
+        cache, _ = self._make_cache()
+        with patch("infrastructure.cache._decode_payload") as decode:
+            cache.set("q", top_k=5, threshold=0.58, response={"answer": "x" * 2000})
+        decode.assert_not_called()
+        assert cache.get("q", top_k=5, threshold=0.58)["answer"] == "x" * 2000
+
+    def test_zstd_entry_is_a_miss_on_a_worker_without_zstandard(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.get.return_value = b"\x02abc"
+        with (
+            patch("infrastructure.cache.zstandard", None),
+            patch("infrastructure.cache.logger") as log,
+        ):
+            assert cache.get("q", top_k=5, threshold=0.58) is None
+        log.warning.assert_not_called()
+
+    def test_invalidate_source_evicts_l1_and_broadcasts(self) -> None:
+        import json
+
+        cache, mock_client = self._make_cache()
+        cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
+        key = _make_key("q", 5, 0.58)
+        mock_client.smembers.return_value = {key}
+        cache.invalidate_source("Bob_Katz.pdf")
+        assert cache.get("q", top_k=5, threshold=0.58) is None
+        channel, payload = mock_client.publish.call_args.args
+        assert channel == _INVALIDATION_CHANNEL
+        assert json.loads(payload)["keys"] == [key]
+        assert json.loads(payload)["source"] == "Bob_Katz.pdf"
+
+    def test_broadcast_from_another_worker_evicts_and_notifies(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
+        listener = MagicMock()
+        cache.add_invalidation_listener(listener)
+        key = _make_key("q", 5, 0.58)
+        cache._on_invalidation(self._message(origin="other", source="a.pdf", keys=[key]))
+        assert cache.get("q", top_k=5, threshold=0.58) is None
+        listener.assert_called_once_with("a.pdf")
+
+    def test_own_broadcast_is_ignored(self) -> None:
+        cache, _ = self._make_cache()
+        listener = MagicMock()
+        cache.add_invalidation_listener(listener)
+        cache._on_invalidation(self._message(origin=cache._instance_id, source="a.pdf", keys=[]))
+        listener.assert_not_called()
+
+    def test_flush_broadcast_clears_l1(self) -> None:
+        cache, _ = self._make_cache()
+        cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
+        cache._on_invalidation(self._message(origin="other", flush=True))
+        assert cache.stats()["local"]["entries"] == 0
+
+    def test_subscriber_error_clears_l1(self) -> None:
+        cache, _ = self._make_cache()
+        cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
+        with patch("infrastructure.cache.time.sleep"):
+            cache._on_subscriber_error(ConnectionError("gone"), MagicMock(), MagicMock())
+        assert cache.stats()["local"]["entries"] == 0
+
+    def test_l1_disabled_without_pubsub(self) -> None:
+        mock_client = _make_mock_redis()
+        mock_client.pubsub.side_effect = ConnectionError("no pubsub")
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0")
+        assert cache.available is True
+        assert "local" not in cache.stats()
+
+
+# ---------------------------------------------------------------------------
+# RetrievalCache
+# ---------------------------------------------------------------------------
+
+
+def _hits(*sources: str) -> list[tuple[MagicMock, float]]:
+    hits = []
+    for i, source in enumerate(sources):
+        chunk = MagicMock()
+        chunk.id = i
+        chunk.source_name = source
+        hits.append((chunk, 0.9 - i * 0.1))
+    return hits
+
+
+class TestRetrievalCache:
+    EMB = [0.1, 0.2, 0.3, 0.4]
+    PARAMS = {"scope": ("mixing",), "top_k": 5, "settings": ("ask", ("eq",))}
+
+    def test_miss_then_hit(self) -> None:
+        cache = RetrievalCache(max_entries=4)
+        assert cache.get(self.EMB, **self.PARAMS) is None
+        cache.set(self.EMB, results=_hits("a.pdf", "b.pdf"), sub_domains=["mixing"], **self.PARAMS)
+        entry = cache.get(self.EMB, **self.PARAMS)
+        assert entry is not None
+        assert entry.chunk_ids == [0, 1]
+        assert entry.sub_domains == ("mixing",)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_tolerates_float_noise_and_scale(self) -> None:
+        noisy = [x + 1e-5 for x in self.EMB]
+        assert _embedding_digest(noisy) == _embedding_digest(self.EMB)
+        assert _embedding_digest([x * 3 for x in self.EMB]) == _embedding_digest(self.EMB)
+        assert _embedding_digest([0.4, 0.3, 0.2, 0.1]) != _embedding_digest(self.EMB)
+
+    def test_key_covers_scope_top_k_and_settings(self) -> None:
+        base = RetrievalCache.make_key(self.EMB, **self.PARAMS)
+        assert base == RetrievalCache.make_key(self.EMB, **{**self.PARAMS, "scope": ["mixing"]})
+        assert base != RetrievalCache.make_key(self.EMB, **{**self.PARAMS, "scope": ()})
+        assert base != RetrievalCache.make_key(self.EMB, **{**self.PARAMS, "top_k": 6})
+        assert base != RetrievalCache.make_key(self.EMB, **{**self.PARAMS, "settings": ()})
+
+    def test_lru_eviction(self) -> None:
+        cache = RetrievalCache(max_entries=2)
+        for top_k in (1, 2):
+            cache.set(self.EMB, scope=(), top_k=top_k, results=_hits("a.pdf"))
+        cache.get(self.EMB, scope=(), top_k=1)  # 1 is now most recent
+        cache.set(self.EMB, scope=(), top_k=3, results=_hits("a.pdf"))
+        assert cache.get(self.EMB, scope=(), top_k=2) is None
+        assert cache.get(self.EMB, scope=(), top_k=1) is not None
+        assert cache.stats()["entries"] == 2
+
+    def test_ttl_expiry(self) -> None:
+        cache = RetrievalCache(max_entries=4, ttl_seconds=10)
+        with patch("infrastructure.cache.time.time", return_value=1000.0):
+            cache.set(self.EMB, results=_hits("a.pdf"), **self.PARAMS)
+        with patch("infrastructure.cache.time.time", return_value=1011.0):
+            assert cache.get(self.EMB, **self.PARAMS) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_invalidate_source(self) -> None:
+        cache = RetrievalCache(max_entries=4)
+        cache.set(self.EMB, scope=(), top_k=1, results=_hits("a.pdf", "b.pdf"))
+        cache.set(self.EMB, scope=(), top_k=2, results=_hits("c.pdf"))
+        assert cache.invalidate_source("b.pdf") == 1
+        assert cache.get(self.EMB, scope=(), top_k=1) is None
+        assert cache.get(self.EMB, scope=(), top_k=2) is not None
+        assert cache.invalidate_source("a.pdf") == 0
+
+    def test_disabled_when_size_zero(self) -> None:
+        cache = RetrievalCache(max_entries=0)
+        cache.set(self.EMB, results=_hits("a.pdf"), **self.PARAMS)
+        assert cache.get(self.EMB, **self.PARAMS) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_clear(self) -> None:
+        cache = RetrievalCache(max_entries=4)
+        cache.set(self.EMB, results=_hits("a.pdf"), **self.PARAMS)
+        assert cache.clear() == 1
+        assert cache.invalidate_source("a.pdf") == 0
+
+
+# ---------------------------------------------------------------------------
+# Semantic response cache
+# ---------------------------------------------------------------------------
+
+
+class TestSemanticQueryIndex:
+    def test_nearest_is_cosine_within_bucket(self) -> None:
+        index = SemanticQueryIndex(max_entries=8)
+        index.add("k1", "5|0.7", [1.0, 0.0])
+        index.add("k2", "5|0.7", [0.0, 2.0])
+        index.add("k3", "6|0.7", [1.0, 0.1])
+        key, sim = index.nearest("5|0.7", [3.0, 0.3])
+        assert key == "k1"
+        assert sim == pytest.approx(0.995, abs=1e-3)
+        assert index.nearest("7|0.7", [1.0, 0.0]) is None
+
+    def test_fifo_eviction_and_discard(self) -> None:
+        index = SemanticQueryIndex(max_entries=2)
+        index.add("k1", "b", [1.0, 0.0])
+        index.add("k2", "b", [0.0, 1.0])
+        index.add("k3", "b", [1.0, 1.0])
+        assert len(index) == 2
+        assert index.nearest("b", [1.0, 0.0])[0] == "k3"
+        index.discard("k3")
+        index.discard("k2")
+        assert index.nearest("b", [1.0, 0.0]) is None
+
+    def test_re_adding_a_key_replaces_its_vector(self) -> None:
+        index = SemanticQueryIndex(max_entries=4)
+        index.add("k1", "b", [1.0, 0.0])
+        index.add("k1", "b", [0.0, 1.0])
+        assert len(index) == 1
+        assert index.nearest("b", [0.0, 1.0]) == ("k1", pytest.approx(1.0))
+
+    def test_bucket_grows_and_removal_keeps_rows_aligned(self) -> None:
+        import numpy as np
+
+        index = SemanticQueryIndex(max_entries=1000)
+        vectors = {f"k{i}": [np.cos(i / 100), np.sin(i / 100)] for i in range(100)}
+        for key, vec in vectors.items():
+            index.add(key, "b", vec)
+        capacity = index._buckets["b"].matrix.shape[0]
+        assert 100 <= capacity < 200  # doubled, not grown per insert
+        for i in range(0, 100, 3):
+            index.discard(f"k{i}")
+        for i in range(100):
+            expected = None if i % 3 == 0 else f"k{i}"
+            match = index.nearest("b", vectors[f"k{i}"])
+            if expected is not None:
+                assert match == (expected, pytest.approx(1.0))
+            else:
+                assert match[0] != f"k{i}"
+        assert index._buckets["b"].matrix.shape[0] == capacity
+
+
+class TestResponseCacheSemantic:
+    EMB = [1.0, 0.0, 0.0]
+    PARAMS = {"top_k": 5, "threshold": 0.7, "scope": ["mixing"]}
+
+    def _make_cache(self) -> tuple[ResponseCache, MagicMock]:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0", semantic_threshold=0.9)
+        return cache, mock_client
+
+    def test_similar_query_hits_cached_response(self) -> None:
+        import json
+
+        cache, mock_client = self._make_cache()
+        cache.index_query("How do I EQ vocals?", self.EMB, **self.PARAMS)
+        mock_client.get.return_value = json.dumps({"answer": "Cut 300Hz."})
+        result = cache.get_similar([0.95, 0.1, 0.0], **self.PARAMS)
+        assert result is not None
+        response, similarity = result
+        assert response == {"answer": "Cut 300Hz."}
+        assert similarity > 0.9
+        mock_client.get.assert_called_once_with(
+            _make_key("How do I EQ vocals?", self.PARAMS["top_k"], self.PARAMS["threshold"])
+        )
+        assert cache.stats()["semantic"]["hit"] == 1
+
+    def test_below_threshold_counts_near_hit_or_miss(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.index_query("q", self.EMB, **self.PARAMS)
+        assert cache.get_similar([0.87, 0.49, 0.0], **self.PARAMS) is None  # cos ~0.87
+        assert cache.get_similar([0.0, 1.0, 0.0], **self.PARAMS) is None
+        stats = cache.stats()["semantic"]
+        assert (stats["hit"], stats["near_hit"], stats["miss"]) == (0, 1, 1)
+        mock_client.get.assert_not_called()
+
+    def test_parameters_and_scope_partition_the_index(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.get.return_value = "{}"
+        cache.index_query("q", self.EMB, **self.PARAMS)
+        assert cache.get_similar(self.EMB, **{**self.PARAMS, "top_k": 6}) is None
+        assert cache.get_similar(self.EMB, **{**self.PARAMS, "threshold": 0.5}) is None
+        assert cache.get_similar(self.EMB, **{**self.PARAMS, "scope": []}) is None
+        assert cache.get_similar(self.EMB, **self.PARAMS, profile="fast") is None
+        assert cache.get_similar(self.EMB, **self.PARAMS) is not None
+        mock_client.get.assert_called_once()
+
+    def test_expired_entry_is_dropped(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.index_query("q", self.EMB, **self.PARAMS)
+        mock_client.get.return_value = None
+        assert cache.get_similar(self.EMB, **self.PARAMS) is None
+        assert cache.stats()["semantic"]["entries"] == 0
+
+    def test_invalidate_source_drops_semantic_entries(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.index_query("q", self.EMB, **self.PARAMS)
+        mock_client.smembers.return_value = {_make_key("q", 5, 0.7)}
+        cache.invalidate_source("Bob_Katz.pdf")
+        assert cache.stats()["semantic"]["entries"] == 0
+
+    def test_disabled_without_redis_or_capacity(self) -> None:
+        assert _make_cache_no_redis().get_similar(self.EMB, **self.PARAMS) is None
+        cache, mock_client = self._make_cache()
+        cache._semantic = None
+        cache.index_query("q", self.EMB, **self.PARAMS)
+        assert cache.get_similar(self.EMB, **self.PARAMS) is None
+        mock_client.get.assert_not_called()
+
+
+class TestResponseCacheSoftTTL:
+    def _make_cache(self, soft_ttl: float = 60) -> tuple[ResponseCache, MagicMock]:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0", soft_ttl_seconds=soft_ttl)
+        return cache, mock_client
+
+    def test_set_stamps_write_time(self) -> None:
+        cache, _ = self._make_cache()
+        cache.set("q", top_k=5, threshold=0.58, response={"answer": "x"})
+        entry = cache.get("q", top_k=5, threshold=0.58)
+        assert entry["_cached_at"] == pytest.approx(time.time(), abs=60)
+        assert cache.is_stale(entry) is False
+
+    def test_entry_past_soft_ttl_is_stale(self) -> None:
+        cache, _ = self._make_cache()
+        assert cache.is_stale({"answer": "x", "_cached_at": time.time() - 61}) is True
+
+    def test_unstamped_entries_and_disabled_soft_ttl_are_never_stale(self) -> None:
+        cache, _ = self._make_cache()
+        assert cache.is_stale({"answer": "x"}) is False
+        cache, _ = self._make_cache(soft_ttl=0)
+        assert cache.is_stale({"answer": "x", "_cached_at": 0.0}) is False
+
+
+class TestQueryLog:
+    def _make_cache(self) -> tuple[ResponseCache, MagicMock]:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0")
+        return cache, mock_client
+
+    def test_record_counts_query_in_todays_log(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.record_query("  EQ vocals ", top_k=5, threshold=0.7)
+        pipe = mock_client.pipeline.return_value
+        key, amount, member = pipe.zincrby.call_args[0]
+        assert key == "mip:querylog:" + time.strftime("%Y%m%d", time.gmtime())
+        assert (amount, member) == (1, '["eq vocals", 5, 0.7]')
+        pipe.expire.assert_called_once()
+        pipe.zremrangebyrank.assert_called_once()
+        pipe.execute.assert_called_once()
+
+    def test_spellings_of_one_cache_key_share_a_member(self) -> None:
+        cache, mock_client = self._make_cache()
+        for query in ("EQ vocals", "eq  VOCALS", "\tEq vocals\n"):
+            cache.record_query(query, top_k=5, threshold=0.7)
+            assert ResponseCache.make_key(query, top_k=5, threshold=0.7) == ResponseCache.make_key(
+                "eq vocals", top_k=5, threshold=0.7
+            )
+        members = {c[0][2] for c in mock_client.pipeline.return_value.zincrby.call_args_list}
+        assert members == {'["eq vocals", 5, 0.7]'}
+
+    def test_profile_is_logged_only_when_set(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.record_query("EQ vocals", top_k=5, threshold=0.7, profile="exhaustive")
+        cache.record_query("EQ vocals", top_k=5, threshold=0.7, profile=None)
+        members = [c[0][2] for c in mock_client.pipeline.return_value.zincrby.call_args_list]
+        assert members == ['["eq vocals", 5, 0.7, "exhaustive"]', '["eq vocals", 5, 0.7]']
+
+    def test_popular_queries_sums_days_most_frequent_first(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.pipeline.return_value.execute.return_value = [
+            [(b'["EQ vocals", 5, 0.7]', 2.0)],
+            [(b'["sidechain", 5, 0.7]', 2.0), (b'["EQ vocals", 5, 0.7]', 1.0)],
+        ]
+        assert cache.popular_queries(limit=5, days=2) == [
+            LoggedQuery("EQ vocals", 5, 0.7, count=3),
+            LoggedQuery("sidechain", 5, 0.7, count=2),
+        ]
+        assert mock_client.pipeline.return_value.zrevrange.call_count == 2
+
+    def test_popular_queries_keeps_profiles_apart(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.pipeline.return_value.execute.return_value = [
+            [(b'["EQ vocals", 5, 0.7, "fast"]', 3.0), (b'["EQ vocals", 5, 0.7]', 1.0)],
+        ]
+        assert cache.popular_queries(limit=5, days=1) == [
+            LoggedQuery("EQ vocals", 5, 0.7, "fast", count=3),
+            LoggedQuery("EQ vocals", 5, 0.7, count=1),
+        ]
+
+    def test_no_redis_records_nothing_and_ranks_nothing(self) -> None:
+        cache = _make_cache_no_redis()
+        cache.record_query("q", top_k=5, threshold=0.7)
+        assert cache.popular_queries() == []
+
+
+class TestResponseCacheFlight:
+    KEY = ResponseCache.make_key("EQ vocals", top_k=5, threshold=0.58)
+
+    def _make_cache(self) -> tuple[ResponseCache, MagicMock]:
+        mock_client = _make_mock_redis()
+        with patch("infrastructure.cache.redis_lib") as mock_redis_mod:
+            mock_redis_mod.from_url.return_value = mock_client
+            cache = ResponseCache(redis_url="redis://localhost:6379/0", local_max_bytes=0)
+        return cache, mock_client
+
+    def test_make_key_matches_get(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.get("EQ vocals", top_k=5, threshold=0.58)
+        assert mock_client.get.call_args[0][0] == self.KEY
+
+    def test_claim_sets_expiring_lock_only_if_absent(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.set.return_value = True
+        assert cache.claim_flight(self.KEY, 30) is True
+        args, kwargs = mock_client.set.call_args
+        assert args[0].startswith("mip:flight:")
+        assert kwargs == {"nx": True, "px": 30_000}
+        mock_client.set.return_value = None
+        assert cache.claim_flight(self.KEY, 30) is False
+
+    def test_claim_succeeds_without_redis(self) -> None:
+        cache = _make_cache_no_redis()
+        assert cache.claim_flight(self.KEY, 30) is True
+        assert cache.wait_for_flight(self.KEY, 1) is None
+
+    def test_release_only_deletes_own_lock(self) -> None:
+        cache, mock_client = self._make_cache()
+        cache.release_flight(self.KEY)
+        args = mock_client.eval.call_args[0]
+        assert args[1:] == (
+            1,
+            "mip:flight:" + self.KEY.removeprefix("mip:resp:"),
+            cache._instance_id,
+        )
+
+    def test_extend_only_touches_own_lock(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.eval.return_value = 0
+        assert cache.extend_flight(self.KEY, 30) is False
+        args = mock_client.eval.call_args[0]
+        assert "pexpire" in args[0]
+        assert args[1:] == (
+            1,
+            "mip:flight:" + self.KEY.removeprefix("mip:resp:"),
+            cache._instance_id,
+            30_000,
+        )
+
+    def test_wait_returns_leaders_answer(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.get.side_effect = [None, None, b'{"answer": "x"}']
+        mock_client.exists.return_value = 1
+        assert cache.wait_for_flight(self.KEY, 5) == {"answer": "x"}
+
+    def test_wait_gives_up_when_lock_released_without_answer(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.exists.return_value = 0
+        assert cache.wait_for_flight(self.KEY, 5) is None
+        assert mock_client.get.call_count == 2
+
+    def test_wait_times_out(self) -> None:
+        cache, mock_client = self._make_cache()
+        mock_client.exists.return_value = 1
+        assert cache.wait_for_flight(self.KEY, 0.1) is None
+
 
 # ---------------------------------------------------------------------------
 # RateLimiter — no Redis
@@ -1,61 +1,30 @@
 """
 Tests for ingestion pipeline helper functions.
 
-Tests retry logic and quality gate without requiring database or OpenAI API.
+Tests the quality gate and the streaming pipeline without
+requiring database or OpenAI API.
 """
 
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from ingestion.ingest import MIN_CHUNK_TOKENS, _embed_with_retry, _extract_text
-from ingestion.loaders import LoadedDocument
-
-
-class TestEmbedWithRetry:
-    """Test exponential backoff retry for embedding calls."""
-
-    def test_succeeds_on_first_try(self) -> None:
-        embedder = MagicMock()
-        embedder.embed_texts.return_value = [[0.1, 0.2]]
-        result = _embed_with_retry(embedder, ["hello"], max_retries=3, base_seconds=0.0)
-        assert result == [[0.1, 0.2]]
-        assert embedder.embed_texts.call_count == 1
-
-    @patch("ingestion.ingest.time.sleep")
-    def test_retries_on_failure_then_succeeds(self, mock_sleep: MagicMock) -> None:
-        embedder = MagicMock()
-        embedder.embed_texts.side_effect = [
-            RuntimeError("rate limit"),
-            [[0.1, 0.2]],
-        ]
-        result = _embed_with_retry(embedder, ["hello"], max_retries=3, base_seconds=0.01)
-        assert result == [[0.1, 0.2]]
-        assert embedder.embed_texts.call_count == 2
-        mock_sleep.assert_called_once()
-
-    @patch("ingestion.ingest.time.sleep")
-    def test_raises_after_exhausting_retries(self, mock_sleep: MagicMock) -> None:
-        embedder = MagicMock()
-        embedder.embed_texts.side_effect = RuntimeError("always fails")
-        with pytest.raises(RuntimeError, match="Embedding failed after 2 attempts"):
-            _embed_with_retry(embedder, ["hello"], max_retries=2, base_seconds=0.01)
-        assert embedder.embed_texts.call_count == 2
-
-    @patch("ingestion.ingest.time.sleep")
-    def test_backoff_increases_exponentially(self, mock_sleep: MagicMock) -> None:
-        embedder = MagicMock()
-        embedder.embed_texts.side_effect = [
-            RuntimeError("fail 1"),
-            RuntimeError("fail 2"),
-            RuntimeError("fail 3"),
-        ]
-        with pytest.raises(RuntimeError):
-            _embed_with_retry(embedder, ["hello"], max_retries=3, base_seconds=1.0)
-
-        # Check sleep durations: 1*2^0=1.0, 1*2^1=2.0, 1*2^2=4.0
-        sleep_calls = [c.args[0] for c in mock_sleep.call_args_list]
-        assert sleep_calls == [1.0, 2.0, 4.0]
+from core.chunking import Chunk
+from ingestion.ingest import (
+    MIN_CHUNK_TOKENS,
+    _chunk_pdf_document,
+    _extract_text,
+    _pack_by_tokens,
+    _prefetch,
+    run_pipeline,
+)
+from ingestion.loaders import LoadedDocument, LoadedPage
+from ingestion.manifest import FileFingerprint, Manifest
 
 
 class TestExtractTextDispatcher:
@@ -73,6 +42,19 @@ class TestExtractTextDispatcher:
         assert result == "hello world"
 
 
+class TestChunkPdfDocument:
+    """PDF pages extracted by the loader are chunked without parsing the file again."""
+
+    @patch("ingestion.ingest.load_pdf_pages")
+    def test_uses_loaded_pages(self, mock_load: MagicMock) -> None:
+        pages = (LoadedPage(1, "First page text"), LoadedPage(3, "Third page text"))
+        doc = LoadedDocument(path="/data/book.pdf", name="book.pdf", content="", pages=pages)
+        with patch("ingestion.ingest.chunk_text", side_effect=_fake_chunks):
+            chunks = _chunk_pdf_document(doc)
+        mock_load.assert_not_called()
+        assert [(c.chunk_index, c.page_number) for c in chunks] == [(0, 1), (1, 3)]
+
+
 class TestMinChunkTokensConstant:
     """Verify the quality gate constant is sensible."""
 
@@ -82,3 +64,306 @@ class TestMinChunkTokensConstant:
     def test_min_chunk_tokens_is_reasonable(self) -> None:
         # Should be small enough to not drop real content
         assert MIN_CHUNK_TOKENS <= 50
+
+
+class TestPrefetch:
+    """A pipeline stage: a background producer at most ``depth`` items ahead."""
+
+    def test_yields_items_in_order(self) -> None:
+        assert list(_prefetch(iter(range(10)), depth=2)) == list(range(10))
+
+    def test_producer_stays_within_depth(self) -> None:
+        produced = 0
+
+        def items() -> Iterator[int]:
+            nonlocal produced
+            for i in range(100):
+                produced += 1
+                yield i
+
+        stage = _prefetch(items(), depth=2)
+        assert next(stage) == 0
+        time.sleep(0.1)
+        # one handed out, two buffered, one waiting for room
+        assert produced <= 4
+        stage.close()
+
+    def test_producer_error_reaches_consumer(self) -> None:
+        def items() -> Iterator[int]:
+            yield 1
+            raise RuntimeError("embedding failed")
+
+        stage = _prefetch(items(), depth=2)
+        assert next(stage) == 1
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            next(stage)
+
+    def test_close_stops_and_closes_producer(self) -> None:
+        closed = threading.Event()
+
+        def items() -> Iterator[int]:
+            try:
+                yield from range(100)
+            finally:
+                closed.set()
+
+        stage = _prefetch(items(), depth=1)
+        next(stage)
+        stage.close()
+        assert closed.is_set()
+
+
+def _fake_chunks(text: str, *, source_path: str) -> list[Chunk]:
+    """One 30-token chunk per line."""
+    return [
+        Chunk(
+            doc_id="doc",
+            source_path=source_path,
+            source_name=Path(source_path).name,
+            chunk_index=i,
+            text=line,
+            token_start=i * 30,
+            token_end=(i + 1) * 30,
+        )
+        for i, line in enumerate(text.splitlines())
+    ]
+
+
+def _sized_chunks(*tokens: int) -> list[Chunk]:
+    return [
+        Chunk(
+            doc_id="doc",
+            source_path="doc.txt",
+            source_name="doc.txt",
+            chunk_index=i,
+            text=f"c{i}",
+            token_start=0,
+            token_end=n,
+        )
+        for i, n in enumerate(tokens)
+    ]
+
+
+class TestPackByTokens:
+    """Batches are filled up to a token budget, not a fixed count."""
+
+    def test_packs_up_to_the_budget(self) -> None:
+        batches = list(_pack_by_tokens(_sized_chunks(40, 50, 10, 100, 30, 30), 100))
+        assert [[c.token_end for c in b] for b in batches] == [[40, 50, 10], [100], [30, 30]]
+
+    def test_oversized_chunk_gets_its_own_batch(self) -> None:
+        batches = list(_pack_by_tokens(_sized_chunks(20, 500, 20), 100))
+        assert [len(b) for b in batches] == [1, 1, 1]
+
+    def test_caps_inputs_per_request(self) -> None:
+        batches = list(_pack_by_tokens(_sized_chunks(*[1] * 5), 100, max_items=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+    def test_keeps_chunk_order(self) -> None:
+        chunks = _sized_chunks(*[30] * 7)
+        batches = list(_pack_by_tokens(chunks, 64))
+        assert [c for b in batches for c in b] == chunks
+
+
+class TestStreamingPipeline:
+    """Every embedded batch is persisted and committed as soon as it lands."""
+
+    @pytest.fixture(autouse=True)
+    def _patch_io(self, tmp_path: Path) -> Iterator[None]:
+        (tmp_path / "a.txt").write_text("\n".join(f"a{i}" for i in range(5)), encoding="utf-8")
+        (tmp_path / "b.txt").write_text("\n".join(f"b{i}" for i in range(3)), encoding="utf-8")
+        self.data_dir = str(tmp_path)
+        self.persisted: list[tuple[str, int]] = []
+        self.texts: dict[tuple[str, int], str] = {}
+        self.embedder = MagicMock()
+        self.embedder.embed_texts.side_effect = lambda texts: [[0.1] * 4 for _ in texts]
+
+        self.manifest: dict[str, FileFingerprint] = {}
+
+        def _upsert(session: object, records: list) -> int:
+            self.persisted += [(r.source_path, r.chunk_index) for r in records]
+            for r in records:
+                self.texts.setdefault((r.source_path, r.chunk_index), r.text)
+            return len(records)
+
+        def _drop(session: object, source_path: str) -> None:
+            self.persisted = [key for key in self.persisted if key[0] != source_path]
+            self.texts = {key: t for key, t in self.texts.items() if key[0] != source_path}
+
+        def _record(
+            session: object, source_path: str, fingerprint: FileFingerprint, chunks: object = None
+        ) -> None:
+            self.manifest[source_path] = fingerprint
+
+        with (
+            patch("ingestion.ingest.Base"),
+            patch("ingestion.ingest.SessionLocal"),
+            patch("ingestion.ingest.chunk_text", side_effect=_fake_chunks),
+            patch("ingestion.ingest.OpenAIEmbeddingProvider", return_value=self.embedder),
+            patch("ingestion.ingest._bulk_upsert", side_effect=_upsert) as self.upsert,
+            patch("ingestion.ingest._insert_records", side_effect=_upsert),
+            patch("ingestion.ingest._replace_document", side_effect=_drop),
+            patch("ingestion.ingest._invalidate_source") as self.invalidate,
+            patch("ingestion.ingest.record_file", side_effect=_record),
+            patch(
+                "ingestion.ingest.Manifest.load",
+                side_effect=lambda session: Manifest(self.manifest),
+            ),
+            patch(
+                "ingestion.ingest._get_stored_chunks",
+                side_effect=lambda session, path: {
+                    i: text for (p, i), text in self.texts.items() if p == path
+                },
+            ),
+        ):
+            yield
+
+    def test_each_batch_is_upserted_separately(self) -> None:
+        stats = run_pipeline(self.data_dir, batch_size=3, batch_tokens=None)
+        assert self.upsert.call_count == 3  # 8 chunks in batches of 3
+        assert [len(call.args[1]) for call in self.upsert.call_args_list] == [3, 3, 2]
+        assert (stats.documents, stats.chunks, stats.batches, stats.inserted) == (2, 8, 3, 8)
+        assert stats.requests == 3
+
+    def test_batches_are_packed_by_tokens(self) -> None:
+        stats = run_pipeline(self.data_dir, batch_tokens=100)  # 30-token chunks
+        assert [len(call.args[1]) for call in self.upsert.call_args_list] == [3, 3, 2]
+        assert (stats.batches, stats.inserted, stats.requests) == (3, 8, 3)
+
+    def test_failed_batch_keeps_earlier_batches_and_resumes(self) -> None:
+        def _flaky(texts: list[str]) -> list[list[float]]:
+            if "a3" in texts:  # the second batch
+                raise RuntimeError("API down")
+            return [[0.1] * 4 for _ in texts]
+
+        self.embedder.embed_texts.side_effect = _flaky
+        with (
+            patch("ingestion.embedding_scheduler.time.sleep"),
+            pytest.raises(RuntimeError, match="Embedding failed"),
+        ):
+            run_pipeline(self.data_dir, batch_size=3, batch_tokens=None)
+        assert len(self.persisted) == 3  # the first batch survived the crash
+
+        self.embedder.embed_texts.side_effect = lambda texts: [[0.1] * 4 for _ in texts]
+        stats = run_pipeline(self.data_dir, batch_size=3, batch_tokens=None)
+        assert stats.skipped_existing == 3
+        assert stats.inserted == 5
+        assert len(set(self.persisted)) == len(self.persisted) == 8
+        embedded = [t for call in self.embedder.embed_texts.call_args_list for t in call.args[0]]
+        assert embedded.count("a0") == 1  # committed chunks are not embedded again
+
+    def test_unchanged_files_are_skipped_before_loading(self) -> None:
+        run_pipeline(self.data_dir)
+        assert len(self.manifest) == 2  # every file recorded once complete
+
+        stats = run_pipeline(self.data_dir)
+        assert (stats.documents, stats.skipped_unchanged, stats.inserted) == (0, 2, 0)
+        assert self.embedder.embed_texts.call_count == 1
+
+    def test_touched_file_only_refreshes_its_manifest_row(self) -> None:
+        run_pipeline(self.data_dir)
+        path = Path(self.data_dir) / "a.txt"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        stats = run_pipeline(self.data_dir)
+        assert (stats.documents, stats.skipped_unchanged) == (0, 2)
+        assert self.manifest[str(path)].mtime_ns == stat.st_mtime_ns + 1_000_000_000
+
+    def test_changed_file_replaces_its_chunks_and_invalidates(self) -> None:
+        run_pipeline(self.data_dir)
+        path = Path(self.data_dir) / "a.txt"
+        path.write_text("x0\nx1", encoding="utf-8")
+
+        stats = run_pipeline(self.data_dir)
+        assert (stats.documents, stats.skipped_unchanged, stats.replaced) == (1, 1, 1)
+        assert sorted(k for k in self.persisted if k[0] == str(path)) == [
+            (str(path), 0),
+            (str(path), 1),
+        ]
+        embedded = [t for call in self.embedder.embed_texts.call_args_list for t in call.args[0]]
+        assert embedded[-2:] == ["x0", "x1"]  # not skipped as already stored
+        self.invalidate.assert_called_once_with(str(path))
+
+    def test_stored_chunks_of_another_version_are_replaced(self) -> None:
+        run_pipeline(self.data_dir)
+        self.manifest.clear()  # chunks stored before the manifest existed
+        path = Path(self.data_dir) / "a.txt"
+        path.write_text("a0\nx1", encoding="utf-8")
+
+        stats = run_pipeline(self.data_dir)
+        assert (stats.documents, stats.replaced) == (2, 1)
+        assert {i: t for (p, i), t in self.texts.items() if p == str(path)} == {0: "a0", 1: "x1"}
+        embedded = [t for call in self.embedder.embed_texts.call_args_list for t in call.args[0]]
+        assert embedded[-2:] == ["a0", "x1"]
+        self.invalidate.assert_called_once_with(str(path))
+
+    def test_stored_chunks_of_the_same_version_are_resumed(self) -> None:
+        run_pipeline(self.data_dir)
+        self.manifest.clear()
+
+        stats = run_pipeline(self.data_dir)
+        assert (stats.documents, stats.skipped_existing, stats.replaced) == (2, 8, 0)
+        assert self.embedder.embed_texts.call_count == 1
+        assert len(self.manifest) == 2
+        self.invalidate.assert_not_called()
+
+
+class _RecordingSession:
+    """A session that logs its statements and commits, in order, to a shared log."""
+
+    def __init__(self, log: list[tuple[int, str]]) -> None:
+        self._log = log
+
+    def __enter__(self) -> "_RecordingSession":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def execute(self, stmt: object) -> MagicMock:
+        self._log.append((id(self), f"{type(stmt).__name__.lower()} {stmt.table.name}"))  # type: ignore[attr-defined]
+        return MagicMock(rowcount=0)
+
+    def commit(self) -> None:
+        self._log.append((id(self), "commit"))
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TestAtomicReplace:
+    """A changed file's delete, inserts and manifest row commit together."""
+
+    def test_replacement_is_one_transaction(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_text("\n".join(f"a{i}" for i in range(5)), encoding="utf-8")
+        log: list[tuple[int, str]] = []
+        embedder = MagicMock()
+        embedder.embed_texts.side_effect = lambda texts: [[0.1] * 4 for _ in texts]
+        old = FileFingerprint(size=0, mtime_ns=0, content_hash="old")
+        with (
+            patch("ingestion.ingest.Base"),
+            patch("ingestion.ingest.SessionLocal", side_effect=lambda: _RecordingSession(log)),
+            patch("ingestion.ingest.chunk_text", side_effect=_fake_chunks),
+            patch("ingestion.ingest.OpenAIEmbeddingProvider", return_value=embedder),
+            patch("ingestion.ingest._invalidate_source"),
+            patch(
+                "ingestion.ingest.Manifest.load",
+                return_value=Manifest({str(tmp_path / "a.txt"): old}),
+            ),
+        ):
+            stats = run_pipeline(str(tmp_path), batch_size=2, batch_tokens=None)
+
+        assert stats.replaced == 1
+        deleting = {session for session, entry in log if entry == "delete chunk_records"}
+        assert len(deleting) == 1
+        session = deleting.pop()
+        assert [entry for s, entry in log if s == session] == [
+            "delete chunk_records",
+            *["insert chunk_records"] * 3,  # 5 chunks in batches of 2
+            "insert ingest_manifest",
+            "commit",
+        ]
@@ -0,0 +1,59 @@
+"""
+Tests for the ingestion manifest — classifying files without a database.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from ingestion.manifest import FileFingerprint, Manifest, hash_file
+
+
+def _fingerprint(path: Path) -> FileFingerprint:
+    stat = path.stat()
+    return FileFingerprint(stat.st_size, stat.st_mtime_ns, hash_file(path))
+
+
+class TestHashFile:
+    def test_sha256_of_content(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"x" * 3_000_000)  # several read blocks
+        assert hash_file(path) == hashlib.sha256(b"x" * 3_000_000).hexdigest()
+
+
+class TestClassify:
+    def test_unknown_file_is_new(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        status, fingerprint = Manifest().classify(path)
+        assert status == "new"
+        assert fingerprint == _fingerprint(path)
+
+    def test_same_stat_is_unchanged_without_reading(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        manifest = Manifest({str(path): _fingerprint(path)})
+        with patch("ingestion.manifest.hash_file") as hashed:
+            status, _ = manifest.classify(path)
+        assert status == "unchanged"
+        hashed.assert_not_called()
+
+    def test_new_mtime_same_content_is_touched(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        manifest = Manifest({str(path): _fingerprint(path)})
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        status, fingerprint = manifest.classify(path)
+        assert status == "touched"
+        assert fingerprint.mtime_ns == stat.st_mtime_ns + 1_000_000_000
+
+    def test_new_content_is_changed(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        manifest = Manifest({str(path): _fingerprint(path)})
+        path.write_text("hello, world", encoding="utf-8")
+        status, fingerprint = manifest.classify(path)
+        assert status == "changed"
+        assert fingerprint == _fingerprint(path)
@@ -145,10 +145,12 @@ class _InMemoryCache(ResponseCache):
     def available(self) -> bool:
         return True
 
-    def get(self, query: str, *, top_k: int, threshold: float) -> dict | None:
+    def get(
+        self, query: str, *, top_k: int, threshold: float, profile: str | None = None
+    ) -> dict | None:
         from infrastructure.cache import _make_key
 
-        key = _make_key(query, top_k, threshold)
+        key = _make_key(query, top_k, threshold, profile)
         return self._store.get(key)
 
     def set(
@@ -159,10 +161,11 @@ class _InMemoryCache(ResponseCache):
         threshold: float,
         response: dict,
         sources: list[str] | None = None,
+        profile: str | None = None,
     ) -> None:
         from infrastructure.cache import _make_key, _tag_key
 
-        key = _make_key(query, top_k, threshold)
+        key = _make_key(query, top_k, threshold, profile)
         self._store[key] = response
         if sources:
             for src in sources:
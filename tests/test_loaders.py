@@ -1,10 +1,20 @@
 """Tests for ingestion/loaders.py."""
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
+from pdfminer.pdfdocument import PDFDocument
 
-from ingestion.loaders import LoadedPage, load_documents, load_pdf_pages
+from ingestion.loaders import (
+    LoadedPage,
+    _extract_pages,
+    _pdf_page_count,
+    iter_documents,
+    load_documents,
+    load_pdf_pages,
+)
 
 # ---------------------------------------------------------------------------
 # Helper: create a tiny PDF with pdfplumber's underlying library
@@ -171,6 +181,49 @@ class TestLoadDocuments:
         assert "Alpha" in pdf_doc.content or "Beta" in pdf_doc.content
 
 
+class TestIterDocuments:
+    def test_reads_files_lazily(self, tmp_path: Path) -> None:
+        (tmp_path / "a.md").write_text("first", encoding="utf-8")
+        (tmp_path / "b.md").write_text("second", encoding="utf-8")
+        docs = iter_documents(tmp_path)
+        assert next(docs).content == "first"
+        (tmp_path / "b.md").write_text("changed", encoding="utf-8")
+        assert next(docs).content == "changed"  # read only when reached
+
+    def test_missing_dir_raises_before_iteration(self) -> None:
+        with pytest.raises(FileNotFoundError):
+            iter_documents("/nonexistent/path/xyz")
+
+    def test_pdf_carries_its_pages(self, tmp_path: Path) -> None:
+        _create_pdf(tmp_path / "book.pdf", ["Alpha content", "Beta content"])
+        doc = next(iter_documents(tmp_path))
+        assert doc.pages is not None
+        assert [p.page_number for p in doc.pages] == [1, 2]
+        assert doc.content == "\n\n".join(p.text for p in doc.pages)
+
+    def test_process_pool_keeps_path_order(self, tmp_path: Path) -> None:
+        _create_pdf(tmp_path / "a.pdf", [f"Page {i}" for i in range(1, 6)])
+        (tmp_path / "b.md").write_text("# Notes", encoding="utf-8")
+        _create_pdf(tmp_path / "c.pdf", ["Short"])
+        sequential = list(iter_documents(tmp_path))
+        parallel = list(iter_documents(tmp_path, workers=2, pages_per_task=2))
+        assert [d.name for d in parallel] == ["a.pdf", "b.md", "c.pdf"]
+        assert parallel == sequential
+
+    def test_include_filters_before_reading_and_limit(self, tmp_path: Path) -> None:
+        for name in ("a.md", "b.md", "c.md"):
+            (tmp_path / name).write_text(name, encoding="utf-8")
+        asked: list[str] = []
+
+        def include(path: Path) -> bool:
+            asked.append(path.name)
+            return path.name != "b.md"
+
+        docs = list(iter_documents(tmp_path, limit=2, include=include))
+        assert [d.name for d in docs] == ["a.md", "c.md"]
+        assert asked == ["a.md", "b.md", "c.md"]
+
+
 class TestLoadPdfPages:
     """Tests for the page-level PDF extractor."""
 
@@ -214,6 +267,46 @@ class TestLoadPdfPages:
         with pytest.raises(ValueError, match="Expected a .pdf file"):
             load_pdf_pages(txt)
 
+    def test_page_ranges_on_executor_match_sequential(self, tmp_path: Path) -> None:
+        pdf_path = tmp_path / "book.pdf"
+        _create_pdf(pdf_path, [f"Page {i}" for i in range(1, 8)])
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            pages = load_pdf_pages(pdf_path, executor=executor, pages_per_task=3)
+        assert pages == load_pdf_pages(pdf_path)
+        assert [p.page_number for p in pages] == list(range(1, 8))
+
+    @staticmethod
+    def _parsed_pages(fn, *args) -> tuple[object, set[int]]:  # type: ignore[no-untyped-def]
+        """Run *fn* and return its result and the 1-based pages whose objects it parsed."""
+        with patch.object(
+            PDFDocument, "getobj", autospec=True, side_effect=PDFDocument.getobj
+        ) as get:
+            result = fn(*args)
+        # _create_pdf numbers page i's object 3 + 2 * (i - 1)
+        objids = {c.args[1] for c in get.call_args_list}
+        return result, {(objid - 3) // 2 + 1 for objid in objids if objid >= 3 and objid % 2}
+
+    def test_page_count_reads_only_the_catalog(self, tmp_path: Path) -> None:
+        pdf_path = tmp_path / "book.pdf"
+        _create_pdf(pdf_path, [f"Page {i}" for i in range(1, 8)])
+        count, parsed = self._parsed_pages(_pdf_page_count, pdf_path)
+        assert count == 7
+        assert parsed == set()
+
+    def test_page_range_parses_only_its_pages(self, tmp_path: Path) -> None:
+        pdf_path = tmp_path / "book.pdf"
+        _create_pdf(pdf_path, [f"Page {i}" for i in range(1, 8)])
+        pages, parsed = self._parsed_pages(_extract_pages, pdf_path, 3, 6)
+        assert [(p.page_number, p.text) for p in pages] == [(n, f"Page {n}") for n in (4, 5, 6)]
+        assert parsed == {4, 5, 6}
+
+    def test_page_range_with_a_wrong_page_count(self, tmp_path: Path) -> None:
+        pdf_path = tmp_path / "book.pdf"
+        _create_pdf(pdf_path, [f"Page {i}" for i in range(1, 8)])
+        pdf_path.write_bytes(pdf_path.read_bytes().replace(b"/Count 7", b"/Count 9"))
+        pages = _extract_pages(pdf_path, 3, 6)
+        assert [p.page_number for p in pages] == [4, 5, 6]
+
     def test_single_page_pdf(self, tmp_path: Path) -> None:
         pdf_path = tmp_path / "single.pdf"
         _create_pdf(pdf_path, ["Only one page here"])
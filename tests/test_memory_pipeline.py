@@ -325,10 +325,11 @@ class TestAskEndpointWithMemory:
         yield
         app.dependency_overrides.clear()
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_ask_returns_200_with_memory_store_active(
-        self, mock_search_chunks: MagicMock, mock_hybrid: MagicMock
+        self, mock_search_chunks: MagicMock, mock_hybrid: MagicMock, mock_multi: MagicMock
     ) -> None:
         """POST /ask returns 200 even when memory store has entries."""
         from db.models import ChunkRecord
@@ -347,15 +348,17 @@ class TestAskEndpointWithMemory:
         )
         mock_search_chunks.return_value = [(chunk, 0.9)]
         mock_hybrid.return_value = [(chunk, 0.9)]
+        mock_multi.return_value = ([(chunk, 0.9)], False)
 
         client = TestClient(app)
         resp = client.post("/ask", json={"query": "What attack time for kick drums?"})
         assert resp.status_code == 200
 
+    @patch("api.routes.ask.search_chunks_multi")
     @patch("api.routes.ask.hybrid_search")
     @patch("api.routes.ask.search_chunks")
     def test_ask_returns_200_when_memory_store_raises(
-        self, mock_search_chunks: MagicMock, mock_hybrid: MagicMock
+        self, mock_search_chunks: MagicMock, mock_hybrid: MagicMock, mock_multi: MagicMock
     ) -> None:
         """/ask survives when memory_store.search_relevant() raises an exception."""
         from db.models import ChunkRecord
@@ -381,6 +384,7 @@ class TestAskEndpointWithMemory:
         )
         mock_search_chunks.return_value = [(chunk, 0.9)]
         mock_hybrid.return_value = [(chunk, 0.9)]
+        mock_multi.return_value = ([(chunk, 0.9)], False)
 
         client = TestClient(app)
         resp = client.post("/ask", json={"query": "What attack time for kick drums?"})
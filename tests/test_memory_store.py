@@ -5,7 +5,7 @@ from pathlib import Path
 
 import pytest
 
-from ingestion.memory_store import MemoryStore
+from ingestion.memory_store import AsyncMemoryStore, MemoryStore
 
 FROZEN_NOW = datetime(2026, 2, 21, 12, 0, 0, tzinfo=UTC)
 
@@ -166,3 +166,13 @@ class TestMemoryStoreSearch:
             store.save(e, embedding=emb)
         results = store.search_relevant(emb, FROZEN_NOW, min_score=0.0)
         assert len(results) == 3
+
+
+class TestAsyncMemoryStore:
+    async def test_save_and_search_through_adapter(self, store: MemoryStore) -> None:
+        adapter = AsyncMemoryStore(store)
+        entry = adapter.create_entry("preference", "I prefer A minor", FROZEN_NOW)
+        await adapter.save(entry, embedding=[0.1] * 1536)
+        results = await adapter.search_relevant([0.1] * 1536, FROZEN_NOW, top_k=1)
+        assert [e.memory_id for e, _ in results] == [entry.memory_id]
+        assert store.get(entry.memory_id) is not None
@@ -6,6 +6,7 @@ All tests are deterministic — no database, no network.
 
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 
 from db.rerank import (
@@ -17,6 +18,7 @@ from db.rerank import (
     mmr_rerank,
     rerank_results,
 )
+from db.search import ChunkHit
 
 
 def _rec(
@@ -183,6 +185,52 @@ class TestMMR:
         assert ranked[1][1] == 0.50  # r_c's original score
 
 
+def _pairwise_mmr(results: list, lambda_: float, top_k: int) -> list:
+    """Reference MMR: the straightforward pairwise-cosine greedy loop."""
+    candidates = list(results)
+    selected: list = []
+    while len(selected) < top_k and candidates:
+        best_mmr, best_idx = float("-inf"), 0
+        for i, (record, relevance) in enumerate(candidates):
+            redundancy = max(
+                (_cosine_similarity(record.embedding, s.embedding) for s, _ in selected),
+                default=0.0,
+            )
+            mmr_score = lambda_ * relevance - (1.0 - lambda_) * redundancy
+            if mmr_score > best_mmr:
+                best_mmr, best_idx = mmr_score, i
+        selected.append(candidates.pop(best_idx))
+    return selected
+
+
+class TestVectorizedMMR:
+    @pytest.mark.parametrize("n", [1, 15, 50])
+    @pytest.mark.parametrize("lambda_", [0.0, 0.3, 0.7, 1.0])
+    def test_matches_pairwise_reference(self, n: int, lambda_: float) -> None:
+        rng = np.random.default_rng(n)
+        results = [
+            (_rec(embedding=rng.normal(size=16).tolist()), float(score))
+            for score in rng.uniform(0.3, 0.95, size=n)
+        ]
+        expected = _pairwise_mmr(results, lambda_, top_k=10)
+        assert mmr_rerank(results, [0.0] * 16, lambda_=lambda_, top_k=10) == expected
+
+    def test_zero_vector_has_no_redundancy(self) -> None:
+        r_a = _rec(embedding=[1.0, 0.0])
+        r_zero = _rec(embedding=[0.0, 0.0])
+        ranked = mmr_rerank([(r_a, 0.9), (r_zero, 0.5)], [1.0, 0.0], lambda_=0.5, top_k=2)
+        assert [score for _, score in ranked] == [0.9, 0.5]
+
+    def test_embedding_row_mismatch_raises(self) -> None:
+        with pytest.raises(ValueError, match="rows"):
+            mmr_rerank([(_rec(), 0.9)], [1.0, 0.0], embeddings=np.zeros((2, 3)))
+
+    def test_boosts_return_python_floats(self) -> None:
+        boosted = apply_authority_boost([(_rec(), 0.5)], course_boost=1.5)
+        assert type(boosted[0][1]) is float
+        assert boosted[0][1] == 0.75
+
+
 # ---------------------------------------------------------------------------
 # rerank_results (orchestrator)
 # ---------------------------------------------------------------------------
@@ -220,3 +268,67 @@ class TestRerankResults:
         results = [(r1, 0.9), (r2, 0.8)]
         reranked = rerank_results(results, top_k=2, use_mmr=True)
         assert len(reranked) == 2
+
+
+# ---------------------------------------------------------------------------
+# Projection-only hits (ChunkHit) + lazy embedding loading
+# ---------------------------------------------------------------------------
+
+
+def _hit(chunk_id: int, source_path: str = "/data/doc.md") -> ChunkHit:
+    return ChunkHit(
+        id=chunk_id,
+        doc_id="doc",
+        source_path=source_path,
+        source_name="doc.md",
+        chunk_index=chunk_id,
+        token_start=0,
+        token_end=100,
+        text=f"chunk {chunk_id}",
+        page_number=None,
+        sub_domain=None,
+    )
+
+
+class TestLazyEmbeddings:
+    def test_mmr_with_embedding_matrix(self) -> None:
+        results = [(_hit(1), 0.9), (_hit(2), 0.89), (_hit(3), 0.50)]
+        matrix = np.array([[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.0, 0.0, 1.0]])
+        ranked = mmr_rerank(results, [1.0, 0.0, 0.0], lambda_=0.0, top_k=3, embeddings=matrix)
+        assert [h.id for h, _ in ranked][:2] == [1, 3]
+
+    def test_loader_called_once_with_candidate_ids(self) -> None:
+        results = [(_hit(1), 0.9), (_hit(2), 0.89), (_hit(3), 0.50)]
+        loader = MagicMock(
+            return_value=np.array([[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.0, 0.0, 1.0]])
+        )
+        reranked = rerank_results(
+            results,
+            top_k=3,
+            use_mmr=True,
+            query_embedding=[1.0, 0.0, 0.0],
+            mmr_lambda=0.0,
+            embedding_loader=loader,
+        )
+        loader.assert_called_once_with([1, 2, 3])
+        assert [h.id for h, _ in reranked][:2] == [1, 3]
+
+    def test_loader_not_called_without_mmr(self) -> None:
+        loader = MagicMock()
+        results = [(_hit(1, "/a.md"), 0.9), (_hit(2, "/b.md"), 0.8)]
+        reranked = rerank_results(results, top_k=2, use_mmr=False, embedding_loader=loader)
+        loader.assert_not_called()
+        assert len(reranked) == 2
+
+    def test_loader_not_called_when_records_carry_embeddings(self) -> None:
+        loader = MagicMock()
+        results = [(_rec(embedding=[1.0, 0.0]), 0.9), (_rec(embedding=[0.0, 1.0]), 0.8)]
+        rerank_results(
+            results, top_k=2, use_mmr=True, query_embedding=[1.0, 0.0], embedding_loader=loader
+        )
+        loader.assert_not_called()
+
+    def test_hits_without_loader_use_document_diversity(self) -> None:
+        results = [(_hit(1, "/a.md"), 0.9), (_hit(2, "/a.md"), 0.8), (_hit(3, "/b.md"), 0.7)]
+        reranked = rerank_results(results, top_k=3, use_mmr=True, query_embedding=[1.0, 0.0])
+        assert [h.id for h, _ in reranked] == [1, 3]
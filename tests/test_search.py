@@ -4,6 +4,11 @@ Tests for the semantic search endpoint.
 Covers:
 - db/search.py: search_chunks input validation
 - db/search.py: sub_domain filter (Day 2)
+- db/search.py: search_chunks_multi single-round-trip search
+- db/migrations/add_sub_domain_hnsw.py: partial HNSW index DDL
+- db/migrations/add_quantized_embeddings.py: quantized HNSW expression index DDL
+- db/search.py: full-text keyword leg (websearch_to_tsquery + ts_rank_cd)
+- db/search.py: hybrid_search concurrent legs + keyword timeout
 - api/schemas/search.py: Pydantic validation
 - api/routes/search.py: POST /search endpoint integration
 - Response headers for observability
@@ -12,8 +17,10 @@ Covers:
 All tests are deterministic — no network calls, no real database.
 """
 
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -21,7 +28,20 @@ from sqlalchemy.orm import Session
 from api.deps import get_db, get_embedding_provider
 from api.main import app
 from api.schemas.search import ResponseMeta, SearchRequest, SearchResponse, SearchResult
-from db.search import search_chunks
+from db.search import (
+    SEARCH_PROFILES,
+    ChunkHit,
+    _apply_search_profile,
+    _parse_version,
+    _rescore_factor,
+    _websearch_query,
+    fetch_embeddings,
+    hybrid_search,
+    reciprocal_rank_fusion,
+    search_chunks,
+    search_chunks_keyword,
+    search_chunks_multi,
+)
 
 # ---------------------------------------------------------------------------
 # Fixtures
@@ -30,6 +50,26 @@ from db.search import search_chunks
 FAKE_EMBEDDING = [0.1] * 1536
 FAKE_REQUEST_ID = "00000000-0000-4000-8000-000000000000"
 
+_HitRow = namedtuple("_HitRow", [*ChunkHit._fields, "distance", "is_fallback"])
+
+
+def _hit_row(record_id: int, distance: float, is_fallback: bool = False) -> tuple:
+    """A result row shaped like the projected ``select(*columns, distance)``."""
+    return _HitRow(
+        id=record_id,
+        doc_id="doc",
+        source_path=f"/data/doc_{record_id}.md",
+        source_name=f"doc_{record_id}.md",
+        chunk_index=0,
+        token_start=0,
+        token_end=100,
+        text=f"chunk {record_id}",
+        page_number=None,
+        sub_domain="mixing",
+        distance=distance,
+        is_fallback=is_fallback,
+    )
+
 
 class _FakeEmbeddingProvider:
     """Deterministic embedding provider for tests."""
@@ -132,6 +172,16 @@ class TestSearchRequest:
         with pytest.raises(ValueError):
             SearchRequest(query="test", min_score=1.1)
 
+    def test_profile_defaults_to_none(self) -> None:
+        assert SearchRequest(query="test").profile is None
+
+    def test_profile_accepts_known_preset(self) -> None:
+        assert SearchRequest(query="test", profile="exhaustive").profile == "exhaustive"
+
+    def test_unknown_profile_raises(self) -> None:
+        with pytest.raises(ValueError):
+            SearchRequest(query="test", profile="turbo")
+
 
 class TestSearchResult:
     """Tests for SearchResult Pydantic model."""
@@ -286,6 +336,132 @@ class TestSearchChunks:
             search_chunks(session, FAKE_EMBEDDING, top_k=-5)
 
 
+class TestSearchProfiles:
+    """hnsw.ef_search / iterative scan presets applied per transaction."""
+
+    @pytest.fixture(autouse=True)
+    def _reset_version_cache(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr("db.search._pgvector_version", None)
+
+    @staticmethod
+    def _session(version: str | None) -> MagicMock:
+        session = MagicMock(spec=Session)
+        session.execute.return_value.scalar.return_value = version
+        return session
+
+    def test_parse_version(self) -> None:
+        assert _parse_version("0.8.0") == (0, 8, 0)
+        assert _parse_version("0.7.4") < (0, 8, 0)
+        assert _parse_version(None) == (0,)
+        assert _parse_version("dev") == (0,)
+
+    def test_profiles_ordered_by_ef_search(self) -> None:
+        ef = [SEARCH_PROFILES[p].ef_search for p in ("fast", "balanced", "exhaustive")]
+        assert ef == sorted(ef)
+        assert ef[0] < ef[-1]
+
+    def test_none_is_noop(self) -> None:
+        session = self._session("0.8.0")
+        _apply_search_profile(session, None)
+        session.execute.assert_not_called()
+
+    def test_unknown_profile_raises(self) -> None:
+        with pytest.raises(ValueError, match="profile must be one of"):
+            _apply_search_profile(self._session("0.8.0"), "turbo")
+
+    def test_sets_ef_search_and_iterative_scan(self) -> None:
+        session = self._session("0.8.0")
+        _apply_search_profile(session, "balanced")
+        sql = str(session.execute.call_args_list[-1].args[0].compile())
+        assert sql.count("set_config(") == 2
+        params = session.execute.call_args_list[-1].args[0].compile().params.values()
+        assert "hnsw.ef_search" in params
+        assert "100" in params
+        assert "relaxed_order" in params
+
+    def test_skips_iterative_scan_before_pgvector_08(self) -> None:
+        session = self._session("0.7.4")
+        _apply_search_profile(session, "exhaustive")
+        params = session.execute.call_args_list[-1].args[0].compile().params.values()
+        assert "hnsw.iterative_scan" not in params
+        assert "400" in params
+
+    def test_version_queried_once(self) -> None:
+        session = self._session("0.8.0")
+        _apply_search_profile(session, "fast")
+        _apply_search_profile(session, "fast")
+        # 1 version lookup + 2 set_config statements
+        assert session.execute.call_count == 3
+
+    def test_search_chunks_applies_profile_before_query(self) -> None:
+        session = self._session("0.8.0")
+        session.execute.return_value.all.return_value = []
+        search_chunks(session, FAKE_EMBEDDING, top_k=3, profile="fast")
+        statements = [str(c.args[0]) for c in session.execute.call_args_list]
+        assert "set_config" in statements[1]
+        assert "chunk_records" in statements[-1]
+
+
+class TestQuantizedSearch:
+    """Two-stage search: quantized HNSW shortlist, full-precision rescore."""
+
+    @staticmethod
+    def _run(quantization: str, top_k: int = 5, **kwargs: object) -> tuple[str, MagicMock]:
+        session = MagicMock(spec=Session)
+        session.execute.return_value.all.return_value = [_hit_row(1, 0.1)]
+        results = search_chunks(
+            session, FAKE_EMBEDDING, top_k=top_k, quantization=quantization, **kwargs
+        )
+        assert results[0][1] == pytest.approx(0.9)
+        return str(session.execute.call_args_list[-1].args[0]), session
+
+    def test_none_is_single_stage(self) -> None:
+        sql, session = self._run("none")
+        assert "shortlist" not in sql
+        assert session.execute.call_count == 1
+
+    def test_halfvec_shortlists_then_rescores(self) -> None:
+        sql, _ = self._run("halfvec")
+        assert "WITH shortlist AS" in sql
+        assert "CAST(chunk_records.embedding AS HALFVEC(1536)) <=>" in sql
+        assert "HALFVEC(1536)" in sql
+        assert "chunk_records.embedding <=>" in sql
+
+    def test_binary_uses_hamming_distance(self) -> None:
+        sql, _ = self._run("binary")
+        assert "CAST(binary_quantize(chunk_records.embedding) AS BIT(1536)) <~>" in sql
+
+    def test_shortlist_size_and_ef_search(self) -> None:
+        session = MagicMock(spec=Session)
+        session.execute.return_value.all.return_value = []
+        search_chunks(session, FAKE_EMBEDDING, top_k=15, quantization="halfvec")
+        set_config, stmt = (c.args[0] for c in session.execute.call_args_list)
+        assert "60" in set_config.compile().params.values()
+        assert 60 in stmt.compile().params.values()
+
+    def test_small_shortlist_keeps_server_ef_search(self) -> None:
+        _, session = self._run("halfvec", top_k=5)
+        assert session.execute.call_count == 1
+
+    def test_sub_domain_filters_shortlist(self) -> None:
+        sql, _ = self._run("halfvec", sub_domain="mixing")
+        shortlist, rescore = sql.split("JOIN shortlist", 1)[0].split(" SELECT chunk_records.id,")
+        assert "WHERE chunk_records.sub_domain" in shortlist
+        assert "WHERE" not in rescore
+
+    def test_unknown_quantization_raises(self) -> None:
+        with pytest.raises(ValueError, match="quantization must be one of"):
+            search_chunks(MagicMock(spec=Session), FAKE_EMBEDDING, quantization="pq")
+
+    def test_binary_oversamples_more_than_halfvec(self) -> None:
+        assert _rescore_factor("binary") > _rescore_factor("halfvec") >= 1
+
+    def test_ef_search_capped(self) -> None:
+        session = MagicMock(spec=Session)
+        _apply_search_profile(session, None, min_ef_search=5000)
+        assert "1000" in session.execute.call_args.args[0].compile().params.values()
+
+
 # ---------------------------------------------------------------------------
 # sub_domain filter tests (Day 2)
 # ---------------------------------------------------------------------------
@@ -363,26 +539,45 @@ class TestSearchChunksSubDomainFilter:
         assert "WHERE" not in sql or "sub_domain =" not in sql
 
     def test_sub_domain_filter_result_mapped(self) -> None:
-        """search_chunks maps (ChunkRecord, distance) rows to (ChunkRecord, score)."""
-        from db.models import ChunkRecord
-
-        mock_record = MagicMock(spec=ChunkRecord)
-        mock_row = MagicMock()
-        mock_row.ChunkRecord = mock_record
-        mock_row.distance = 0.2  # cosine distance → score = 1 - 0.2 = 0.8
-
+        """search_chunks maps projected (columns..., distance) rows to (ChunkHit, score)."""
         mock_result = MagicMock()
-        mock_result.all.return_value = [mock_row]
+        mock_result.all.return_value = [_hit_row(7, 0.2)]  # distance 0.2 → score 0.8
 
         session = MagicMock(spec=Session)
         session.execute.return_value = mock_result
 
         results = search_chunks(session, FAKE_EMBEDDING, top_k=1, sub_domain="mixing")
         assert len(results) == 1
-        record, score = results[0]
-        assert record is mock_record
+        hit, score = results[0]
+        assert isinstance(hit, ChunkHit)
+        assert hit.id == 7
+        assert hit.sub_domain == "mixing"
         assert abs(score - 0.8) < 1e-9
 
+    @pytest.mark.parametrize("quantization", ["none", "halfvec"])
+    def test_sub_domain_rendered_as_literal(self, quantization: str) -> None:
+        """The filter value is inlined so the planner can match a partial HNSW index."""
+        from sqlalchemy.dialects import postgresql
+
+        session, captured = _multi_session([])
+        search_chunks(
+            session, FAKE_EMBEDDING, top_k=5, sub_domain="mixing", quantization=quantization
+        )
+        sql = str(
+            captured[-1].compile(
+                dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+            )
+        )
+        assert "chunk_records.sub_domain = 'mixing'" in sql
+
+    def test_embedding_column_not_selected(self) -> None:
+        """Only metadata columns are projected — the embedding stays in Postgres."""
+        sql = self._build_stmt(sub_domain=None)
+        select_list = sql.split("FROM")[0]
+        assert "chunk_records.text" in select_list
+        assert "chunk_records.embedding," not in select_list
+        assert "chunk_records.embedding AS" not in select_list
+
     def test_valid_sub_domain_names_accepted(self) -> None:
         """All six valid sub-domain names are accepted without error."""
         valid_domains = [
@@ -403,6 +598,343 @@ class TestSearchChunksSubDomainFilter:
             assert results == []
 
 
+def _multi_session(rows: list) -> tuple[MagicMock, list]:
+    captured: list = []
+    session = MagicMock(spec=Session)
+
+    def _execute(stmt, *args, **kwargs):  # type: ignore[no-untyped-def]
+        captured.append(stmt)
+        result = MagicMock()
+        result.all.return_value = rows
+        return result
+
+    session.execute.side_effect = _execute
+    return session, captured
+
+
+class TestSearchChunksMulti:
+    """Tests for search_chunks_multi — per-domain top-k + fallback in one statement."""
+
+    def _sql(self, captured: list) -> str:
+        from sqlalchemy.dialects import postgresql
+
+        return str(
+            captured[0].compile(
+                dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+            )
+        )
+
+    def test_single_round_trip(self) -> None:
+        session, captured = _multi_session([])
+        search_chunks_multi(
+            session,
+            FAKE_EMBEDDING,
+            ["mixing", "sound_design", "arrangement"],
+            per_domain_k=6,
+            global_k=15,
+        )
+        assert session.execute.call_count == 1
+        sql = self._sql(captured)
+        assert "UNION ALL" in sql
+        assert "LATERAL" not in sql
+        for sd in ("mixing", "sound_design", "arrangement"):
+            assert f"chunk_records.sub_domain = '{sd}'" in sql
+
+    def test_single_sub_domain_has_one_scoped_leg(self) -> None:
+        session, captured = _multi_session([])
+        search_chunks_multi(
+            session, FAKE_EMBEDDING, ["mixing", "mixing"], per_domain_k=6, global_k=15
+        )
+        sql = self._sql(captured)
+        assert sql.count("chunk_records.sub_domain = 'mixing'") == 1
+
+    def test_scoped_results_deduplicated_by_db_id(self) -> None:
+        rows = [
+            _hit_row(1, 0.1, False),
+            _hit_row(2, 0.2, False),
+            _hit_row(1, 0.1, False),
+            _hit_row(3, 0.3, False),
+        ]
+        session, _ = _multi_session(rows)
+        results, used_fallback = search_chunks_multi(
+            session, FAKE_EMBEDDING, ["mixing", "mixing"], per_domain_k=6, global_k=15
+        )
+        assert used_fallback is False
+        assert [r.id for r, _ in results] == [1, 2, 3]
+        assert results[0][1] == pytest.approx(0.9)
+
+    def test_global_leg_used_when_scoped_too_few(self) -> None:
+        rows = [
+            _hit_row(1, 0.1, False),
+            _hit_row(1, 0.1, True),
+            _hit_row(7, 0.15, True),
+            _hit_row(8, 0.2, True),
+        ]
+        session, _ = _multi_session(rows)
+        results, used_fallback = search_chunks_multi(
+            session, FAKE_EMBEDDING, ["practice"], per_domain_k=6, global_k=15, min_results=3
+        )
+        assert used_fallback is True
+        assert [r.id for r, _ in results] == [1, 7, 8]
+
+    def test_empty_table_reports_fallback(self) -> None:
+        session, _ = _multi_session([])
+        results, used_fallback = search_chunks_multi(
+            session, FAKE_EMBEDDING, ["mixing"], per_domain_k=6, global_k=15
+        )
+        assert results == []
+        assert used_fallback is True
+
+    def test_empty_sub_domains_raises(self) -> None:
+        session, _ = _multi_session([])
+        with pytest.raises(ValueError, match="sub_domains"):
+            search_chunks_multi(session, FAKE_EMBEDDING, [], per_domain_k=6, global_k=15)
+
+    @pytest.mark.parametrize("kwargs", [{"per_domain_k": 0}, {"global_k": 0}])
+    def test_invalid_k_raises(self, kwargs: dict) -> None:
+        session, _ = _multi_session([])
+        params = {"per_domain_k": 6, "global_k": 15, **kwargs}
+        with pytest.raises(ValueError, match=">= 1"):
+            search_chunks_multi(session, FAKE_EMBEDDING, ["mixing"], **params)
+
+
+class TestSubDomainHnswMigration:
+    """Tests for the partial HNSW index DDL in db/migrations/add_sub_domain_hnsw.py."""
+
+    def test_predicate_matches_search_filter(self) -> None:
+        from db.migrations.add_sub_domain_hnsw import create_index_sql
+
+        sql = create_index_sql("live_performance")
+        assert "CONCURRENTLY IF NOT EXISTS idx_chunk_embedding_hnsw_live_performance" in sql
+        assert "USING hnsw (embedding vector_cosine_ops)" in sql
+        assert sql.endswith("WHERE sub_domain = 'live_performance'")
+
+    @pytest.mark.parametrize("name", ["Mixing", "mix'; DROP TABLE chunk_records; --", "", "a" * 60])
+    def test_rejects_unsafe_names(self, name: str) -> None:
+        from db.migrations.add_sub_domain_hnsw import partial_index_name
+
+        with pytest.raises(ValueError, match="identifier"):
+            partial_index_name(name)
+
+
+class TestQuantizedHnswMigration:
+    """Tests for the expression index DDL in db/migrations/add_quantized_embeddings.py."""
+
+    @pytest.mark.parametrize(
+        ("kind", "expression"),
+        [
+            ("halfvec", "(embedding::halfvec(1536)) halfvec_cosine_ops"),
+            ("binary", "(binary_quantize(embedding)::bit(1536)) bit_hamming_ops"),
+        ],
+    )
+    def test_indexes_an_expression_not_a_column(self, kind: str, expression: str) -> None:
+        from db.migrations.add_quantized_embeddings import create_index_sql
+
+        assert f"USING hnsw ({expression})" in create_index_sql(kind)
+
+
+class TestSearchChunksKeyword:
+    """Tests for the full-text keyword leg used by hybrid_search."""
+
+    def _sql(self, terms: list[str]) -> str:
+        from sqlalchemy.dialects import postgresql
+
+        session, captured = _multi_session([])
+        search_chunks_keyword(session, terms, top_k=5)
+        return str(captured[0].compile(dialect=postgresql.dialect()))
+
+    def test_uses_full_text_search(self) -> None:
+        sql = self._sql(["sidechain", "kick"])
+        assert "websearch_to_tsquery" in sql
+        assert "ts_rank_cd" in sql
+        assert "chunk_records.text_search @@" in sql
+        assert "ILIKE" not in sql.upper()
+
+    def test_result_mapped_to_hit_and_rank(self) -> None:
+        Row = namedtuple("Row", [*ChunkHit._fields, "rank"])
+        row = Row(*_hit_row(3, 0.0)[: len(ChunkHit._fields)], rank=0.42)
+        session, _ = _multi_session([row])
+        results = search_chunks_keyword(session, ["eq"], top_k=5)
+        assert results == [(ChunkHit(*row[: len(ChunkHit._fields)]), 0.42)]
+
+    def test_empty_terms_raises(self) -> None:
+        session, _ = _multi_session([])
+        with pytest.raises(ValueError, match="non-empty"):
+            search_chunks_keyword(session, [], top_k=5)
+
+    def test_invalid_top_k_raises(self) -> None:
+        session, _ = _multi_session([])
+        with pytest.raises(ValueError, match="top_k"):
+            search_chunks_keyword(session, ["eq"], top_k=0)
+
+    def test_websearch_query_ors_quoted_terms(self) -> None:
+        assert _websearch_query(["sidechain compression", "kick"]) == (
+            '"sidechain compression" or "kick"'
+        )
+
+    def test_websearch_query_strips_quotes_and_blanks(self) -> None:
+        assert _websearch_query(['say "hi"', "  ", "low   end"]) == '"say hi" or "low end"'
+
+    def test_websearch_query_all_blank_raises(self) -> None:
+        with pytest.raises(ValueError):
+            _websearch_query(['"', " "])
+
+
+class TestHybridSearchConcurrency:
+    """hybrid_search runs the keyword leg on its own session when given a factory."""
+
+    def _patch_legs(self, vector_delay: float, keyword: object):  # type: ignore[no-untyped-def]
+        import time as _time
+
+        vector_hits = [(ChunkHit(*_hit_row(1, 0.1)[: len(ChunkHit._fields)]), 0.9)]
+
+        def _vector(*args, **kwargs):  # type: ignore[no-untyped-def]
+            _time.sleep(vector_delay)
+            return vector_hits
+
+        return (
+            patch("db.search.search_chunks", side_effect=_vector),
+            patch("db.search.search_chunks_keyword", side_effect=keyword),
+        )
+
+    def test_legs_overlap(self) -> None:
+        import time as _time
+
+        def _keyword(*args, **kwargs):  # type: ignore[no-untyped-def]
+            _time.sleep(0.15)
+            return []
+
+        vec_patch, kw_patch = self._patch_legs(0.15, _keyword)
+        timings: dict[str, float] = {}
+        with vec_patch, kw_patch:
+            t0 = _time.perf_counter()
+            results = hybrid_search(
+                MagicMock(spec=Session),
+                FAKE_EMBEDDING,
+                ["eq"],
+                top_k=5,
+                session_factory=lambda: MagicMock(spec=Session),
+                keyword_timeout_s=2.0,
+                timings=timings,
+            )
+            elapsed = _time.perf_counter() - t0
+        assert len(results) == 1
+        assert elapsed < 0.28  # sequential would be >= 0.30
+        assert set(timings) == {"vector_ms", "keyword_ms"}
+
+    def test_keyword_timeout_degrades_to_vector_only(self) -> None:
+        import time as _time
+
+        kw_hit = ChunkHit(*_hit_row(2, 0.0)[: len(ChunkHit._fields)])
+
+        def _slow_keyword(*args, **kwargs):  # type: ignore[no-untyped-def]
+            _time.sleep(0.3)
+            return [(kw_hit, 1.0)]
+
+        vec_patch, kw_patch = self._patch_legs(0.0, _slow_keyword)
+        timings: dict[str, float] = {}
+        with vec_patch, kw_patch:
+            results = hybrid_search(
+                MagicMock(spec=Session),
+                FAKE_EMBEDDING,
+                ["eq"],
+                top_k=5,
+                session_factory=lambda: MagicMock(spec=Session),
+                keyword_timeout_s=0.05,
+                timings=timings,
+            )
+        assert [hit.id for hit, _ in results] == [1]
+        assert timings["keyword_timeout_ms"] == 50.0
+        assert timings["keyword_ms"] < 250
+
+    def test_keyword_failure_degrades_to_vector_only(self) -> None:
+        vec_patch, kw_patch = self._patch_legs(0.0, RuntimeError("no text_search column"))
+        with vec_patch, kw_patch:
+            results = hybrid_search(
+                MagicMock(spec=Session),
+                FAKE_EMBEDDING,
+                ["eq"],
+                top_k=5,
+                session_factory=lambda: MagicMock(spec=Session),
+            )
+        assert [hit.id for hit, _ in results] == [1]
+
+    def test_keyword_leg_uses_factory_session_with_statement_timeout(self) -> None:
+        request_session = MagicMock(spec=Session)
+        leg_session = MagicMock(spec=Session)
+        leg_session.__enter__.return_value = leg_session
+        vec_patch, kw_patch = self._patch_legs(0.0, None)
+        with vec_patch, kw_patch as mock_keyword:
+            mock_keyword.return_value = []
+            hybrid_search(
+                request_session,
+                FAKE_EMBEDDING,
+                ["eq"],
+                top_k=5,
+                session_factory=lambda: leg_session,
+                keyword_timeout_s=0.2,
+            )
+        assert mock_keyword.call_args.args[0] is leg_session
+        set_local = str(leg_session.execute.call_args_list[0].args[0])
+        assert set_local == "SET LOCAL statement_timeout = 200"
+
+    def test_sequential_mode_fills_timings(self) -> None:
+        vec_patch, kw_patch = self._patch_legs(0.0, None)
+        timings: dict[str, float] = {}
+        session = MagicMock(spec=Session)
+        with vec_patch, kw_patch as mock_keyword:
+            mock_keyword.return_value = []
+            hybrid_search(session, FAKE_EMBEDDING, ["eq"], top_k=5, timings=timings)
+        assert mock_keyword.call_args.args[0] is session
+        assert set(timings) == {"vector_ms", "keyword_ms"}
+
+
+class TestFetchEmbeddings:
+    """Tests for the lazy embedding loader used by MMR."""
+
+    def _session(self, rows: list) -> MagicMock:
+        session = MagicMock(spec=Session)
+        session.execute.return_value.all.return_value = rows
+        return session
+
+    def test_rows_aligned_with_requested_ids(self) -> None:
+        Row = namedtuple("Row", ["id", "embedding"])
+        session = self._session([Row(2, [0.0, 1.0]), Row(1, [1.0, 0.0])])
+        matrix = fetch_embeddings(session, [1, 2, 1])
+        assert matrix.dtype == np.float32
+        assert matrix.tolist() == [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]]
+        assert session.execute.call_count == 1
+
+    def test_empty_ids_skip_query(self) -> None:
+        session = self._session([])
+        assert fetch_embeddings(session, []).shape == (0, 0)
+        session.execute.assert_not_called()
+
+    def test_missing_id_raises(self) -> None:
+        session = self._session([])
+        with pytest.raises(LookupError):
+            fetch_embeddings(session, [99])
+
+
+class TestReciprocalRankFusion:
+    """Tests for the RRF helper shared by hybrid_search and /ask."""
+
+    def test_keyword_only_hit_scores_zero(self) -> None:
+        a, b = MagicMock(id=1), MagicMock(id=2)
+        fused = reciprocal_rank_fusion([(a, 0.9)], [(b, 1.0)], top_k=5)
+        assert fused == [(a, 0.9), (b, 0.0)]
+
+    def test_shared_hit_ranks_first(self) -> None:
+        a, b = MagicMock(id=1), MagicMock(id=2)
+        fused = reciprocal_rank_fusion([(a, 0.9), (b, 0.8)], [(b, 1.0)], top_k=5)
+        assert [r.id for r, _ in fused] == [2, 1]
+        assert fused[0][1] == 0.8
+
+    def test_no_keyword_results_keeps_vector_order(self) -> None:
+        hits = [(MagicMock(id=i), 1.0 - i / 10) for i in range(5)]
+        assert reciprocal_rank_fusion(hits, [], top_k=3) == hits[:3]
+
+
 # ---------------------------------------------------------------------------
 # API endpoint tests
 # ---------------------------------------------------------------------------
@@ -514,6 +1046,40 @@ class TestResponseHeaders:
 # ---------------------------------------------------------------------------
 
 
+class TestRetrievalCacheInSearch:
+    """Warm retrievals skip search_chunks and rerank."""
+
+    def test_repeat_query_served_from_cache(self, client: TestClient) -> None:
+        client._search_mock.return_value = [(_make_mock_record(), 0.85)]  # type: ignore[attr-defined]
+        first = client.post("/search", json={"query": "sidechain", "min_score": 0.0}).json()
+        second = client.post("/search", json={"query": "sidechain", "min_score": 0.0}).json()
+        assert client._search_mock.call_count == 1  # type: ignore[attr-defined]
+        assert first["meta"]["retrieval_cache_hit"] is False
+        assert second["meta"]["retrieval_cache_hit"] is True
+        assert second["results"] == first["results"]
+
+    def test_rerank_settings_are_part_of_key(self, client: TestClient) -> None:
+        client._search_mock.return_value = [(_make_mock_record(), 0.85)]  # type: ignore[attr-defined]
+        client.post("/search", json={"query": "sidechain", "use_mmr": False})
+        client.post("/search", json={"query": "sidechain", "use_mmr": True})
+        assert client._search_mock.call_count == 2  # type: ignore[attr-defined]
+
+    def test_degraded_results_not_cached(self) -> None:
+        app.dependency_overrides[get_db] = lambda: MagicMock(spec=Session)
+        app.dependency_overrides[get_embedding_provider] = _FakeEmbeddingProvider
+        with (
+            patch(
+                "api.routes.search.search_chunks", return_value=[(_make_mock_record(), 0.85)]
+            ) as mock_search,
+            patch("api.routes.search.rerank_results", side_effect=RuntimeError("boom")),
+            TestClient(app) as c,
+        ):
+            c.post("/search", json={"query": "test"})
+            c.post("/search", json={"query": "test"})
+        app.dependency_overrides.clear()
+        assert mock_search.call_count == 2
+
+
 class TestResilientReranking:
     """Tests for graceful degradation when reranking fails."""
 
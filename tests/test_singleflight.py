@@ -0,0 +1,312 @@
+"""Tests for request coalescing (infrastructure/singleflight.py)."""
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+
+import pytest
+
+from infrastructure.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _run_threads(n: int, target) -> list:  # type: ignore[no-untyped-def]
+    results: list = [None] * n
+
+    def run(i: int) -> None:
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_computation(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        def slow() -> str:
+            nonlocal calls
+            calls += 1
+            time.sleep(0.1)
+            return "answer"
+
+        results = _run_threads(5, lambda: flights.do("k", slow))
+        assert calls == 1
+        assert [value for value, _ in results] == ["answer"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+    def test_key_is_released_after_the_leader_finishes(self) -> None:
+        flights = SingleFlight()
+        assert flights.do("k", lambda: 1) == (1, False)
+        assert flights.do("k", lambda: 2) == (2, False)
+
+    def test_different_keys_do_not_coalesce(self) -> None:
+        flights = SingleFlight()
+        results = _run_threads(2, lambda: flights.do(threading.current_thread().name, time.time))
+        assert [shared for _, shared in results] == [False, False]
+
+    def test_leader_error_reaches_followers(self) -> None:
+        flights = SingleFlight()
+
+        def boom() -> None:
+            time.sleep(0.1)
+            raise RuntimeError("llm down")
+
+        def call() -> object:
+            try:
+                flights.do("k", boom)
+            except RuntimeError as exc:
+                return exc
+            return None
+
+        errors = _run_threads(3, call)
+        assert all(isinstance(exc, RuntimeError) for exc in errors)
+        assert flights.do("k", lambda: "recovered") == ("recovered", False)
+
+    def test_submit_runs_once_in_background_and_leads_the_flight(self) -> None:
+        flights = SingleFlight()
+        gate = threading.Event()
+        calls = 0
+
+        def refresh() -> str:
+            nonlocal calls
+            calls += 1
+            gate.wait(5)
+            return "fresh"
+
+        assert flights.submit("k", refresh) is True
+        assert flights.submit("k", refresh) is False
+        follower = []
+        thread = threading.Thread(target=lambda: follower.append(flights.do("k", refresh)))
+        thread.start()
+        time.sleep(0.05)  # the follower is waiting on the flight
+        gate.set()
+        thread.join(5)
+        assert follower == [("fresh", True)]
+        assert calls == 1
+
+    def test_stream_fans_out_to_late_followers(self) -> None:
+        flights = SingleFlight()
+        first_sent = threading.Event()
+        gate = threading.Event()
+        produced = 0
+
+        def produce() -> Iterator[str]:
+            nonlocal produced
+            produced += 1
+            yield "a"
+            first_sent.set()
+            gate.wait(5)
+            yield "b"
+
+        leader: list[str] = []
+        thread = threading.Thread(target=lambda: leader.extend(flights.stream("k", produce)))
+        thread.start()
+        first_sent.wait(5)
+        follower_stream = flights.stream("k", produce)
+        assert next(follower_stream) == "a"  # replayed
+        gate.set()
+        assert list(follower_stream) == ["b"]
+        thread.join(5)
+        assert leader == ["a", "b"]
+        assert produced == 1
+
+    def test_leader_disconnect_keeps_streaming_to_followers(self) -> None:
+        flights = SingleFlight()
+
+        def produce() -> Iterator[str]:
+            yield from ("a", "b", "c")
+
+        leader_stream = flights.stream("k", produce)
+        assert next(leader_stream) == "a"
+        follower_stream = flights.stream("k", produce)
+        leader_stream.close()  # the leader's client went away
+        assert list(follower_stream) == ["a", "b", "c"]
+
+    def test_abandoned_leader_keeps_streaming_to_followers(self) -> None:
+        flights = SingleFlight()
+        gate = threading.Event()
+        produced = 0
+
+        def produce() -> Iterator[str]:
+            nonlocal produced
+            produced += 1
+            yield "a"
+            gate.wait(5)
+            yield from ("b", "c")
+
+        leader_stream = flights.stream("k", produce)
+        assert next(leader_stream) == "a"
+        follower_stream = flights.stream("k", produce)
+        assert next(follower_stream) == "a"
+        del leader_stream  # never resumed nor closed — the worker went away
+        gate.set()
+        assert list(follower_stream) == ["b", "c"]
+        assert produced == 1
+
+    def test_producer_error_reaches_every_subscriber(self) -> None:
+        flights = SingleFlight()
+        gate = threading.Event()
+
+        def produce() -> Iterator[str]:
+            yield "a"
+            gate.wait(5)
+            raise RuntimeError("llm down")
+
+        leader_stream = flights.stream("k", produce)
+        assert next(leader_stream) == "a"
+        follower_stream = flights.stream("k", produce)
+        assert next(follower_stream) == "a"
+        gate.set()
+        for stream in (leader_stream, follower_stream):
+            with pytest.raises(RuntimeError, match="llm down"):
+                next(stream)
+        assert list(flights.stream("k", lambda: iter(["fresh"]))) == ["fresh"]
+
+
+class TestAsyncSingleFlight:
+    async def test_concurrent_calls_share_one_computation(self) -> None:
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def slow() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        results = await asyncio.gather(*(flights.do("k", slow) for _ in range(5)))
+        assert calls == 1
+        assert [value for value, _ in results] == ["answer"] * 5
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+
+    async def test_leader_error_reaches_followers(self) -> None:
+        flights = AsyncSingleFlight()
+
+        async def boom() -> None:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+        results = await asyncio.gather(
+            *(flights.do("k", boom) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(exc, RuntimeError) for exc in results)
+
+    async def test_follower_takes_over_from_cancelled_leader(self) -> None:
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def slow() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == ("answer", False)
+        assert calls == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    async def test_submit_runs_once_as_a_task(self) -> None:
+        flights = AsyncSingleFlight()
+        calls = 0
+
+        async def refresh() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "fresh"
+
+        assert flights.submit("k", refresh) is True
+        assert flights.submit("k", refresh) is False
+        assert await flights.do("k", refresh) == ("fresh", True)
+        assert calls == 1
+
+    async def test_stream_fans_out(self) -> None:
+        flights = AsyncSingleFlight()
+        produced = 0
+
+        async def produce() -> AsyncIterator[str]:
+            nonlocal produced
+            produced += 1
+            for event in ("a", "b", "c"):
+                await asyncio.sleep(0.01)
+                yield event
+
+        async def collect() -> list[str]:
+            return [event async for event in flights.stream("k", produce)]
+
+        leader = asyncio.create_task(collect())
+        await asyncio.sleep(0.015)  # the leader has sent "a"
+        follower = await collect()
+        assert await leader == follower == ["a", "b", "c"]
+        assert produced == 1
+
+    async def test_cancelled_leader_keeps_streaming_to_followers(self) -> None:
+        flights = AsyncSingleFlight()
+        produced = 0
+
+        async def produce() -> AsyncIterator[str]:
+            nonlocal produced
+            produced += 1
+            for event in ("a", "b", "c"):
+                await asyncio.sleep(0.01)
+                yield event
+
+        async def collect() -> list[str]:
+            return [event async for event in flights.stream("k", produce)]
+
+        leader = asyncio.create_task(collect())
+        await asyncio.sleep(0.015)  # the leader has sent "a"
+        follower = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        leader.cancel()  # the leader's client went away
+        assert await follower == ["a", "b", "c"]
+        assert produced == 1
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    async def test_producer_stops_when_every_subscriber_leaves(self) -> None:
+        flights = AsyncSingleFlight()
+        closed = asyncio.Event()
+
+        async def produce() -> AsyncIterator[str]:
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield "tick"
+            finally:
+                closed.set()
+
+        async def first() -> str:
+            async for event in flights.stream("k", produce):
+                return event
+            return ""
+
+        assert await first() == "tick"
+        await asyncio.wait_for(closed.wait(), 1)
+        assert await first() == "tick"  # a later request starts afresh
+
+    async def test_producer_error_reaches_every_subscriber(self) -> None:
+        flights = AsyncSingleFlight()
+
+        async def produce() -> AsyncIterator[str]:
+            yield "a"
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+        async def collect() -> list[str]:
+            return [event async for event in flights.stream("k", produce)]
+
+        results = await asyncio.gather(collect(), collect(), return_exceptions=True)
+        assert all(isinstance(exc, RuntimeError) for exc in results)
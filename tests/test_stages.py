@@ -0,0 +1,116 @@
+"""Tests for the request-pipeline stage scheduler (infrastructure/stages.py)."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from infrastructure.stages import AsyncStageScheduler, StageScheduler
+
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+
+class TestStageScheduler:
+    def test_background_stages_overlap_inline_stage(self) -> None:
+        stages = StageScheduler()
+        t0 = time.perf_counter()
+        stages.submit("a", time.sleep, 0.1)
+        stages.submit("b", time.sleep, 0.1)
+        stages.run("inline", time.sleep, 0.1)
+        stages.result("a")
+        stages.result("b")
+        assert time.perf_counter() - t0 < 0.25
+
+    def test_result_returns_value(self) -> None:
+        stages = StageScheduler()
+        stages.submit("sum", sum, [1, 2, 3])
+        assert stages.result("sum") == 6
+        assert stages.run("inline", max, 4, 7) == 7
+
+    def test_timings_cover_every_stage(self) -> None:
+        stages = StageScheduler()
+        stages.submit("bg", time.sleep, 0.02)
+        stages.run("inline", time.sleep, 0.01)
+        stages.result("bg")
+        assert stages.timings.keys() == {"bg", "inline"}
+        assert stages.timings["bg"] >= 20
+
+    def test_background_error_reraised_by_result_and_timed(self) -> None:
+        def boom() -> None:
+            raise RuntimeError("db down")
+
+        stages = StageScheduler()
+        stages.submit("boom", boom)
+        with pytest.raises(RuntimeError, match="db down"):
+            stages.result("boom")
+        assert "boom" in stages.timings
+
+    def test_duplicate_stage_name_rejected(self) -> None:
+        stages = StageScheduler()
+        stages.submit("a", int)
+        with pytest.raises(ValueError, match="already submitted"):
+            stages.submit("a", int)
+
+    def test_unknown_stage_raises_key_error(self) -> None:
+        with pytest.raises(KeyError):
+            StageScheduler().result("missing")
+
+    def test_context_variables_reach_worker(self) -> None:
+        token = _request_id.set("req-42")
+        try:
+            stages = StageScheduler()
+            stages.submit("ctx", _request_id.get)
+            assert stages.result("ctx") == "req-42"
+        finally:
+            _request_id.reset(token)
+
+    def test_runs_on_worker_thread(self) -> None:
+        stages = StageScheduler()
+        stages.submit("thread", threading.current_thread)
+        assert stages.result("thread") is not threading.current_thread()
+
+    def test_critical_stage_does_not_queue_behind_side_stages(self) -> None:
+        shared = ThreadPoolExecutor(max_workers=1)
+        try:
+            stages = StageScheduler(executor=shared)
+            stages.submit("side", time.sleep, 0.2)  # saturates the shared pool
+            stages.submit_critical("embedding", threading.current_thread)
+            t0 = time.perf_counter()
+            worker = stages.result("embedding", timeout=1.0)
+            assert time.perf_counter() - t0 < 0.1
+            assert worker.name.startswith("critical")
+            with pytest.raises(ValueError, match="already submitted"):
+                stages.submit("embedding", int)
+        finally:
+            shared.shutdown(wait=True)
+
+
+class TestAsyncStageScheduler:
+    async def test_background_tasks_overlap_inline_stage(self) -> None:
+        stages = AsyncStageScheduler()
+        t0 = time.perf_counter()
+        stages.submit("a", asyncio.sleep, 0.1, result="a")
+        value = await stages.run("inline", asyncio.sleep, 0.1, result="inline")
+        assert value == "inline"
+        assert await stages.result("a") == "a"
+        assert time.perf_counter() - t0 < 0.18
+        assert stages.timings.keys() == {"a", "inline"}
+
+    async def test_error_reraised_by_result(self) -> None:
+        async def boom() -> None:
+            raise RuntimeError("llm down")
+
+        stages = AsyncStageScheduler()
+        stages.submit("boom", boom)
+        with pytest.raises(RuntimeError, match="llm down"):
+            await stages.result("boom")
+
+    async def test_duplicate_stage_name_rejected(self) -> None:
+        stages = AsyncStageScheduler()
+        stages.submit("a", asyncio.sleep, 0)
+        with pytest.raises(ValueError, match="already submitted"):
+            stages.submit("a", asyncio.sleep, 0)
+        await stages.result("a")
@@ -0,0 +1,283 @@
+"""
+Tests for db/vector_index.py — the in-process mmap search backend.
+
+Covers:
+- write_index / MmapVectorIndex.load round trip
+- Exact and blocked top-k agree with brute-force cosine ranking
+- sub_domain filtering
+- Input validation
+- /search and /ask fall back to the local index when pgvector fails
+
+All tests are deterministic — no network calls, no real database.
+"""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from api.deps import (
+    get_db,
+    get_embedding_breaker,
+    get_embedding_provider,
+    get_generation_provider,
+    get_llm_breaker,
+    get_memory_store,
+    get_rate_limiter,
+    get_response_cache,
+    get_vector_index,
+)
+from api.main import app
+from core.generation.base import GenerationResponse
+from db.vector_index import MmapVectorIndex, write_index
+from infrastructure.cache import ResponseCache
+from infrastructure.circuit_breaker import CircuitBreaker
+from infrastructure.rate_limiter import RateLimiter
+from tests.conftest import FakeEmbeddingProvider
+
+DIM = 8
+SUB_DOMAINS = ("mixing", "sound_design", None)
+
+
+def _rows(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": i + 1,
+            "doc_id": f"doc-{i // 4}",
+            "source_path": f"/data/doc_{i // 4}.md",
+            "source_name": f"doc_{i // 4}.md",
+            "chunk_index": i % 4,
+            "token_start": 0,
+            "token_end": 100,
+            "text": f"chunk {i}",
+            "page_number": None,
+            "sub_domain": SUB_DOMAINS[i % 3],
+            "embedding": rng.normal(size=DIM).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture()
+def index_dir(tmp_path: Path) -> tuple[Path, list[dict]]:
+    rows = _rows(50)
+    out = tmp_path / "index"
+    write_index(rows, out, count=len(rows), dim=DIM)
+    return out, rows
+
+
+def _brute_force(rows: list[dict], query: list[float], k: int, sub_domain=None) -> list[int]:
+    q = np.asarray(query) / np.linalg.norm(query)
+    scored = []
+    for row in rows:
+        if sub_domain is not None and row["sub_domain"] != sub_domain:
+            continue
+        v = np.asarray(row["embedding"])
+        scored.append((float(v @ q / np.linalg.norm(v)), row["id"]))
+    scored.sort(reverse=True)
+    return [rid for _, rid in scored[:k]]
+
+
+class TestWriteAndLoad:
+    def test_round_trip(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        assert len(index) == len(rows)
+        assert index.dim == DIM
+        assert isinstance(index.matrix, np.memmap)
+
+    def test_rows_are_normalised(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, _ = index_dir
+        index = MmapVectorIndex.load(path)
+        norms = np.linalg.norm(np.asarray(index.matrix), axis=1)
+        assert np.allclose(norms, 1.0, atol=1e-5)
+
+    def test_missing_index_raises(self, tmp_path: Path) -> None:
+        with pytest.raises(FileNotFoundError):
+            MmapVectorIndex.load(tmp_path / "nope")
+
+    def test_count_mismatch_raises(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="expected 5 rows"):
+            write_index(_rows(3), tmp_path / "index", count=5, dim=DIM)
+        assert not (tmp_path / "index").exists()
+
+    def test_rebuild_replaces_existing(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, _ = index_dir
+        write_index(_rows(10, seed=1), path, count=10, dim=DIM)
+        assert len(MmapVectorIndex.load(path)) == 10
+
+
+class TestSearch:
+    def test_matches_brute_force(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        query = rows[7]["embedding"]
+        results = index.search(query, top_k=5)
+        assert [hit.id for hit, _ in results] == _brute_force(rows, query, 5)
+        assert results[0][0].id == 8
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_scores_descending(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        results = MmapVectorIndex.load(path).search(rows[0]["embedding"], top_k=10)
+        scores = [s for _, s in results]
+        assert scores == sorted(scores, reverse=True)
+
+    @pytest.mark.parametrize("block_size", [1, 7, 16, 1000])
+    def test_blocked_equals_exact(
+        self, index_dir: tuple[Path, list[dict]], block_size: int
+    ) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        query = rows[3]["embedding"]
+        exact = [hit.id for hit, _ in index.search(query, top_k=6)]
+        blocked = [hit.id for hit, _ in index.search(query, top_k=6, block_size=block_size)]
+        assert blocked == exact
+
+    def test_sub_domain_filter(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        query = rows[0]["embedding"]
+        results = index.search(query, top_k=4, sub_domain="mixing", block_size=5)
+        assert all(hit.sub_domain == "mixing" for hit, _ in results)
+        assert [hit.id for hit, _ in results] == _brute_force(rows, query, 4, "mixing")
+
+    def test_unknown_sub_domain_returns_empty(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        assert index.search(rows[0]["embedding"], top_k=3, sub_domain="practice") == []
+
+    def test_top_k_larger_than_corpus(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        assert len(MmapVectorIndex.load(path).search(rows[0]["embedding"], top_k=500)) == 50
+
+    def test_hit_exposes_record_attributes(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        hit, _ = MmapVectorIndex.load(path).search(rows[5]["embedding"], top_k=1)[0]
+        assert hit.text == "chunk 5"
+        assert hit.source_name == "doc_1.md"
+        assert hit.chunk_index == 1
+
+    def test_fetch_embeddings_row_aligned(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        index = MmapVectorIndex.load(path)
+        matrix = index.fetch_embeddings([5, 1])
+        assert matrix.shape == (2, DIM)
+        assert np.allclose(matrix[0], index.matrix[4])
+        assert np.allclose(matrix[1], index.matrix[0])
+
+    def test_fetch_embeddings_unknown_id_raises(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, _ = index_dir
+        with pytest.raises(LookupError):
+            MmapVectorIndex.load(path).fetch_embeddings([999])
+
+    def test_invalid_top_k_raises(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, rows = index_dir
+        with pytest.raises(ValueError, match="top_k must be >= 1"):
+            MmapVectorIndex.load(path).search(rows[0]["embedding"], top_k=0)
+
+    def test_wrong_dimension_raises(self, index_dir: tuple[Path, list[dict]]) -> None:
+        path, _ = index_dir
+        with pytest.raises(ValueError, match="shape"):
+            MmapVectorIndex.load(path).search([0.1] * 3, top_k=1)
+
+
+# ---------------------------------------------------------------------------
+# Route fallback
+# ---------------------------------------------------------------------------
+
+
+def _fake_index() -> MagicMock:
+    hit = MagicMock()
+    hit.text = "Sidechain the bass to the kick."
+    hit.source_name = "local.md"
+    hit.source_path = "/data/local.md"
+    hit.chunk_index = 0
+    hit.token_start = 0
+    hit.token_end = 100
+    hit.page_number = None
+    index = MagicMock(spec=MmapVectorIndex)
+    index.search.return_value = [(hit, 0.91)]
+    return index
+
+
+class TestRouteFallback:
+    @pytest.fixture(autouse=True)
+    def _setup_and_teardown(self):
+        app.dependency_overrides.clear()
+        noop_cache = ResponseCache.__new__(ResponseCache)
+        noop_cache._client = None
+        noop_cache._ttl = 86400
+        app.dependency_overrides[get_response_cache] = lambda: noop_cache
+        noop_limiter = RateLimiter.__new__(RateLimiter)
+        noop_limiter._client = None
+        noop_limiter._max = 30
+        noop_limiter._window = 60
+        app.dependency_overrides[get_rate_limiter] = lambda: noop_limiter
+        noop_memory = MagicMock()
+        noop_memory.search_relevant.return_value = []
+        app.dependency_overrides[get_memory_store] = lambda: noop_memory
+        app.dependency_overrides[get_db] = lambda: MagicMock(spec=Session)
+        app.dependency_overrides[get_embedding_provider] = lambda: FakeEmbeddingProvider()
+        app.dependency_overrides[get_embedding_breaker] = lambda: CircuitBreaker(name="test-emb")
+        app.dependency_overrides[get_llm_breaker] = lambda: CircuitBreaker(name="test-llm")
+        yield
+        app.dependency_overrides.clear()
+
+    def test_search_falls_back_when_db_fails(self) -> None:
+        index = _fake_index()
+        app.dependency_overrides[get_vector_index] = lambda: index
+        with (
+            patch("api.routes.search.search_chunks", side_effect=RuntimeError("db down")),
+            TestClient(app) as c,
+        ):
+            resp = c.post("/search", json={"query": "sidechain", "min_score": 0.0})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["results"][0]["source_name"] == "local.md"
+        assert any("search_fallback_local_index" in w for w in data["warnings"])
+
+    def test_search_still_fails_without_index(self) -> None:
+        app.dependency_overrides[get_vector_index] = lambda: None
+        with (
+            patch("api.routes.search.search_chunks", side_effect=RuntimeError("db down")),
+            TestClient(app) as c,
+        ):
+            resp = c.post("/search", json={"query": "sidechain"})
+        assert resp.status_code == 500
+
+    def test_search_backend_mmap_skips_db(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("SEARCH_BACKEND", "mmap")
+        index = _fake_index()
+        app.dependency_overrides[get_vector_index] = lambda: index
+        with patch("api.routes.search.search_chunks") as mock_search, TestClient(app) as c:
+            resp = c.post("/search", json={"query": "sidechain", "min_score": 0.0})
+        assert resp.status_code == 200
+        mock_search.assert_not_called()
+        assert resp.json()["warnings"] == []
+
+    def test_ask_falls_back_when_db_fails(self) -> None:
+        index = _fake_index()
+        app.dependency_overrides[get_vector_index] = lambda: index
+        generator = MagicMock()
+        generator.generate.return_value = GenerationResponse(
+            content="Duck the bass [1].",
+            model="gpt-4o",
+            usage_input_tokens=10,
+            usage_output_tokens=5,
+        )
+        app.dependency_overrides[get_generation_provider] = lambda: generator
+        with (
+            patch("api.routes.ask.search_chunks", side_effect=RuntimeError("db down")),
+            patch("api.routes.ask.hybrid_search", side_effect=RuntimeError("db down")),
+            TestClient(app) as c,
+        ):
+            resp = c.post("/ask", json={"query": "hello there", "use_tools": False})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["sources"][0]["source_name"] == "local.md"
+        assert "search_fallback_local_index" in data["warnings"]